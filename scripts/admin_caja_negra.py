@@ -13,12 +13,14 @@ FUNCIONALIDADES:
 - 📋 Resúmenes por período y rendimiento
 - 🛠️ Mantenimiento automático de la caja negra
 - 📦 Integración completa con el sistema Trading Grid
+- 🗂️ Índice SQLite incremental (logs/index/) para búsquedas y reportes
 
 Autor: GitHub Copilot
 Fecha: Agosto 13, 2025
 """
 
 # Imports estándar
+import hashlib
 import json
 import sys
 from datetime import datetime, timedelta
@@ -26,14 +28,19 @@ from pathlib import Path
 from typing import Dict, List, Any
 from collections import Counter
 import re
-import shutil
+import sqlite3
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 # Añadir path del proyecto para imports
 current_file = Path(__file__)
 project_root = current_file.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.core.logger_manager import (
+    SEGMENT_NAME_RE, archive_log_file, read_log_segment
+)
+
 @dataclass
 class LogEntry:
     """Estructura de una entrada de log"""
@@ -68,6 +75,272 @@ class SystemHealth:
     disk_usage: Dict[str, int]
     performance_score: float
 
+def parse_log_line(line: str) -> Optional[Dict[str, Any]]:
+    """Extraer el JSON de una línea 'asctime | level | logger | {json}'"""
+    try:
+        if '|' in line and '{"timestamp"' in line:
+            json_part = line.split('|', 3)[-1].strip()
+            return json.loads(json_part)
+    except (json.JSONDecodeError, KeyError, IndexError):
+        pass
+    return None
+
+
+class LogIndexer:
+    """
+    Índice SQLite incremental de la caja negra
+    
+    Cada archivo *.log se ingiere una sola vez: se guarda el offset ya leído
+    y en cada actualización solo se parsean las líneas nuevas. Las consultas
+    por sesión, categoría, nivel y rango de fechas usan índices.
+    
+    Junto al offset se guarda la identidad del archivo (inode y hash de la
+    primera línea): si la rotación renombra el archivo activo y vuelve a crear
+    el mismo nombre, el archivo nuevo se reingiere desde el principio y sus
+    entradas antiguas se descartan (ya las aporta el segmento rotado).
+    """
+    
+    HEAD_BYTES = 4096
+    
+    def __init__(self, logs_path: Path, categories: List[str], index_path: Path = None):
+        self.logs_path = Path(logs_path)
+        self.categories = categories
+        self.index_path = Path(index_path) if index_path else self.logs_path / "index" / "caja_negra_index.db"
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.conn = sqlite3.connect(str(self.index_path))
+        self.conn.create_function("REGEXP", 2, self._regexp, deterministic=True)
+        self._regex_cache = {}
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Crear tablas e índices del índice de logs"""
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS log_files (
+                    file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT UNIQUE NOT NULL,
+                    category TEXT,
+                    offset INTEGER NOT NULL DEFAULT 0,
+                    inode INTEGER,
+                    head_hash TEXT
+                )
+            ''')
+            # Índices creados antes de guardar la identidad del archivo
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(log_files)")}
+            for column, sql_type in (("inode", "INTEGER"), ("head_hash", "TEXT")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE log_files ADD COLUMN {column} {sql_type}")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS log_entries (
+                    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id INTEGER NOT NULL,
+                    timestamp TEXT,
+                    session_id TEXT,
+                    category TEXT,
+                    level TEXT,
+                    message TEXT,
+                    metadata TEXT
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_session ON log_entries(session_id, timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_time ON log_entries(timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_cat_level ON log_entries(category, level, timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_file ON log_entries(file_id)")
+    
+    def _regexp(self, pattern: str, value: str) -> bool:
+        """Función REGEXP de SQLite (insensible a mayúsculas, como la búsqueda original)"""
+        regex = self._regex_cache.get(pattern)
+        if regex is None:
+            regex = self._regex_cache[pattern] = re.compile(pattern, re.IGNORECASE)
+        return value is not None and regex.search(value) is not None
+    
+    def update(self) -> Dict[str, int]:
+        """
+        Ingerir líneas nuevas de todos los archivos de log
+        
+        Returns:
+            Diccionario con archivos revisados y entradas nuevas
+        """
+        known = {row[0]: row[1:] for row in
+                 self.conn.execute("SELECT path, file_id, offset, inode, head_hash FROM log_files")}
+        seen = set()
+        new_entries = 0
+        
+        for category in self.categories:
+            category_path = self.logs_path / category
+            if not category_path.exists():
+                continue
+            for log_file in list(category_path.glob("*.log")) + list(category_path.glob("*.log.gz")):
+                path = str(log_file)
+                seen.add(path)
+                stat = log_file.stat()
+                size = stat.st_size
+                file_id, offset, inode, head_hash = known.get(path, (None, 0, None, None))
+                if log_file.suffix == '.gz':
+                    # Segmento comprimido: inmutable, se ingiere completo una sola vez
+                    if file_id is None or size != offset:
+                        new_entries += self._ingest_segment(log_file, category, file_id, size)
+                    continue
+                
+                identity = (stat.st_ino or None, self._head_hash(log_file))
+                replaced = file_id is not None and (
+                    size < offset or self._identity_changed((inode, head_hash), identity)
+                )
+                if file_id is not None and size == offset and not replaced:
+                    continue
+                new_entries += self._ingest_file(log_file, category, file_id, 0 if replaced else offset,
+                                                 identity, truncated=replaced)
+        
+        # Archivos movidos/eliminados (p. ej. por cleanup_and_archive)
+        removed = [(row[0],) for path, row in known.items() if path not in seen]
+        if removed:
+            with self.conn:
+                self.conn.executemany("DELETE FROM log_entries WHERE file_id = ?", removed)
+                self.conn.executemany("DELETE FROM log_files WHERE file_id = ?", removed)
+        
+        return {"files": len(seen), "new_entries": new_entries, "removed_files": len(removed)}
+    
+    def _head_hash(self, log_file: Path) -> Optional[str]:
+        """Hash de la primera línea completa (None si aún no hay ninguna)"""
+        with open(log_file, 'rb') as f:
+            head = f.read(self.HEAD_BYTES)
+        end = head.find(b'\n')
+        if end < 0:
+            return None
+        return hashlib.sha1(head[:end]).hexdigest()
+    
+    @staticmethod
+    def _identity_changed(stored: Tuple[Optional[int], Optional[str]],
+                          current: Tuple[Optional[int], Optional[str]]) -> bool:
+        """Si el archivo en la ruta ya no es el que se ingirió (rotación)"""
+        (stored_inode, stored_hash), (inode, head_hash) = stored, current
+        if stored_inode and inode and stored_inode != inode:
+            return True
+        return bool(stored_hash and head_hash and stored_hash != head_hash)
+    
+    def _ingest_file(self, log_file: Path, category: str, file_id: Optional[int],
+                     offset: int, identity: Tuple[Optional[int], Optional[str]],
+                     truncated: bool = False) -> int:
+        """Leer desde el offset guardado hasta la última línea completa"""
+        with open(log_file, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+        
+        end = chunk.rfind(b'\n') + 1
+        if end == 0 and not truncated:
+            return 0
+        
+        rows = []
+        for raw_line in chunk[:end].splitlines():
+            data = parse_log_line(raw_line.decode('utf-8', errors='replace'))
+            if data:
+                rows.append(self._entry_row(data))
+        
+        with self.conn:
+            if file_id is None:
+                file_id = self.conn.execute(
+                    "INSERT INTO log_files (path, category, offset) VALUES (?, ?, 0)", (str(log_file), category)
+                ).lastrowid
+            elif truncated:
+                self.conn.execute("DELETE FROM log_entries WHERE file_id = ?", (file_id,))
+            self.conn.executemany(
+                "INSERT INTO log_entries (file_id, timestamp, session_id, category, level, message, metadata) "
+                f"VALUES ({file_id}, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute("UPDATE log_files SET offset = ?, inode = ?, head_hash = ? WHERE file_id = ?",
+                              (offset + end, identity[0], identity[1], file_id))
+        
+        return len(rows)
+    
+    def _ingest_segment(self, segment: Path, category: str, file_id: Optional[int], size: int) -> int:
+        """Ingerir un segmento .log.gz completo"""
+        rows = [self._entry_row(data) for data in
+                (parse_log_line(line) for line in read_log_segment(segment)) if data]
+        with self.conn:
+            if file_id is None:
+                file_id = self.conn.execute(
+                    "INSERT INTO log_files (path, category, offset) VALUES (?, ?, 0)", (str(segment), category)
+                ).lastrowid
+            else:
+                self.conn.execute("DELETE FROM log_entries WHERE file_id = ?", (file_id,))
+            self.conn.executemany(
+                "INSERT INTO log_entries (file_id, timestamp, session_id, category, level, message, metadata) "
+                f"VALUES ({file_id}, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute("UPDATE log_files SET offset = ? WHERE file_id = ?", (size, file_id))
+        return len(rows)
+    
+    @staticmethod
+    def _entry_row(data: Dict[str, Any]) -> tuple:
+        return (
+            data.get("timestamp", ""), data.get("session_id", ""),
+            data.get("category", ""), data.get("level", ""),
+            data.get("message", ""), json.dumps(data.get("metadata", {}), ensure_ascii=False)
+        )
+    
+    def rebuild(self) -> Dict[str, int]:
+        """Borrar el índice y reingerir todos los archivos"""
+        with self.conn:
+            self.conn.execute("DELETE FROM log_entries")
+            self.conn.execute("DELETE FROM log_files")
+        return self.update()
+    
+    @staticmethod
+    def _normalize_bound(value: Optional[str]) -> Optional[str]:
+        """Fecha ISO parcial -> texto ISO completo comparable con timestamp"""
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '')).isoformat()
+    
+    def query(self, pattern: str = "", category: str = None, level: str = None,
+              session_id: str = None, start_date: str = None, end_date: str = None,
+              columns: str = "timestamp, session_id, category, level, message, metadata") -> List[tuple]:
+        """Consulta filtrada por índices; el patrón se evalúa solo sobre el mensaje"""
+        query = f"SELECT {columns} FROM log_entries WHERE 1 = 1"
+        params = []
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        if level:
+            query += " AND level = ?"
+            params.append(level)
+        if session_id:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        start = self._normalize_bound(start_date)
+        if start:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        end = self._normalize_bound(end_date)
+        if end:
+            query += " AND timestamp <= ?"
+            params.append(end)
+        if pattern:
+            query += " AND message REGEXP ?"
+            params.append(pattern)
+        query += " ORDER BY entry_id"
+        return self.conn.execute(query, params).fetchall()
+    
+    def sessions(self) -> List[str]:
+        """Session IDs únicos (más recientes primero)"""
+        cursor = self.conn.execute(
+            "SELECT DISTINCT session_id FROM log_entries WHERE session_id != '' ORDER BY session_id DESC"
+        )
+        return [row[0] for row in cursor]
+    
+    def session_summary(self, session_id: str) -> List[tuple]:
+        """(category, level, count, min_ts, max_ts) de una sesión"""
+        return self.conn.execute('''
+            SELECT category, level, COUNT(*), MIN(timestamp), MAX(timestamp)
+            FROM log_entries WHERE session_id = ?
+            GROUP BY category, level
+        ''', (session_id,)).fetchall()
+    
+    def close(self):
+        self.conn.close()
+
+
 class BlackBoxAdmin:
     """Administrador completo de la caja negra del Trading Grid"""
     
@@ -93,6 +366,16 @@ class BlackBoxAdmin:
             "trading": [r"order", r"position", r"trade", r"fill"],
             "connections": [r"connect", r"disconnect", r"network", r"mt5"]
         }
+        
+        self._indexer = None
+    
+    @property
+    def indexer(self) -> LogIndexer:
+        """Índice de logs, actualizado incrementalmente en cada acceso"""
+        if self._indexer is None:
+            self._indexer = LogIndexer(self.logs_path, self.categories)
+        self._indexer.update()
+        return self._indexer
     
     def print_header(self, title: str, width: int = 80):
         """Imprimir header formateado"""
@@ -107,69 +390,38 @@ class BlackBoxAdmin:
     
     def parse_log_entry(self, line: str) -> LogEntry:
         """Parsear una línea de log en LogEntry"""
-        try:
-            # Buscar el JSON en la línea
-            if '|' in line and '{"timestamp"' in line:
-                json_part = line.split('|', 3)[-1].strip()
-                data = json.loads(json_part)
-                
-                return LogEntry(
-                    timestamp=data.get("timestamp", ""),
-                    session_id=data.get("session_id", ""),
-                    category=data.get("category", ""),
-                    level=data.get("level", ""),
-                    message=data.get("message", ""),
-                    metadata=data.get("metadata", {})
-                )
-        except (json.JSONDecodeError, KeyError, IndexError):
-            pass
-        return None
+        data = parse_log_line(line)
+        if data is None:
+            return None
+        return LogEntry(
+            timestamp=data.get("timestamp", ""),
+            session_id=data.get("session_id", ""),
+            category=data.get("category", ""),
+            level=data.get("level", ""),
+            message=data.get("message", ""),
+            metadata=data.get("metadata", {})
+        )
     
     def get_all_sessions(self) -> List[str]:
         """Obtener todos los session_ids únicos"""
-        sessions = set()
-        
-        for category in self.categories:
-            category_path = self.logs_path / category
-            if category_path.exists():
-                for log_file in category_path.glob("*.log"):
-                    try:
-                        with open(log_file, 'r', encoding='utf-8') as f:
-                            for line in f:
-                                entry = self.parse_log_entry(line)
-                                if entry and entry.session_id:
-                                    sessions.add(entry.session_id)
-                    except Exception:
-                        continue
-        
-        return sorted(list(sessions), reverse=True)
+        return self.indexer.sessions()
     
     def analyze_session_complete(self, session_id: str) -> SessionStats:
         """Análisis completo de una sesión específica"""
-        entries = []
+        summary = self.indexer.session_summary(session_id)
+        if not summary:
+            return None
+        
         categories = set()
         level_counts = Counter()
-        
-        for category in self.categories:
-            category_path = self.logs_path / category
-            if category_path.exists():
-                for log_file in category_path.glob("*.log"):
-                    try:
-                        with open(log_file, 'r', encoding='utf-8') as f:
-                            for line in f:
-                                entry = self.parse_log_entry(line)
-                                if entry and entry.session_id == session_id:
-                                    entries.append(entry)
-                                    categories.add(entry.category)
-                                    level_counts[entry.level] += 1
-                    except Exception:
-                        continue
-        
-        if not entries:
-            return None
+        timestamps = []
+        for category, level, count, min_ts, max_ts in summary:
+            categories.add(category)
+            level_counts[level] += count
+            timestamps.extend([min_ts, max_ts])
         
         # Calcular tiempos
-        timestamps = [datetime.fromisoformat(entry.timestamp.replace('Z', '+00:00').replace('+00:00', '')) for entry in entries]
+        timestamps = [datetime.fromisoformat(ts.replace('Z', '+00:00').replace('+00:00', '')) for ts in timestamps]
         start_time = min(timestamps)
         end_time = max(timestamps)
         duration = end_time - start_time
@@ -180,7 +432,7 @@ class BlackBoxAdmin:
             end_time=end_time,
             duration=duration,
             categories=list(categories),
-            total_logs=len(entries),
+            total_logs=sum(level_counts.values()),
             level_counts=dict(level_counts),
             error_count=level_counts.get('ERROR', 0) + level_counts.get('CRITICAL', 0),
             warning_count=level_counts.get('WARNING', 0),
@@ -200,7 +452,7 @@ class BlackBoxAdmin:
         for category in self.categories:
             category_path = self.logs_path / category
             if category_path.exists():
-                files = list(category_path.glob("*.log"))
+                files = list(category_path.glob("*.log")) + list(category_path.glob("*.log.gz"))
                 if files:
                     active_categories.append(category)
                     category_size = sum(f.stat().st_size for f in files)
@@ -240,51 +492,16 @@ class BlackBoxAdmin:
                            session_id: str = None,
                            start_date: str = None,
                            end_date: str = None) -> List[LogEntry]:
-        """Búsqueda avanzada en logs"""
-        results = []
-        pattern_regex = re.compile(pattern, re.IGNORECASE)
-        
-        # Filtros de fecha
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
-        
-        categories_to_search = [category] if category else self.categories
-        
-        for cat in categories_to_search:
-            category_path = self.logs_path / cat
-            if category_path.exists():
-                for log_file in category_path.glob("*.log"):
-                    try:
-                        with open(log_file, 'r', encoding='utf-8') as f:
-                            for line in f:
-                                entry = self.parse_log_entry(line)
-                                if not entry:
-                                    continue
-                                
-                                # Aplicar filtros
-                                if level and entry.level != level:
-                                    continue
-                                if session_id and entry.session_id != session_id:
-                                    continue
-                                
-                                # Filtro de fecha
-                                if start_dt or end_dt:
-                                    try:
-                                        entry_dt = datetime.fromisoformat(entry.timestamp.replace('Z', '+00:00').replace('+00:00', ''))
-                                        if start_dt and entry_dt < start_dt:
-                                            continue
-                                        if end_dt and entry_dt > end_dt:
-                                            continue
-                                    except:
-                                        continue
-                                
-                                # Buscar patrón en mensaje
-                                if pattern_regex.search(entry.message):
-                                    results.append(entry)
-                    except Exception:
-                        continue
-        
-        return results
+        """Búsqueda avanzada en logs (consulta indexada)"""
+        rows = self.indexer.query(pattern, category=category, level=level, session_id=session_id,
+                                  start_date=start_date, end_date=end_date)
+        return [
+            LogEntry(
+                timestamp=timestamp, session_id=session, category=cat, level=lvl,
+                message=message, metadata=json.loads(metadata) if metadata else {}
+            )
+            for timestamp, session, cat, lvl, message, metadata in rows
+        ]
     
     def generate_daily_report(self, date: str = None) -> Dict[str, Any]:
         """Generar reporte diario del sistema"""
@@ -302,39 +519,41 @@ class BlackBoxAdmin:
             "trading_activity": []
         }
         
-        # Analizar logs del día
+        # Analizar logs del día (rango de timestamps indexado)
+        start_date = f"{date}T00:00:00"
+        end_date = f"{date}T23:59:59.999999"
+        indexer = self.indexer
+        
         for category in self.categories:
-            log_file = self.logs_path / category / f"{category}_{date_pattern}.log"
-            if log_file.exists():
+            day_files = [f for f in (self.logs_path / category).glob(f"{category}_{date_pattern}*")
+                         if SEGMENT_NAME_RE.match(f.name)]
+            if day_files:
                 category_stats = {
-                    "file_size": log_file.stat().st_size,
+                    "file_size": sum(f.stat().st_size for f in day_files),
                     "log_count": 0,
                     "levels": Counter(),
                     "sessions": set()
                 }
                 
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            entry = self.parse_log_entry(line)
-                            if entry:
-                                category_stats["log_count"] += 1
-                                category_stats["levels"][entry.level] += 1
-                                category_stats["sessions"].add(entry.session_id)
-                                
-                                # Detectar eventos críticos
-                                for pattern_type, patterns in self.critical_patterns.items():
-                                    for pattern in patterns:
-                                        if re.search(pattern, entry.message, re.IGNORECASE):
-                                            daily_stats["critical_events"].append({
-                                                "type": pattern_type,
-                                                "timestamp": entry.timestamp,
-                                                "category": entry.category,
-                                                "message": entry.message[:100]
-                                            })
+                rows = indexer.query(category=category, start_date=start_date, end_date=end_date,
+                                     columns="level, session_id")
+                for level, session in rows:
+                    category_stats["log_count"] += 1
+                    category_stats["levels"][level] += 1
+                    category_stats["sessions"].add(session)
                 
-                except Exception:
-                    continue
+                # Detectar eventos críticos
+                for pattern_type, patterns in self.critical_patterns.items():
+                    for pattern in patterns:
+                        matches = indexer.query(pattern, category=category, start_date=start_date,
+                                                end_date=end_date, columns="timestamp, category, message")
+                        for timestamp, cat, message in matches:
+                            daily_stats["critical_events"].append({
+                                "type": pattern_type,
+                                "timestamp": timestamp,
+                                "category": cat,
+                                "message": message[:100]
+                            })
                 
                 category_stats["sessions"] = list(category_stats["sessions"])
                 daily_stats["categories"][category] = category_stats
@@ -363,27 +582,21 @@ class BlackBoxAdmin:
             if not category_path.exists():
                 continue
             
-            for log_file in category_path.glob("*.log"):
+            for log_file in list(category_path.glob("*.log")) + list(category_path.glob("*.log.gz")):
                 mod_time = datetime.fromtimestamp(log_file.stat().st_mtime)
                 if mod_time < cutoff_date:
-                    # Crear estructura de archivo por año/mes
-                    archive_month = archive_base / mod_time.strftime("%Y") / mod_time.strftime("%m")
-                    archive_month.mkdir(parents=True, exist_ok=True)
-                    
-                    # Mover archivo
-                    new_path = archive_month / log_file.name
                     file_size = log_file.stat().st_size
                     
-                    shutil.move(str(log_file), str(new_path))
+                    # Segmentos .gz se mueven con su sidecar; los planos se comprimen en streaming
+                    archive_log_file(log_file, archive_base, compress=compress)
                     
                     moved_files += 1
                     total_size_archived += file_size
                     
-                    # Extraer session_id
-                    filename = log_file.name
-                    if "_" in filename:
-                        session_id = filename.split("_", 1)[1].replace(".log", "")
-                        archived_sessions.add(session_id)
+                    # Extraer fecha del archivo (categoria_YYYYMMDD[_NNNN])
+                    match = SEGMENT_NAME_RE.match(log_file.name)
+                    if match:
+                        archived_sessions.add(match.group("date"))
         
         print(f"✅ Archivado completado:")
         print(f"   • {moved_files} archivos movidos")
@@ -396,6 +609,39 @@ class BlackBoxAdmin:
             "size_freed": total_size_archived
         }
     
+    def read_time_window(self, start: str, end: str, category: str = None,
+                         include_archive: bool = True) -> List[LogEntry]:
+        """
+        Leer logs de una ventana de tiempo, incluidos segmentos comprimidos
+        
+        Usa el sidecar .idx de cada segmento para descartar archivos completos
+        y descomprimir solo los bloques que se solapan con la ventana.
+        """
+        categories = [category] if category else self.categories
+        segments = []
+        for cat in categories:
+            category_path = self.logs_path / cat
+            if category_path.exists():
+                segments.extend(category_path.glob(f"{cat}_*.log*"))
+            if include_archive:
+                segments.extend((self.logs_path / "archive").glob(f"*/*/{cat}_*.log*"))
+        
+        start_day = datetime.fromisoformat(start).strftime("%Y%m%d")
+        end_day = datetime.fromisoformat(end).strftime("%Y%m%d")
+        
+        entries = []
+        for segment in sorted(segments):
+            match = SEGMENT_NAME_RE.match(segment.name)
+            if not match or not (start_day <= match.group("date") <= end_day):
+                continue
+            for line in read_log_segment(segment, start, end):
+                entry = self.parse_log_entry(line)
+                if entry:
+                    entries.append(entry)
+        
+        entries.sort(key=lambda entry: entry.timestamp)
+        return entries
+    
     def display_overview(self):
         """Mostrar resumen completo del sistema"""
         self.print_header("🗃️ ADMINISTRADOR CAJA NEGRA TRADING GRID")
@@ -495,6 +741,8 @@ def main():
         print("  search <patrón>       - Búsqueda avanzada en logs")
         print("  cleanup [días]        - Limpiar logs antiguos")
         print("  archive [días]        - Archivar logs antiguos")
+        print("  reindex               - Reconstruir el índice de logs")
+        print("  window <inicio> <fin> - Logs de una ventana de tiempo (incluye archivo)")
         print()
         print("COMANDOS DE BÚSQUEDA:")
         print("  errors [sesión]       - Buscar errores")
@@ -565,6 +813,18 @@ def main():
             result = admin.cleanup_and_archive(days)
             print(f"Limpieza completada: {result['files_moved']} archivos archivados")
         
+        elif command == "reindex":
+            result = admin.indexer.rebuild()
+            print(f"Índice reconstruido: {result['new_entries']} entradas de {result['files']} archivos")
+        
+        elif command == "window" and len(sys.argv) > 3:
+            category = sys.argv[4] if len(sys.argv) > 4 else None
+            entries = admin.read_time_window(sys.argv[2], sys.argv[3], category)
+            admin.print_header(f"🕒 VENTANA {sys.argv[2]} → {sys.argv[3]}")
+            print(f"Encontrados {len(entries)} registros")
+            for entry in entries[:50]:
+                print(f"[{entry.timestamp}] {entry.category}/{entry.level}: {entry.message[:80]}")
+        
         elif command == "errors":
             session_id = sys.argv[2] if len(sys.argv) > 2 else None
             errors = admin.search_logs_advanced("", level="ERROR", session_id=session_id)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARK - TIEMPO DE IMPORTACIÓN Y ARRANQUE
+===============================================
+Mide con `python -X importtime` lo que cuesta importar los puntos de entrada
+del sistema y falla (código de salida 1) si alguno supera su presupuesto.
+Con --startup mide además el arranque en frío de TradingGridSystemAdvanced
+hasta tener el core inicializado (listo para el primer tick).
+
+Uso:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --budget trading_grid_system=400 --top 20
+    python scripts/benchmark_import_time.py --startup
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.lazy_loader import measure_import_time
+
+# Presupuestos por módulo (ms, mejor de N ejecuciones en intérprete limpio)
+DEFAULT_BUDGETS_MS = {
+    "src": 150.0,
+    "src.core.common_imports": 250.0,
+    "trading_grid_system": 500.0,
+}
+
+STARTUP_BUDGET_MS = 1000.0
+
+STARTUP_SNIPPET = """
+import asyncio, time
+started = time.perf_counter()
+import trading_grid_system
+system = trading_grid_system.TradingGridSystemAdvanced()
+asyncio.run(system.initialize_system())
+print(f"STARTUP_MS={(time.perf_counter() - started) * 1000:.1f}")
+"""
+
+
+def measure_startup(repeat: int) -> float:
+    """Mejor tiempo de arranque en frío (import + initialize_system) en ms"""
+    best = float("inf")
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=str(PROJECT_ROOT),
+                                 capture_output=True, text=True, timeout=300)
+        for line in process.stdout.splitlines():
+            if line.startswith("STARTUP_MS="):
+                best = min(best, float(line.split("=", 1)[1]))
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de importación")
+    parser.add_argument("modules", nargs="*", help="Módulos a medir (por defecto los puntos de entrada)")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULO=MS",
+                        help="Presupuesto en ms para un módulo (repetible)")
+    parser.add_argument("--repeat", type=int, default=3, help="Ejecuciones por módulo (se toma la mejor)")
+    parser.add_argument("--top", type=int, default=10, help="Módulos más costosos a listar")
+    parser.add_argument("--startup", action="store_true", help="Medir también el arranque en frío")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        module, _, value = item.partition("=")
+        budgets[module] = float(value)
+    modules = args.modules or list(DEFAULT_BUDGETS_MS)
+
+    failures = []
+    print("⏱️ Tiempo de importación (-X importtime)")
+    print("=" * 60)
+    for module in modules:
+        runs = [measure_import_time(module, cwd=PROJECT_ROOT, top=args.top) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["total_ms"])
+        budget = budgets.get(module)
+        over = not best["ok"] or (budget is not None and best["total_ms"] > budget)
+        icon = "❌" if over else "✅"
+        limit = f" / presupuesto {budget:.0f} ms" if budget is not None else ""
+        print(f"{icon} {module}: {best['total_ms']:.1f} ms{limit} ({best['modules_imported']} módulos)")
+        if not best["ok"]:
+            print(f"   🚨 Error al importar: {best['error']}")
+        for row in best["slowest"]:
+            print(f"   {row['self_ms']:8.1f} ms  {row['module']}")
+        if over:
+            failures.append(module)
+
+    if args.startup:
+        started = time.perf_counter()
+        startup_ms = measure_startup(args.repeat)
+        over = startup_ms > STARTUP_BUDGET_MS
+        print("=" * 60)
+        print(f"{'❌' if over else '✅'} Arranque en frío: {startup_ms:.1f} ms / presupuesto {STARTUP_BUDGET_MS:.0f} ms"
+              f" (medido en {time.perf_counter() - started:.1f} s)")
+        if over:
+            failures.append("startup")
+
+    print("=" * 60)
+    if failures:
+        print(f"⚠️ Fuera de presupuesto: {', '.join(failures)}")
+        return 1
+    print("🚀 Todos los tiempos dentro de presupuesto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
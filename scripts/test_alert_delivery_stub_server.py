@@ -0,0 +1,182 @@
+"""
+🧪 TEST OFFLINE - ENTREGA DE ALERTAS CONTRA UN SERVIDOR STUB
+============================================================
+
+Levanta un servidor HTTP local que responde con los códigos que pide cada
+escenario y ejecuta AlertDelivery / HttpSessionPool / AlertEventBus contra él:
+
+- 2xx se entrega sin pasar por la cola de reintentos
+- 4xx (salvo 408/429) queda como 'dead' sin reintentos
+- 429 se reintenta con backoff y sale en cuanto el servidor acepta
+- Un POST que el servidor recibió pero no respondió no se repite
+- El digest pendiente (ventana de 30 s) se envía al parar el bus
+
+Uso:
+    python scripts/test_alert_delivery_stub_server.py
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.alert_delivery import AlertDelivery, HttpSessionPool, PermanentDeliveryError, RetryQueue, \
+    is_retryable_status
+from src.core.event_bus import AlertEventBus
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Responde con el siguiente código de la lista del servidor (o 'drop')"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.received.append(json.loads(body))
+        status = self.server.responses.pop(0) if self.server.responses else 204
+        if status == 'drop':
+            # Petición procesada pero la conexión se corta antes de responder
+            self.close_connection = True
+            self.connection.close()
+            return
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Servidor HTTP en un hilo con respuestas programables"""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.received = []
+        self.httpd.responses = []
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/hook"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def program(self, *responses):
+        self.httpd.received.clear()
+        self.httpd.responses[:] = list(responses)
+
+    @property
+    def received(self):
+        return self.httpd.received
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class AlertDeliveryStubTest:
+    """🧪 Escenarios de entrega contra el servidor stub"""
+
+    def __init__(self):
+        self.server = StubServer()
+        self.pool = HttpSessionPool(timeout=2.0)
+        self.queue = RetryQueue(':memory:', base_delay=0.05, max_delay=0.2)
+        self.failures = []
+
+    def check(self, condition: bool, description: str):
+        print(f"{'✅' if condition else '❌'} {description}")
+        if not condition:
+            self.failures.append(description)
+
+    async def post(self, payload) -> bool:
+        status = await self.pool.post_json(self.server.url, payload)
+        if 200 <= status < 300:
+            return True
+        if not is_retryable_status(status):
+            raise PermanentDeliveryError(f"stub respondió {status}", status)
+        return False
+
+    def delivery(self, key: str, digest_window: float = 0.0) -> AlertDelivery:
+        return AlertDelivery(key, self.post, format_single=lambda alert: {'alert': alert},
+                             format_digest=lambda alerts: {'digest': alerts}, retry_queue=self.queue,
+                             digest_window=digest_window, retry_interval=0.05)
+
+    async def test_success(self):
+        print("\n📬 2xx")
+        self.server.program(204)
+        ok = await self.delivery("ok").deliver("a1")
+        self.check(ok and len(self.server.received) == 1, "Entregada con un solo POST")
+        self.check(self.queue.pending_count("ok") == 0, "Nada en la cola de reintentos")
+
+    async def test_rejected(self):
+        print("\n🚫 4xx definitivo")
+        self.server.program(400, 204)
+        delivery = self.delivery("bad")
+        ok = await delivery.deliver("a2")
+        await asyncio.sleep(0.3)
+        self.check(not ok and len(self.server.received) == 1, "Un único POST para un 400")
+        self.check(self.queue.pending_count("bad") == 0 and delivery.stats['rejected'] == 1,
+                   "El 400 queda como 'dead', sin reintentos pendientes")
+
+    async def test_rate_limited(self):
+        print("\n⏳ 429")
+        self.server.program(429, 204)
+        delivery = self.delivery("slow")
+        ok = await delivery.deliver("a3")
+        self.check(not ok and self.queue.pending_count("slow") == 1, "El 429 queda en la cola")
+        for _ in range(40):
+            if not self.queue.pending_count("slow"):
+                break
+            await asyncio.sleep(0.05)
+        self.check(self.queue.pending_count("slow") == 0 and len(self.server.received) == 2,
+                   "El reintento sale en cuanto el servidor acepta")
+
+    def test_no_duplicate_post(self):
+        print("\n🔁 POST sin respuesta")
+        self.server.program('drop', 204)
+        try:
+            self.pool._post_blocking(self.server.url, b'{"alert": "a4"}')
+            raised = False
+        except Exception:
+            raised = True
+        self.check(raised and len(self.server.received) == 1,
+                   f"El POST recibido no se repite ({len(self.server.received)} recibidos)")
+
+    def test_digest_flushed_on_stop(self):
+        print("\n🛑 Digest pendiente al parar el bus")
+        self.server.program(204)
+        bus = AlertEventBus()
+        delivery = self.delivery("digest", digest_window=30.0)
+        bus.register_channel("stub.digest", delivery.deliver)
+        bus.add_shutdown_hook(delivery.close)
+        bus.start()
+        for name in ("d1", "d2", "d3"):
+            bus.publish(name, 'MEDIUM').result(timeout=5)
+        self.check(not self.server.received, "Las alertas esperan a la ventana del digest")
+        bus.stop()
+        self.check([p.get('digest') for p in self.server.received] == [["d1", "d2", "d3"]],
+                   "Al parar se envía un único digest con las tres alertas")
+
+    def run(self) -> bool:
+        print("🧪 TEST OFFLINE - ENTREGA DE ALERTAS")
+        print("=" * 60)
+        try:
+            asyncio.run(self.test_success())
+            asyncio.run(self.test_rejected())
+            asyncio.run(self.test_rate_limited())
+            self.test_no_duplicate_post()
+            self.test_digest_flushed_on_stop()
+        finally:
+            self.server.close()
+            self.queue.close()
+
+        print("\n" + "=" * 60)
+        if self.failures:
+            print(f"❌ {len(self.failures)} comprobaciones fallidas")
+            return False
+        print("🎯 Entrega de alertas correcta")
+        return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if AlertDeliveryStubTest().run() else 1)
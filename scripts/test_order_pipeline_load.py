@@ -0,0 +1,137 @@
+"""
+🧪 TEST OFFLINE - CARGA DEL PIPELINE DE ÓRDENES
+===============================================
+
+Ejecuta el OrderExecutor contra un SimulatedTerminal con 50 ms de latencia
+por ``order_send`` (sin MT5) y mide el flujo de señales:
+
+- 40 señales de 4 símbolos vía process_signal_async frente al envío
+  secuencial de process_signal
+- Orden FIFO por símbolo y concurrencia limitada por los workers
+- Una señal repetida no genera un segundo order_send
+- Un símbolo desconocido no llega al terminal
+
+Uso:
+    python scripts/test_order_pipeline_load.py
+"""
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.logger_manager import LoggerManager
+from src.core.live_trading.order_executor import OrderExecutor, OrderStatus
+from src.core.live_trading.simulated_terminal import SimulatedTerminal
+from src.core.real_time.strategy_engine import SignalStrength, TradingSignal
+
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY", "AUDUSD")
+SIGNALS_PER_SYMBOL = 10
+SEND_LATENCY = 0.05
+WORKERS = 4               # execution_config['pipeline_workers'] por defecto
+
+
+def make_signal(symbol: str, index: int, base_time: datetime) -> TradingSignal:
+    return TradingSignal(symbol=symbol, timeframe="M5", signal_type="BUY" if index % 2 == 0 else "SELL",
+                         strength=SignalStrength.STRONG, price=1.1 + index * 0.0001,
+                         timestamp=base_time + timedelta(minutes=index), confidence=0.8, source="load_test")
+
+
+class OrderPipelineLoadTest:
+    """🧪 Throughput y garantías del pipeline contra el terminal simulado"""
+
+    def __init__(self):
+        self._log_dir = tempfile.TemporaryDirectory()
+        self.logger = LoggerManager(base_path=self._log_dir.name, async_mode=False)
+        self.failures = []
+
+    def check(self, condition: bool, description: str):
+        print(f"{'✅' if condition else '❌'} {description}")
+        if not condition:
+            self.failures.append(description)
+
+    def new_executor(self):
+        terminal = SimulatedTerminal(latency=SEND_LATENCY)
+        for symbol in SYMBOLS:
+            terminal.set_quote(symbol, bid=1.10000, ask=1.10010)
+        executor = OrderExecutor(logger_manager=self.logger, terminal=terminal)
+        self.check(executor.initialize_executor(), "Ejecutor activo con el terminal inyectado")
+        return executor, terminal
+
+    def signals(self, base_time: datetime):
+        # Intercaladas por símbolo, como llegan del StrategyEngine
+        return [make_signal(symbol, i, base_time) for i in range(SIGNALS_PER_SYMBOL) for symbol in SYMBOLS]
+
+    def test_sequential_baseline(self) -> float:
+        print("\n🐢 Envío secuencial (process_signal)")
+        executor, terminal = self.new_executor()
+        signals = self.signals(datetime(2025, 8, 1, 10, 0))
+        started = time.perf_counter()
+        executed = sum(executor.process_signal(signal) for signal in signals)
+        elapsed = time.perf_counter() - started
+        self.check(executed == len(signals), f"{executed}/{len(signals)} ejecutadas en {elapsed:.2f} s")
+        self.check(terminal.call_counts.get('order_send') == len(signals), "process_signal envía por el pipeline")
+        executor.cleanup()
+        return elapsed
+
+    def test_pipeline_throughput(self, baseline: float):
+        print("\n🚀 Pipeline asíncrono (process_signal_async)")
+        executor, terminal = self.new_executor()
+        signals = self.signals(datetime(2025, 8, 2, 10, 0))
+        started = time.perf_counter()
+        futures = [executor.process_signal_async(signal) for signal in signals]
+        results = [future.result(timeout=30) for future in futures if future is not None]
+        elapsed = time.perf_counter() - started
+
+        executed = sum(1 for r in results if r and r.status == OrderStatus.EXECUTED)
+        self.check(executed == len(signals), f"{executed}/{len(signals)} ejecutadas en {elapsed:.2f} s")
+        speedup = baseline / elapsed if elapsed else 0.0
+        self.check(speedup >= 2.5, f"Throughput x{speedup:.1f} frente al envío secuencial ({baseline:.2f} s)")
+        self.check(2 <= terminal.max_observed_concurrency <= WORKERS,
+                   f"Concurrencia máxima en el terminal: {terminal.max_observed_concurrency} (límite {WORKERS})")
+
+        fifo = all(
+            [r.price for r in results if r.symbol == symbol] ==
+            [s.price for s in signals if s.symbol == symbol]
+            for symbol in SYMBOLS
+        )
+        self.check(fifo, "Las órdenes de cada símbolo se ejecutan en el orden de las señales")
+
+        sends = terminal.call_counts.get('order_send', 0)
+        again = executor.process_signal_async(signals[0])
+        self.check(again is futures[0] and terminal.call_counts.get('order_send', 0) == sends,
+                   "Una señal repetida devuelve el mismo Future sin otro order_send")
+
+        unknown = make_signal("XAUUSD", 0, datetime(2025, 8, 2, 10, 0))
+        self.check(executor.process_signal_async(unknown) is None and
+                   terminal.call_counts.get('order_send', 0) == sends,
+                   "Un símbolo desconocido se descarta antes de llegar al terminal")
+
+        latency = executor.get_execution_status()['pipeline']['latency']
+        print(f"   📊 Latencia submit→ack: p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms, "
+              f"p99 {latency['p99_ms']:.0f} ms ({latency['count']} órdenes)")
+        executor.cleanup()
+
+    def run(self) -> bool:
+        print("🧪 TEST OFFLINE - CARGA DEL PIPELINE DE ÓRDENES")
+        print("=" * 60)
+        try:
+            baseline = self.test_sequential_baseline()
+            self.test_pipeline_throughput(baseline)
+        finally:
+            self._log_dir.cleanup()
+
+        print("\n" + "=" * 60)
+        if self.failures:
+            print(f"❌ {len(self.failures)} comprobaciones fallidas")
+            return False
+        print("🎯 Pipeline de órdenes correcto bajo carga")
+        return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if OrderPipelineLoadTest().run() else 1)
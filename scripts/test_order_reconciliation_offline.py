@@ -0,0 +1,158 @@
+"""
+🧪 TEST OFFLINE - CONCILIACIÓN DE ÓRDENES LÍMITE FVG
+====================================================
+
+Ejecuta el EnhancedOrderExecutor contra un SimulatedTerminal, sin MT5:
+
+- Servidor con 3 h de desfase respecto al reloj local
+- Historial de deals con 30 s de retraso respecto al libro de órdenes
+- Órdenes que se llenan, se cancelan fuera del sistema y expiran
+
+Comprueba que todas las consultas pasan por el terminal inyectado, que las
+expiraciones van en hora del servidor y que una orden llenada cuyo deal
+aún no aparece no se da por cancelada.
+
+Uso:
+    python scripts/test_order_reconciliation_offline.py
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.logger_manager import LoggerManager
+from src.core.live_trading.enhanced_order_executor import EnhancedOrderExecutor
+from src.core.live_trading.order_reconciler import OrderTransition
+from src.core.live_trading.simulated_terminal import SimulatedTerminal
+
+SERVER_OFFSET = timedelta(hours=3)
+DEAL_DELAY = timedelta(seconds=30)
+
+
+class ServerClock:
+    """Hora del servidor simulada: reloj local + desfase + avance manual"""
+
+    def __init__(self, offset: timedelta):
+        self.offset = offset
+
+    def __call__(self) -> datetime:
+        return datetime.now() + self.offset
+
+    def advance(self, seconds: float):
+        self.offset += timedelta(seconds=seconds)
+
+
+class OfflineReconciliationTest:
+    """🧪 Escenarios de conciliación contra el terminal simulado"""
+
+    def __init__(self):
+        self.clock = ServerClock(SERVER_OFFSET)
+        self.terminal = SimulatedTerminal(clock=self.clock, deal_delay=DEAL_DELAY)
+        self.terminal.set_quote("EURUSD", bid=1.10000, ask=1.10010)
+
+        self._log_dir = tempfile.TemporaryDirectory()
+        logger = LoggerManager(base_path=self._log_dir.name, async_mode=False)
+        self.executor = EnhancedOrderExecutor(logger_manager=logger, fvg_detector=object(),
+                                              terminal=self.terminal)
+        self.executor.is_active = True
+        self.failures = []
+
+    def check(self, condition: bool, description: str):
+        print(f"{'✅' if condition else '❌'} {description}")
+        if not condition:
+            self.failures.append(description)
+
+    def advance(self, seconds: float):
+        """Avanzar el servidor; el ejecutor lo ve en el siguiente tick"""
+        self.clock.advance(seconds)
+        self.executor._observe_server_time(self.terminal.symbol_info_tick("EURUSD"))
+
+    def place_order(self) -> int:
+        fvg = SimpleNamespace(symbol="EURUSD", type="BULLISH", timeframe="M15", status="ACTIVE",
+                              gap_low=1.09950, gap_high=1.09990, gap_size=0.00040)
+        before = set(self.executor.active_fvg_orders)
+        placed = self.executor.process_fvg_signal(fvg)
+        new = set(self.executor.active_fvg_orders) - before
+        self.check(placed and len(new) == 1, "Orden límite colocada en el terminal simulado")
+        return new.pop() if new else 0
+
+    def test_server_time(self, ticket: int):
+        print("\n🕒 Hora del servidor")
+        drift = abs((self.executor.server_now() - self.clock()).total_seconds())
+        self.check(drift < 2, f"server_now sigue al servidor (+3 h), desfase {drift:.2f} s")
+        order = self.terminal.orders_get(ticket=ticket)[0]
+        expiry = self.executor.active_fvg_orders[ticket].expiry_time
+        self.check(abs((order.time_expiration - expiry).total_seconds()) < 1,
+                   "La expiración enviada coincide con la del libro local (hora del servidor)")
+        self.check(order.time_expiration > self.clock() + timedelta(hours=20),
+                   "La expiración queda en el futuro del servidor")
+
+    def test_lagging_fill(self, ticket: int):
+        print("\n⏳ Deal con retraso en el historial")
+        self.terminal.fill_order(ticket)
+        self.terminal.reset_call_counts()
+        events = self.executor.monitor_active_orders()
+        calls = sum(self.terminal.call_counts.values())
+        self.check(calls == 2, f"Una pasada con 3 órdenes hace {calls} llamadas al terminal (orders + deals)")
+        self.check(not events and ticket in self.executor.active_fvg_orders,
+                   "Sin deal visible todavía: la orden queda sin confirmar")
+        self.advance(DEAL_DELAY.total_seconds() + 1)
+        events = self.executor.monitor_active_orders()
+        self.check([e.transition for e in events] == [OrderTransition.FILLED],
+                   "Al aparecer el deal la orden se concilia como FILLED, no CANCELLED")
+
+    def test_external_cancel(self, ticket: int):
+        print("\n🚫 Cancelación fuera del sistema")
+        self.terminal.cancel_order(ticket)
+        self.check(not self.executor.monitor_active_orders(), "Primera pasada: pendiente de confirmar")
+        self.advance(self.executor.order_reconciler.confirm_after.total_seconds() + 1)
+        events = self.executor.monitor_active_orders()
+        self.check([e.transition for e in events] == [OrderTransition.CANCELLED],
+                   "Confirmada sin deals: CANCELLED")
+
+    def test_expiry(self, ticket: int):
+        print("\n⏰ Expiración")
+        expiry = self.executor.active_fvg_orders[ticket].expiry_time
+        self.advance((expiry - self.clock()).total_seconds() + 1)
+        self.terminal.expire_orders()
+        self.executor.monitor_active_orders()
+        self.advance(self.executor.order_reconciler.confirm_after.total_seconds() + 1)
+        events = self.executor.monitor_active_orders()
+        self.check([e.transition for e in events] == [OrderTransition.EXPIRED], "Expirada en hora del servidor: EXPIRED")
+
+    def test_final_state(self):
+        print("\n📒 Estado final")
+        stats = self.executor.get_fvg_order_status()
+        self.check(stats['active_orders_count'] == 0 and stats['reconciler']['unconfirmed_orders'] == 0,
+                   "Libro local vacío al terminar")
+
+    def run(self) -> bool:
+        print("🧪 TEST OFFLINE - CONCILIACIÓN DE ÓRDENES FVG")
+        print("=" * 60)
+        try:
+            filled, cancelled, expired = self.place_order(), self.place_order(), self.place_order()
+            self.check(self.terminal.call_counts.get('symbol_info_tick', 0) >= 3,
+                       "Precios y símbolos consultados al terminal inyectado")
+            self.test_server_time(filled)
+            self.test_lagging_fill(filled)
+            self.test_external_cancel(cancelled)
+            self.test_expiry(expired)
+            self.test_final_state()
+        finally:
+            self._log_dir.cleanup()
+
+        print("\n" + "=" * 60)
+        if self.failures:
+            print(f"❌ {len(self.failures)} comprobaciones fallidas")
+            return False
+        print("🎯 Conciliación offline correcta")
+        return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if OfflineReconciliationTest().run() else 1)
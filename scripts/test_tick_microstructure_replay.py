@@ -0,0 +1,164 @@
+"""
+🧪 TEST OFFLINE - MICROESTRUCTURA DE TICKS (REPLAY)
+===================================================
+
+Graba un fichero de ticks sintético, lo reproduce con
+TickMicrostructure.replay y compara cada métrica incremental con un
+recálculo completo sobre la ventana (pandas/numpy):
+
+- Tasa de ticks con más ticks en ``rate_window`` que ``capacity``
+- Percentiles y rango del spread, desequilibrio, volatilidad realizada
+  e impacto medio sobre los últimos ``capacity`` ticks
+- export → replay reproduce la misma ventana
+- spread_check rechaza un spread anómalo y permite siempre un spread
+  constante (sin rechazos por ruido de coma flotante)
+
+Uso:
+    python scripts/test_tick_microstructure_replay.py
+"""
+
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.tick_microstructure import TickMicrostructure
+
+SYMBOL = "EURUSD"
+POINT = 0.00001
+CAPACITY = 1000
+RATE_WINDOW = 60.0
+TICKS_PER_SECOND = 50     # 3000 ticks en la ventana de tasa > CAPACITY
+DURATION = 120.0
+
+
+def synthetic_ticks(seed: int = 7) -> pd.DataFrame:
+    """Paseo aleatorio de bid con spread variable a 50 ticks/s"""
+    rng = np.random.default_rng(seed)
+    n = int(DURATION * TICKS_PER_SECOND)
+    times = 1_760_000_000 + np.arange(n) / TICKS_PER_SECOND
+    bid = 1.10000 + np.cumsum(rng.choice([-1, 0, 1], size=n)) * POINT
+    spread = rng.choice([8, 9, 10, 11, 12, 20], size=n, p=[0.2, 0.25, 0.25, 0.15, 0.1, 0.05]) * POINT
+    return pd.DataFrame({
+        'symbol': SYMBOL,
+        'time': times,
+        'bid': np.round(bid, 5),
+        'ask': np.round(bid + spread, 5),
+        'volume': rng.integers(1, 5, size=n).astype(float)
+    })
+
+
+def constant_spread_ticks(spread_points: int = 10, n: int = 400, seed: int = 11) -> pd.DataFrame:
+    """Paseo aleatorio de bid con spread constante (ask - bid arrastra ruido de coma flotante)"""
+    rng = np.random.default_rng(seed)
+    bid = np.round(1.10000 + np.cumsum(rng.choice([-3, -1, 1, 3], size=n)) * POINT, 5)
+    return pd.DataFrame({
+        'symbol': SYMBOL,
+        'time': 1_760_000_000 + np.arange(n) / TICKS_PER_SECOND,
+        'bid': bid,
+        'ask': np.round(bid + spread_points * POINT, 5),
+        'volume': 1.0
+    })
+
+
+def expected_metrics(ticks: pd.DataFrame) -> dict:
+    """Recalcular las métricas desde cero con los ticks aceptados"""
+    window = ticks.iloc[-CAPACITY:]
+    mid = (ticks['bid'] + ticks['ask']) / 2
+    returns = np.log(mid / mid.shift()).fillna(0.0).iloc[-CAPACITY:]
+    d_bid = np.sign(ticks['bid'].diff().fillna(0.0))
+    d_ask = np.sign(ticks['ask'].diff().fillna(0.0))
+    signs = (d_bid + d_ask).iloc[-CAPACITY:]
+    spreads = np.round((window['ask'] - window['bid']) / POINT).astype(int)
+    last_time = ticks['time'].iloc[-1]
+    return {
+        'tick_rate': int((ticks['time'] >= last_time - RATE_WINDOW).sum()) / RATE_WINDOW,
+        'spread_p50': np.sort(spreads)[math.ceil(0.50 * CAPACITY) - 1] * POINT,
+        'spread_p95': np.sort(spreads)[math.ceil(0.95 * CAPACITY) - 1] * POINT,
+        'imbalance': signs.sum() / np.abs(signs).sum(),
+        'realized_volatility': math.sqrt(float((returns ** 2).sum())),
+        'price_impact': float(returns.abs().mean()),
+        'volume': float(window['volume'].sum())
+    }
+
+
+class TickReplayTest:
+    """🧪 Replay de ticks contra recálculo completo"""
+
+    def __init__(self):
+        self.failures = []
+
+    def check(self, condition: bool, description: str):
+        print(f"{'✅' if condition else '❌'} {description}")
+        if not condition:
+            self.failures.append(description)
+
+    def new_micro(self) -> TickMicrostructure:
+        return TickMicrostructure(capacity=CAPACITY, rate_window=RATE_WINDOW, point_fn=lambda symbol: POINT)
+
+    def run(self) -> bool:
+        print("🧪 TEST OFFLINE - MICROESTRUCTURA DE TICKS")
+        print("=" * 60)
+        ticks = synthetic_ticks()
+        with tempfile.TemporaryDirectory() as tmp:
+            tick_file = Path(tmp) / "ticks.csv"
+            ticks.to_csv(tick_file, index=False)
+
+            micro = self.new_micro()
+            accepted = micro.replay(tick_file)
+            self.check(accepted == len(ticks), f"Replay acepta los {len(ticks)} ticks grabados")
+
+            print("\n📊 Métricas incrementales vs recálculo")
+            snapshot = micro.snapshot(SYMBOL)
+            expected = expected_metrics(ticks)
+            for name, value in expected.items():
+                got = snapshot[name]
+                self.check(math.isclose(got, value, rel_tol=1e-9, abs_tol=1e-12),
+                           f"{name}: {got:.10g} (esperado {value:.10g})")
+            self.check(snapshot['tick_rate'] > CAPACITY / RATE_WINDOW,
+                       "La tasa de ticks no queda limitada por la capacidad del ring")
+
+            print("\n💾 export → replay")
+            exported = micro.export(Path(tmp) / "window.csv")
+            copy = self.new_micro()
+            copy.replay(Path(tmp) / "window.csv")
+            again = copy.snapshot(SYMBOL)
+            self.check(exported == CAPACITY and again['ticks'] == CAPACITY, "Se exporta la ventana completa")
+            self.check(all(math.isclose(again[f'spread_p{q}'], snapshot[f'spread_p{q}']) for q in (50, 90, 95)),
+                       "Los percentiles del spread se reproducen desde el fichero exportado")
+
+            print("\n🚦 Control de spread")
+            wide = micro.spread_check(SYMBOL, 30 * POINT)
+            normal = micro.spread_check(SYMBOL, 9 * POINT)
+            self.check(not wide['allowed'] and normal['allowed'],
+                       f"Spread de 30 points rechazado (rango {wide['rank']:.1f}), 9 points permitido")
+
+            print("\n📏 Spread constante")
+            flat = constant_spread_ticks()
+            flat_file = Path(tmp) / "flat.csv"
+            flat.to_csv(flat_file, index=False)
+            flat_micro = self.new_micro()
+            flat_micro.replay(flat_file)
+            spreads = (flat['ask'] - flat['bid']).to_numpy()
+            rejected = sum(not flat_micro.spread_check(SYMBOL, spread)['allowed'] for spread in spreads)
+            noisy = len(set(spreads.tolist()))
+            self.check(rejected == 0,
+                       f"Spread constante de 10 points siempre permitido ({rejected}/{len(spreads)} rechazados, "
+                       f"{noisy} valores float distintos)")
+
+        print("\n" + "=" * 60)
+        if self.failures:
+            print(f"❌ {len(self.failures)} comprobaciones fallidas")
+            return False
+        print("🎯 Microestructura consistente con el recálculo completo")
+        return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if TickReplayTest().run() else 1)
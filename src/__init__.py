@@ -45,98 +45,56 @@ def setup_project_path():
 # Configurar automáticamente al importar
 PROJECT_ROOT = setup_project_path()
 
-# Importaciones centrales disponibles
-try:
-    # Core Managers básicos
-    from core.logger_manager import LoggerManager
-    LOGGER_AVAILABLE = True
-except ImportError:
-    LoggerManager = None
-    LOGGER_AVAILABLE = False
+# Importaciones centrales disponibles (diferidas)
+# Cada nombre se importa en su primer acceso (PEP 562); importar `src` solo
+# configura el path. Si la importación falla el nombre vale None, como antes.
+from core.lazy_loader import lazy_exports
 
-try:
+_LAZY_EXPORTS = {
+    # Core Managers básicos
+    'LoggerManager': ('core.logger_manager', 'LoggerManager'),
     # MT5 System
-    from core.mt5_data_manager import DATA_MANAGER as MT5_MANAGER, MT5DataManager
-    MT5_AVAILABLE = True
-except ImportError:
-    MT5_MANAGER = None
-    MT5DataManager = None
-    MT5_AVAILABLE = False
-
-try:
-    from analysis.piso_4.session_manager import SessionManager
-    SESSION_MANAGER_AVAILABLE = True
-except ImportError:
-    SessionManager = None
-    SESSION_MANAGER_AVAILABLE = False
-
-# Intentar importar otros managers si existen
-try:
-    from core.config_manager import ConfigManager
-except ImportError:
-    ConfigManager = None
+    'MT5_MANAGER': ('core.mt5_data_manager', 'DATA_MANAGER'),
+    'MT5DataManager': ('core.mt5_data_manager', 'MT5DataManager'),
+    'SessionManager': ('analysis.piso_4.session_manager', 'SessionManager'),
+    # Otros managers si existen
+    'ConfigManager': ('core.config_manager', 'ConfigManager'),
+    'AnalyticsManager': ('analytics_manager', 'AnalyticsManager'),
+    'DataManager': ('data_manager', 'DataManager'),
+    'ErrorManager': ('core.error_manager', 'ErrorManager'),
+    'FVGDatabaseManager': ('core.ml_foundation.fvg_database_manager', 'FVGDatabaseManager'),
+    'FundedNextMT5Manager': ('core.fundednext_mt5_manager', 'FundedNextMT5Manager'),
+}
 
-try:
-    from analytics_manager import AnalyticsManager
-except ImportError:
-    AnalyticsManager = None
+# Banderas de disponibilidad: se resuelven importando el componente asociado
+_AVAILABILITY_FLAGS = {
+    'LOGGER_AVAILABLE': 'LoggerManager',
+    'IMPORTS_AVAILABLE': 'LoggerManager',
+    'MT5_AVAILABLE': 'MT5_MANAGER',
+    'SESSION_MANAGER_AVAILABLE': 'SessionManager',
+}
 
-try:
-    from data_manager import DataManager
-except ImportError:
-    DataManager = None
+_resolve_export = lazy_exports(globals(), _LAZY_EXPORTS, fallback=lambda name: None)
 
-try:
-    from core.error_manager import ErrorManager
-except ImportError:
-    ErrorManager = None
 
-try:
-    from core.ml_foundation.fvg_database_manager import FVGDatabaseManager
-except ImportError:
-    FVGDatabaseManager = None
+def __getattr__(name):
+    if name in _AVAILABILITY_FLAGS:
+        value = _resolve_export(_AVAILABILITY_FLAGS[name]) is not None
+        globals()[name] = value
+        return value
+    return _resolve_export(name)
 
-try:
-    from core.fundednext_mt5_manager import FundedNextMT5Manager
-except ImportError:
-    FundedNextMT5Manager = None
 
-IMPORTS_AVAILABLE = LOGGER_AVAILABLE
+# Acceso a los nombres diferidos desde las funciones del propio paquete
+_package = sys.modules[__name__]
 
 # Información del sistema
 __version__ = "1.0.0"
 __author__ = "Trading Grid System"
 __email__ = "trading@grid.system"
 
-# Exportar componentes disponibles
-__all__ = ['test_imports', 'test_all_components', 'get_system_info']
-
-if LOGGER_AVAILABLE:
-    __all__.append('LoggerManager')
-
-if MT5_AVAILABLE:
-    __all__.extend(['MT5_MANAGER', 'MT5DataManager'])
-
-if SESSION_MANAGER_AVAILABLE:
-    __all__.append('SessionManager')
-
-if ConfigManager is not None:
-    __all__.append('ConfigManager')
-
-if AnalyticsManager is not None:
-    __all__.append('AnalyticsManager')
-
-if DataManager is not None:
-    __all__.append('DataManager')
-
-if ErrorManager is not None:
-    __all__.append('ErrorManager')
-
-if FVGDatabaseManager is not None:
-    __all__.append('FVGDatabaseManager')
-
-if FundedNextMT5Manager is not None:
-    __all__.append('FundedNextMT5Manager')
+# Exportar componentes (`from src import *` los importa todos)
+__all__ = ['test_imports', 'test_all_components', 'get_system_info'] + list(_LAZY_EXPORTS)
 
 def get_system_info():
     """📊 Información del sistema Trading Grid"""
@@ -144,7 +102,7 @@ def get_system_info():
         'version': __version__,
         'author': __author__,
         'project_root': str(PROJECT_ROOT),
-        'imports_available': IMPORTS_AVAILABLE,
+        'imports_available': _package.IMPORTS_AVAILABLE,
         'python_path': sys.path[:5]  # Primeros 5 paths
     }
 
@@ -153,9 +111,9 @@ def test_imports():
     
     # Inicializar logger central si está disponible
     central_logger = None
-    if LOGGER_AVAILABLE:
+    if _package.LOGGER_AVAILABLE:
         try:
-            central_logger = LoggerManager()
+            central_logger = _package.LoggerManager()
             central_logger.log_info("🏗️ Iniciando Testing Central de Imports - Trading Grid")
         except:
             central_logger = None
@@ -181,7 +139,7 @@ def test_imports():
     log_message(f"📁 Project Root: {info['project_root']}")
     log_message(f"✅ Imports Available: {info['imports_available']}")
     
-    if IMPORTS_AVAILABLE:
+    if _package.IMPORTS_AVAILABLE:
         log_message("\n✅ IMPORTACIONES EXITOSAS:", "success")
         log_message("   🔧 LoggerManager")
         log_message("   ⚙️ ConfigManager") 
@@ -198,12 +156,12 @@ def test_imports():
         # Probar instanciación básica
         try:
             # Test LoggerManager - Crear instancia para verificar funcionalidad
-            logger_mgr = LoggerManager()
+            logger_mgr = _package.LoggerManager()
             log_message("🧪 Test LoggerManager: ✅", "success")
             del logger_mgr  # Limpiar después del test
             
             # Test SessionManager - Crear instancia para verificar funcionalidad  
-            session_mgr = SessionManager()
+            session_mgr = _package.SessionManager()
             log_message("🧪 Test SessionManager: ✅", "success")
             del session_mgr  # Limpiar después del test
             
@@ -217,9 +175,9 @@ def test_all_components():
     
     # Inicializar logger central
     central_logger = None
-    if LOGGER_AVAILABLE:
+    if _package.LOGGER_AVAILABLE:
         try:
-            central_logger = LoggerManager()
+            central_logger = _package.LoggerManager()
             central_logger.log_info("🎯 Iniciando Test Completo de Componentes Trading")
         except:
             central_logger = None
@@ -244,7 +202,7 @@ def test_all_components():
     # Test LoggerManager
     try:
         # Crear instancia para verificar funcionalidad básica
-        logger_mgr = LoggerManager()
+        logger_mgr = _package.LoggerManager()
         # Verificar que tiene los métodos necesarios
         if hasattr(logger_mgr, 'log_info') and hasattr(logger_mgr, 'log_success'):
             log_message("✅ LoggerManager: Operativo", "success")
@@ -257,7 +215,7 @@ def test_all_components():
     # Test SessionManager
     try:
         # Crear instancia para verificar funcionalidad básica
-        session_mgr = SessionManager()
+        session_mgr = _package.SessionManager()
         # Verificar que se instancia correctamente
         if session_mgr is not None:
             log_message("✅ SessionManager: Operativo", "success")
@@ -270,7 +228,7 @@ def test_all_components():
     # Test FVGDatabaseManager
     try:
         # Crear instancia para verificar funcionalidad básica
-        fvg_mgr = FVGDatabaseManager()
+        fvg_mgr = _package.FVGDatabaseManager()
         # Verificar que se instancia correctamente
         if fvg_mgr is not None:
             log_message("✅ FVGDatabaseManager: Operativo", "success")
@@ -283,7 +241,7 @@ def test_all_components():
     # Test FundedNextMT5Manager
     try:
         # Crear instancia para verificar funcionalidad básica
-        mt5_mgr = FundedNextMT5Manager()
+        mt5_mgr = _package.FundedNextMT5Manager()
         # Verificar que se instancia correctamente
         if mt5_mgr is not None:
             log_message("✅ FundedNextMT5Manager: Operativo", "success")
@@ -3,7 +3,7 @@ from pathlib import Path
 
 # Configurar rutas para imports
 current_dir = Path(__file__).parent
-project_root = current_dir / "."
+project_root = current_dir.parent.parent
 sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 sys.path.insert(0, str((project_root / "src" / "analysis").absolute()))
@@ -22,12 +22,16 @@ from config import ZONA_HORARIA_LOCAL
 
 # Managers centralizados (FASE 4)
 from data_manager import DataManager
+from src.core.stochastic_state import get_stochastic_state
 
 SYMBOL = 'EURUSD'
 
 # Instancia global DataManager (FASE 4)
 data_manager = DataManager()
 
+# Estado estocástico compartido (14, 3, suavizado 3) de M15
+stoch_state = get_stochastic_state(SYMBOL, 'M15', k_period=14, d_period=3, smooth_period=3)
+
 def analizar_estocastico_m15_cacheado(riskbot, modalidad_operacion, lotaje_inicial):
     """
     REFACTORIZADO FASE 4: Usar DataManager para calcular indicadores estocásticos
@@ -51,56 +55,23 @@ def analizar_estocastico_m15_cacheado(riskbot, modalidad_operacion, lotaje_inici
     ahora = datetime.now(zona)
     
     if cache['timestamp'] is None or (ahora - cache['timestamp']).total_seconds() > 60:
-        try:
-            # Usar DataManager para obtener datos OHLC (FASE 4)
-            df_ohlc = data_manager.get_ohlc_data(SYMBOL, 'M15', 20)
-            if df_ohlc is None or len(df_ohlc) < 20:
-                return cache
-            
-            # Calcular Estocástico usando DataManager (FASE 4)
-            stoch_data = data_manager.calculate_stochastic(df_ohlc, k_period=14, d_period=3)
-            if stoch_data is None or len(stoch_data) < 2:
-                return cache
-                
-            # Obtener valores actuales y anteriores
-            k_actual = stoch_data['%K'].iloc[-1]
-            d_actual = stoch_data['%D'].iloc[-1]
-            k_anterior = stoch_data['%K'].iloc[-2]
-            d_anterior = stoch_data['%D'].iloc[-2]
-            
-        except Exception:
-            # Fallback al método original si DataManager falla
-            rates = mt5.copy_rates_from_pos(SYMBOL, mt5.TIMEFRAME_M15, 0, 20)
-            if rates is None or len(rates) < 20:
-                return cache
-            
-            df = pd.DataFrame(rates)
-            low = df['low']
-            high = df['high']
-            close = df['close']
-            
-            period_k = 14
-            period_d = 3
-            period_smooth = 3
-            
-            lowest = low.rolling(window=period_k).min()
-            highest = high.rolling(window=period_k).max()
-            k = 100 * (close - lowest) / (highest - lowest)
-            d = k.rolling(window=period_d).mean()
-            d_smooth = d.rolling(window=period_smooth).mean()
-            
-            k_actual = k.iloc[-1] if not k.empty else cache['k']
-            d_actual = d_smooth.iloc[-1] if not d_smooth.empty else cache['d']
-            k_anterior = k.iloc[-2] if len(k) > 1 else k_actual
-            d_anterior = d_smooth.iloc[-2] if len(d_smooth) > 1 else d_actual
+        # Estado incremental compartido: solo consulta al terminal al cerrar vela
+        stoch_state.refresh()
+        if stoch_state.d is None:
+            return cache
+        
+        # %D suavizado (media de 3 del %D), como el cálculo original de este módulo
+        if stoch_state.prev_d_smooth is None:
+            return cache
         
-        # Detectar cruces
-        cruce_k_d = k_actual > d_actual and k_anterior <= d_anterior
-        cruce_d_k = k_actual < d_actual and k_anterior >= d_anterior
+        k_actual = stoch_state.k
+        d_actual = stoch_state.d_smooth
         
-        # Detectar zonas de sobrecompra/sobreventa
-        sobreventa = k_actual < 10 and d_actual < 10
-        sobrecompra = k_actual > 90 and d_actual > 90
+        # Cruces y zonas resueltos por el estado al cerrar la vela
+        cruce_k_d = stoch_state.smooth_cross_up
+        cruce_d_k = stoch_state.smooth_cross_down
+        sobreventa = stoch_state.is_oversold(10, smoothed=True)
+        sobrecompra = stoch_state.is_overbought(90, smoothed=True)
         
         # Evaluar señales de trading
         senal_valida = False
@@ -112,23 +83,12 @@ def analizar_estocastico_m15_cacheado(riskbot, modalidad_operacion, lotaje_inici
             senal_valida = True
             senal_tipo = 'SELL'
         
-        # Verificar si la vela está cerrada (método DataManager o fallback)
-        try:
-            # Usar DataManager para obtener datos más recientes
-            rates_recientes = data_manager.get_ohlc_data(SYMBOL, 'M15', 1)
-            if rates_recientes is not None and len(rates_recientes) > 0:
-                time_current = pd.Timestamp(rates_recientes.index[-1])
-                vela_cerrada = (ahora - time_current).total_seconds() >= 60
-            else:
-                vela_cerrada = True  # Fallback seguro
-        except Exception:
-            # Fallback tradicional
-            rates = mt5.copy_rates_from_pos(SYMBOL, mt5.TIMEFRAME_M15, 0, 1)
-            if rates is not None and len(rates) > 0:
-                time_current = pd.Timestamp(rates[-1]['time'], unit='s', tz=zona)
-                vela_cerrada = (ahora - time_current).total_seconds() >= 60
-            else:
-                vela_cerrada = True  # Fallback seguro
+        # Verificar si la vela está cerrada con la apertura de la vela en formación
+        if stoch_state.forming_bar_time is not None:
+            time_current = pd.Timestamp(stoch_state.forming_bar_time, unit='s', tz=zona)
+            vela_cerrada = (ahora - time_current).total_seconds() >= 60
+        else:
+            vela_cerrada = True  # Fallback seguro
         
         if senal_valida and vela_cerrada:
             posiciones = mt5.positions_get(symbol=SYMBOL)
@@ -10,12 +10,12 @@ Estado: Sistema de Notificaciones Organizado
 # IMPORTS
 # =============================================================================
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import random
-import smtplib
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass, field
 from enum import Enum
@@ -24,9 +24,11 @@ from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-import aiohttp
-
 from src.core.config_manager import ConfigManager
+from src.core.alert_delivery import (AlertDelivery, PermanentDeliveryError, SmtpConnection,
+                                     get_http_pool, is_retryable_status)
+from src.core.event_bus import get_event_bus
+from src.core.alert_throttle import AlertThrottle
 
 # =============================================================================
 # CONFIGURACIÓN Y LOGGER
@@ -106,6 +108,9 @@ class AlertChannel:
         """Envía una alerta (implementar en subclases)"""
         raise NotImplementedError
 
+    async def close(self):
+        """Entrega lo pendiente y libera recursos (por defecto nada que hacer)"""
+
 # =============================================================================
 # CANALES DE ALERTA ESPECÍFICOS
 # =============================================================================
@@ -203,31 +208,91 @@ class FileAlertChannel(AlertChannel):
 
 
 class WebhookAlertChannel(AlertChannel):
-    """Canal de alertas por webhook (Discord, Slack, etc.)"""
+    """
+    Canal de alertas por webhook (Discord, Slack, etc.)
+    
+    Reutiliza las conexiones keep-alive del pool HTTP compartido, agrupa
+    ráfagas en un digest y reintenta los envíos fallidos desde disco.
+    Las alertas CRITICAL no esperan al digest.
+    """
     
-    def __init__(self, webhook_url: str, platform: str = "discord"):
+    def __init__(self, webhook_url: str, platform: str = "discord",
+                 digest_window: float = 2.0, max_digest: int = 20):
         super().__init__(f"Webhook-{platform}", enabled=True)
         self.webhook_url = webhook_url
         self.platform = platform.lower()
+        self.http = get_http_pool()
+        url_hash = hashlib.sha1(webhook_url.encode('utf-8')).hexdigest()[:10]
+        self.delivery = AlertDelivery(
+            key=f"webhook:{self.platform}:{url_hash}",
+            send_payload=self._post,
+            format_single=self._format_message,
+            format_digest=self._format_digest,
+            digest_window=digest_window,
+            max_digest=max_digest,
+            immediate=lambda alert: alert.priority == AlertPriority.CRITICAL
+        )
 
     async def send_alert(self, alert: Alert) -> bool:
-        """Envía alerta por webhook"""
+        """Envía alerta por webhook (o la agrega al digest en curso)"""
         try:
-            if self.platform == "discord":
-                payload = self._format_discord_message(alert)
-            elif self.platform == "slack":
-                payload = self._format_slack_message(alert)
-            else:
-                payload = self._format_generic_message(alert)
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.webhook_url, json=payload) as response:
-                    return response.status == 200
-                    
+            return await self.delivery.deliver(alert)
         except Exception as e:
             logger.error(f"Error enviando webhook: {e}")
             return False
 
+    async def close(self):
+        """Envía el digest en curso antes de parar"""
+        await self.delivery.close()
+
+    async def _post(self, payload: Dict) -> bool:
+        status = await self.http.post_json(self.webhook_url, payload)
+        if 200 <= status < 300:  # Discord responde 204
+            return True
+        if not is_retryable_status(status):
+            raise PermanentDeliveryError(f"Webhook respondió {status}", status)
+        return False
+
+    def _format_message(self, alert: Alert) -> Dict:
+        if self.platform == "discord":
+            return self._format_discord_message(alert)
+        if self.platform == "slack":
+            return self._format_slack_message(alert)
+        return self._format_generic_message(alert)
+
+    def _format_digest(self, alerts: List[Alert]) -> Dict:
+        """Formatea varias alertas en un único mensaje"""
+        if self.platform == "discord":
+            return self._format_discord_digest(alerts)
+        if self.platform == "slack":
+            return {"attachments": [self._format_slack_message(a)["attachments"][0] for a in alerts]}
+        return {
+            "text": f"🚨 {len(alerts)} alertas FVG",
+            "alerts": [self._format_generic_message(a)["content"] for a in alerts]
+        }
+
+    def _format_discord_digest(self, alerts: List[Alert]) -> Dict:
+        """Un embed con un campo por alerta (Discord admite hasta 25)"""
+        levels = list(AlertPriority)
+        top = max(alerts, key=lambda a: levels.index(a.priority))
+        color = self._format_discord_message(top)["embeds"][0]["color"]
+        fields = [
+            {
+                "name": f"{a.priority.value} · {a.symbol} {a.timeframe or ''}".strip(),
+                "value": f"{a.title}\n{a.message}"[:1024],
+                "inline": False
+            }
+            for a in alerts[:25]
+        ]
+        return {
+            "embeds": [{
+                "title": f"🚨 {len(alerts)} alertas FVG",
+                "color": color,
+                "timestamp": alerts[-1].timestamp.isoformat(),
+                "fields": fields
+            }]
+        }
+
     def _format_discord_message(self, alert: Alert) -> Dict:
         """Formatea mensaje para Discord"""
         color_map = {
@@ -326,10 +391,16 @@ class WebhookAlertChannel(AlertChannel):
 
 
 class EmailAlertChannel(AlertChannel):
-    """Canal de alertas por email"""
+    """
+    Canal de alertas por email
+    
+    Mantiene una conexión SMTP persistente y envía las ráfagas como un
+    único email digest; los envíos fallidos se reintentan desde disco.
+    """
     
     def __init__(self, smtp_server: str, smtp_port: int, username: str, password: str, 
-                 from_email: str, to_emails: List[str], use_tls: bool = True):
+                 from_email: str, to_emails: List[str], use_tls: bool = True,
+                 digest_window: float = 30.0, max_digest: int = 50):
         super().__init__("Email", enabled=True)
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
@@ -338,35 +409,55 @@ class EmailAlertChannel(AlertChannel):
         self.from_email = from_email
         self.to_emails = to_emails
         self.use_tls = use_tls
+        self.smtp = SmtpConnection(smtp_server, smtp_port, username, password, use_tls)
+        self.delivery = AlertDelivery(
+            key=f"email:{smtp_server}:{','.join(sorted(to_emails))}",
+            send_payload=self._send_email,
+            format_single=lambda alert: {
+                "subject": f"🚨 FVG Alert: {alert.title}",
+                "html": self._format_html_content(alert)
+            },
+            format_digest=self._format_digest,
+            digest_window=digest_window,
+            max_digest=max_digest,
+            immediate=lambda alert: alert.priority == AlertPriority.CRITICAL
+        )
 
     async def send_alert(self, alert: Alert) -> bool:
-        """Envía alerta por email"""
+        """Envía alerta por email (o la agrega al digest en curso)"""
         try:
-            # Crear mensaje
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = ', '.join(self.to_emails)
-            msg['Subject'] = f"🚨 FVG Alert: {alert.title}"
-
-            # Formatear contenido HTML
-            html_content = self._format_html_content(alert)
-            msg.attach(MIMEText(html_content, 'html'))
-
-            # Enviar email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            if self.use_tls:
-                server.starttls()
-            server.login(self.username, self.password)
-            text = msg.as_string()
-            server.sendmail(self.from_email, self.to_emails, text)
-            server.quit()
-
-            return True
-            
+            return await self.delivery.deliver(alert)
         except Exception as e:
             logger.error(f"Error enviando email: {e}")
             return False
 
+    async def close(self):
+        """Envía el digest en curso (ventana de 30 s) y cierra la conexión SMTP"""
+        await self.delivery.close()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.smtp.close)
+
+    async def _send_email(self, payload: Dict) -> bool:
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = ', '.join(self.to_emails)
+        msg['Subject'] = payload["subject"]
+        msg.attach(MIMEText(payload["html"], 'html'))
+
+        # smtplib es bloqueante: enviar desde el pool de hilos
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.smtp.send, self.from_email, self.to_emails, msg.as_string())
+        return True
+
+    def _format_digest(self, alerts: List[Alert]) -> Dict:
+        """Un email con todas las alertas de la ráfaga"""
+        sections = "<hr>".join(self._format_html_content(a) for a in alerts)
+        symbols = sorted({a.symbol for a in alerts})
+        return {
+            "subject": f"🚨 FVG Digest: {len(alerts)} alertas ({', '.join(symbols[:5])})",
+            "html": sections
+        }
+
     def _format_html_content(self, alert: Alert) -> str:
         """Formatea contenido HTML para email"""
         priority_colors = {
@@ -437,18 +528,28 @@ class FVGAlertSystem:
             'min_priority': AlertPriority.LOW,
             'enabled_types': [t.value for t in AlertType],
             'throttling_enabled': True,
-            'history_max_size': 1000
+            'history_max_size': 1000,
+            'await_delivery': False,        # True = esperar a que terminen los canales
+            'channel_queue_size': 500,
+            'channel_timeout_seconds': 15.0
         }
         
         self.config = {**default_config, **(config or {})}
         
-        # Canales de alerta
+        # Canales de alerta (cada uno con su cola en el bus de eventos compartido)
         self.channels: List[AlertChannel] = []
+        self.event_bus = get_event_bus()
+        self.bus_namespace = self.event_bus.reserve_namespace("fvg_alerts")
         
         # Historial y throttling
         self.alert_history = deque(maxlen=self.config['history_max_size'])
-        self.sent_alerts = deque(maxlen=100)  # Para throttling
-        self.last_alerts = {}  # Para supresión de duplicados
+        # Throttling y supresión de duplicados en O(1) (ventana circular + claves con caducidad)
+        self.rate_limiter = AlertThrottle(max_events=self.config['max_alerts_per_minute'],
+                                          window_seconds=60.0)
+        self.duplicate_filter = AlertThrottle(
+            dedupe_seconds=self.config['duplicate_suppression_minutes'] * 60,
+            max_keys=self.config['history_max_size']
+        )
         
         # Métricas
         self.metrics = {
@@ -462,6 +563,9 @@ class FVGAlertSystem:
         
         # Configurar canales por defecto
         self._setup_default_channels()
+
+        # Al parar el bus: enviar los digests pendientes de cada canal
+        self.event_bus.add_shutdown_hook(self.close_channels)
         
         logger.info("Sistema de alertas FVG inicializado")
 
@@ -480,13 +584,31 @@ class FVGAlertSystem:
     def add_channel(self, channel: AlertChannel):
         """Agrega un canal de alertas"""
         self.channels.append(channel)
+        self.event_bus.register_channel(
+            self._bus_channel_name(channel.name),
+            channel.send_alert,
+            max_queue=self.config['channel_queue_size'],
+            timeout=self.config['channel_timeout_seconds']
+        )
         logger.info(f"Canal agregado: {channel.name}")
 
     def remove_channel(self, channel_name: str):
         """Remueve un canal por nombre"""
         self.channels = [c for c in self.channels if c.name != channel_name]
+        self.event_bus.unregister_channel(self._bus_channel_name(channel_name))
         logger.info(f"Canal removido: {channel_name}")
 
+    async def close_channels(self):
+        """Entrega lo pendiente de cada canal (digests) y libera sus conexiones"""
+        for channel in list(self.channels):
+            try:
+                await channel.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando canal {channel.name}: {e}")
+
+    def _bus_channel_name(self, channel_name: str) -> str:
+        return f"{self.bus_namespace}.{channel_name}"
+
     async def send_alert(self, 
                         alert_type: AlertType,
                         title: str,
@@ -533,35 +655,29 @@ class FVGAlertSystem:
             logger.debug(f"Alerta suprimida: {alert_id}")
             return alert_id
 
-        # Enviar por todos los canales
-        send_results = []
-        for channel in self.channels:
-            if channel.enabled:
-                try:
-                    success = await channel.send_alert(alert)
-                    send_results.append(success)
-                    if success:
-                        alert.sent = True
-                except Exception as e:
-                    logger.error(f"Error enviando alerta por {channel.name}: {e}")
-                    send_results.append(False)
-
-        # Actualizar métricas
-        if any(send_results):
-            self.metrics['sent_alerts'] += 1
-            self.sent_alerts.append(alert.timestamp)
-        else:
-            self.metrics['failed_sends'] += 1
+        # Publicar en el bus: fan-out concurrente, CRITICAL se atiende primero
+        targets = [self._bus_channel_name(c.name) for c in self.channels if c.enabled]
+        delivery = self.event_bus.publish(alert, priority, channels=targets)
+        delivery.add_done_callback(lambda future: self._on_delivery(alert, future))
+        self.rate_limiter.record()
+        self.duplicate_filter.record(self._dedupe_key(alert))
+        if self.config['await_delivery']:
+            await asyncio.wrap_future(delivery)
 
         # Agregar al historial
         self.alert_history.append(alert)
 
-        # Actualizar last_alerts para supresión de duplicados
-        alert_key = f"{alert_type.value}_{symbol}_{timeframe or 'ALL'}"
-        self.last_alerts[alert_key] = alert.timestamp
-
         return alert_id
 
+    def _on_delivery(self, alert: Alert, future):
+        """Actualiza métricas cuando todos los canales terminaron"""
+        results = future.result()
+        if any(results.values()):
+            alert.sent = True
+            self.metrics['sent_alerts'] += 1
+        else:
+            self.metrics['failed_sends'] += 1
+
     def _should_send_alert(self, alert: Alert) -> bool:
         """Verifica si se debe enviar la alerta"""
         # Verificar prioridad mínima
@@ -595,23 +711,14 @@ class FVGAlertSystem:
 
     def _check_throttling(self) -> bool:
         """Verifica límites de throttling"""
-        now = datetime.now()
-        one_minute_ago = now - timedelta(minutes=1)
-        
-        # Contar alertas en el último minuto
-        recent_alerts = [t for t in self.sent_alerts if t > one_minute_ago]
-        return len(recent_alerts) < self.config['max_alerts_per_minute']
+        return self.rate_limiter.check() is None
 
     def _is_duplicate_alert(self, alert: Alert) -> bool:
         """Verifica si es una alerta duplicada"""
-        alert_key = f"{alert.type.value}_{alert.symbol}_{alert.timeframe or 'ALL'}"
-        
-        if alert_key in self.last_alerts:
-            last_time = self.last_alerts[alert_key]
-            time_diff = (alert.timestamp - last_time).total_seconds() / 60
-            return time_diff < self.config['duplicate_suppression_minutes']
-        
-        return False
+        return self.duplicate_filter.check(self._dedupe_key(alert)) == 'duplicate'
+
+    def _dedupe_key(self, alert: Alert) -> str:
+        return f"{alert.type.value}_{alert.symbol}_{alert.timeframe or 'ALL'}"
 
     def _generate_alert_id(self) -> str:
         """Genera ID único para alerta"""
@@ -732,7 +839,10 @@ class FVGAlertSystem:
             **self.metrics,
             'active_channels': len([c for c in self.channels if c.enabled]),
             'total_channels': len(self.channels),
-            'history_size': len(self.alert_history)
+            'history_size': len(self.alert_history),
+            'channel_queues': self.event_bus.get_stats(prefix=self.bus_namespace)['channels'],
+            'throttling': self.rate_limiter.get_stats(),
+            'duplicates': self.duplicate_filter.get_stats()
         }
 
     def configure(self, **kwargs):
@@ -741,6 +851,8 @@ class FVGAlertSystem:
             if key in self.config:
                 self.config[key] = value
                 logger.info(f"Configuración actualizada: {key} = {value}")
+        self.rate_limiter.max_events = self.config['max_alerts_per_minute']
+        self.duplicate_filter.dedupe_seconds = self.config['duplicate_suppression_minutes'] * 60
 
     def enable_channel(self, channel_name: str):
         """Habilita un canal específico"""
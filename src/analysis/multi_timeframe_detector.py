@@ -20,6 +20,19 @@ import logging
 # Imports del sistema base
 from .fvg_detector import FVGDetector, FVGData, RealTimeFVGDetector
 
+try:
+    from src.core.session_calendar import SessionWindow, get_session_calendar
+except ImportError:
+    from session_calendar import SessionWindow, get_session_calendar
+
+# Sesiones por hora UTC (fin inclusivo); el solapamiento London-NY es OVERLAP
+TRADING_SESSION_WINDOWS = (
+    SessionWindow.hours('ASIA', 21, 6),
+    SessionWindow.hours('LONDON', 7, 12),
+    SessionWindow.hours('OVERLAP', 13, 16),
+    SessionWindow.hours('NY', 17, 20),
+)
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -139,6 +152,7 @@ class MultiTimeframeFVGDetector:
             'NY': SessionStats('NY', time_range="13:00-22:00 UTC"),
             'OVERLAP': SessionStats('OVERLAP', time_range="13:00-16:00 UTC")
         }
+        self.session_calendar = get_session_calendar(TRADING_SESSION_WINDOWS)
         
         # Callbacks para alertas
         self.alert_callbacks = []
@@ -226,9 +240,13 @@ class MultiTimeframeFVGDetector:
     
     def _analyze_session_distribution(self, fvgs: List[FVGData], analysis: MultiTimeframeAnalysis):
         """Analiza distribución de FVGs por sesión"""
-        for fvg in fvgs:
-            session = self._get_trading_session(fvg.formation_time)
-            
+        if not fvgs:
+            return
+        
+        # Etiquetado vectorizado de todas las formaciones en una pasada
+        sessions = self.session_calendar.label([fvg.formation_time for fvg in fvgs], default='ASIA')
+        
+        for fvg, session in zip(fvgs, sessions):
             # Actualizar estadísticas de sesión
             if session not in analysis.session_stats:
                 analysis.session_stats[session] = SessionStats(session)
@@ -239,18 +257,7 @@ class MultiTimeframeFVGDetector:
     
     def _get_trading_session(self, timestamp: datetime) -> str:
         """Determina la sesión de trading"""
-        hour = timestamp.hour
-        
-        if 21 <= hour or hour <= 6:
-            return 'ASIA'
-        elif 7 <= hour <= 16:
-            if 13 <= hour <= 16:
-                return 'OVERLAP'  # También contará para London y NY
-            return 'LONDON'
-        elif 13 <= hour <= 22:
-            return 'NY'
-        else:
-            return 'ASIA'  # Fallback
+        return self.session_calendar.session_at(timestamp, default='ASIA')
     
     def _detect_timeframe_confluences(self, timeframe_data: Dict[str, List[FVGData]]) -> List[Dict]:
         """
@@ -14,6 +14,15 @@ import numpy as np
 from datetime import datetime
 import logging
 
+try:
+    from src.core.session_calendar import SessionWindow, get_session_calendar
+    from src.core.regime_state import DEFAULT_REGIME_CONFIG, compute_regimes
+    from src.core.seasonal_stats import get_seasonal_stats
+except ImportError:
+    from session_calendar import SessionWindow, get_session_calendar
+    from regime_state import DEFAULT_REGIME_CONFIG, compute_regimes
+    from seasonal_stats import get_seasonal_stats
+
 logger = logging.getLogger(__name__)
 
 class FVGQualityAnalyzer:
@@ -27,6 +36,8 @@ class FVGQualityAnalyzer:
     - Estructura de velas
     """
     
+    SCORE_NAMES = ('size', 'structure', 'context', 'volume')
+    
     def __init__(self, config=None):
         """
         Inicializa el analizador de calidad
@@ -56,127 +67,96 @@ class FVGQualityAnalyzer:
         Returns:
             Dict con score y detalles del análisis
         """
-        scores = {}
-        
-        # 1. Análisis de tamaño
-        scores['size'] = self._analyze_size_quality(fvg)
-        
-        # 2. Análisis de estructura
-        scores['structure'] = self._analyze_structure_quality(fvg)
+        row = self.analyze_batch([fvg], [market_context], volume_data).iloc[0]
+        scores = {name: float(row[name]) for name in self.SCORE_NAMES}
         
-        # 3. Análisis de contexto
-        scores['context'] = self._analyze_context_quality(fvg, market_context)
+        return {
+            'final_score': float(row['final_score']),
+            'scores': scores,
+            'quality_level': row['quality_level'],
+            'analysis_time': datetime.now()
+        }
+    
+    def analyze_batch(self, fvgs, market_contexts=None, volume_data=None):
+        """
+        Analiza la calidad de un lote de FVGs en una pasada vectorizada
         
-        # 4. Análisis de volumen
-        scores['volume'] = self._analyze_volume_quality(fvg, volume_data)
+        Args:
+            fvgs: Lista de FVGs
+            market_contexts: Contexto común (dict) o lista con uno por FVG
+            volume_data: Datos de volumen (avg_volume)
+            
+        Returns:
+            DataFrame con un score por criterio, final_score y quality_level
+        """
+        n = len(fvgs)
+        if market_contexts is None or isinstance(market_contexts, dict):
+            market_contexts = [market_contexts] * n
+        
+        # Extracción a arrays (una pasada sobre los objetos)
+        pips = np.full(n, np.nan)
+        body_ratio = np.full(n, np.nan)
+        impulse_volume = np.full(n, np.nan)
+        context_score = np.full(n, 5.0)
+        for i, (fvg, market_context) in enumerate(zip(fvgs, market_contexts)):
+            if hasattr(fvg, 'gap_size_pips'):
+                pips[i] = fvg.gap_size_pips
+            candles = getattr(fvg, 'formation_candles', None)
+            if candles is not None and len(candles) >= 3:
+                middle_candle = candles[1]
+                total_range = middle_candle['high'] - middle_candle['low']
+                if total_range > 0:
+                    body_ratio[i] = abs(middle_candle['close'] - middle_candle['open']) / total_range
+            if candles is not None and len(candles) >= 2:
+                impulse_volume[i] = candles[1].get('volume', 0)
+            if market_context:
+                context_score[i] = (
+                    market_context.get('trend_alignment', 0.5)
+                    + market_context.get('sr_proximity', 0.5)
+                    + market_context.get('momentum', 0.5)
+                ) / 3 * 10
+        
+        avg_volume = volume_data.get('avg_volume', 1) if volume_data else 0
+        volume_ratio = impulse_volume / avg_volume if avg_volume > 0 else np.full(n, np.nan)
+        
+        scores = pd.DataFrame({
+            # 1. Tamaño del gap
+            'size': np.where(np.isnan(pips), 5.0, np.select(
+                [pips >= 10, pips >= 5, pips >= 2, pips >= 1], [10.0, 8.0, 6.0, 4.0], 2.0
+            )),
+            # 2. Estructura: cuerpo de la vela de impulso
+            'structure': np.where(np.isnan(body_ratio), 5.0, np.select(
+                [body_ratio >= 0.8, body_ratio >= 0.6, body_ratio >= 0.4], [9.0, 7.0, 5.0], 3.0
+            )),
+            # 3. Contexto de mercado
+            'context': np.clip(context_score, 0.0, 10.0),
+            # 4. Volumen de la vela de impulso
+            'volume': np.where(np.isnan(volume_ratio), 5.0, np.select(
+                [volume_ratio >= 2.0, volume_ratio >= 1.5, volume_ratio >= 1.0], [9.0, 7.0, 5.0], 3.0
+            ))
+        })
         
         # Cálculo de score final ponderado
-        final_score = (
+        scores['final_score'] = (
             scores['size'] * self.config['size_weight'] +
             scores['structure'] * self.config['structure_weight'] +
             scores['context'] * self.config['context_weight'] +
             scores['volume'] * self.config['volume_weight']
         )
-        
-        return {
-            'final_score': final_score,
-            'scores': scores,
-            'quality_level': self._get_quality_level(final_score),
-            'analysis_time': datetime.now()
-        }
-    
-    def _analyze_size_quality(self, fvg):
-        """Analiza la calidad basada en el tamaño del gap"""
-        if hasattr(fvg, 'gap_size_pips'):
-            pips = fvg.gap_size_pips
-            if pips >= 10:
-                return 10.0
-            elif pips >= 5:
-                return 8.0
-            elif pips >= 2:
-                return 6.0
-            elif pips >= 1:
-                return 4.0
-            else:
-                return 2.0
-        return 5.0
-    
-    def _analyze_structure_quality(self, fvg):
-        """Analiza la calidad basada en la estructura de velas"""
-        # Análisis de la fuerza de las velas de formación
-        if hasattr(fvg, 'formation_candles') and len(fvg.formation_candles) >= 3:
-            candles = fvg.formation_candles
-            
-            # Vela central (impulso)
-            middle_candle = candles[1]
-            body_size = abs(middle_candle['close'] - middle_candle['open'])
-            total_range = middle_candle['high'] - middle_candle['low']
-            
-            if total_range > 0:
-                body_ratio = body_size / total_range
-                if body_ratio >= 0.8:
-                    return 9.0
-                elif body_ratio >= 0.6:
-                    return 7.0
-                elif body_ratio >= 0.4:
-                    return 5.0
-                else:
-                    return 3.0
-        
-        return 5.0
-    
-    def _analyze_context_quality(self, fvg, market_context):
-        """Analiza la calidad basada en el contexto de mercado"""
-        if not market_context:
-            return 5.0
-        
-        # Análisis de tendencia
-        trend_alignment = market_context.get('trend_alignment', 0.5)
-        
-        # Análisis de soporte/resistencia
-        sr_proximity = market_context.get('sr_proximity', 0.5)
-        
-        # Análisis de momento
-        momentum = market_context.get('momentum', 0.5)
-        
-        context_score = (trend_alignment + sr_proximity + momentum) / 3 * 10
-        return min(10.0, max(0.0, context_score))
-    
-    def _analyze_volume_quality(self, fvg, volume_data):
-        """Analiza la calidad basada en el volumen"""
-        if not volume_data or not hasattr(fvg, 'formation_candles'):
-            return 5.0
-        
-        # Obtener volumen de vela de impulso
-        if len(fvg.formation_candles) >= 2:
-            impulse_volume = fvg.formation_candles[1].get('volume', 0)
-            avg_volume = volume_data.get('avg_volume', 1)
-            
-            if avg_volume > 0:
-                volume_ratio = impulse_volume / avg_volume
-                if volume_ratio >= 2.0:
-                    return 9.0
-                elif volume_ratio >= 1.5:
-                    return 7.0
-                elif volume_ratio >= 1.0:
-                    return 5.0
-                else:
-                    return 3.0
-        
-        return 5.0
+        scores['quality_level'] = self._get_quality_levels(scores['final_score'].to_numpy())
+        return scores
     
     def _get_quality_level(self, score):
         """Convierte score numérico a nivel cualitativo"""
-        if score >= 8.5:
-            return "EXCELENTE"
-        elif score >= 7.0:
-            return "BUENA"
-        elif score >= 5.5:
-            return "REGULAR"
-        elif score >= 4.0:
-            return "BAJA"
-        else:
-            return "MUY_BAJA"
+        return self._get_quality_levels(np.array([score]))[0]
+    
+    @staticmethod
+    def _get_quality_levels(scores):
+        """Nivel cualitativo de cada score"""
+        return np.select(
+            [scores >= 8.5, scores >= 7.0, scores >= 5.5, scores >= 4.0],
+            ['EXCELENTE', 'BUENA', 'REGULAR', 'BAJA'], 'MUY_BAJA'
+        ).astype(object)
 
 
 class FVGPredictor:
@@ -335,22 +315,33 @@ class SessionAnalyzer:
             'NY': {'start': 13, 'end': 22},      # 13:00-22:00 UTC
             'OVERLAP': {'start': 13, 'end': 16}  # London-NY overlap
         }
+        self.calendar = get_session_calendar([
+            SessionWindow.hours(name, config['start'], config['end'])
+            for name, config in self.session_configs.items()
+        ])
+        self.seasonal_stats = get_seasonal_stats()
         print("🕒 SessionAnalyzer inicializado")
     
-    def analyze_session_patterns(self, fvgs_data):
+    def analyze_session_patterns(self, fvgs_data, symbol=None):
         """
         Analiza patrones de FVGs por sesión
         
         Args:
             fvgs_data: Lista de FVGs con timestamps
+            symbol: Si se indica, cada sesión incluye 'historical' con las
+                estadísticas acumuladas de SeasonalStats
             
         Returns:
             Dict con análisis por sesión
         """
         session_stats = {}
         
-        for session_name, config in self.session_configs.items():
-            session_fvgs = self._filter_fvgs_by_session(fvgs_data, config)
+        # Timestamps convertidos una sola vez para todas las sesiones
+        timed_fvgs = [fvg for fvg in fvgs_data if hasattr(fvg, 'formation_time')]
+        formation_times = self.calendar.to_epoch_array([fvg.formation_time for fvg in timed_fvgs])
+        
+        for session_name in self.session_configs:
+            session_fvgs = self._filter_fvgs_by_session(timed_fvgs, session_name, formation_times)
             
             if session_fvgs:
                 session_stats[session_name] = {
@@ -362,29 +353,24 @@ class SessionAnalyzer:
                     'session_bias': self._calculate_session_bias(session_fvgs)
                 }
         
+        if symbol is not None:
+            for session_name in self.session_configs:
+                if session_name in self.seasonal_stats.sessions:
+                    session_stats.setdefault(session_name, {})['historical'] = \
+                        self.seasonal_stats.bin_stats(symbol, session=session_name)
+        
         return session_stats
     
-    def _filter_fvgs_by_session(self, fvgs_data, session_config):
-        """Filtra FVGs por sesión específica"""
-        session_fvgs = []
-        
-        for fvg in fvgs_data:
-            if hasattr(fvg, 'formation_time'):
-                fvg_time = pd.to_datetime(fvg.formation_time)
-                hour = fvg_time.hour
-                
-                start_hour = session_config['start']
-                end_hour = session_config['end']
-                
-                # Manejar sesiones que cruzan medianoche
-                if start_hour > end_hour:
-                    if hour >= start_hour or hour <= end_hour:
-                        session_fvgs.append(fvg)
-                else:
-                    if start_hour <= hour <= end_hour:
-                        session_fvgs.append(fvg)
-        
-        return session_fvgs
+    def _filter_fvgs_by_session(self, fvgs_data, session_name, formation_times=None):
+        """Filtra FVGs por sesión específica (máscara vectorizada del calendario)"""
+        if formation_times is None:
+            fvgs_data = [fvg for fvg in fvgs_data if hasattr(fvg, 'formation_time')]
+            formation_times = [fvg.formation_time for fvg in fvgs_data]
+        if len(formation_times) == 0:
+            return []
+        
+        mask = self.calendar.mask(session_name, formation_times)
+        return [fvg for fvg, in_session in zip(fvgs_data, mask) if in_session]
     
     def _calculate_session_bias(self, session_fvgs):
         """Calcula el bias direccional de la sesión"""
@@ -424,14 +410,17 @@ class MarketRegimeDetector:
         Returns:
             Dict con información del régimen
         """
+        # Indicadores de la última vela con el motor de regímenes compartido
+        last = self.label_bars(price_data).iloc[-1] if len(price_data) >= 20 else None
+        
         # Análisis de volatilidad
-        volatility = self._calculate_volatility(price_data)
+        volatility = self._calculate_volatility(last)
         
         # Análisis de tendencia
-        trend = self._calculate_trend(price_data)
+        trend = self._calculate_trend(last)
         
         # Análisis de FVG density
-        fvg_density = self._calculate_fvg_density(fvg_data) if fvg_data else 0.5
+        fvg_density = self._calculate_fvg_density(fvg_data, last)
         
         # Determinar régimen
         regime = self._determine_regime(volatility, trend, fvg_density)
@@ -444,13 +433,24 @@ class MarketRegimeDetector:
             'confidence': self._calculate_regime_confidence(volatility, trend, fvg_density)
         }
     
-    def _calculate_volatility(self, price_data):
+    def label_bars(self, price_data):
+        """
+        Indicadores y régimen de cada vela del histórico (una pasada vectorizada)
+        
+        Args:
+            price_data: Velas con high, low, close y opcionalmente volume
+            
+        Returns:
+            DataFrame alineado con price_data (columnas de compute_regimes)
+        """
+        return compute_regimes(price_data)
+    
+    def _calculate_volatility(self, last):
         """Calcula nivel de volatilidad"""
-        if len(price_data) < 20:
+        if last is None or pd.isna(last['volatility']):
             return 0.5
         
-        returns = price_data['close'].pct_change().dropna()
-        volatility = returns.std()
+        volatility = last['volatility']
         
         # Normalizar a escala 0-1
         if volatility < 0.001:
@@ -460,40 +460,42 @@ class MarketRegimeDetector:
         else:
             return 0.8  # Alta volatilidad
     
-    def _calculate_trend(self, price_data):
+    def _calculate_trend(self, last):
         """Calcula fuerza de tendencia"""
-        if len(price_data) < 50:
+        if last is None or pd.isna(last['trend_slope']):
             return 0.5
         
-        # Simple moving averages
-        sma_20 = price_data['close'].rolling(20).mean()
-        sma_50 = price_data['close'].rolling(50).mean()
-        
-        current_price = price_data['close'].iloc[-1]
-        sma_20_current = sma_20.iloc[-1]
-        sma_50_current = sma_50.iloc[-1]
-        
-        if current_price > sma_20_current > sma_50_current:
+        threshold = DEFAULT_REGIME_CONFIG['trend_strength_threshold']
+        if last['trend_strength'] > threshold:
             return 0.8  # Tendencia alcista fuerte
-        elif current_price < sma_20_current < sma_50_current:
+        elif last['trend_strength'] < -threshold:
             return 0.2  # Tendencia bajista fuerte
         else:
             return 0.5  # Sin tendencia clara
     
-    def _calculate_fvg_density(self, fvg_data):
+    def _calculate_fvg_density(self, fvg_data, last=None):
         """Calcula densidad de FVGs"""
-        if not fvg_data:
-            return 0.5
+        if fvg_data:
+            # Contar FVGs recientes (últimas 24 horas)
+            recent_fvgs = [fvg for fvg in fvg_data if hasattr(fvg, 'formation_time')]
+            
+            if len(recent_fvgs) > 10:
+                return 0.8  # Alta densidad
+            elif len(recent_fvgs) > 5:
+                return 0.6  # Media densidad
+            else:
+                return 0.3  # Baja densidad
         
-        # Contar FVGs recientes (últimas 24 horas)
-        recent_fvgs = [fvg for fvg in fvg_data if hasattr(fvg, 'formation_time')]
+        if last is None:
+            return 0.5
         
-        if len(recent_fvgs) > 10:
-            return 0.8  # Alta densidad
-        elif len(recent_fvgs) > 5:
-            return 0.6  # Media densidad
+        # Fracción de velas con gap de 3 velas en la ventana del motor
+        if last['fvg_density'] >= 0.2:
+            return 0.8
+        elif last['fvg_density'] >= 0.1:
+            return 0.6
         else:
-            return 0.3  # Baja densidad
+            return 0.3
     
     def _determine_regime(self, volatility, trend, fvg_density):
         """Determina el régimen de mercado"""
@@ -22,6 +22,19 @@ sys.path.insert(0, str(project_root / "src" / "core"))
 # Imports centralizados
 from data_manager import DataManager
 from logger_manager import LoggerManager
+from src.core.seasonal_stats import get_seasonal_stats
+from src.core.tick_microstructure import get_tick_microstructure
+
+try:
+    from .fvg_quality_batch import (
+        FACTOR_NAMES, FVGBatch,
+        build_bar_context, context_for_batch, score_frame, score_quality
+    )
+except ImportError:
+    from fvg_quality_batch import (
+        FACTOR_NAMES, FVGBatch,
+        build_bar_context, context_for_batch, score_frame, score_quality
+    )
 
 class FVGQuality(Enum):
     """Niveles de calidad de FVG"""
@@ -58,6 +71,8 @@ class FVGQualityAnalyzer:
     def __init__(self):
         self.logger = LoggerManager().get_logger("FVGQuality")
         self.data_manager = DataManager()
+        self.seasonal_stats = get_seasonal_stats()
+        self.microstructure = get_tick_microstructure()
         
         # Pesos para cada factor de calidad
         self.weight_factors = {
@@ -77,6 +92,12 @@ class FVGQualityAnalyzer:
             'BAJA': 0.25
         }
         
+        # Velas H1 de contexto (ATR, EMA200 y rango de 50 velas)
+        self.context_bars = 250
+        
+        # Spread actual por encima de este percentil de los ticks recientes: confianza a la mitad
+        self.max_spread_percentile = 95.0
+        
         self.logger.info("FVGQualityAnalyzer inicializado")
 
     def analyze_fvg_quality(self, fvg_data: Dict, symbol: str = "EURUSD") -> FVGQualityScore:
@@ -91,55 +112,11 @@ class FVGQualityAnalyzer:
             FVGQualityScore con el análisis completo
         """
         try:
-            factors = {}
-            
-            # 1. Factor de tamaño
-            factors['size_factor'] = self._calculate_size_factor(fvg_data, symbol)
-            
-            # 2. Factor de velocidad
-            factors['speed_factor'] = self._calculate_speed_factor(fvg_data)
-            
-            # 3. Factor de volumen
-            factors['volume_factor'] = self._calculate_volume_factor(fvg_data, symbol)
-            
-            # 4. Factor de contexto
-            factors['context_factor'] = self._calculate_context_factor(fvg_data, symbol)
-            
-            # 5. Factor de distancia
-            factors['distance_factor'] = self._calculate_distance_factor(fvg_data, symbol)
-            
-            # 6. Factor de confluencia
-            factors['confluence_factor'] = self._calculate_confluence_factor(fvg_data, symbol)
-            
-            # 7. Factor de sesión
-            factors['session_factor'] = self._calculate_session_factor(fvg_data)
-            
-            # Calcular score total ponderado
-            score_total = sum(
-                factors[factor] * self.weight_factors[factor] 
-                for factor in factors
+            quality_score = self.batch_analyze_fvgs([fvg_data], symbol, sort=False)[0]
+            self.logger.debug(
+                f"FVG {quality_score.fvg_id}: Score={quality_score.score_total:.3f}, "
+                f"Calidad={quality_score.calidad.value}"
             )
-            
-            # Determinar calidad
-            calidad = self._determine_quality(score_total)
-            
-            # Generar recomendación
-            recomendacion = self._generate_recommendation(score_total, factors, calidad)
-            
-            # Calcular confianza
-            confianza = self._calculate_confidence(factors)
-            
-            quality_score = FVGQualityScore(
-                fvg_id=fvg_data.get('id', 'unknown'),
-                score_total=score_total,
-                calidad=calidad,
-                factores=factors,
-                recomendacion=recomendacion,
-                confianza=confianza
-            )
-            
-            self.logger.info(f"FVG {quality_score.fvg_id}: Score={score_total:.3f}, Calidad={calidad.value}")
-            
             return quality_score
             
         except Exception as e:
@@ -154,283 +131,51 @@ class FVGQualityAnalyzer:
                 confianza=0.0
             )
 
-    def _calculate_size_factor(self, fvg_data: Dict, symbol: str) -> float:
-        """Calcula factor de calidad basado en el tamaño del FVG"""
-        try:
-            # Obtener ATR del período para normalizar
-            df_ohlc = self.data_manager.get_ohlc_data(symbol, 'H1', 24)
-            if df_ohlc is None:
-                return 0.5
-                
-            atr = self._calculate_atr(df_ohlc, period=14)
-            current_atr = atr.iloc[-1] if len(atr) > 0 else 0.0001
-            
-            # Tamaño del FVG en pips
-            fvg_size = abs(fvg_data.get('high', 0) - fvg_data.get('low', 0))
-            
-            # Normalizar por ATR
-            size_ratio = fvg_size / current_atr if current_atr > 0 else 0
-            
-            # Score: mejor entre 0.3 y 1.5 ATR
-            if size_ratio < 0.1:
-                return 0.1  # Muy pequeño
-            elif size_ratio < 0.3:
-                return 0.4  # Pequeño
-            elif size_ratio <= 1.5:
-                return 1.0  # Tamaño óptimo
-            elif size_ratio <= 3.0:
-                return 0.7  # Grande pero aceptable
-            else:
-                return 0.3  # Muy grande
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando size_factor: {e}")
-            return 0.5
-
-    def _calculate_speed_factor(self, fvg_data: Dict) -> float:
-        """Calcula factor basado en la velocidad de formación del FVG"""
-        try:
-            # Tiempo de formación (asumiendo que tenemos timestamps)
-            start_time = fvg_data.get('start_time', datetime.now())
-            end_time = fvg_data.get('end_time', datetime.now())
-            
-            if isinstance(start_time, str):
-                start_time = pd.to_datetime(start_time)
-            if isinstance(end_time, str):
-                end_time = pd.to_datetime(end_time)
-                
-            formation_minutes = (end_time - start_time).total_seconds() / 60
-            
-            # FVG size
-            fvg_size = abs(fvg_data.get('high', 0) - fvg_data.get('low', 0))
-            
-            # Velocidad en pips por minuto
-            speed = fvg_size / formation_minutes if formation_minutes > 0 else 0
-            
-            # Score basado en velocidad (FVGs rápidos son mejores)
-            if speed > 0.001:  # Muy rápido
-                return 1.0
-            elif speed > 0.0005:  # Rápido
-                return 0.8
-            elif speed > 0.0002:  # Normal
-                return 0.6
-            else:  # Lento
-                return 0.3
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando speed_factor: {e}")
-            return 0.5
-
-    def _calculate_volume_factor(self, fvg_data: Dict, symbol: str) -> float:
-        """Calcula factor basado en el volumen durante la formación"""
-        try:
-            # Obtener datos de volumen tick
-            df_ticks = self.data_manager.get_tick_data(symbol, count=1000)
-            if df_ticks is None or len(df_ticks) == 0:
-                return 0.5
-                
-            # Filtrar ticks en el período del FVG
-            start_time = fvg_data.get('start_time', datetime.now() - timedelta(hours=1))
-            end_time = fvg_data.get('end_time', datetime.now())
-            
-            if isinstance(start_time, str):
-                start_time = pd.to_datetime(start_time)
-            if isinstance(end_time, str):
-                end_time = pd.to_datetime(end_time)
-            
-            # Volumen durante la formación del FVG
-            mask = (df_ticks.index >= start_time) & (df_ticks.index <= end_time)
-            volume_fvg = df_ticks[mask]['volume'].sum() if mask.any() else 0
-            
-            # Volumen promedio de referencia
-            volume_avg = df_ticks['volume'].mean()
-            
-            # Ratio de volumen
-            volume_ratio = volume_fvg / volume_avg if volume_avg > 0 else 1
-            
-            # Score: más volumen = mejor calidad
-            if volume_ratio > 2.0:
-                return 1.0
-            elif volume_ratio > 1.5:
-                return 0.8
-            elif volume_ratio > 1.0:
-                return 0.6
-            else:
-                return 0.3
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando volume_factor: {e}")
-            return 0.5
-
-    def _calculate_context_factor(self, fvg_data: Dict, symbol: str) -> float:
-        """Calcula factor basado en el contexto de mercado"""
-        try:
-            # Obtener datos para determinar tendencia
-            df_ohlc = self.data_manager.get_ohlc_data(symbol, 'H1', 50)
-            if df_ohlc is None:
-                return 0.5
-                
-            # Calcular EMAs para tendencia
-            ema_20 = df_ohlc['close'].ewm(span=20).mean()
-            ema_50 = df_ohlc['close'].ewm(span=50).mean()
-            
-            current_price = df_ohlc['close'].iloc[-1]
-            current_ema20 = ema_20.iloc[-1]
-            current_ema50 = ema_50.iloc[-1]
-            
-            # Determinar contexto
-            fvg_type = fvg_data.get('type', 'BULLISH')
-            
-            # FVG alcista en tendencia alcista = mejor
-            # FVG bajista en tendencia bajista = mejor
-            if fvg_type == 'BULLISH':
-                if current_price > current_ema20 > current_ema50:
-                    return 1.0  # Tendencia alcista fuerte
-                elif current_price > current_ema20:
-                    return 0.7  # Tendencia alcista débil
-                else:
-                    return 0.3  # Contra tendencia
-            else:  # BEARISH
-                if current_price < current_ema20 < current_ema50:
-                    return 1.0  # Tendencia bajista fuerte
-                elif current_price < current_ema20:
-                    return 0.7  # Tendencia bajista débil
-                else:
-                    return 0.3  # Contra tendencia
-                    
-        except Exception as e:
-            self.logger.error(f"Error calculando context_factor: {e}")
-            return 0.5
-
-    def _calculate_distance_factor(self, fvg_data: Dict, symbol: str) -> float:
-        """Calcula factor basado en la distancia desde el precio actual"""
-        try:
-            # Precio actual
-            current_price = self.data_manager.get_current_price(symbol)
-            if current_price is None:
-                return 0.5
-                
-            # Centro del FVG
-            fvg_center = (fvg_data.get('high', 0) + fvg_data.get('low', 0)) / 2
-            
-            # Distancia en pips
-            distance = abs(current_price - fvg_center)
-            
-            # Obtener ATR para normalizar
-            df_ohlc = self.data_manager.get_ohlc_data(symbol, 'H1', 24)
-            if df_ohlc is None:
-                return 0.5
-                
-            atr = self._calculate_atr(df_ohlc, period=14)
-            current_atr = atr.iloc[-1] if len(atr) > 0 else 0.0001
-            
-            # Ratio de distancia
-            distance_ratio = distance / current_atr if current_atr > 0 else 0
-            
-            # Score: distancia óptima entre 0.5 y 3 ATR
-            if distance_ratio < 0.2:
-                return 0.3  # Muy cerca
-            elif distance_ratio <= 3.0:
-                return 1.0  # Distancia óptima
-            elif distance_ratio <= 5.0:
-                return 0.6  # Lejos pero alcanzable
-            else:
-                return 0.2  # Muy lejos
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando distance_factor: {e}")
-            return 0.5
-
-    def _calculate_confluence_factor(self, fvg_data: Dict, symbol: str) -> float:
-        """Calcula factor basado en confluencias técnicas"""
-        try:
-            confluences = 0
-            
-            # Obtener datos para análisis técnico
-            df_ohlc = self.data_manager.get_ohlc_data(symbol, 'H1', 100)
-            if df_ohlc is None:
-                return 0.5
-                
-            fvg_level = (fvg_data.get('high', 0) + fvg_data.get('low', 0)) / 2
-            
-            # 1. Confluencia con Fibonacci
-            recent_high = df_ohlc['high'].tail(50).max()
-            recent_low = df_ohlc['low'].tail(50).min()
-            fib_levels = self._calculate_fibonacci_levels(recent_high, recent_low)
-            
-            for level in fib_levels:
-                if abs(fvg_level - level) < (recent_high - recent_low) * 0.01:
-                    confluences += 1
-                    break
-                    
-            # 2. Confluencia con niveles de soporte/resistencia
-            pivot_levels = self._calculate_pivot_levels(df_ohlc)
-            for level in pivot_levels:
-                if abs(fvg_level - level) < (recent_high - recent_low) * 0.02:
-                    confluences += 1
-                    break
-                    
-            # 3. Confluencia con EMAs importantes
-            ema_20 = df_ohlc['close'].ewm(span=20).mean().iloc[-1]
-            ema_50 = df_ohlc['close'].ewm(span=50).mean().iloc[-1]
-            ema_200 = df_ohlc['close'].ewm(span=200).mean().iloc[-1]
-            
-            for ema in [ema_20, ema_50, ema_200]:
-                if abs(fvg_level - ema) < (recent_high - recent_low) * 0.015:
-                    confluences += 1
-                    break
-            
-            # Score basado en confluencias
-            if confluences >= 3:
-                return 1.0
-            elif confluences >= 2:
-                return 0.8
-            elif confluences >= 1:
-                return 0.6
-            else:
-                return 0.3
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando confluence_factor: {e}")
-            return 0.5
-
-    def _calculate_session_factor(self, fvg_data: Dict) -> float:
-        """Calcula factor basado en la sesión de trading"""
-        try:
-            fvg_time = fvg_data.get('start_time', datetime.now())
-            if isinstance(fvg_time, str):
-                fvg_time = pd.to_datetime(fvg_time)
-                
-            hour_utc = fvg_time.hour
+    def score_batch(self, batch: FVGBatch, bars: pd.DataFrame,
+                    price: Optional[float] = None, symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Scoring vectorizado de un lote de FVGs sobre un histórico de velas
+        
+        Cada FVG toma el contexto (ATR, EMAs, confluencias, volumen) de la
+        última vela anterior a su inicio, por lo que sirve para backtests y
+        estudios históricos de decenas de miles de FVGs.
+        
+        Args:
+            batch: Lote de FVGs (FVGBatch.from_dicts / from_frame)
+            bars: Velas H1 que cubren el período de los FVGs
+            price: Precio de referencia para la distancia (por defecto el último cierre)
+            symbol: Si se indica, el factor de sesión usa la tasa histórica de
+                llenado de SeasonalStats en los bins con muestra suficiente
             
-            # Sesiones de trading (UTC)
-            # London: 8-16, New York: 13-21, Tokyo: 0-8
-            if 8 <= hour_utc <= 11:  # London open
-                return 1.0
-            elif 13 <= hour_utc <= 16:  # London + NY overlap
-                return 1.0
-            elif 0 <= hour_utc <= 3:  # Tokyo
-                return 0.7
-            elif 16 <= hour_utc <= 21:  # NY only
-                return 0.8
-            else:  # Low activity
-                return 0.3
-                
-        except Exception as e:
-            self.logger.error(f"Error calculando session_factor: {e}")
-            return 0.5
+        Returns:
+            DataFrame con fvg_id, una columna por factor, score_total, calidad y confianza
+        """
+        context = context_for_batch(batch, build_bar_context(bars), price)
+        if symbol is not None:
+            fill_rates = self.seasonal_stats.fill_rates(symbol, np.nan_to_num(batch.start_time).astype(np.int64))
+            context['seasonal_fill_rate'] = np.where(np.isnan(batch.start_time), np.nan, fill_rates)
+        scores = score_quality(batch, context, self.weight_factors, self.quality_thresholds)
+        return score_frame(batch, scores)
 
-    def _determine_quality(self, score: float) -> FVGQuality:
-        """Determina la calidad basada en el score"""
-        if score >= self.quality_thresholds['ALTA']:
-            return FVGQuality.ALTA
-        elif score >= self.quality_thresholds['MEDIA']:
-            return FVGQuality.MEDIA
-        elif score >= self.quality_thresholds['BAJA']:
-            return FVGQuality.BAJA
-        else:
-            return FVGQuality.DESCARTABLE
+    def _live_context(self, symbol: str) -> Tuple[pd.DataFrame, Optional[float]]:
+        """Velas H1 y precio actual para el análisis en vivo (una sola consulta)"""
+        bars = self.data_manager.get_ohlc_data(symbol, 'H1', self.context_bars)
+        if bars is None:
+            bars = pd.DataFrame(columns=['datetime', 'open', 'high', 'low', 'close', 'volume'])
+        price = None
+        get_current_price = getattr(self.data_manager, 'get_current_price', None)
+        if get_current_price is not None:
+            price = get_current_price(symbol)
+        return bars, price
 
+    def _spread_confidence_factor(self, symbol: str) -> float:
+        """0.5 si el spread actual es anómalo según la microestructura de ticks, 1.0 si no"""
+        snapshot = self.microstructure.snapshot(symbol)
+        if snapshot is None:
+            return 1.0
+        gate = self.microstructure.spread_check(symbol, snapshot['spread'], self.max_spread_percentile)
+        return 1.0 if gate['allowed'] else 0.5
+    
     def _generate_recommendation(self, score: float, factors: Dict, quality: FVGQuality) -> str:
         """Genera recomendación basada en el análisis"""
         if quality == FVGQuality.ALTA:
@@ -442,78 +187,44 @@ class FVGQualityAnalyzer:
         else:
             return "FVG de calidad insuficiente - No recomendado para trading"
 
-    def _calculate_confidence(self, factors: Dict) -> float:
-        """Calcula nivel de confianza del análisis"""
-        # Confianza basada en la varianza de los factores
-        factor_values = list(factors.values())
-        if len(factor_values) == 0:
-            return 0.0
-            
-        mean_score = np.mean(factor_values)
-        std_score = np.std(factor_values)
-        
-        # Menor varianza = mayor confianza
-        confidence = 1.0 - min(std_score / mean_score if mean_score > 0 else 1.0, 1.0)
-        
-        return max(0.0, min(1.0, confidence))
-
-    def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calcula Average True Range"""
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        
-        true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-        return true_range.rolling(window=period).mean()
-
-    def _calculate_fibonacci_levels(self, high: float, low: float) -> List[float]:
-        """Calcula niveles de Fibonacci"""
-        diff = high - low
-        return [
-            low + diff * 0.236,
-            low + diff * 0.382,
-            low + diff * 0.500,
-            low + diff * 0.618,
-            low + diff * 0.786
-        ]
-
-    def _calculate_pivot_levels(self, df: pd.DataFrame) -> List[float]:
-        """Calcula niveles pivot de soporte y resistencia"""
-        recent_data = df.tail(20)
-        pivot = (recent_data['high'].iloc[-1] + recent_data['low'].iloc[-1] + recent_data['close'].iloc[-1]) / 3
-        
-        high = recent_data['high'].max()
-        low = recent_data['low'].min()
-        
-        s1 = 2 * pivot - high
-        r1 = 2 * pivot - low
-        s2 = pivot - (high - low)
-        r2 = pivot + (high - low)
-        
-        return [s2, s1, pivot, r1, r2]
-
-    def batch_analyze_fvgs(self, fvg_list: List[Dict], symbol: str = "EURUSD") -> List[FVGQualityScore]:
+    def batch_analyze_fvgs(self, fvg_list: List[Dict], symbol: str = "EURUSD",
+                           sort: bool = True) -> List[FVGQualityScore]:
         """
         Analiza una lista de FVGs en lote
         
         Args:
             fvg_list: Lista de FVGs a analizar
             symbol: Símbolo del instrumento
+            sort: Ordenar por score descendente
             
         Returns:
             Lista de FVGQualityScore ordenada por calidad
         """
         try:
-            results = []
+            if not fvg_list:
+                return []
             
-            for fvg in fvg_list:
-                quality_score = self.analyze_fvg_quality(fvg, symbol)
-                results.append(quality_score)
+            bars, price = self._live_context(symbol)
+            frame = self.score_batch(FVGBatch.from_dicts(fvg_list), bars, price, symbol)
+            confidence_factor = self._spread_confidence_factor(symbol)
             
-            # Ordenar por score descendente
-            results.sort(key=lambda x: x.score_total, reverse=True)
-            
-            self.logger.info(f"Análisis en lote completado: {len(results)} FVGs analizados")
+            results = []
+            for row in frame.itertuples(index=False):
+                calidad = FVGQuality(row.calidad)
+                factors = {name: float(getattr(row, name)) for name in FACTOR_NAMES}
+                results.append(FVGQualityScore(
+                    fvg_id=row.fvg_id,
+                    score_total=float(row.score_total),
+                    calidad=calidad,
+                    factores=factors,
+                    recomendacion=self._generate_recommendation(row.score_total, factors, calidad),
+                    confianza=float(row.confianza) * confidence_factor
+                ))
+            
+            if sort:
+                # Ordenar por score descendente
+                results.sort(key=lambda x: x.score_total, reverse=True)
+                self.logger.info(f"Análisis en lote completado: {len(results)} FVGs analizados")
             
             return results
             
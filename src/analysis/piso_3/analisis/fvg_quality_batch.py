@@ -0,0 +1,325 @@
+"""
+🏢 PISO 3 - OFICINA ANÁLISIS
+FVG Quality Batch - Scoring vectorizado de calidad de FVGs
+
+Motor de scoring de FVGQualityAnalyzer para lotes completos:
+
+- ``FVGBatch``: lote de FVGs como struct-of-arrays (un array por campo)
+- ``build_bar_context``: contexto por vela calculado una sola vez sobre
+  el histórico (ATR, EMAs, rangos, pivots, ratio de volumen)
+- ``context_for_batch``: asigna a cada FVG el contexto de su vela
+  (as-of join con ``searchsorted``)
+- ``score_quality``: los 7 factores, el total ponderado, la calidad y la
+  confianza de todo el lote en una pasada de NumPy
+
+El análisis en vivo de un solo FVG usa el mismo motor con un lote de 1.
+"""
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Configurar rutas
+current_dir = Path(__file__).parent
+project_root = current_dir.parents[3]
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src" / "core"))
+
+from src.core.session_calendar import SessionWindow, get_session_calendar
+
+# Sesiones UTC del factor de sesión (fin inclusivo, por prioridad) y su peso
+SESSION_FACTOR_WINDOWS = (
+    SessionWindow.hours('LONDON_OPEN', 8, 11),
+    SessionWindow.hours('LONDON_NY', 13, 16),
+    SessionWindow.hours('TOKYO', 0, 3),
+    SessionWindow.hours('NY', 17, 21),
+)
+SESSION_FACTORS = {'LONDON_OPEN': 1.0, 'LONDON_NY': 1.0, 'TOKYO': 0.7, 'NY': 0.8}
+OFF_SESSION_FACTOR = 0.3  # Baja actividad fuera de sesión
+
+FACTOR_NAMES = (
+    'size_factor', 'speed_factor', 'volume_factor', 'context_factor',
+    'distance_factor', 'confluence_factor', 'session_factor'
+)
+
+# Valor neutro de un factor cuando falta su contexto
+NEUTRAL_FACTOR = 0.5
+
+QUALITY_LEVELS = np.array(['ALTA', 'MEDIA', 'BAJA', 'DESCARTABLE'], dtype=object)
+
+FIB_RATIOS = np.array([0.236, 0.382, 0.500, 0.618, 0.786])
+
+
+def _to_epoch(values: Any) -> np.ndarray:
+    """Columna de instantes → segundos (float, NaN si falta)"""
+    times = pd.to_datetime(pd.Series(values), errors='coerce')
+    if getattr(times.dt, 'tz', None) is not None:
+        times = times.dt.tz_convert('UTC').dt.tz_localize(None)
+    epochs = times.to_numpy(dtype='datetime64[s]').astype(np.int64).astype(float)
+    epochs[times.isna().to_numpy()] = np.nan
+    return epochs
+
+
+@dataclass
+class FVGBatch:
+    """Lote de FVGs en formato struct-of-arrays"""
+    ids: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    bullish: np.ndarray
+    start_time: np.ndarray  # epoch (s)
+    end_time: np.ndarray    # epoch (s)
+
+    def __len__(self) -> int:
+        return len(self.high)
+
+    @property
+    def size(self) -> np.ndarray:
+        return np.abs(self.high - self.low)
+
+    @property
+    def center(self) -> np.ndarray:
+        return (self.high + self.low) / 2
+
+    @classmethod
+    def from_dicts(cls, fvgs: Sequence[Dict], now: Optional[pd.Timestamp] = None) -> 'FVGBatch':
+        """Construir desde dicts de FVG (claves id, high, low, type, start_time, end_time)"""
+        now = now if now is not None else pd.Timestamp.now()
+        return cls(
+            ids=np.array([f.get('id', 'unknown') for f in fvgs], dtype=object),
+            high=np.array([f.get('high', 0.0) for f in fvgs], dtype=float),
+            low=np.array([f.get('low', 0.0) for f in fvgs], dtype=float),
+            bullish=np.array([f.get('type', 'BULLISH') == 'BULLISH' for f in fvgs], dtype=bool),
+            start_time=_to_epoch([f.get('start_time', now) for f in fvgs]),
+            end_time=_to_epoch([f.get('end_time', now) for f in fvgs])
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'FVGBatch':
+        """Construir desde un DataFrame con columnas high, low, type, start_time, end_time"""
+        n = len(df)
+        return cls(
+            ids=df['id'].to_numpy(dtype=object) if 'id' in df else np.arange(n).astype(object),
+            high=df['high'].to_numpy(dtype=float),
+            low=df['low'].to_numpy(dtype=float),
+            bullish=(df['type'] == 'BULLISH').to_numpy() if 'type' in df else np.ones(n, dtype=bool),
+            start_time=_to_epoch(df['start_time']),
+            end_time=_to_epoch(df['end_time']) if 'end_time' in df else _to_epoch(df['start_time'])
+        )
+
+
+# ============================================================================
+# 📊 CONTEXTO POR VELA
+# ============================================================================
+
+def _atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    high_low = df['high'] - df['low']
+    high_close = np.abs(df['high'] - df['close'].shift())
+    low_close = np.abs(df['low'] - df['close'].shift())
+    true_range = np.maximum(high_low, np.maximum(high_close, low_close))
+    return true_range.rolling(window=period).mean()
+
+
+def build_bar_context(bars: pd.DataFrame, atr_period: int = 14, volume_window: int = 20) -> pd.DataFrame:
+    """
+    Precalcular el contexto de calidad de cada vela del histórico
+
+    Args:
+        bars: Velas con datetime (o time), high, low, close y opcionalmente volume
+        atr_period: Período del ATR
+        volume_window: Ventana del volumen medio para el ratio de volumen
+
+    Returns:
+        DataFrame alineado con ``bars`` con las columnas de contexto
+    """
+    times = bars['datetime'] if 'datetime' in bars else pd.to_datetime(bars['time'], unit='s')
+    close = bars['close']
+    context = pd.DataFrame({
+        'time': _to_epoch(times),
+        'close': close.to_numpy(dtype=float),
+        'atr': _atr(bars, atr_period).to_numpy(),
+        'ema_20': close.ewm(span=20).mean().to_numpy(),
+        'ema_50': close.ewm(span=50).mean().to_numpy(),
+        'ema_200': close.ewm(span=200).mean().to_numpy(),
+        'recent_high': bars['high'].rolling(50, min_periods=1).max().to_numpy(),
+        'recent_low': bars['low'].rolling(50, min_periods=1).min().to_numpy(),
+        'pivot_high': bars['high'].rolling(20, min_periods=1).max().to_numpy(),
+        'pivot_low': bars['low'].rolling(20, min_periods=1).min().to_numpy(),
+        'pivot': ((bars['high'] + bars['low'] + close) / 3).to_numpy()
+    })
+    volume_col = 'volume' if 'volume' in bars else ('tick_volume' if 'tick_volume' in bars else None)
+    if volume_col:
+        volume = bars[volume_col].astype(float)
+        avg_volume = volume.rolling(volume_window, min_periods=1).mean()
+        context['volume_ratio'] = (volume / avg_volume.replace(0, np.nan)).to_numpy()
+    else:
+        context['volume_ratio'] = np.nan
+    return context
+
+
+def context_for_batch(batch: FVGBatch, bar_context: pd.DataFrame,
+                      price: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Contexto de cada FVG: la última vela con tiempo <= inicio del FVG
+
+    Args:
+        batch: Lote de FVGs
+        bar_context: Resultado de ``build_bar_context``
+        price: Precio de referencia (escalar o uno por FVG) para el factor
+            de distancia; por defecto el último cierre del histórico
+
+    Returns:
+        dict: Arrays de contexto alineados con el lote (NaN sin vela)
+    """
+    bar_times = bar_context['time'].to_numpy()
+    pos = np.searchsorted(bar_times, np.nan_to_num(batch.start_time, nan=-np.inf), side='right') - 1
+    valid = pos >= 0
+    idx = np.clip(pos, 0, None)
+
+    context = {}
+    for column in bar_context.columns:
+        if column == 'time':
+            continue
+        values = bar_context[column].to_numpy(dtype=float)[idx] if len(bar_times) else np.full(len(batch), np.nan)
+        context[column] = np.where(valid, values, np.nan)
+    if price is None:
+        price = bar_context['close'].iloc[-1] if len(bar_times) else np.nan
+    context['price'] = np.broadcast_to(np.asarray(price, dtype=float), (len(batch),))
+    return context
+
+
+# ============================================================================
+# 🎯 SCORING VECTORIZADO
+# ============================================================================
+
+def _select(conditions: List[np.ndarray], choices: List[float], default: float,
+            missing: np.ndarray) -> np.ndarray:
+    return np.where(missing, NEUTRAL_FACTOR, np.select(conditions, choices, default))
+
+
+def score_quality(batch: FVGBatch, context: Dict[str, np.ndarray],
+                  weights: Dict[str, float], thresholds: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """
+    Calcular factores, score total, calidad y confianza de todo el lote
+
+    Args:
+        batch: Lote de FVGs
+        context: Arrays de contexto por FVG (``context_for_batch``)
+        weights: Peso de cada factor
+        thresholds: Umbrales ALTA / MEDIA / BAJA
+
+    Returns:
+        dict: Una columna por factor más score_total, calidad y confianza
+    """
+    size = batch.size
+    atr = context['atr']
+    atr_missing = ~(atr > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        size_ratio = np.where(atr_missing, 0.0, size / atr)
+        distance_ratio = np.where(atr_missing, 0.0, np.abs(context['price'] - batch.center) / atr)
+        minutes = (batch.end_time - batch.start_time) / 60
+        speed = np.where(minutes > 0, size / minutes, 0.0)
+
+    factors: Dict[str, np.ndarray] = {}
+
+    # 1. Tamaño relativo al ATR: óptimo entre 0.3 y 1.5 ATR
+    factors['size_factor'] = _select(
+        [size_ratio < 0.1, size_ratio < 0.3, size_ratio <= 1.5, size_ratio <= 3.0],
+        [0.1, 0.4, 1.0, 0.7], 0.3, np.isnan(atr)
+    )
+
+    # 2. Velocidad de formación (precio por minuto)
+    factors['speed_factor'] = _select(
+        [speed > 0.001, speed > 0.0005, speed > 0.0002],
+        [1.0, 0.8, 0.6], 0.3, np.isnan(speed)
+    )
+
+    # 3. Volumen relativo en la formación
+    volume_ratio = context['volume_ratio']
+    factors['volume_factor'] = _select(
+        [volume_ratio > 2.0, volume_ratio > 1.5, volume_ratio > 1.0],
+        [1.0, 0.8, 0.6], 0.3, np.isnan(volume_ratio)
+    )
+
+    # 4. Contexto de tendencia (a favor / débil / en contra)
+    price, ema_20, ema_50 = context['close'], context['ema_20'], context['ema_50']
+    strong = np.where(batch.bullish, (price > ema_20) & (ema_20 > ema_50), (price < ema_20) & (ema_20 < ema_50))
+    weak = np.where(batch.bullish, price > ema_20, price < ema_20)
+    factors['context_factor'] = _select([strong, weak], [1.0, 0.7], 0.3, np.isnan(ema_50))
+
+    # 5. Distancia al precio de referencia en ATRs
+    factors['distance_factor'] = _select(
+        [distance_ratio < 0.2, distance_ratio <= 3.0, distance_ratio <= 5.0],
+        [0.3, 1.0, 0.6], 0.2, atr_missing | np.isnan(context['price'])
+    )
+
+    # 6. Confluencias: Fibonacci, pivots y EMAs
+    level = batch.center[:, None]
+    recent_range = (context['recent_high'] - context['recent_low'])[:, None]
+    fib_levels = context['recent_low'][:, None] + recent_range * FIB_RATIOS
+    pivot, p_high, p_low = context['pivot'], context['pivot_high'], context['pivot_low']
+    pivot_levels = np.column_stack([
+        pivot - (p_high - p_low), 2 * pivot - p_high, pivot, 2 * pivot - p_low, pivot + (p_high - p_low)
+    ])
+    ema_levels = np.column_stack([context['ema_20'], context['ema_50'], context['ema_200']])
+    confluences = (
+        (np.abs(level - fib_levels) < recent_range * 0.01).any(axis=1).astype(int)
+        + (np.abs(level - pivot_levels) < recent_range * 0.02).any(axis=1)
+        + (np.abs(level - ema_levels) < recent_range * 0.015).any(axis=1)
+    )
+    factors['confluence_factor'] = _select(
+        [confluences >= 3, confluences >= 2, confluences >= 1],
+        [1.0, 0.8, 0.6], 0.3, np.isnan(context['recent_high'])
+    )
+
+    # 7. Sesión de trading
+    sessions = session_labels(batch.start_time)
+    factors['session_factor'] = np.array(
+        [SESSION_FACTORS.get(s, OFF_SESSION_FACTOR) for s in sessions], dtype=float
+    ) if len(sessions) else np.zeros(0)
+    seasonal = context.get('seasonal_fill_rate')
+    if seasonal is not None:
+        # Tasa histórica de llenado del bin de formación cuando hay muestra suficiente
+        factors['session_factor'] = np.where(np.isnan(seasonal), factors['session_factor'], seasonal)
+
+    # Total ponderado, calidad y confianza (menor dispersión = más confianza)
+    matrix = np.column_stack([factors[name] for name in FACTOR_NAMES]) if len(batch) else np.zeros((0, 7))
+    weight_vector = np.array([weights.get(name, 0.0) for name in FACTOR_NAMES])
+    score_total = matrix @ weight_vector
+
+    level_index = np.select(
+        [score_total >= thresholds['ALTA'], score_total >= thresholds['MEDIA'], score_total >= thresholds['BAJA']],
+        [0, 1, 2], 3
+    )
+    mean = matrix.mean(axis=1) if len(batch) else np.zeros(0)
+    std = matrix.std(axis=1) if len(batch) else np.zeros(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dispersion = np.where(mean > 0, std / mean, 1.0)
+    confidence = np.clip(1.0 - np.minimum(dispersion, 1.0), 0.0, 1.0)
+
+    result = dict(factors)
+    result['score_total'] = score_total
+    result['calidad'] = QUALITY_LEVELS[level_index] if len(batch) else np.zeros(0, dtype=object)
+    result['confianza'] = confidence
+    return result
+
+
+def session_labels(epochs: np.ndarray) -> np.ndarray:
+    """Sesión del factor de sesión para cada instante (None fuera de sesión)"""
+    calendar = get_session_calendar(SESSION_FACTOR_WINDOWS)
+    valid = ~np.isnan(epochs)
+    labels = np.full(len(epochs), None, dtype=object)
+    if valid.any():
+        labels[valid] = calendar.label(epochs[valid].astype(np.int64))
+    return labels
+
+
+def score_frame(batch: FVGBatch, scores: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Resultado de ``score_quality`` como DataFrame indexado por id de FVG"""
+    frame = pd.DataFrame(scores)
+    frame.insert(0, 'fvg_id', batch.ids)
+    return frame
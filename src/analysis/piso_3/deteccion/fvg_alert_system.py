@@ -10,7 +10,8 @@ Estado: Sistema de Notificaciones
 import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass, field
 from enum import Enum
@@ -18,6 +19,15 @@ from collections import deque
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from pathlib import Path
+
+# Configurar imports
+current_dir = Path(__file__).parent
+project_root = current_dir.parent.parent.parent.parent
+sys.path.insert(0, str((project_root / "src" / "core").absolute()))
+
+from event_bus import get_event_bus
+from alert_throttle import AlertThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -257,18 +267,28 @@ class FVGAlertSystem:
             'min_priority': AlertPriority.LOW,
             'enabled_types': [t.value for t in AlertType],
             'throttling_enabled': True,
-            'history_max_size': 1000
+            'history_max_size': 1000,
+            'await_delivery': False,        # True = esperar a que terminen los canales
+            'channel_queue_size': 500,
+            'channel_timeout_seconds': 15.0
         }
         
         self.config = {**default_config, **(config or {})}
         
-        # Canales de alerta
+        # Canales de alerta (cada uno con su cola en el bus de eventos compartido)
         self.channels: List[AlertChannel] = []
+        self.event_bus = get_event_bus()
+        self.bus_namespace = self.event_bus.reserve_namespace("fvg_alerts")
         
         # Historial y throttling
         self.alert_history = deque(maxlen=self.config['history_max_size'])
-        self.sent_alerts = deque(maxlen=100)  # Para throttling
-        self.last_alerts = {}  # Para supresión de duplicados
+        # Throttling y supresión de duplicados en O(1) (ventana circular + claves con caducidad)
+        self.rate_limiter = AlertThrottle(max_events=self.config['max_alerts_per_minute'],
+                                          window_seconds=60.0)
+        self.duplicate_filter = AlertThrottle(
+            dedupe_seconds=self.config['duplicate_suppression_minutes'] * 60,
+            max_keys=self.config['history_max_size']
+        )
         
         # Métricas
         self.metrics = {
@@ -302,13 +322,23 @@ class FVGAlertSystem:
     def add_channel(self, channel: AlertChannel):
         """Agrega un canal de alertas"""
         self.channels.append(channel)
+        self.event_bus.register_channel(
+            self._bus_channel_name(channel.name),
+            channel.send_alert,
+            max_queue=self.config['channel_queue_size'],
+            timeout=self.config['channel_timeout_seconds']
+        )
         logger.info(f"Canal agregado: {channel.name}")
     
     def remove_channel(self, channel_name: str):
         """Remueve un canal por nombre"""
         self.channels = [c for c in self.channels if c.name != channel_name]
+        self.event_bus.unregister_channel(self._bus_channel_name(channel_name))
         logger.info(f"Canal removido: {channel_name}")
     
+    def _bus_channel_name(self, channel_name: str) -> str:
+        return f"{self.bus_namespace}.{channel_name}"
+    
     async def send_alert(self, 
                         alert_type: AlertType,
                         title: str,
@@ -357,35 +387,29 @@ class FVGAlertSystem:
             logger.debug(f"Alerta suprimida: {alert_id}")
             return alert_id
         
-        # Enviar por todos los canales
-        send_results = []
-        for channel in self.channels:
-            if channel.enabled:
-                try:
-                    success = await channel.send_alert(alert)
-                    send_results.append(success)
-                    if success:
-                        alert.sent = True
-                except Exception as e:
-                    logger.error(f"Error enviando alerta por {channel.name}: {e}")
-                    send_results.append(False)
-        
-        # Actualizar métricas
-        if any(send_results):
-            self.metrics['sent_alerts'] += 1
-            self.sent_alerts.append(alert.timestamp)
-        else:
-            self.metrics['failed_sends'] += 1
+        # Publicar en el bus: fan-out concurrente, CRITICAL se atiende primero
+        targets = [self._bus_channel_name(c.name) for c in self.channels if c.enabled]
+        delivery = self.event_bus.publish(alert, priority, channels=targets)
+        delivery.add_done_callback(lambda future: self._on_delivery(alert, future))
+        self.rate_limiter.record()
+        self.duplicate_filter.record(self._dedupe_key(alert))
+        if self.config['await_delivery']:
+            await asyncio.wrap_future(delivery)
         
         # Agregar al historial
         self.alert_history.append(alert)
         
-        # Actualizar last_alerts para supresión de duplicados
-        alert_key = f"{alert_type.value}_{symbol}_{timeframe or 'ALL'}"
-        self.last_alerts[alert_key] = alert.timestamp
-        
         return alert_id
     
+    def _on_delivery(self, alert: Alert, future):
+        """Actualiza métricas cuando todos los canales terminaron"""
+        results = future.result()
+        if any(results.values()):
+            alert.sent = True
+            self.metrics['sent_alerts'] += 1
+        else:
+            self.metrics['failed_sends'] += 1
+    
     def _should_send_alert(self, alert: Alert) -> bool:
         """Verifica si se debe enviar la alerta"""
         # Verificar prioridad mínima
@@ -419,25 +443,14 @@ class FVGAlertSystem:
     
     def _check_throttling(self) -> bool:
         """Verifica límites de throttling"""
-        now = datetime.now()
-        one_minute_ago = now - timedelta(minutes=1)
-        
-        # Contar alertas en el último minuto
-        recent_alerts = [t for t in self.sent_alerts if t > one_minute_ago]
-        
-        return len(recent_alerts) < self.config['max_alerts_per_minute']
+        return self.rate_limiter.check() is None
     
     def _is_duplicate_alert(self, alert: Alert) -> bool:
         """Verifica si es una alerta duplicada"""
-        alert_key = f"{alert.type.value}_{alert.symbol}_{alert.timeframe or 'ALL'}"
-        
-        if alert_key in self.last_alerts:
-            last_time = self.last_alerts[alert_key]
-            time_diff = (alert.timestamp - last_time).total_seconds() / 60
-            
-            return time_diff < self.config['duplicate_suppression_minutes']
-        
-        return False
+        return self.duplicate_filter.check(self._dedupe_key(alert)) == 'duplicate'
+    
+    def _dedupe_key(self, alert: Alert) -> str:
+        return f"{alert.type.value}_{alert.symbol}_{alert.timeframe or 'ALL'}"
     
     def _generate_alert_id(self) -> str:
         """Genera ID único para alerta"""
@@ -496,7 +509,10 @@ class FVGAlertSystem:
             **self.metrics,
             'active_channels': len([c for c in self.channels if c.enabled]),
             'total_channels': len(self.channels),
-            'history_size': len(self.alert_history)
+            'history_size': len(self.alert_history),
+            'channel_queues': self.event_bus.get_stats(prefix=self.bus_namespace)['channels'],
+            'throttling': self.rate_limiter.get_stats(),
+            'duplicates': self.duplicate_filter.get_stats()
         }
     
     def configure(self, **kwargs):
@@ -505,6 +521,8 @@ class FVGAlertSystem:
             if key in self.config:
                 self.config[key] = value
                 logger.info(f"Configuración actualizada: {key} = {value}")
+        self.rate_limiter.max_events = self.config['max_alerts_per_minute']
+        self.duplicate_filter.dedupe_seconds = self.config['duplicate_suppression_minutes'] * 60
 
 # Función de utilidad para testing
 async def test_alert_system():
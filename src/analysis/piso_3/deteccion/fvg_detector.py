@@ -16,6 +16,11 @@ from collections import deque
 import asyncio
 import logging
 
+try:
+    from src.core.seasonal_stats import get_seasonal_stats
+except ImportError:
+    from seasonal_stats import get_seasonal_stats
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -440,6 +445,9 @@ class RealTimeFVGDetector:
         self.on_fvg_detected = None
         self.on_fvg_filled = None
         
+        # Formaciones y llenados alimentan las estadísticas estacionales compartidas
+        self.seasonal_stats = get_seasonal_stats()
+        
         # Inicializar buffers
         for symbol in self.symbols:
             for timeframe in self.timeframes:
@@ -504,6 +512,9 @@ class RealTimeFVGDetector:
                 if self.on_fvg_detected:
                     await self.on_fvg_detected(bearish_fvg)
         
+        if new_fvgs:
+            self.seasonal_stats.record_fvgs(symbol, [fvg.formation_time for fvg in new_fvgs])
+        
         # Actualizar estado de FVGs existentes
         await self._update_existing_fvgs(symbol, timeframe, enriched_candle)
         
@@ -525,6 +536,7 @@ class RealTimeFVGDetector:
             if self._is_fvg_filled(fvg, current_candle):
                 fvg.status = 'FILLED'
                 fill_time = self.detector._parse_candle_time(current_candle)
+                self.seasonal_stats.record_fvg_fill(symbol, fvg.formation_time)
                 
                 # Notificar llenado
                 if self.on_fvg_filled:
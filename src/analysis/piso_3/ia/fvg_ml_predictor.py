@@ -35,6 +35,15 @@ except ImportError:
 # Imports centralizados
 from data_manager import DataManager
 from logger_manager import LoggerManager
+from src.core.session_calendar import SessionWindow, get_session_calendar
+from src.core.seasonal_stats import get_seasonal_stats
+
+# Sesiones UTC del factor de sesión (fin inclusivo) y su peso
+SESSION_FACTOR_WINDOWS = (
+    SessionWindow.hours('LONDON_NY', 8, 16),
+    SessionWindow.hours('TOKYO', 0, 7),
+)
+SESSION_FACTORS = {'LONDON_NY': 1.0, 'TOKYO': 0.7}
 
 class FVGPrediction(Enum):
     """Tipos de predicción para FVGs"""
@@ -68,6 +77,7 @@ class FVGMLPredictor:
     def __init__(self, db_path: Optional[str] = None):
         self.logger = LoggerManager().get_logger("FVGMLPredictor")
         self.data_manager = DataManager()
+        self.seasonal_stats = get_seasonal_stats()
         
         # Rutas de modelos
         self.models_dir = project_root / "data" / "ml" / "models"
@@ -446,15 +456,28 @@ class FVGMLPredictor:
             # Regla simple: FVGs más pequeños tienen mayor probabilidad de llenado
             if size_ratio < 0.5:
                 probability = 0.8
-                prediction = FVGPrediction.FILL_HIGH
             elif size_ratio < 1.0:
                 probability = 0.6
-                prediction = FVGPrediction.FILL_MEDIUM
             elif size_ratio < 2.0:
                 probability = 0.4
-                prediction = FVGPrediction.FILL_LOW
             else:
                 probability = 0.2
+            features_used = {'size_ratio': size_ratio}
+            
+            # Promediar con la tasa histórica de llenado del bin de formación
+            formation_time = fvg_data.get('start_time') or datetime.now()
+            seasonal_fill_rate = float(self.seasonal_stats.fill_rates(symbol, [formation_time])[0])
+            if not np.isnan(seasonal_fill_rate):
+                probability = (probability + seasonal_fill_rate) / 2
+                features_used['seasonal_fill_rate'] = seasonal_fill_rate
+            
+            if probability >= 0.75:
+                prediction = FVGPrediction.FILL_HIGH
+            elif probability >= 0.50:
+                prediction = FVGPrediction.FILL_MEDIUM
+            elif probability >= 0.25:
+                prediction = FVGPrediction.FILL_LOW
+            else:
                 prediction = FVGPrediction.NO_FILL
             
             return FVGMLResult(
@@ -462,7 +485,7 @@ class FVGMLPredictor:
                 prediction=prediction,
                 probability=probability,
                 confidence=0.5,
-                features_used={'size_ratio': size_ratio},
+                features_used=features_used,
                 model_version="fallback"
             )
             
@@ -553,13 +576,8 @@ class FVGMLPredictor:
     def _calculate_session_factor(self, timestamp: datetime) -> float:
         """Calcula factor de sesión"""
         try:
-            hour = timestamp.hour
-            if 8 <= hour <= 16:  # London + NY
-                return 1.0
-            elif 0 <= hour <= 8:  # Tokyo
-                return 0.7
-            else:
-                return 0.5
+            session = get_session_calendar(SESSION_FACTOR_WINDOWS).session_at(timestamp)
+            return SESSION_FACTORS.get(session, 0.5)
         except:
             return 0.5
 
@@ -4,6 +4,7 @@ Sistema inteligente de notificaciones para el Piso 3
 """
 
 import json
+import sys
 import smtplib
 import requests
 import logging
@@ -13,6 +14,13 @@ from email.mime.multipart import MimeMultipart
 from typing import Dict, List, Optional, Callable
 from pathlib import Path
 
+# Configurar imports
+current_dir = Path(__file__).parent
+project_root = current_dir.parent.parent.parent.parent
+sys.path.insert(0, str((project_root / "src" / "core").absolute()))
+
+from event_bus import get_event_bus
+
 class AlertSystem:
     """
     🔔 SISTEMA DE ALERTAS AVANZADO
@@ -48,6 +56,10 @@ class AlertSystem:
         
         self.logger = logging.getLogger(__name__)
         
+        # Bus de eventos compartido: cada canal envía desde su propia cola
+        self.event_bus = get_event_bus()
+        self.bus_namespace = self.event_bus.reserve_namespace("piso3_alerts")
+        
         # Inicializar canales y plantillas
         self._initialize_channels()
         self._initialize_templates()
@@ -223,7 +235,8 @@ class AlertSystem:
             'error_count': self.alert_stats['errors'],
             'last_alert': self.alert_stats['last_alert'],
             'active_filters': len(self.filters),
-            'rate_limit_status': self._get_rate_limit_status()
+            'rate_limit_status': self._get_rate_limit_status(),
+            'channel_queues': self.event_bus.get_stats(prefix=self.bus_namespace)['channels']
         }
     
     def configure_email(self, smtp_server, smtp_port, username, password, recipients):
@@ -271,7 +284,8 @@ class AlertSystem:
             'timestamp': alert_data.get('timestamp', datetime.now()),
             'source': alert_data.get('source', 'UNKNOWN'),
             'data': alert_data.get('data', {}),
-            'channels': alert_data.get('channels', list(self.channels.keys()))
+            'channels': alert_data.get('channels', [name for name, channel_config in self.config['channels'].items()
+                                                    if channel_config.get('enabled', False)])
         }
         
         # Validaciones básicas
@@ -357,30 +371,34 @@ class AlertSystem:
         return alert
     
     def _send_to_channels(self, alert):
-        """Envía alerta a todos los canales habilitados"""
+        """
+        Publica la alerta en el bus para todos los canales habilitados
         
-        success = False
+        Los canales se atienden en paralelo desde sus propias colas; un
+        webhook o SMTP lento no bloquea al llamador.
         
-        for channel_name, channel_config in self.config['channels'].items():
-            if not channel_config.get('enabled', False):
-                continue
-            
-            try:
-                if channel_name == 'console':
-                    self._send_console(alert, channel_config)
-                elif channel_name == 'email':
-                    self._send_email(alert, channel_config)
-                elif channel_name == 'discord':
-                    self._send_discord(alert, channel_config)
-                elif channel_name == 'telegram':
-                    self._send_telegram(alert, channel_config)
-                
-                success = True
-                
-            except Exception as e:
-                self.logger.error(f"Error enviando a {channel_name}: {e}")
+        Returns:
+            bool: True si al menos un canal aceptó la alerta
+        """
+        
+        targets = [self.channels[channel_name]
+                   for channel_name, channel_config in self.config['channels'].items()
+                   if channel_config.get('enabled', False) and channel_name in self.channels]
+        
+        if not targets:
+            return False
+        
+        delivery = self.event_bus.publish(alert, alert['priority'], channels=targets)
+        delivery.add_done_callback(self._on_delivery)
+        return True
+    
+    def _on_delivery(self, future):
+        """Contabiliza los canales que fallaron al entregar"""
         
-        return success
+        failed = [name for name, success in future.result().items() if not success]
+        if failed:
+            self.alert_stats['errors'] += len(failed)
+            self.logger.error(f"Error enviando a {', '.join(failed)}")
     
     def _send_console(self, alert, config):
         """Envía alerta a consola"""
@@ -504,9 +522,23 @@ class AlertSystem:
             response.raise_for_status()
     
     def _initialize_channels(self):
-        """Inicializa canales de notificación"""
-        # Implementación básica - se expande según necesidades
-        pass
+        """Registra un canal del bus por cada canal de notificación"""
+        
+        senders = {
+            'console': self._send_console,
+            'email': self._send_email,
+            'discord': self._send_discord,
+            'telegram': self._send_telegram
+        }
+        
+        for channel_name, sender in senders.items():
+            bus_name = f"{self.bus_namespace}.{channel_name}"
+            # La configuración se lee al entregar: configure_* aplica sin re-registrar
+            self.event_bus.register_channel(
+                bus_name,
+                lambda alert, name=channel_name, send=sender: send(alert, self.config['channels'][name])
+            )
+            self.channels[channel_name] = bus_name
     
     def _initialize_templates(self):
         """Inicializa plantillas de mensajes"""
@@ -6,11 +6,15 @@ Sistema Orquestador del Piso 3 - Coordinación completa de FVG Analysis + ML + T
 import sys
 from pathlib import Path
 import asyncio
+import threading
+import time
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any
+from dataclasses import dataclass, field
 import json
 
 # Configurar rutas
@@ -23,6 +27,7 @@ sys.path.insert(0, str(project_root / "src" / "analysis" / "piso_3"))
 # Imports centralizados
 from data_manager import DataManager
 from logger_manager import LoggerManager
+from live_trading.order_pipeline import LatencyHistogram
 
 # Imports del Piso 3
 try:
@@ -49,6 +54,54 @@ class FVGProcessingResult:
     timestamp: datetime
     status: str
 
+
+@dataclass
+class PipelineItem:
+    """Elemento en tránsito entre etapas del pipeline"""
+    symbol: str
+    payload: Any
+    result: Optional[FVGProcessingResult] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PipelineStage:
+    """
+    Etapa del pipeline con cola acotada y métricas propias
+
+    Args:
+        name: Nombre de la etapa
+        handler: Callable(item) → lista de items para la etapa siguiente
+        executor: Pool donde se ejecuta el handler (None = en el event loop)
+        workers: Consumidores concurrentes de la cola
+        max_queue: Tamaño máximo de la cola de entrada (backpressure)
+    """
+
+    def __init__(self, name: str, handler: Callable[[PipelineItem], List[PipelineItem]],
+                 executor: Optional[ThreadPoolExecutor] = None, workers: int = 1,
+                 max_queue: int = 100):
+        self.name = name
+        self.handler = handler
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue: Optional[asyncio.Queue] = None
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.stats = {'processed': 0, 'emitted': 0, 'errors': 0, 'max_depth': 0}
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['queue_depth'] = self.depth()
+        stats['queue_size'] = self.max_queue
+        stats['workers'] = self.workers
+        stats['latency'] = self.latency.to_dict()
+        stats['queue_wait'] = self.queue_wait.to_dict()
+        return stats
+
 class SystemOrchestrator:
     """
     Orquestador central del Piso 3
@@ -60,6 +113,7 @@ class SystemOrchestrator:
     4. Genera señales de trading
     5. Monitorea rendimiento
     6. Gestiona pipeline completo
+    7. Procesa N símbolos en paralelo con etapas desacopladas por colas
     """
     
     def __init__(self):
@@ -92,56 +146,255 @@ class SystemOrchestrator:
             'processing_interval_seconds': 30,
             'enable_quality_filter': True,
             'enable_ml_filter': True,
-            'enable_signal_generation': True
+            'enable_signal_generation': True,
+            'symbols': ['EURUSD'],
+            'timeframe': 'M15',
+            'bars_per_fetch': 100,
+            'incremental_bars': 10,
+            'stage_queue_size': 100,
+            'cpu_workers': 4,
+            'max_tracked_fvg_ids': 5000
         }
         
+        # Pipeline por etapas (se crea al arrancar, dentro del event loop)
+        self.stages: List[PipelineStage] = []
+        self._cpu_pool: Optional[ThreadPoolExecutor] = None
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        
+        # Detección incremental: última vela cerrada procesada e IDs ya vistos
+        self._last_bar_time: Dict[str, pd.Timestamp] = {}
+        self._seen_fvg_ids: "OrderedDict[str, bool]" = OrderedDict()
+        self._seen_lock = threading.Lock()
+        
         self.logger.info("SystemOrchestrator inicializado")
 
-    async def start_processing_pipeline(self, symbol: str = "EURUSD"):
+    async def start_processing_pipeline(self, symbol: Optional[str] = None, symbols: Optional[List[str]] = None):
         """
         Inicia el pipeline completo de procesamiento FVG
         
+        Pipeline por etapas con colas acotadas entre ellas:
+        fetch (por símbolo) → detección → calidad → ML → señal
+        
         Args:
             symbol: Símbolo del instrumento a procesar
+            symbols: Lista de símbolos a procesar en paralelo (sustituye a symbol)
+            
+        Sin argumentos se procesan los símbolos de ``config['symbols']``.
         """
+        symbols = self._resolve_symbols(symbol, symbols)
+        tasks: List[asyncio.Task] = []
+        
         try:
             self.is_running = True
-            self.logger.info(f"🏢 PISO 3 - Pipeline iniciado para {symbol}")
+            self._build_stages()
+            self.logger.info(f"🏢 PISO 3 - Pipeline iniciado para {', '.join(symbols)}")
             
+            # Consumidores de cada etapa
+            for i, stage in enumerate(self.stages):
+                next_stage = self.stages[i + 1] if i + 1 < len(self.stages) else None
+                for _ in range(stage.workers):
+                    tasks.append(asyncio.create_task(self._stage_worker(stage, next_stage)))
+            
+            # Productores: un ciclo de obtención de velas por símbolo
+            tasks.extend(asyncio.create_task(self._symbol_producer(s)) for s in symbols)
+            
+            # Métricas y estado del sistema
             while self.is_running:
-                start_time = datetime.now()
-                
-                # 1. Detectar nuevos FVGs
-                new_fvgs = await self._detect_new_fvgs(symbol)
-                
-                if new_fvgs:
-                    self.logger.info(f"Detectados {len(new_fvgs)} nuevos FVGs")
-                    
-                    # 2. Procesar cada FVG a través del pipeline
-                    for fvg_data in new_fvgs:
-                        result = await self._process_fvg_pipeline(fvg_data, symbol)
-                        if result:
-                            self.results_history.append(result)
-                            
-                            # Limpiar historial (mantener últimos 1000)
-                            if len(self.results_history) > 1000:
-                                self.results_history = self.results_history[-1000:]
-                
-                # 3. Actualizar métricas de rendimiento
+                await asyncio.sleep(self.config['processing_interval_seconds'])
                 self._update_performance_metrics()
-                
-                # 4. Log de estado del sistema
                 self._log_system_status()
-                
-                # Esperar antes del siguiente ciclo
-                processing_time = (datetime.now() - start_time).total_seconds()
-                sleep_time = max(0, self.config['processing_interval_seconds'] - processing_time)
-                
-                await asyncio.sleep(sleep_time)
-                
+            
         except Exception as e:
             self.logger.error(f"Error en pipeline de procesamiento: {e}")
             self.is_running = False
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _resolve_symbols(self, symbol: Optional[str] = None, symbols: Optional[List[str]] = None) -> List[str]:
+        """Símbolos a procesar: los argumentos explícitos tienen prioridad sobre la configuración"""
+        return list(symbols or ([symbol] if symbol else self.config['symbols']))
+
+    # ========================================================================
+    # 🏭 PIPELINE POR ETAPAS
+    # ========================================================================
+
+    def _build_stages(self):
+        """Crea las etapas y sus colas acotadas en el event loop actual"""
+        queue_size = self.config['stage_queue_size']
+        workers = self.config['cpu_workers']
+        
+        # Detección y scoring ML son CPU: pool dedicado. Calidad y señal
+        # consultan datos del terminal: pool de E/S
+        if self._cpu_pool is None:
+            self._cpu_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Piso3CPU")
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Piso3IO")
+        
+        self.stages = [
+            PipelineStage('detection', self._stage_detection, self._cpu_pool, workers, queue_size),
+            PipelineStage('quality', self._stage_quality, self._io_pool, workers, queue_size),
+            PipelineStage('ml', self._stage_ml, self._cpu_pool, workers, queue_size),
+            # Un solo consumidor: el rate limit de señales es secuencial
+            PipelineStage('signal', self._stage_signal, self._io_pool, 1, queue_size)
+        ]
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.max_queue)
+
+    async def _symbol_producer(self, symbol: str):
+        """Obtiene velas nuevas del símbolo cada ciclo y las encola para detección"""
+        loop = asyncio.get_running_loop()
+        detection = self.stages[0]
+        
+        while self.is_running:
+            start = time.perf_counter()
+            try:
+                df = await loop.run_in_executor(self._io_pool, self._fetch_bars, symbol)
+                if df is not None and len(df) > 0:
+                    # put() bloquea si la detección va retrasada (backpressure)
+                    await detection.queue.put(PipelineItem(symbol=symbol, payload=df))
+                    detection.stats['max_depth'] = max(detection.stats['max_depth'], detection.depth())
+            except Exception as e:
+                self.logger.error(f"Error obteniendo velas de {symbol}: {e}")
+            
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(max(0, self.config['processing_interval_seconds'] - elapsed))
+
+    async def _stage_worker(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        """Consume la cola de una etapa y pasa sus salidas a la siguiente"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            item = await stage.queue.get()
+            try:
+                stage.queue_wait.record((time.perf_counter() - item.enqueued_at) * 1000)
+                start = time.perf_counter()
+                if stage.executor:
+                    outputs = await loop.run_in_executor(stage.executor, stage.handler, item)
+                else:
+                    outputs = stage.handler(item)
+                stage.latency.record((time.perf_counter() - start) * 1000)
+                stage.stats['processed'] += 1
+                
+                for output in outputs or []:
+                    if output.result is not None and output.result.status != "PROCESSING":
+                        self._record_result(output)
+                        continue
+                    if next_stage is None:
+                        self._record_result(output)
+                        continue
+                    output.enqueued_at = time.perf_counter()
+                    await next_stage.queue.put(output)
+                    stage.stats['emitted'] += 1
+                    next_stage.stats['max_depth'] = max(next_stage.stats['max_depth'], next_stage.depth())
+                    
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.stats['errors'] += 1
+                self.logger.error(f"Error en etapa {stage.name} ({item.symbol}): {e}")
+            finally:
+                stage.queue.task_done()
+
+    def _record_result(self, item: PipelineItem):
+        """Registra el resultado final de un FVG (en el event loop)"""
+        result = item.result
+        if result.status == "PROCESSING":
+            result.status = "COMPLETED"
+        result.processing_time = time.perf_counter() - item.started_at
+        
+        if result.status == "FILTERED_QUALITY":
+            self.performance_metrics['quality_filtered'] += 1
+        elif result.status == "FILTERED_ML":
+            self.performance_metrics['ml_filtered'] += 1
+        elif result.status == "SIGNAL_GENERATED":
+            self.performance_metrics['signals_generated'] += 1
+        self.performance_metrics['total_fvgs_processed'] += 1
+        
+        self.results_history.append(result)
+        # Limpiar historial (mantener últimos 1000)
+        if len(self.results_history) > 1000:
+            self.results_history = self.results_history[-1000:]
+
+    # ========================================================================
+    # 🔍 DETECCIÓN INCREMENTAL
+    # ========================================================================
+
+    def _fetch_bars(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Velas M15 del símbolo: ventana completa la primera vez, solo la cola después"""
+        timeframe = self.config['timeframe']
+        periods = self.config['bars_per_fetch'] if symbol not in self._last_bar_time else self.config['incremental_bars']
+        df = self.data_manager.get_ohlc_data(symbol, timeframe, periods, use_cache=False)
+        
+        # Si la cola no llega a la última vela procesada faltan velas: ventana completa
+        last_bar = self._last_bar_time.get(symbol)
+        if (df is not None and len(df) > 0 and last_bar is not None
+                and periods < self.config['bars_per_fetch'] and df['datetime'].iloc[0] > last_bar):
+            df = self.data_manager.get_ohlc_data(symbol, timeframe, self.config['bars_per_fetch'], use_cache=False)
+        return df
+
+    def _stage_detection(self, item: PipelineItem) -> List[PipelineItem]:
+        """Detecta FVGs solo en las ventanas de 3 velas que incluyen velas cerradas nuevas"""
+        fvgs = self._detect_in_bars(item.symbol, item.payload)
+        return [
+            PipelineItem(symbol=item.symbol, payload=fvg_data, result=self._new_result(fvg_data))
+            for fvg_data in fvgs
+        ]
+
+    def _detect_in_bars(self, symbol: str, df: pd.DataFrame) -> List[Dict]:
+        if not self.detector or df is None or len(df) < 4:
+            return []
+        
+        timeframe = self.config['timeframe']
+        closed = df.iloc[:-1]  # La última vela sigue en formación
+        last_bar = self._last_bar_time.get(symbol)
+        
+        # Primera vela nueva y las 2 anteriores que completan su ventana
+        if last_bar is not None:
+            new_rows = int((closed['datetime'] > last_bar).sum())
+            if new_rows == 0:
+                return []
+            closed = closed.iloc[max(0, len(closed) - new_rows - 2):]
+        
+        candles = [
+            {'time': row.datetime.to_pydatetime(), 'open': row.open, 'high': row.high,
+             'low': row.low, 'close': row.close, 'symbol': symbol, 'timeframe': timeframe}
+            for row in closed.itertuples(index=False)
+        ]
+        self._last_bar_time[symbol] = closed['datetime'].iloc[-1]
+        
+        new_fvgs = []
+        for fvg in self.detector.detect_all_fvgs(candles):
+            fvg_data = self._fvg_to_dict(fvg, symbol, timeframe)
+            if self._is_new_fvg(fvg_data['id']):
+                new_fvgs.append(fvg_data)
+        return new_fvgs
+
+    def _fvg_to_dict(self, fvg: Any, symbol: str, timeframe: str) -> Dict:
+        """FVGData → dict que esperan calidad, ML y señal, con ID estable"""
+        fvg_data = fvg.to_dict()
+        fvg_data.update({
+            'id': f"{symbol}_{timeframe}_{fvg.type}_{fvg.formation_time.strftime('%Y%m%d_%H%M%S')}",
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'high': fvg.gap_high,
+            'low': fvg.gap_low,
+            'start_time': fvg.formation_time,
+            'detection_time': datetime.now()
+        })
+        return fvg_data
+
+    def _is_new_fvg(self, fvg_id: str) -> bool:
+        """Deduplicación por ID estable (memoria acotada)"""
+        with self._seen_lock:
+            if fvg_id in self._seen_fvg_ids:
+                self._seen_fvg_ids.move_to_end(fvg_id)
+                return False
+            self._seen_fvg_ids[fvg_id] = True
+            if len(self._seen_fvg_ids) > self.config['max_tracked_fvg_ids']:
+                self._seen_fvg_ids.popitem(last=False)
+            return True
 
     async def _detect_new_fvgs(self, symbol: str) -> List[Dict]:
         """Detecta nuevos FVGs usando el detector"""
@@ -150,32 +403,75 @@ class SystemOrchestrator:
                 self.logger.warning("FVGDetector no disponible")
                 return []
             
-            # Obtener datos recientes
-            df_m15 = self.data_manager.get_ohlc_data(symbol, 'M15', 100)
-            if df_m15 is None:
-                return []
-            
-            # Detectar FVGs
-            fvgs = self.detector.detect_fvgs(df_m15, timeframe='M15')
-            
-            # Filtrar solo FVGs nuevos (últimas 2 horas)
-            cutoff_time = datetime.now() - timedelta(hours=2)
-            new_fvgs = []
-            
-            for fvg in fvgs:
-                fvg_time = fvg.get('detection_time', datetime.now())
-                if isinstance(fvg_time, str):
-                    fvg_time = pd.to_datetime(fvg_time)
-                    
-                if fvg_time > cutoff_time:
-                    new_fvgs.append(fvg)
-            
-            return new_fvgs
+            df_m15 = await asyncio.to_thread(self._fetch_bars, symbol)
+            return await asyncio.to_thread(self._detect_in_bars, symbol, df_m15)
             
         except Exception as e:
             self.logger.error(f"Error detectando FVGs: {e}")
             return []
 
+    # ========================================================================
+    # 🎯 ETAPAS DE PROCESAMIENTO
+    # ========================================================================
+
+    def _new_result(self, fvg_data: Dict) -> FVGProcessingResult:
+        start_time = datetime.now()
+        return FVGProcessingResult(
+            fvg_id=fvg_data.get('id', f"fvg_{start_time.strftime('%Y%m%d_%H%M%S')}"),
+            detection_data=fvg_data,
+            quality_analysis=None,
+            ml_prediction=None,
+            trading_signal=None,
+            processing_time=0.0,
+            timestamp=start_time,
+            status="PROCESSING"
+        )
+
+    def _stage_quality(self, item: PipelineItem) -> List[PipelineItem]:
+        """ETAPA 1: Análisis de Calidad"""
+        result = item.result
+        if self.config['enable_quality_filter'] and self.quality_analyzer:
+            quality_result = self.quality_analyzer.analyze_fvg_quality(item.payload, item.symbol)
+            result.quality_analysis = quality_result
+            
+            # Filtrar por calidad mínima
+            if quality_result.score_total < self.config['min_quality_threshold']:
+                result.status = "FILTERED_QUALITY"
+                self.logger.debug(f"FVG {result.fvg_id} filtrado por baja calidad: {quality_result.score_total:.3f}")
+        return [item]
+
+    def _stage_ml(self, item: PipelineItem) -> List[PipelineItem]:
+        """ETAPA 2: Predicción ML"""
+        result = item.result
+        if self.config['enable_ml_filter'] and self.ml_predictor:
+            ml_result = self.ml_predictor.predict_fvg_fill(item.payload, item.symbol)
+            result.ml_prediction = ml_result
+            
+            # Filtrar por probabilidad ML mínima
+            if ml_result.probability < self.config['min_ml_probability']:
+                result.status = "FILTERED_ML"
+                self.logger.debug(f"FVG {result.fvg_id} filtrado por baja probabilidad ML: {ml_result.probability:.3f}")
+        return [item]
+
+    def _stage_signal(self, item: PipelineItem) -> List[PipelineItem]:
+        """ETAPA 3: Generación de Señal"""
+        result = item.result
+        if self.config['enable_signal_generation'] and self.signal_generator:
+            # Verificar límite de señales por hora
+            if self._check_signal_rate_limit():
+                trading_signal = self.signal_generator.generate_signal_from_fvg(item.payload, item.symbol)
+                result.trading_signal = trading_signal
+                
+                if trading_signal:
+                    result.status = "SIGNAL_GENERATED"
+                    self.logger.info(f"🎯 Señal generada para FVG {result.fvg_id}: {trading_signal.signal_type.value}")
+                else:
+                    result.status = "NO_SIGNAL"
+            else:
+                result.status = "RATE_LIMITED"
+                self.logger.debug(f"FVG {result.fvg_id} limitado por rate limit de señales")
+        return [item]
+
     async def _process_fvg_pipeline(self, fvg_data: Dict, symbol: str) -> Optional[FVGProcessingResult]:
         """
         Procesa un FVG a través del pipeline completo
@@ -183,76 +479,24 @@ class SystemOrchestrator:
         Pipeline:
         FVG Detection → Quality Analysis → ML Prediction → Signal Generation
         """
-        start_time = datetime.now()
-        fvg_id = fvg_data.get('id', f"fvg_{start_time.strftime('%Y%m%d_%H%M%S')}")
+        item = PipelineItem(symbol=symbol, payload=fvg_data, result=self._new_result(fvg_data))
         
         try:
-            # Inicializar resultado
-            result = FVGProcessingResult(
-                fvg_id=fvg_id,
-                detection_data=fvg_data,
-                quality_analysis=None,
-                ml_prediction=None,
-                trading_signal=None,
-                processing_time=0.0,
-                timestamp=start_time,
-                status="PROCESSING"
-            )
-            
-            # ETAPA 1: Análisis de Calidad
-            if self.config['enable_quality_filter'] and self.quality_analyzer:
-                quality_result = self.quality_analyzer.analyze_fvg_quality(fvg_data, symbol)
-                result.quality_analysis = quality_result
-                
-                # Filtrar por calidad mínima
-                if quality_result.score_total < self.config['min_quality_threshold']:
-                    result.status = "FILTERED_QUALITY"
-                    self.performance_metrics['quality_filtered'] += 1
-                    self.logger.debug(f"FVG {fvg_id} filtrado por baja calidad: {quality_result.score_total:.3f}")
-                    return result
-            
-            # ETAPA 2: Predicción ML
-            if self.config['enable_ml_filter'] and self.ml_predictor:
-                ml_result = self.ml_predictor.predict_fvg_fill(fvg_data, symbol)
-                result.ml_prediction = ml_result
-                
-                # Filtrar por probabilidad ML mínima
-                if ml_result.probability < self.config['min_ml_probability']:
-                    result.status = "FILTERED_ML"
-                    self.performance_metrics['ml_filtered'] += 1
-                    self.logger.debug(f"FVG {fvg_id} filtrado por baja probabilidad ML: {ml_result.probability:.3f}")
-                    return result
-            
-            # ETAPA 3: Generación de Señal
-            if self.config['enable_signal_generation'] and self.signal_generator:
-                # Verificar límite de señales por hora
-                if self._check_signal_rate_limit():
-                    trading_signal = self.signal_generator.generate_signal_from_fvg(fvg_data, symbol)
-                    result.trading_signal = trading_signal
-                    
-                    if trading_signal:
-                        result.status = "SIGNAL_GENERATED"
-                        self.performance_metrics['signals_generated'] += 1
-                        self.logger.info(f"🎯 Señal generada para FVG {fvg_id}: {trading_signal.signal_type.value}")
-                    else:
-                        result.status = "NO_SIGNAL"
-                else:
-                    result.status = "RATE_LIMITED"
-                    self.logger.debug(f"FVG {fvg_id} limitado por rate limit de señales")
-            
-            # Finalizar resultado
-            result.processing_time = (datetime.now() - start_time).total_seconds()
-            result.status = result.status if result.status != "PROCESSING" else "COMPLETED"
-            
-            self.performance_metrics['total_fvgs_processed'] += 1
-            
-            return result
+            for stage in (self._stage_quality, self._stage_ml, self._stage_signal):
+                stage(item)
+                if item.result.status != "PROCESSING":
+                    break
             
         except Exception as e:
-            self.logger.error(f"Error procesando FVG {fvg_id}: {e}")
-            result.status = "ERROR"
-            result.processing_time = (datetime.now() - start_time).total_seconds()
-            return result
+            self.logger.error(f"Error procesando FVG {item.result.fvg_id}: {e}")
+            item.result.status = "ERROR"
+        
+        self._record_result(item)
+        return item.result
+
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Latencia, profundidad de cola y contadores de cada etapa"""
+        return {stage.name: stage.get_stats() for stage in self.stages}
 
     def _check_signal_rate_limit(self) -> bool:
         """Verifica si se puede generar una nueva señal según el rate limit"""
@@ -296,6 +540,11 @@ class SystemOrchestrator:
                     'signal_generator': self.signal_generator is not None
                 },
                 'performance': self.performance_metrics,
+                'stages': {
+                    stage.name: {'queue_depth': stage.depth(), 'processed': stage.stats['processed'],
+                                 'p95_ms': stage.latency.percentile(95)}
+                    for stage in self.stages
+                },
                 'recent_results': len([r for r in self.results_history if r.timestamp > datetime.now() - timedelta(minutes=30)])
             }
             
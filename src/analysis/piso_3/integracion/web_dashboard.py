@@ -1009,7 +1009,7 @@ function requestData() {
             self.metrics_data.update({
                 'cache_hits': cache_stats.get('hits', 0),
                 'cache_misses': cache_stats.get('misses', 0),
-                'db_fvg_count': db_stats.get('total_records', 0),
+                'db_fvg_count': db_stats.get('total_fvgs', 0),
                 'last_update': datetime.now()
             })
             
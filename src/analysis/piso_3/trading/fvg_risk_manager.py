@@ -26,11 +26,14 @@ import MetaTrader5 as mt5
 # Configurar imports
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 sys.path.insert(0, str((project_root / "config").absolute()))
 
 from riskbot_mt5 import RiskBotMT5
 from logger_manager import LoggerManager
+from src.core.exposure_engine import get_exposure_engine
+from src.core.symbol_specs import get_symbol_spec_cache
 
 class FVGRiskManager(RiskBotMT5):
     """
@@ -76,6 +79,9 @@ class FVGRiskManager(RiskBotMT5):
             'TP3': 4.0     # Tercer take profit
         }
         
+        # Vista de exposición compartida (posiciones y cuenta)
+        self.exposure = get_exposure_engine()
+        
         # Estado de posiciones FVG
         self.fvg_positions = {}
         self.daily_fvg_count = 0
@@ -93,6 +99,11 @@ class FVGRiskManager(RiskBotMT5):
         
         self.logger.info("🛡️ FVGRiskManager inicializado para símbolo: %s", symbol)
     
+    def get_account_balance(self):
+        """💰 Balance desde el snapshot de cuenta compartido (sin consultar MT5 por decisión)"""
+        self.exposure.ensure_fresh(self.get_open_positions, mt5.account_info)
+        return self.exposure.balance
+    
     def evaluate_fvg_trade(self, fvg_analysis: Dict) -> Dict:
         """
         🎯 Evaluar viabilidad y riesgo para trade FVG
@@ -218,12 +229,9 @@ class FVGRiskManager(RiskBotMT5):
     def _check_fvg_position_limits(self) -> bool:
         """📊 Verificar límites de posiciones FVG"""
         try:
-            # Obtener posiciones abiertas del RiskBot base
-            current_positions = self.get_open_positions()
-            
-            # Contar posiciones FVG específicas
-            fvg_position_count = len([pos for pos in current_positions 
-                                    if hasattr(pos, 'comment') and 'FVG' in str(pos.comment)])
+            # Contar posiciones FVG desde la vista de exposición compartida
+            self.exposure.ensure_fresh(self.get_open_positions, mt5.account_info)
+            fvg_position_count = self.exposure.comment_positions_count('FVG')
             
             if fvg_position_count >= self.fvg_config['max_positions_fvg']:
                 self.logger.warning("⚠️ Límite de posiciones FVG alcanzado: %d/%d", 
@@ -304,15 +312,15 @@ class FVGRiskManager(RiskBotMT5):
             fvg_size_pips = fvg_analysis.get('fvg_size_pips', 10)
             sl_pips = max(fvg_size_pips * 1.2, 8)  # SL = 120% del FVG size, mínimo 8 pips
             
-            # Valor por pip para EURUSD (simplificado)
-            pip_value_per_lot = 10.0  # $10 por pip para 1 lote estándar
+            # Valor por pip y lote desde el cache de specs ($10 en EURUSD)
+            spec = get_symbol_spec_cache().get(self.symbol)
+            pip_value_per_lot = spec.pip_value_per_lot or 10.0
             
             # Calcular lotaje basado en riesgo y SL
             calculated_lots = adjusted_risk / (sl_pips * pip_value_per_lot)
             
             # Aplicar límites del sistema
-            final_lots = max(0.01, min(1.0, calculated_lots))
-            final_lots = round(final_lots, 2)
+            final_lots = spec.snap_volume(max(0.01, min(1.0, calculated_lots)))
             
             self.logger.debug("💰 Cálculo lotaje FVG: Risk=%.2f, Quality=%s(%.2f), Confluence=%.2f -> Lots=%.3f", 
                             adjusted_risk, quality_level, quality_multiplier, confluence_factor, final_lots)
@@ -447,8 +455,7 @@ class FVGRiskManager(RiskBotMT5):
     
     def _get_pip_value(self, lot_size: float) -> float:
         """💱 Obtener valor por pip para el lotaje dado"""
-        # Para EURUSD, 1 pip = $10 por lote estándar
-        return lot_size * 10.0
+        return get_symbol_spec_cache().get(self.symbol).pip_value(lot_size)
     
     def register_fvg_trade(self, trade_info: Dict) -> str:
         """
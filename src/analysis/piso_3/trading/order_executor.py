@@ -26,10 +26,12 @@ import MetaTrader5 as mt5
 # Configurar imports
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 sys.path.insert(0, str((project_root / "config").absolute()))
 
 from logger_manager import LoggerManager
+from src.core.tick_microstructure import get_tick_microstructure
 
 class FVGOrderExecutor:
     """
@@ -48,9 +50,14 @@ class FVGOrderExecutor:
             'timeout_ms': 10000,            # Timeout para órdenes
             'retry_attempts': 3,            # Intentos de reintento
             'min_distance_points': 10,      # Distancia mínima SL/TP
-            'partial_close_enabled': True   # Habilitear cierres parciales
+            'partial_close_enabled': True,  # Habilitear cierres parciales
+            'max_spread_pips': 5.0,         # Spread máximo absoluto
+            'max_spread_percentile': 95.0   # Spread máximo relativo a los ticks recientes
         }
         
+        # Ventana de ticks compartida (spread, tasa de ticks, volatilidad)
+        self.microstructure = get_tick_microstructure()
+        
         # Estado de órdenes
         self.pending_orders = {}
         self.executed_orders = {}
@@ -253,13 +260,24 @@ class FVGOrderExecutor:
             if not tick:
                 return {'tradeable': False, 'reason': 'No hay cotizaciones disponibles'}
             
-            spread_pips = (tick.ask - tick.bid) / self._get_pip_size()
-            max_spread_pips = 5.0  # Máximo spread permitido
+            spread = tick.ask - tick.bid
+            spread_pips = spread / self._get_pip_size()
+            max_spread_pips = self.execution_config['max_spread_pips']
             
             if spread_pips > max_spread_pips:
                 return {'tradeable': False, 'reason': f'Spread muy alto: {spread_pips:.1f} pips'}
             
-            return {'tradeable': True, 'reason': 'Mercado disponible', 'spread_pips': spread_pips}
+            # Spread anómalo respecto a la ventana reciente del símbolo
+            self.microstructure.update_tick(self.symbol, tick.bid, tick.ask, tick.volume, tick.time)
+            spread_gate = self.microstructure.spread_check(
+                self.symbol, spread, self.execution_config['max_spread_percentile']
+            )
+            if not spread_gate['allowed']:
+                return {'tradeable': False,
+                        'reason': f'Spread anómalo: {spread_pips:.1f} pips (percentil {spread_gate["rank"]:.0f})'}
+            
+            return {'tradeable': True, 'reason': 'Mercado disponible', 'spread_pips': spread_pips,
+                    'spread_percentile': spread_gate['rank']}
             
         except Exception as e:
             self.logger.error("❌ Error verificando mercado: %s", e)
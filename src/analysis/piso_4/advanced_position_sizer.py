@@ -16,8 +16,18 @@ Version: 4.0 - Advanced Operations
 Date: 2025-08-13
 """
 
+import sys
+from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# Configurar imports
+current_dir = Path(__file__).parent
+project_root = current_dir.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
+sys.path.insert(0, str((project_root / "src" / "core").absolute()))
+
+from src.core.symbol_specs import get_symbol_spec_cache
 
 class AdvancedPositionSizer:
     """Sistema avanzado de cálculo de posición optimizado"""
@@ -120,7 +130,8 @@ class AdvancedPositionSizer:
             final_position_size = self._apply_safety_limits(
                 position_size, 
                 account_data, 
-                cycle_data
+                cycle_data,
+                market_data.get('symbol')
             )
             
             # 7. Preparar resultado
@@ -136,7 +147,7 @@ class AdvancedPositionSizer:
                     'total': total_multiplier
                 },
                 'risk_percentage': (adjusted_risk_amount / account_data['equity']) * 100,
-                'expected_sl_amount': final_position_size * stop_loss_pips * market_data.get('pip_value', 10),
+                'expected_sl_amount': final_position_size * stop_loss_pips * self._get_pip_value(market_data),
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
             
@@ -210,7 +221,7 @@ class AdvancedPositionSizer:
     def _calculate_lot_size(self, risk_amount: float, sl_pips: float, 
                           market_data: Dict[str, Any]) -> float:
         """Calcula el tamaño de lote basado en risk amount y SL"""
-        pip_value = market_data.get('pip_value', 10)  # $10 por pip para 1 lote estándar
+        pip_value = self._get_pip_value(market_data)
         
         if sl_pips <= 0:
             return self.min_position_size
@@ -218,9 +229,19 @@ class AdvancedPositionSizer:
         lot_size = risk_amount / (sl_pips * pip_value)
         return lot_size
     
+    def _get_pip_value(self, market_data: Dict[str, Any]) -> float:
+        """Valor por pip y lote: market_data, specs del símbolo o $10 por defecto"""
+        if 'pip_value' in market_data:
+            return market_data['pip_value']
+        symbol = market_data.get('symbol')
+        if symbol:
+            return get_symbol_spec_cache().get(symbol).pip_value_per_lot or 10
+        return 10  # $10 por pip para 1 lote estándar
+    
     def _apply_safety_limits(self, position_size: float, 
                            account_data: Dict[str, Any],
-                           cycle_data: Dict[str, Any]) -> float:
+                           cycle_data: Dict[str, Any],
+                           symbol: Optional[str] = None) -> float:
         """Aplica límites de seguridad"""
         # Límites básicos
         position_size = max(self.min_position_size, 
@@ -238,6 +259,9 @@ class AdvancedPositionSizer:
         if trades_executed >= 2:  # Si ya hay 2 trades, ser más conservador
             position_size *= 0.8
         
+        # Ajustar al step de lotaje del símbolo si se conoce
+        if symbol:
+            return get_symbol_spec_cache().get(symbol).snap_volume(position_size)
         return round(position_size, 2)
     
     def _get_emergency_position_size(self, account_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -25,10 +25,17 @@ from enum import Enum
 
 # Configurar imports del proyecto
 current_dir = Path(__file__).parent
-project_root = current_dir.parent.parent.parent.parent
+project_root = current_dir.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    mt5 = None
+
 from logger_manager import LoggerManager
+from src.core.exposure_engine import get_exposure_engine
 
 class CycleStatus(Enum):
     """Estados del ciclo diario"""
@@ -69,6 +76,9 @@ class DailyCycleManager:
         self.initial_balance = initial_balance
         self.current_balance = initial_balance
         
+        # Vista de exposición compartida (P&L flotante de posiciones abiertas)
+        self.exposure = get_exposure_engine()
+        
         # Tracking de performance
         self.cycle_stats = {
             'start_balance': initial_balance,
@@ -161,8 +171,11 @@ class DailyCycleManager:
             
             result['session_trades_remaining'] = session_max - session_trades
             
-            # Verificar riesgo acumulado vs límite diario
-            current_loss = min(0, self.cycle_stats['total_pnl_percent'])  # Solo pérdidas
+            # Verificar riesgo acumulado vs límite diario (realizado + flotante)
+            if mt5 is not None:
+                self.exposure.ensure_fresh(mt5.positions_get)
+            floating_pnl_percent = (self.exposure.floating_pnl / self.current_balance) * 100 if self.current_balance > 0 else 0.0
+            current_loss = min(0, self.cycle_stats['total_pnl_percent'] + floating_pnl_percent)  # Solo pérdidas
             risk_used = abs(current_loss)
             risk_limit = abs(self.cycle_config['daily_risk_limit_percent'])
             remaining_risk = risk_limit - risk_used
@@ -26,9 +26,11 @@ import MetaTrader5 as mt5
 # Configurar imports
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 
 from logger_manager import LoggerManager
+from src.core.symbol_specs import get_symbol_spec_cache
 from .risk_position_manager import RiskPositionManager
 
 class EntryExecutionManager:
@@ -157,7 +159,8 @@ class EntryExecutionManager:
             
             # Preparar parámetros de orden
             entry_type = confluence_result.get('entry_recommendation', 'WAIT')
-            lot_size = risk_evaluation.get('recommended_lots', 0.01)
+            spec = get_symbol_spec_cache().get(self.symbol)
+            lot_size = spec.snap_volume(risk_evaluation.get('recommended_lots', 0.01))
             
             # Obtener precio actual
             tick = mt5.symbol_info_tick(self.symbol)
@@ -178,6 +181,9 @@ class EntryExecutionManager:
             else:
                 raise Exception(f"Tipo de entrada inválido: {entry_type}")
             
+            sl = spec.round_price(sl)
+            tp = spec.round_price(tp)
+            
             # Crear request de orden
             request = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -253,18 +259,8 @@ class EntryExecutionManager:
             }
     
     def _get_pip_value(self) -> float:
-        """📏 Obtener valor de pip para el símbolo"""
-        # Valores de pip comunes
-        pip_values = {
-            'EURUSD': 0.0001,
-            'GBPUSD': 0.0001,
-            'USDJPY': 0.01,
-            'AUDUSD': 0.0001,
-            'USDCAD': 0.0001,
-            'USDCHF': 0.0001
-        }
-        
-        return pip_values.get(self.symbol, 0.0001)  # Default a 0.0001
+        """📏 Obtener tamaño de pip para el símbolo (cache de specs)"""
+        return get_symbol_spec_cache().get(self.symbol).pip_size
     
     def _add_to_pending_executions(self, confluence_result: Dict, risk_evaluation: Dict):
         """⏳ Agregar ejecución a pendientes para confirmación manual"""
@@ -26,10 +26,13 @@ import MetaTrader5 as mt5
 # Configurar imports
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 
 from riskbot_mt5 import RiskBotMT5
 from logger_manager import LoggerManager
+from src.core.exposure_engine import get_exposure_engine
+from src.core.correlation_service import get_correlation_service
 
 class RiskPositionManager:
     """
@@ -49,7 +52,10 @@ class RiskPositionManager:
             'comision_por_lote': 7.0,       # Comisión por lote
             'max_positions': 3,             # Máximo posiciones simultáneas
             'min_lot_size': 0.01,           # Tamaño mínimo de lote
-            'max_lot_size': 1.0             # Tamaño máximo de lote
+            'max_lot_size': 1.0,            # Tamaño máximo de lote
+            'max_correlated_lots': 2.0,     # Exposición correlacionada máxima (lotes)
+            'correlation_threshold': 0.7,   # |ρ| mínimo para considerar símbolos ligados
+            'correlation_refresh_seconds': 300  # Refresco propio si nadie más alimenta el servicio
         }
         
         # RiskBot base
@@ -60,6 +66,13 @@ class RiskPositionManager:
             comision_por_lote=self.risk_config['comision_por_lote']
         )
         
+        # Vista de exposición compartida (posiciones y cuenta)
+        self.exposure = get_exposure_engine()
+        
+        # Correlaciones entre símbolos: servicio compartido configurado por
+        # AdvancedAnalyzer; si no corre en este proceso, se refresca aquí
+        self.correlation = get_correlation_service()
+        
         # Estado de posiciones FVG
         self.fvg_positions = {}  # Posiciones abiertas por confluencias FVG
         self.position_history = []
@@ -116,16 +129,30 @@ class RiskPositionManager:
             recommended_lots = self._calculate_lot_size(confluence_result, confluence_factor)
             risk_evaluation['recommended_lots'] = recommended_lots
             
-            # 5. Calcular pérdida máxima
-            account_balance = self.risk_bot.get_account_balance()
+            # 5. Verificar exposición correlacionada
+            side = confluence_result.get('entry_recommendation')
+            if side in ('BUY', 'SELL'):
+                self.correlation.refresh(self._load_correlation_bars,
+                                         min_interval=self.risk_config['correlation_refresh_seconds'])
+                allowed, correlated = self.correlation.check_exposure_limit(
+                    self.symbol, side, recommended_lots, self.exposure.net_volumes(),
+                    self.risk_config['max_correlated_lots'], self.risk_config['correlation_threshold']
+                )
+                risk_evaluation['correlated_exposure'] = correlated
+                if not allowed:
+                    risk_evaluation['reason'] = f'Exposición correlacionada excesiva ({correlated:+.2f} lotes)'
+                    return risk_evaluation
+            
+            # 6. Calcular pérdida máxima
+            account_balance = self.exposure.balance
             max_loss = account_balance * (self.risk_config['risk_percent'] / 100)
             risk_evaluation['max_loss'] = max_loss
             
-            # 6. Determinar nivel de riesgo
+            # 7. Determinar nivel de riesgo
             risk_level = self._determine_risk_level(confluence_strength, account_status)
             risk_evaluation['risk_level'] = risk_level
             
-            # 7. Decisión final
+            # 8. Decisión final
             if (confluence_strength >= 70 and 
                 recommended_lots >= self.risk_config['min_lot_size'] and
                 risk_level in ['LOW', 'MEDIUM']):
@@ -149,16 +176,22 @@ class RiskPositionManager:
                 'risk_level': 'VERY_HIGH',
                 'reason': f'Error en evaluación: {e}'
             }
-    
+
+    def _load_correlation_bars(self, symbol: str, count: int):
+        """Velas de un símbolo en el timeframe del servicio de correlaciones"""
+        timeframe = getattr(mt5, f"TIMEFRAME_{self.correlation.timeframe}", mt5.TIMEFRAME_H1)
+        return mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+
     def _check_account_status(self) -> Dict:
         """🏦 Verificar estado de la cuenta"""
         try:
             # Usar RiskBot para verificar estado
             risk_status = self.risk_bot.check_and_act()
+            self._refresh_exposure()
             
             account_info = {
                 'can_trade': True,
-                'balance': self.risk_bot.get_account_balance(),
+                'balance': self.exposure.balance,
                 'risk_status': risk_status,
                 'reason': ''
             }
@@ -185,15 +218,16 @@ class RiskPositionManager:
                 'reason': f'Error verificando cuenta: {e}'
             }
     
+    def _refresh_exposure(self):
+        """🔄 Recargar la vista de exposición solo si está caducada"""
+        self.exposure.ensure_fresh(self.risk_bot.get_open_positions, mt5.account_info)
+    
     def _check_position_limits(self) -> bool:
         """📊 Verificar límites de posiciones"""
         try:
-            current_positions = self.risk_bot.get_open_positions()
-            position_count = len(current_positions) if current_positions else 0
-            
-            # Filtrar posiciones del símbolo actual
-            symbol_positions = [pos for pos in current_positions if pos.symbol == self.symbol]
-            symbol_position_count = len(symbol_positions)
+            self._refresh_exposure()
+            position_count = self.exposure.positions_count
+            symbol_position_count = self.exposure.symbol_positions_count(self.symbol)
             
             # Verificar límites
             if position_count >= self.risk_config['max_positions']:
@@ -226,8 +260,8 @@ class RiskPositionManager:
     def _calculate_lot_size(self, confluence_result: Dict, confluence_factor: float) -> float:
         """📏 Calcular tamaño de lote basado en confluencia y riesgo"""
         try:
-            # Balance actual
-            balance = self.risk_bot.get_account_balance()
+            # Balance actual (snapshot de cuenta compartido)
+            balance = self.exposure.balance
             if balance <= 0:
                 return 0.0
             
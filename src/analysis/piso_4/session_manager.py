@@ -31,6 +31,8 @@ sys.path.insert(0, str(project_root.absolute()))
 
 # Usar central de imports
 from src import LoggerManager
+from src.core.session_calendar import SessionWindow, get_session_calendar
+from src.core.seasonal_stats import get_seasonal_stats
 
 class TradingSession(Enum):
     """Sesiones de trading disponibles"""
@@ -145,6 +147,19 @@ class SessionManager:
         # Configurar timezone GMT
         self.gmt_tz = pytz.timezone('GMT')
         
+        # Calendario con los límites de sesión precalculados
+        self.calendar = get_session_calendar([
+            SessionWindow(session.value,
+                          time(config['start_hour'], config['start_minute']),
+                          time(config['end_hour'], config['end_minute']),
+                          tz='GMT')
+            for session, config in self.session_config.items()
+        ])
+        self._session_valid_until: Optional[float] = None
+        
+        # Estadísticas estacionales compartidas (retornos, volatilidad, FVGs por hora)
+        self.seasonal_stats = get_seasonal_stats()
+        
         self.logger.info("📅 SessionManager inicializado - Configuradas 3 sesiones de trading")
     
     def get_current_session(self) -> TradingSession:
@@ -155,26 +170,18 @@ class SessionManager:
             TradingSession: Sesión activa o INACTIVE
         """
         try:
-            # Obtener hora actual en GMT
-            now_utc = datetime.now(pytz.UTC)
-            now_gmt = now_utc.astimezone(self.gmt_tz)
-            current_time = now_gmt.time()
+            now = datetime.now(pytz.UTC).timestamp()
             
-            # Verificar cada sesión
-            for session, config in self.session_config.items():
-                start_time = time(config['start_hour'], config['start_minute'])
-                end_time = time(config['end_hour'], config['end_minute'])
-                
-                if start_time <= current_time <= end_time:
-                    if self.current_session != session:
-                        self._on_session_change(session)
-                    return session
+            # La sesión no cambia hasta la próxima transición del calendario
+            if self._session_valid_until is not None and now < self._session_valid_until:
+                return self.current_session
             
-            # Si no está en ninguna sesión, marcar como INACTIVE
-            if self.current_session != TradingSession.INACTIVE:
-                self._on_session_change(TradingSession.INACTIVE)
+            session = TradingSession(self.calendar.session_at(now, default=TradingSession.INACTIVE.value))
+            self._session_valid_until = self.calendar.next_transition(now)
             
-            return TradingSession.INACTIVE
+            if self.current_session != session:
+                self._on_session_change(session)
+            return session
             
         except Exception as e:
             self.logger.error("❌ Error detectando sesión actual: %s", e)
@@ -321,6 +328,27 @@ class SessionManager:
         
         return self.session_config[target_session].copy()
     
+    def get_session_statistics(self, symbol: str, session: Optional[TradingSession] = None) -> Dict[str, float]:
+        """
+        Estadísticas históricas de las horas de una sesión
+        
+        Args:
+            symbol: Símbolo
+            session: Sesión (por defecto la actual)
+            
+        Returns:
+            Dict con bars, mean_return, volatility, average_range, fvg_rate,
+            fill_rate... de SeasonalStats (vacío si la sesión no está configurada)
+        """
+        session = session or self.get_current_session()
+        config = self.session_config.get(session)
+        if config is None:
+            return {}
+        
+        # Horas GMT que toca la ventana (una hora empezada cuenta entera)
+        end_hour = config['end_hour'] + (1 if config['end_minute'] else 0)
+        return self.seasonal_stats.bin_stats(symbol, hour=list(range(config['start_hour'], end_hour)))
+    
     def record_trade(self, session: Optional[TradingSession], trade_data: Dict[str, Any]) -> bool:
         """
         📊 Registrar trade ejecutado en sesión
@@ -437,6 +465,7 @@ class SessionManager:
             self.daily_cycle_start = datetime.now()
             self.current_session = TradingSession.INACTIVE
             self.session_status = SessionStatus.PENDING
+            self._session_valid_until = None
             
             self.logger.info("✅ Nuevo ciclo 24h iniciado")
             
@@ -6,7 +6,7 @@ Módulo especializado en análisis estocástico integrado con FVG.
 Migrado desde analisis_estocastico_m15.py para mejor organización.
 
 FUNCIONALIDADES:
-- Análisis estocástico con caché optimizado
+- Análisis estocástico sobre estado incremental compartido (StochasticState)
 - Integración con DataManager centralizado
 - Detección de cruces y zonas críticas
 - Gestión de señales de trading
@@ -36,10 +36,12 @@ from rich.table import Table
 # Imports centralizados del core
 current_dir = Path(__file__).parent
 project_root = current_dir.parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
 sys.path.insert(0, str((project_root / "src" / "core").absolute()))
 sys.path.insert(0, str((project_root / "config").absolute()))
 
 from data_manager import DataManager
+from src.core.stochastic_state import get_stochastic_state
 from config import ZONA_HORARIA_LOCAL
 
 class StochasticSignalAnalyzer:
@@ -78,6 +80,13 @@ class StochasticSignalAnalyzer:
             'sobrecompra_nivel': 80,  # Ajustado para mayor sensibilidad
             'cache_duration': 60  # segundos
         }
+        
+        # Estado estocástico compartido por (símbolo, timeframe)
+        self.stoch_state = get_stochastic_state(
+            symbol, timeframe,
+            k_period=self.config['k_period'],
+            d_period=self.config['d_period']
+        )
     
     def analyze_stochastic_for_fvg(self, fvg_signal=None, modalidad_operacion='AMBOS'):
         """
@@ -93,15 +102,12 @@ class StochasticSignalAnalyzer:
         zona = pytz.timezone(ZONA_HORARIA_LOCAL)
         ahora = datetime.now(zona)
         
-        # Verificar cache
-        if (self.cache['timestamp'] is None or 
-            (ahora - self.cache['timestamp']).total_seconds() > self.config['cache_duration']):
-            
-            self._calculate_stochastic_values()
-            self._detect_signals(modalidad_operacion)
-            self._check_candle_closure()
-            
-            self.cache['timestamp'] = ahora
+        # El estado compartido limita las consultas al terminal; el resto es O(1)
+        self._calculate_stochastic_values()
+        self._detect_signals(modalidad_operacion)
+        self._check_candle_closure()
+        
+        self.cache['timestamp'] = ahora
         
         # Si hay señal FVG, evaluar confluencia
         if fvg_signal:
@@ -110,94 +116,22 @@ class StochasticSignalAnalyzer:
         return self.cache.copy()
     
     def _calculate_stochastic_values(self):
-        """🔢 Calcular valores estocásticos usando DataManager"""
+        """🔢 Leer valores estocásticos del estado incremental compartido"""
         try:
-            # Usar DataManager centralizado
-            df_ohlc = self.data_manager.get_ohlc_data(
-                self.symbol, 
-                self.timeframe, 
-                self.config['k_period'] + 10
-            )
-            
-            if df_ohlc is None or len(df_ohlc) < self.config['k_period']:
+            # Solo se consulta al terminal si puede haber cerrado una vela nueva
+            self.stoch_state.refresh()
+            if self.stoch_state.d is None:
                 return False
             
-            # Calcular estocástico usando DataManager
-            stoch_data = self.data_manager.calculate_stochastic(
-                df_ohlc, 
-                k_period=self.config['k_period'],
-                d_period=self.config['d_period']
-            )
-            
-            if stoch_data is None or len(stoch_data) < 2:
-                return False
-            
-            # Obtener valores actuales y anteriores
-            self.cache['k'] = stoch_data['%K'].iloc[-1]
-            self.cache['d'] = stoch_data['%D'].iloc[-1]
-            k_anterior = stoch_data['%K'].iloc[-2]
-            d_anterior = stoch_data['%D'].iloc[-2]
-            
-            # Detectar cruces
-            self.cache['cruce_k_d'] = (self.cache['k'] > self.cache['d'] and 
-                                       k_anterior <= d_anterior)
-            self.cache['cruce_d_k'] = (self.cache['k'] < self.cache['d'] and 
-                                       k_anterior >= d_anterior)
-            
-            # Detectar zonas críticas
-            self.cache['sobreventa'] = (self.cache['k'] < self.config['sobreventa_nivel'] and 
-                                        self.cache['d'] < self.config['sobreventa_nivel'])
-            self.cache['sobrecompra'] = (self.cache['k'] > self.config['sobrecompra_nivel'] and 
-                                         self.cache['d'] > self.config['sobrecompra_nivel'])
-            
+            # Cruces y zonas ya resueltos al cerrar la vela: lectura O(1)
+            self.cache.update(self.stoch_state.snapshot(
+                oversold=self.config['sobreventa_nivel'],
+                overbought=self.config['sobrecompra_nivel']
+            ))
             return True
             
         except Exception as e:
             print(f"⚠️ Error calculando estocástico: {e}")
-            return self._fallback_calculation()
-    
-    def _fallback_calculation(self):
-        """🔄 Cálculo fallback usando MT5 directo"""
-        try:
-            rates = mt5.copy_rates_from_pos(self.symbol, mt5.TIMEFRAME_M15, 0, 30)
-            if rates is None or len(rates) < self.config['k_period']:
-                return False
-            
-            df = pd.DataFrame(rates)
-            low = df['low']
-            high = df['high'] 
-            close = df['close']
-            
-            # Calcular estocástico manualmente
-            period_k = self.config['k_period']
-            period_d = self.config['d_period']
-            
-            lowest = low.rolling(window=period_k).min()
-            highest = high.rolling(window=period_k).max()
-            k = 100 * (close - lowest) / (highest - lowest)
-            d = k.rolling(window=period_d).mean()
-            
-            self.cache['k'] = k.iloc[-1] if not k.empty else 50
-            self.cache['d'] = d.iloc[-1] if not d.empty else 50
-            
-            if len(k) > 1 and len(d) > 1:
-                k_anterior = k.iloc[-2]
-                d_anterior = d.iloc[-2]
-                
-                self.cache['cruce_k_d'] = (self.cache['k'] > self.cache['d'] and 
-                                           k_anterior <= d_anterior)
-                self.cache['cruce_d_k'] = (self.cache['k'] < self.cache['d'] and 
-                                           k_anterior >= d_anterior)
-            
-            self.cache['sobreventa'] = (self.cache['k'] < self.config['sobreventa_nivel'] and 
-                                        self.cache['d'] < self.config['sobreventa_nivel'])
-            self.cache['sobrecompra'] = (self.cache['k'] > self.config['sobrecompra_nivel'] and 
-                                         self.cache['d'] > self.config['sobrecompra_nivel'])
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error en fallback estocástico: {e}")
             return False
     
     def _detect_signals(self, modalidad_operacion):
@@ -226,23 +160,13 @@ class StochasticSignalAnalyzer:
         zona = pytz.timezone(ZONA_HORARIA_LOCAL)
         ahora = datetime.now(zona)
         
-        try:
-            # Usar DataManager para verificar cierre de vela
-            rates_recientes = self.data_manager.get_ohlc_data(self.symbol, self.timeframe, 1)
-            if rates_recientes is not None and len(rates_recientes) > 0:
-                time_current = pd.Timestamp(rates_recientes.index[-1])
-                self.cache['vela_cerrada'] = (ahora - time_current).total_seconds() >= 60
-            else:
-                self.cache['vela_cerrada'] = True
-                
-        except Exception:
-            # Fallback con MT5
-            rates = mt5.copy_rates_from_pos(self.symbol, mt5.TIMEFRAME_M15, 0, 1)
-            if rates is not None and len(rates) > 0:
-                time_current = pd.Timestamp(rates[-1]['time'], unit='s', tz=zona)
-                self.cache['vela_cerrada'] = (ahora - time_current).total_seconds() >= 60
-            else:
-                self.cache['vela_cerrada'] = True
+        # Apertura de la vela en formación conocida por el estado compartido
+        time_current = self.stoch_state.forming_bar_time
+        if time_current is not None:
+            time_current = pd.Timestamp(time_current, unit='s', tz=zona)
+            self.cache['vela_cerrada'] = (ahora - time_current).total_seconds() >= 60
+        else:
+            self.cache['vela_cerrada'] = True
     
     def _evaluate_fvg_stochastic_confluence(self, fvg_signal):
         """
@@ -0,0 +1,623 @@
+"""
+AlertDelivery - Entrega de alertas con conexiones reutilizadas
+==============================================================
+
+Capa de entrega para los canales externos de alertas (webhooks, email):
+
+- ``HttpSessionPool``: sesiones HTTP keep-alive compartidas (aiohttp si está
+  disponible; si no, conexiones ``http.client`` persistentes por host)
+- ``SmtpConnection``: una conexión SMTP persistente que se reabre sola
+  si el servidor la cierra o queda inactiva demasiado tiempo
+- ``DigestBatcher``: agrupa ráfagas de alertas en un único mensaje digest
+- ``RetryQueue``: cola de reintentos en disco (SQLite) con backoff
+  exponencial; lo que no se pudo enviar sobrevive a un reinicio. Los
+  rechazos definitivos (4xx salvo 408/429) pasan a 'dead' sin reintentos
+- ``AlertDelivery``: une todo lo anterior para un canal concreto
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import asyncio
+import http.client
+import json
+import logging
+import smtplib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_RETRY_DB = PROJECT_ROOT / "data" / "alerts" / "retry_queue.db"
+
+# Respuestas 4xx que sí merecen reintento (timeout del servidor, rate limit)
+RETRYABLE_CLIENT_STATUS = frozenset({408, 429})
+
+
+def is_retryable_status(status: int) -> bool:
+    """
+    Si una respuesta HTTP fallida puede salir bien al reintentarla
+
+    Args:
+        status: Código de estado HTTP
+
+    Returns:
+        bool: False para 4xx (salvo 408/429): el mismo payload volverá a fallar
+    """
+    return not 400 <= status < 500 or status in RETRYABLE_CLIENT_STATUS
+
+
+class PermanentDeliveryError(Exception):
+    """Envío rechazado de forma definitiva: no se reintenta (queda como 'dead')"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================================
+# 🌐 HTTP
+# ============================================================================
+
+class HttpSessionPool:
+    """
+    Sesiones HTTP keep-alive compartidas entre canales
+
+    Args:
+        timeout: Timeout total por petición (segundos)
+        limit_per_host: Conexiones simultáneas por host
+        keepalive_timeout: Segundos que se mantiene abierta una conexión ociosa
+    """
+
+    def __init__(self, timeout: float = 10.0, limit_per_host: int = 4,
+                 keepalive_timeout: float = 60.0):
+        self.timeout = timeout
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session = None
+        self._session_loop = None
+        # Fallback sin aiohttp: (scheme, netloc) → (conexión, lock)
+        self._connections: Dict[Tuple[str, str], Tuple[http.client.HTTPConnection, threading.Lock]] = {}
+        self._connections_lock = threading.Lock()
+        self._last_used: Dict[Tuple[str, str], float] = {}
+
+        self.stats = {'requests': 0, 'errors': 0, 'connections_opened': 0}
+
+    async def post_json(self, url: str, payload: Any) -> int:
+        """
+        POST con cuerpo JSON reutilizando la conexión del host
+
+        Returns:
+            int: Código de estado HTTP
+        """
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.stats['requests'] += 1
+        try:
+            if AIOHTTP_AVAILABLE:
+                session = self._get_session()
+                async with session.post(url, data=body,
+                                        headers={'Content-Type': 'application/json'}) as response:
+                    await response.read()
+                    return response.status
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._post_blocking, url, body)
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+    def _get_session(self):
+        """Sesión aiohttp del event loop actual (una sesión por loop)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._session_loop = loop
+            self.stats['connections_opened'] += 1
+        return self._session
+
+    def _post_blocking(self, url: str, body: bytes) -> int:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        with self._connections_lock:
+            entry = self._connections.get(key)
+            if entry is None:
+                entry = self._connections[key] = (self._open_connection(parts), threading.Lock())
+
+        connection, lock = entry
+        with lock:
+            # Conexión ociosa más allá del keep-alive: el servidor ya la habrá cerrado
+            if time.time() - self._last_used.get(key, time.time()) > self.keepalive_timeout:
+                connection.close()
+            for attempt in range(2):
+                sent = False
+                try:
+                    connection.request('POST', path, body=body,
+                                       headers={'Content-Type': 'application/json',
+                                                'Connection': 'keep-alive'})
+                    sent = True
+                    response = connection.getresponse()
+                    response.read()
+                    self._last_used[key] = time.time()
+                    return response.status
+                except (http.client.HTTPException, ConnectionError, OSError):
+                    connection.close()
+                    # Un POST no es idempotente: solo se repite si falló al escribir
+                    # la petición sobre una conexión keep-alive cerrada. Si ya se
+                    # envió, el servidor pudo procesarla; decide la cola de reintentos
+                    if sent or attempt:
+                        raise
+                    connection = self._open_connection(parts)
+                    with self._connections_lock:
+                        self._connections[key] = (connection, lock)
+        return 0
+
+    def _open_connection(self, parts) -> http.client.HTTPConnection:
+        self.stats['connections_opened'] += 1
+        cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        return cls(parts.hostname, parts.port, timeout=self.timeout)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        with self._connections_lock:
+            for connection, _ in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+
+# ============================================================================
+# 📧 SMTP
+# ============================================================================
+
+class SmtpConnection:
+    """
+    Conexión SMTP persistente (thread-safe)
+
+    Args:
+        host, port: Servidor SMTP
+        username, password: Credenciales (sin login si username está vacío)
+        use_tls: Usar STARTTLS
+        timeout: Timeout de socket
+        idle_timeout: Segundos de inactividad tras los que se reabre la conexión
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = True,
+                 timeout: float = 15.0, idle_timeout: float = 240.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'messages_sent': 0, 'connections_opened': 0, 'reconnects': 0}
+
+    def send(self, from_addr: str, to_addrs: List[str], message: str):
+        """Enviar un mensaje ya serializado (bloqueante)"""
+        with self._lock:
+            if self._server is not None and time.time() - self._last_used > self.idle_timeout:
+                self._close()
+            for attempt in range(2):
+                if self._server is None:
+                    self._connect()
+                try:
+                    self._server.sendmail(from_addr, to_addrs, message)
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    self._server = None
+                    self.stats['reconnects'] += 1
+                    if attempt:
+                        raise
+            self._last_used = time.time()
+            self.stats['messages_sent'] += 1
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self._server = server
+        self.stats['connections_opened'] += 1
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+# ============================================================================
+# 💾 COLA DE REINTENTOS
+# ============================================================================
+
+@dataclass
+class RetryItem:
+    """Envío pendiente de reintento"""
+    id: int
+    channel: str
+    payload: Any
+    attempts: int
+
+
+class RetryQueue:
+    """
+    Cola de reintentos persistente con backoff exponencial
+
+    Args:
+        path: Archivo SQLite (':memory:' para pruebas)
+        base_delay: Espera antes del primer reintento (segundos)
+        max_delay: Espera máxima entre reintentos
+        max_attempts: Intentos tras los que el envío pasa a 'dead'
+    """
+
+    def __init__(self, path=DEFAULT_RETRY_DB, base_delay: float = 5.0,
+                 max_delay: float = 900.0, max_attempts: int = 8):
+        self.path = str(path)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS alert_retry (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_alert_retry_due ON alert_retry (dead, channel, next_attempt)"
+        )
+        self._conn.commit()
+        self.stats = {'queued': 0, 'retried_ok': 0, 'retried_failed': 0, 'dead': 0}
+
+    def backoff(self, attempts: int) -> float:
+        """Espera antes del intento número ``attempts + 1``"""
+        return min(self.max_delay, self.base_delay * (2 ** attempts))
+
+    def push(self, channel: str, payload: Any, error: str = '', now: Optional[float] = None,
+             dead: bool = False) -> int:
+        """
+        Encolar un envío fallido
+
+        Args:
+            dead: Guardarlo directamente como 'dead' (fallo permanente, sin reintentos)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO alert_retry (channel, payload, attempts, next_attempt, created_at, last_error, dead) "
+                "VALUES (?, ?, 0, ?, ?, ?, ?)",
+                (channel, json.dumps(payload, default=str), now + self.backoff(0), now, error, int(dead))
+            )
+            self._conn.commit()
+            self.stats['dead' if dead else 'queued'] += 1
+            return cursor.lastrowid
+
+    def due(self, channel: str, now: Optional[float] = None, limit: int = 50) -> List[RetryItem]:
+        """Envíos del canal cuyo próximo intento ya venció"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, channel, payload, attempts FROM alert_retry "
+                "WHERE dead = 0 AND channel = ? AND next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                (channel, now, limit)
+            ).fetchall()
+        return [RetryItem(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def complete(self, item: RetryItem):
+        """El reintento tuvo éxito: eliminar de la cola"""
+        with self._lock:
+            self._conn.execute("DELETE FROM alert_retry WHERE id = ?", (item.id,))
+            self._conn.commit()
+            self.stats['retried_ok'] += 1
+
+    def fail(self, item: RetryItem, error: str = '', now: Optional[float] = None,
+             permanent: bool = False) -> bool:
+        """
+        El reintento falló: reprogramar con backoff
+
+        Args:
+            permanent: El destino rechazó el envío (4xx): pasa a 'dead' sin más intentos
+
+        Returns:
+            bool: False si se agotaron los intentos (queda como 'dead')
+        """
+        now = time.time() if now is None else now
+        attempts = item.attempts + 1
+        dead = permanent or attempts >= self.max_attempts
+        with self._lock:
+            self._conn.execute(
+                "UPDATE alert_retry SET attempts = ?, next_attempt = ?, last_error = ?, dead = ? WHERE id = ?",
+                (attempts, now + self.backoff(attempts), error, int(dead), item.id)
+            )
+            self._conn.commit()
+            self.stats['dead' if dead else 'retried_failed'] += 1
+        return not dead
+
+    def pending_count(self, channel: Optional[str] = None) -> int:
+        with self._lock:
+            if channel is None:
+                return self._conn.execute("SELECT COUNT(*) FROM alert_retry WHERE dead = 0").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM alert_retry WHERE dead = 0 AND channel = ?", (channel,)
+            ).fetchone()[0]
+
+    def next_due_in(self, channel: str, now: Optional[float] = None) -> Optional[float]:
+        """Segundos hasta el próximo reintento del canal (None si no hay)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt) FROM alert_retry WHERE dead = 0 AND channel = ?", (channel,)
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['pending'] = self.pending_count()
+        with self._lock:
+            stats['dead_total'] = self._conn.execute(
+                "SELECT COUNT(*) FROM alert_retry WHERE dead = 1").fetchone()[0]
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================================
+# 📦 DIGEST
+# ============================================================================
+
+class DigestBatcher:
+    """
+    Agrupa alertas durante una ventana corta y las entrega juntas
+
+    Args:
+        flush_fn: Corrutina que recibe la lista de alertas acumuladas
+        window_seconds: Espera desde la primera alerta hasta el envío
+        max_items: Tamaño que fuerza el envío inmediato
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Any]], Awaitable[Any]],
+                 window_seconds: float = 2.0, max_items: int = 20):
+        self.flush_fn = flush_fn
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self._items: List[Any] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def add(self, item: Any):
+        self._items.append(item)
+        if len(self._items) >= self.max_items:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window_seconds)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Entregar ya lo acumulado"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if items:
+            await self.flush_fn(items)
+
+
+# ============================================================================
+# 🚚 ENTREGA POR CANAL
+# ============================================================================
+
+class AlertDelivery:
+    """
+    Entrega de un canal: digest + envío + cola de reintentos
+
+    Args:
+        key: Identificador estable del destino (clave en la cola de reintentos)
+        send_payload: Corrutina(payload) → bool que realiza el envío; lanza
+            ``PermanentDeliveryError`` si el destino rechaza el payload
+        format_single: Callable(alert) → payload de una alerta
+        format_digest: Callable(alerts) → payload de un digest
+        retry_queue: Cola de reintentos (por defecto la compartida)
+        digest_window: Segundos de agrupación (0 = sin digest)
+        max_digest: Alertas máximas por digest
+        immediate: Callable(alert) → True si la alerta no debe esperar al digest
+        retry_interval: Espera mínima entre pasadas de reintento
+    """
+
+    def __init__(self, key: str, send_payload: Callable[[Any], Awaitable[bool]],
+                 format_single: Callable[[Any], Any], format_digest: Callable[[List[Any]], Any],
+                 retry_queue: Optional[RetryQueue] = None, digest_window: float = 2.0,
+                 max_digest: int = 20, immediate: Optional[Callable[[Any], bool]] = None,
+                 retry_interval: float = 1.0):
+        self.key = key
+        self.send_payload = send_payload
+        self.format_single = format_single
+        self.format_digest = format_digest
+        self.retry_queue = retry_queue or get_retry_queue()
+        self.immediate = immediate or (lambda alert: False)
+        self.retry_interval = retry_interval
+        self.batcher = DigestBatcher(self._send_batch, digest_window, max_digest) if digest_window > 0 else None
+        self._retry_task: Optional[asyncio.Task] = None
+        self.stats = {'alerts': 0, 'messages': 0, 'digests': 0, 'failed': 0, 'queued_for_retry': 0,
+                      'rejected': 0}
+
+    async def deliver(self, alert: Any) -> bool:
+        """
+        Entregar (o encolar en el digest) una alerta
+
+        Returns:
+            bool: True si se envió o quedó aceptada para el digest
+        """
+        self.stats['alerts'] += 1
+        self._ensure_retry_pump()
+        if self.batcher is None or self.immediate(alert):
+            return await self._send_batch([alert])
+        await self.batcher.add(alert)
+        return True
+
+    async def flush(self):
+        """Enviar el digest pendiente sin esperar a la ventana"""
+        if self.batcher is not None:
+            await self.batcher.flush()
+
+    async def close(self):
+        """
+        Entregar el digest pendiente y parar la bomba de reintentos
+
+        Lo que siga fallando queda en la cola en disco para el próximo arranque.
+        """
+        await self.flush()
+        if self._retry_task is not None and not self._retry_task.done():
+            self._retry_task.cancel()
+        self._retry_task = None
+
+    async def _send_batch(self, alerts: List[Any]) -> bool:
+        if len(alerts) == 1:
+            payload = self.format_single(alerts[0])
+        else:
+            payload = self.format_digest(alerts)
+            self.stats['digests'] += 1
+
+        ok, error, permanent = await self._attempt(payload)
+        self.stats['messages'] += 1
+        if not ok:
+            self.stats['failed'] += 1
+            if permanent:
+                # Se guarda como 'dead' para inspección, sin reintentos
+                self.stats['rejected'] += 1
+                self.retry_queue.push(self.key, payload, error, dead=True)
+            else:
+                self.stats['queued_for_retry'] += 1
+                self.retry_queue.push(self.key, payload, error)
+                self._ensure_retry_pump()
+        return ok
+
+    async def _attempt(self, payload: Any) -> Tuple[bool, str, bool]:
+        """Intentar un envío → (ok, error, fallo permanente)"""
+        try:
+            return bool(await self.send_payload(payload)), '', False
+        except PermanentDeliveryError as e:
+            logger.error(f"Entrega rechazada en {self.key}: {e}")
+            return False, str(e), True
+        except Exception as e:
+            logger.warning(f"Entrega fallida en {self.key}: {e}")
+            return False, str(e), False
+
+    async def retry_due(self) -> int:
+        """
+        Reintentar los envíos vencidos de este canal
+
+        Returns:
+            int: Envíos que salieron bien
+        """
+        delivered = 0
+        for item in self.retry_queue.due(self.key):
+            ok, error, permanent = await self._attempt(item.payload)
+            if ok:
+                self.retry_queue.complete(item)
+                delivered += 1
+            elif permanent:
+                self.retry_queue.fail(item, error, permanent=True)
+            elif not self.retry_queue.fail(item, error or 'send failed'):
+                logger.error(f"Alerta descartada tras {self.retry_queue.max_attempts} intentos en {self.key}")
+        return delivered
+
+    def _ensure_retry_pump(self):
+        if self._retry_task is not None and not self._retry_task.done():
+            return
+        if self.retry_queue.pending_count(self.key):
+            self._retry_task = asyncio.get_running_loop().create_task(self._retry_loop())
+
+    async def _retry_loop(self):
+        """Reintentar mientras queden envíos pendientes del canal"""
+        while True:
+            wait = self.retry_queue.next_due_in(self.key)
+            if wait is None:
+                return
+            await asyncio.sleep(max(self.retry_interval, wait))
+            await self.retry_due()
+
+
+# Instancias compartidas por todos los canales del proceso
+_shared_http_pool: Optional[HttpSessionPool] = None
+_shared_retry_queue: Optional[RetryQueue] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_pool(**options) -> HttpSessionPool:
+    """
+    Obtener el HttpSessionPool compartido del proceso
+
+    Args:
+        **options: Argumentos de HttpSessionPool (solo se usan en la primera llamada)
+    """
+    global _shared_http_pool
+    with _shared_lock:
+        if _shared_http_pool is None:
+            _shared_http_pool = HttpSessionPool(**options)
+        return _shared_http_pool
+
+
+def get_retry_queue(**options) -> RetryQueue:
+    """
+    Obtener la RetryQueue compartida del proceso
+
+    Args:
+        **options: Argumentos de RetryQueue (solo se usan en la primera llamada)
+    """
+    global _shared_retry_queue
+    with _shared_lock:
+        if _shared_retry_queue is None:
+            _shared_retry_queue = RetryQueue(**options)
+        return _shared_retry_queue
@@ -0,0 +1,275 @@
+"""
+AlertThrottle - Throttling y deduplicación en O(1)
+==================================================
+
+Componente compartido de rate limiting para los sistemas de alertas
+(FVGAlertSystem, AlertEngine). Sustituye las listas de timestamps y los
+diccionarios sin límite por estructuras de tamaño fijo:
+
+- ``SlidingWindowCounter``: contador en buffer circular (N sub-ventanas)
+  para "como máximo X alertas por minuto"
+- ``TokenBucket``: límite de ritmo por clave con ráfaga configurable
+- Deduplicación por clave con caducidad incremental: las claves se
+  guardan por orden de último uso y en cada consulta se retiran unas
+  pocas caducadas desde la cabeza, sin barridos completos
+
+Todas las operaciones son O(1) amortizado e independientes del tamaño
+del historial. Los contadores de supresión quedan en ``get_stats()``.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SlidingWindowCounter:
+    """
+    Contador de eventos en ventana deslizante sobre un buffer circular
+
+    Args:
+        window_seconds: Duración de la ventana
+        buckets: Sub-ventanas del buffer (precisión = window / buckets)
+    """
+
+    def __init__(self, window_seconds: float = 60.0, buckets: int = 60):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_width = window_seconds / buckets
+        self.counts = [0] * buckets
+        self.total = 0
+        self._head: Optional[int] = None  # Índice absoluto de la sub-ventana más reciente
+
+    def _advance(self, now: float) -> int:
+        slot = int(now // self.bucket_width)
+        if self._head is None:
+            self._head = slot
+        elif slot > self._head:
+            if slot - self._head >= self.buckets:
+                self.counts = [0] * self.buckets
+                self.total = 0
+            else:
+                # Cada sub-ventana se vacía una vez por vuelta: O(1) amortizado
+                for expired in range(self._head + 1, slot + 1):
+                    i = expired % self.buckets
+                    self.total -= self.counts[i]
+                    self.counts[i] = 0
+            self._head = slot
+        return self._head % self.buckets
+
+    def add(self, now: float, count: int = 1):
+        self.counts[self._advance(now)] += count
+        self.total += count
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+class TokenBucket:
+    """
+    Token bucket: ``rate`` tokens por segundo hasta ``capacity``
+
+    Args:
+        rate: Tokens repuestos por segundo
+        capacity: Ráfaga máxima
+        now: Instante de creación (el bucket empieza lleno)
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def try_consume(self, now: float, tokens: float = 1.0) -> bool:
+        self._refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class _KeyState:
+    """Estado de una clave: último uso y bucket opcional"""
+
+    __slots__ = ('last_seen', 'bucket')
+
+    def __init__(self, last_seen: float, bucket: Optional[TokenBucket]):
+        self.last_seen = last_seen
+        self.bucket = bucket
+
+
+class AlertThrottle:
+    """
+    Throttling global + por clave con deduplicación
+
+    Args:
+        max_events: Eventos permitidos por ventana (None = sin límite global)
+        window_seconds: Ventana del límite global
+        dedupe_seconds: Una clave repetida antes de este tiempo es duplicada
+            (None = sin deduplicación)
+        key_rate: Eventos por segundo permitidos por clave (None = sin límite)
+        key_burst: Ráfaga máxima por clave
+        max_keys: Claves vivas como máximo (se expulsa la menos reciente)
+        expire_batch: Claves caducadas retiradas como máximo por llamada
+        clock: Reloj en segundos (por defecto time.monotonic)
+    """
+
+    def __init__(self, max_events: Optional[int] = None, window_seconds: float = 60.0,
+                 dedupe_seconds: Optional[float] = None, key_rate: Optional[float] = None,
+                 key_burst: float = 1.0, max_keys: int = 10000, expire_batch: int = 32,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_events = max_events
+        self.dedupe_seconds = dedupe_seconds
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.max_keys = max_keys
+        self.expire_batch = expire_batch
+        self.clock = clock
+
+        self.window = SlidingWindowCounter(window_seconds)
+        self._keys: "OrderedDict[Hashable, _KeyState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'allowed': 0,
+            'suppressed_rate': 0,
+            'suppressed_key_rate': 0,
+            'suppressed_duplicate': 0,
+            'expired_keys': 0,
+            'evicted_keys': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def key_ttl(self) -> float:
+        """Segundos sin actividad tras los que una clave ya no limita nada"""
+        refill_time = self.key_burst / self.key_rate if self.key_rate else 0.0
+        return max(self.dedupe_seconds or 0.0, refill_time)
+
+    # ========================================================================
+    # 🚦 CONSULTA Y REGISTRO
+    # ========================================================================
+
+    def check(self, key: Optional[Hashable] = None, now: Optional[float] = None) -> Optional[str]:
+        """
+        Comprobar si un evento se suprimiría, sin registrarlo
+
+        Args:
+            key: Clave de deduplicación / límite por clave
+            now: Instante (por defecto el reloj del throttle)
+
+        Returns:
+            Motivo de supresión ('rate', 'key_rate', 'duplicate') o None
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._expire(now)
+            reason = self._reason(key, now)
+            if reason:
+                self.stats[f'suppressed_{reason}'] += 1
+            return reason
+
+    def record(self, key: Optional[Hashable] = None, now: Optional[float] = None):
+        """Registrar un evento emitido (cuenta para la ventana y para su clave)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._record(key, now)
+
+    def allow(self, key: Optional[Hashable] = None, now: Optional[float] = None) -> bool:
+        """
+        Comprobar y registrar en un solo paso
+
+        Returns:
+            bool: True si el evento puede emitirse (y queda registrado)
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._expire(now)
+            reason = self._reason(key, now)
+            if reason:
+                self.stats[f'suppressed_{reason}'] += 1
+                return False
+            self._record(key, now)
+            return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Retirar todas las claves caducadas (para limpiezas periódicas)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            return self._expire(now, limit=None)
+
+    # ========================================================================
+    # 🔧 INTERNOS
+    # ========================================================================
+
+    def _reason(self, key: Optional[Hashable], now: float) -> Optional[str]:
+        if self.max_events is not None and self.window.count(now) >= self.max_events:
+            return 'rate'
+        state = self._keys.get(key) if key is not None else None
+        if state is not None:
+            if self.dedupe_seconds is not None and now - state.last_seen < self.dedupe_seconds:
+                return 'duplicate'
+            if state.bucket is not None and state.bucket.available(now) < 1.0:
+                return 'key_rate'
+        return None
+
+    def _record(self, key: Optional[Hashable], now: float):
+        self.window.add(now)
+        self.stats['allowed'] += 1
+        if key is None:
+            return
+
+        state = self._keys.get(key)
+        if state is None:
+            bucket = TokenBucket(self.key_rate, self.key_burst, now) if self.key_rate else None
+            state = self._keys[key] = _KeyState(now, bucket)
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.stats['evicted_keys'] += 1
+        else:
+            state.last_seen = now
+            self._keys.move_to_end(key)
+        if state.bucket is not None:
+            state.bucket.try_consume(now)
+
+    def _expire(self, now: float, limit: Optional[int] = -1) -> int:
+        """Retirar claves caducadas desde la cabeza (las menos recientes)"""
+        limit = self.expire_batch if limit == -1 else limit
+        ttl = self.key_ttl
+        removed = 0
+        while self._keys and (limit is None or removed < limit):
+            key, state = next(iter(self._keys.items()))
+            if now - state.last_seen < ttl:
+                break
+            del self._keys[key]
+            removed += 1
+        self.stats['expired_keys'] += removed
+        return removed
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = self.clock() if now is None else now
+        with self._lock:
+            stats = self.stats.copy()
+            stats['tracked_keys'] = len(self._keys)
+            stats['window_count'] = self.window.count(now)
+            stats['suppressed_total'] = (stats['suppressed_rate'] + stats['suppressed_key_rate']
+                                         + stats['suppressed_duplicate'])
+            return stats
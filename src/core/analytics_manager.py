@@ -11,7 +11,7 @@ import logging
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -19,6 +19,11 @@ from .config_manager import ConfigManager
 from .logger_manager import LoggerManager
 from .error_manager import ErrorManager
 from .data_manager import DataManager
+from .running_stats import TradeStatsAccumulator
+from .columnar_history import ColumnarHistory
+from .grid_level_index import GridLevelIndex
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 
 
 @dataclass
@@ -66,14 +71,62 @@ class MarketMetrics:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+# Esquemas de los historiales de snapshots (ver ColumnarHistory)
+PERFORMANCE_HISTORY_COLUMNS = {
+    "timestamp": "datetime64[ms]",
+    "total_trades": "int64",
+    "winning_trades": "int64",
+    "losing_trades": "int64",
+    "win_rate": float,
+    "total_profit": float,
+    "total_loss": float,
+    "net_profit": float,
+    "profit_factor": float,
+    "average_win": float,
+    "average_loss": float,
+    "max_drawdown": float,
+    "sharpe_ratio": float,
+    "trades_per_day": float
+}
+
+GRID_HISTORY_COLUMNS = {
+    "timestamp": "datetime64[ms]",
+    "active_levels": "int32",
+    "completed_cycles": "int64",
+    "grid_efficiency": float,
+    "level_hit_rate": float,
+    "average_cycle_time": float,
+    "grid_spread": float,
+    # level_distribution aplanado
+    "buy_levels": "int32",
+    "sell_levels": "int32",
+    "total_levels": "int32"
+}
+
+MARKET_HISTORY_COLUMNS = {
+    "timestamp": "datetime64[ms]",
+    "volatility": float,
+    "trend_strength": float,
+    "support_resistance_strength": float,
+    "market_efficiency": float,
+    "correlation_with_grid": float,
+    "bollinger_width": float,
+    "rsi_average": float
+}
+
+HISTORY_FLUSH_ROWS = 60
+
+
 class MarketAnalytics:
     """Módulo de análisis de condiciones del mercado"""
     
-    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager, data_manager):
+    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager, data_manager,
+                 history_dir: Optional[Path] = None):
         self.config = config_manager
         self.logger = logger_manager
         self.data_manager = data_manager
-        self.market_history: List[MarketMetrics] = []
+        self.market_history = ColumnarHistory(MARKET_HISTORY_COLUMNS, path=history_dir,
+                                              flush_rows=HISTORY_FLUSH_ROWS)
         self.current_market_metrics = MarketMetrics()
         self.stochastic_signals = []  # Historial de señales estocásticas
         self.market_conditions = {}  # Condiciones actuales del mercado
@@ -391,18 +444,7 @@ class MarketAnalytics:
     def save_market_snapshot(self) -> None:
         """Guarda snapshot de métricas del mercado"""
         try:
-            snapshot = MarketMetrics(
-                volatility=self.current_market_metrics.volatility,
-                trend_strength=self.current_market_metrics.trend_strength,
-                support_resistance_strength=self.current_market_metrics.support_resistance_strength,
-                market_efficiency=self.current_market_metrics.market_efficiency,
-                correlation_with_grid=self.current_market_metrics.correlation_with_grid,
-                bollinger_width=self.current_market_metrics.bollinger_width,
-                rsi_average=self.current_market_metrics.rsi_average,
-                timestamp=datetime.now()
-            )
-            
-            self.market_history.append(snapshot)
+            self.market_history.append_record(self.current_market_metrics, timestamp=datetime.now())
             self.logger.log_success("Snapshot de mercado guardado")
             
         except Exception as e:
@@ -412,57 +454,32 @@ class MarketAnalytics:
 class GridAnalytics:
     """Módulo de análisis específico para grid trading"""
     
-    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager):
+    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager,
+                 history_dir: Optional[Path] = None):
         self.config = config_manager
         self.logger = logger_manager
-        self.grid_history: List[GridMetrics] = []
+        self.grid_history = ColumnarHistory(GRID_HISTORY_COLUMNS, path=history_dir,
+                                            flush_rows=HISTORY_FLUSH_ROWS)
         self.current_grid_metrics = GridMetrics()
-        self.active_levels = {}  # nivel -> información del nivel
-        self.completed_cycles = []
-        self.level_performance = {}  # tracking por nivel
+        # Acumuladores por nivel; completed_cycles guarda solo los ciclos recientes
+        self.level_index = GridLevelIndex()
+        self.completed_cycles = self.level_index.cycles
         
-    def update_grid_level(self, level: float, action: str, price: float, volume: float = 0.0) -> None:
-        """Actualiza información de un nivel del grid"""
+    def update_grid_level(self, level: float, action: str, price: float, volume: float = 0.0,
+                          pnl: float = 0.0, level_type: Optional[str] = None) -> None:
+        """
+        Actualiza información de un nivel del grid (O(1))
+        
+        Args:
+            level: Precio del nivel
+            action: 'ACTIVATE', 'HIT', 'FILL' o 'DEACTIVATE'
+            price: Precio de mercado
+            volume: Volumen del toque o ejecución
+            pnl: P&L realizado atribuido al nivel
+            level_type: 'BUY' o 'SELL' al activar
+        """
         try:
-            level_key = f"{level:.5f}"
-            
-            if action == "ACTIVATE":
-                self.active_levels[level_key] = {
-                    'level': level,
-                    'activated_at': datetime.now(),
-                    'price': price,
-                    'volume': volume,
-                    'hits': 0
-                }
-                self.current_grid_metrics.active_levels += 1
-                
-            elif action == "HIT":
-                if level_key in self.active_levels:
-                    self.active_levels[level_key]['hits'] += 1
-                    self.active_levels[level_key]['last_hit'] = datetime.now()
-                
-                # Actualizar performance por nivel
-                if level_key not in self.level_performance:
-                    self.level_performance[level_key] = {'hits': 0, 'volume': 0.0}
-                self.level_performance[level_key]['hits'] += 1
-                self.level_performance[level_key]['volume'] += volume
-                
-            elif action == "DEACTIVATE":
-                if level_key in self.active_levels:
-                    level_info = self.active_levels.pop(level_key)
-                    self.current_grid_metrics.active_levels -= 1
-                    
-                    # Registrar ciclo completado
-                    if level_info.get('hits', 0) > 0:
-                        cycle_time = (datetime.now() - level_info['activated_at']).total_seconds()
-                        self.completed_cycles.append({
-                            'level': level,
-                            'duration': cycle_time,
-                            'hits': level_info['hits'],
-                            'completed_at': datetime.now()
-                        })
-                        self.current_grid_metrics.completed_cycles += 1
-            
+            self.level_index.record(level, action, price, volume, pnl, level_type)
             self._calculate_grid_metrics()
             self.logger.log_info(f"Grid level {action}: {level:.5f} @ {price:.5f}")
             
@@ -470,36 +487,35 @@ class GridAnalytics:
             self.logger.log_error(f"Error actualizando grid level: {e}")
     
     def _calculate_grid_metrics(self) -> None:
-        """Calcula métricas derivadas del grid"""
+        """Calcula métricas derivadas del grid desde los agregados del índice"""
         try:
-            if self.completed_cycles:
-                total_duration = sum(cycle['duration'] for cycle in self.completed_cycles)
-                self.current_grid_metrics.average_cycle_time = total_duration / len(self.completed_cycles)
+            index = self.level_index
+            metrics = self.current_grid_metrics
+            metrics.active_levels = index.active_count
+            metrics.completed_cycles = index.completed_cycles
+            metrics.average_cycle_time = index.average_cycle_time()
             
             # Calcular eficiencia del grid
-            total_hits = sum(perf['hits'] for perf in self.level_performance.values())
-            if total_hits > 0 and self.current_grid_metrics.active_levels > 0:
-                self.current_grid_metrics.level_hit_rate = (
-                    total_hits / (self.current_grid_metrics.active_levels + len(self.completed_cycles)) * 100
+            if index.total_hits > 0 and metrics.active_levels > 0:
+                metrics.level_hit_rate = (
+                    index.total_hits / (metrics.active_levels + metrics.completed_cycles) * 100
                 )
             
             # Calcular spread del grid
-            if len(self.active_levels) >= 2:
-                levels = [float(level) for level in self.active_levels.keys()]
-                self.current_grid_metrics.grid_spread = max(levels) - min(levels)
+            if metrics.active_levels >= 2:
+                metrics.grid_spread = index.spread()
             
             # Distribución de niveles
-            self.current_grid_metrics.level_distribution = {
-                'buy_levels': len([l for l in self.active_levels.values() if l.get('type') == 'BUY']),
-                'sell_levels': len([l for l in self.active_levels.values() if l.get('type') == 'SELL']),
-                'total_levels': len(self.active_levels)
+            metrics.level_distribution = {
+                'buy_levels': index.active_by_type["BUY"],
+                'sell_levels': index.active_by_type["SELL"],
+                'total_levels': metrics.active_levels
             }
             
             # Calcular eficiencia general
-            if self.current_grid_metrics.completed_cycles > 0:
-                self.current_grid_metrics.grid_efficiency = (
-                    self.current_grid_metrics.completed_cycles / 
-                    (self.current_grid_metrics.active_levels + self.current_grid_metrics.completed_cycles) * 100
+            if metrics.completed_cycles > 0:
+                metrics.grid_efficiency = (
+                    metrics.completed_cycles / (metrics.active_levels + metrics.completed_cycles) * 100
                 )
                 
         except Exception as e:
@@ -512,32 +528,32 @@ class GridAnalytics:
     def get_level_performance_report(self) -> Dict[str, Any]:
         """Retorna reporte detallado de performance por nivel"""
         try:
-            if not self.level_performance:
+            index = self.level_index
+            if not index.levels_hit:
                 return {"message": "No hay datos de niveles disponibles"}
             
             # Top 5 niveles más activos
-            top_levels = sorted(
-                self.level_performance.items(),
-                key=lambda x: x[1]['hits'],
-                reverse=True
-            )[:5]
+            top_levels = index.top_levels(5, by="hits")
             
             return {
-                "total_levels_tracked": len(self.level_performance),
-                "total_hits": sum(perf['hits'] for perf in self.level_performance.values()),
-                "total_volume": sum(perf['volume'] for perf in self.level_performance.values()),
+                "total_levels_tracked": index.levels_hit,
+                "total_hits": index.total_hits,
+                "total_volume": index.total_volume,
+                "total_fills": index.total_fills,
+                "total_pnl": round(index.total_pnl, 2),
                 "top_performing_levels": [
                     {
-                        "level": level,
-                        "hits": data['hits'],
-                        "volume": round(data['volume'], 2)
+                        "level": row['level'],
+                        "hits": row['hits'],
+                        "volume": round(row['volume'], 2),
+                        "fills": row['fills'],
+                        "pnl": round(row['pnl'], 2),
+                        "time_in_level": round(row['time_in_level'], 1)
                     }
-                    for level, data in top_levels
+                    for row in top_levels
                 ],
-                "average_hits_per_level": round(
-                    sum(perf['hits'] for perf in self.level_performance.values()) / len(self.level_performance),
-                    2
-                )
+                "average_hits_per_level": round(index.total_hits / index.levels_hit, 2),
+                "recent_events": index.recent_events(10)
             }
             
         except Exception as e:
@@ -547,18 +563,11 @@ class GridAnalytics:
     def save_grid_snapshot(self) -> None:
         """Guarda snapshot de métricas del grid"""
         try:
-            snapshot = GridMetrics(
-                active_levels=self.current_grid_metrics.active_levels,
-                completed_cycles=self.current_grid_metrics.completed_cycles,
-                grid_efficiency=self.current_grid_metrics.grid_efficiency,
-                level_hit_rate=self.current_grid_metrics.level_hit_rate,
-                average_cycle_time=self.current_grid_metrics.average_cycle_time,
-                grid_spread=self.current_grid_metrics.grid_spread,
-                level_distribution=self.current_grid_metrics.level_distribution.copy(),
-                timestamp=datetime.now()
+            self.grid_history.append_record(
+                self.current_grid_metrics,
+                timestamp=datetime.now(),
+                **self.current_grid_metrics.level_distribution
             )
-            
-            self.grid_history.append(snapshot)
             self.logger.log_success("Snapshot de grid guardado")
             
         except Exception as e:
@@ -568,26 +577,21 @@ class GridAnalytics:
 class PerformanceTracker:
     """Módulo de seguimiento de rendimiento del sistema"""
     
-    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager):
+    def __init__(self, config_manager: ConfigManager, logger_manager: LoggerManager,
+                 history_dir: Optional[Path] = None):
         self.config = config_manager
         self.logger = logger_manager
-        self.metrics_history: List[PerformanceMetrics] = []
+        self.metrics_history = ColumnarHistory(PERFORMANCE_HISTORY_COLUMNS, path=history_dir,
+                                               flush_rows=HISTORY_FLUSH_ROWS)
         self.current_metrics = PerformanceMetrics()
+        self.trade_stats = TradeStatsAccumulator()
         
     def update_trade_metrics(self, trade_result: Dict[str, Any]) -> None:
         """Actualiza métricas con resultado de un trade"""
         try:
             profit = trade_result.get('profit', 0)
             
-            self.current_metrics.total_trades += 1
-            
-            if profit > 0:
-                self.current_metrics.winning_trades += 1
-                self.current_metrics.total_profit += profit
-            else:
-                self.current_metrics.losing_trades += 1
-                self.current_metrics.total_loss += abs(profit)
-            
+            self.trade_stats.add(float(profit))
             self._calculate_derived_metrics()
             self.logger.log_info(f"Métricas actualizadas - Trades: {self.current_metrics.total_trades}")
             
@@ -595,31 +599,24 @@ class PerformanceTracker:
             self.logger.log_error(f"Error actualizando métricas de trade: {e}")
     
     def _calculate_derived_metrics(self) -> None:
-        """Calcula métricas derivadas"""
+        """Calcula métricas derivadas desde el acumulador (O(1) por trade)"""
         try:
-            if self.current_metrics.total_trades > 0:
-                self.current_metrics.win_rate = (
-                    self.current_metrics.winning_trades / self.current_metrics.total_trades * 100
-                )
-            
-            self.current_metrics.net_profit = (
-                self.current_metrics.total_profit - self.current_metrics.total_loss
-            )
-            
-            if self.current_metrics.total_loss > 0:
-                self.current_metrics.profit_factor = (
-                    self.current_metrics.total_profit / self.current_metrics.total_loss
-                )
-            
-            if self.current_metrics.winning_trades > 0:
-                self.current_metrics.average_win = (
-                    self.current_metrics.total_profit / self.current_metrics.winning_trades
-                )
-            
-            if self.current_metrics.losing_trades > 0:
-                self.current_metrics.average_loss = (
-                    self.current_metrics.total_loss / self.current_metrics.losing_trades
-                )
+            stats = self.trade_stats.metrics()
+            metrics = self.current_metrics
+            
+            metrics.total_trades = stats["total_trades"]
+            metrics.winning_trades = stats["winning_trades"]
+            metrics.losing_trades = stats["losing_trades"]
+            metrics.win_rate = stats["win_rate"]
+            metrics.total_profit = stats["gross_profit"]
+            metrics.total_loss = stats["gross_loss"]
+            metrics.net_profit = stats["net_profit"]
+            metrics.profit_factor = stats["profit_factor"]
+            metrics.average_win = stats["average_win"]
+            metrics.average_loss = stats["average_loss"]
+            # Drawdown del P&L cerrado acumulado y Sharpe por trade
+            metrics.max_drawdown = stats["max_drawdown"]
+            metrics.sharpe_ratio = stats["trade_sharpe"]
                 
         except Exception as e:
             self.logger.log_error(f"Error calculando métricas derivadas: {e}")
@@ -631,24 +628,7 @@ class PerformanceTracker:
     def save_snapshot(self) -> None:
         """Guarda snapshot de métricas actuales"""
         try:
-            snapshot = PerformanceMetrics(
-                total_trades=self.current_metrics.total_trades,
-                winning_trades=self.current_metrics.winning_trades,
-                losing_trades=self.current_metrics.losing_trades,
-                win_rate=self.current_metrics.win_rate,
-                total_profit=self.current_metrics.total_profit,
-                total_loss=self.current_metrics.total_loss,
-                net_profit=self.current_metrics.net_profit,
-                profit_factor=self.current_metrics.profit_factor,
-                average_win=self.current_metrics.average_win,
-                average_loss=self.current_metrics.average_loss,
-                max_drawdown=self.current_metrics.max_drawdown,
-                sharpe_ratio=self.current_metrics.sharpe_ratio,
-                trades_per_day=self.current_metrics.trades_per_day,
-                timestamp=datetime.now()
-            )
-            
-            self.metrics_history.append(snapshot)
+            self.metrics_history.append_record(self.current_metrics, timestamp=datetime.now())
             self.logger.log_success("Snapshot de métricas guardado")
             
         except Exception as e:
@@ -674,10 +654,14 @@ class AnalyticsManager:
         self.error_manager = error_manager
         self.data_manager = data_manager
         
-        # Inicializar submódulos
-        self.performance_tracker = PerformanceTracker(config_manager, logger_manager)
-        self.grid_analytics = GridAnalytics(config_manager, logger_manager)
-        self.market_analytics = MarketAnalytics(config_manager, logger_manager, data_manager)
+        # Inicializar submódulos (historiales en columnas bajo analytics/)
+        self.history_dir = PROJECT_ROOT / "analytics" / "history"
+        self.performance_tracker = PerformanceTracker(config_manager, logger_manager,
+                                                      history_dir=self.history_dir / "performance")
+        self.grid_analytics = GridAnalytics(config_manager, logger_manager,
+                                            history_dir=self.history_dir / "grid")
+        self.market_analytics = MarketAnalytics(config_manager, logger_manager, data_manager,
+                                                history_dir=self.history_dir / "market")
         
         # Estado interno
         self.is_initialized = False
@@ -695,7 +679,7 @@ class AnalyticsManager:
                 raise Exception("Dependencias no válidas")
             
             # Configurar directorio de analytics
-            analytics_dir = Path("analytics")
+            analytics_dir = PROJECT_ROOT / "analytics"
             analytics_dir.mkdir(exist_ok=True)
             
             self.is_initialized = True
@@ -888,13 +872,14 @@ class AnalyticsManager:
             self.logger.log_error(error_msg)
             return {"error": error_msg}
     
-    def update_grid_level(self, level: float, action: str, price: float, volume: float = 0.0) -> None:
+    def update_grid_level(self, level: float, action: str, price: float, volume: float = 0.0,
+                          pnl: float = 0.0, level_type: Optional[str] = None) -> None:
         """Actualiza información de un nivel del grid"""
         try:
             if not self.analytics_active:
                 return
             
-            self.grid_analytics.update_grid_level(level, action, price, volume)
+            self.grid_analytics.update_grid_level(level, action, price, volume, pnl, level_type)
             self.logger.log_info(f"Grid level actualizado: {action} @ {level:.5f}")
             
         except Exception as e:
@@ -982,6 +967,36 @@ class AnalyticsManager:
             self.error_manager.handle_system_error("SnapshotSave", e)
             return False
     
+    def get_history_dataframe(self, kind: str = "performance", tail: Optional[int] = None,
+                              copy: bool = False) -> pd.DataFrame:
+        """
+        Historial de snapshots como DataFrame (vista sin copia)
+        
+        Args:
+            kind: 'performance', 'grid' o 'market'
+            tail: Solo los últimos N snapshots (opcional)
+            copy: Entregar una copia modificable en lugar de la vista
+            
+        Returns:
+            pd.DataFrame: Snapshots en memoria (de solo lectura salvo con copy=True)
+        """
+        return self._histories()[kind].frame(tail=tail, copy=copy)
+    
+    def flush_history(self) -> int:
+        """Escribe a disco los snapshots pendientes de todos los submódulos"""
+        try:
+            return sum(history.flush() for history in self._histories().values())
+        except Exception as e:
+            self.logger.log_error(f"Error escribiendo historial de analytics: {e}")
+            return 0
+    
+    def _histories(self) -> Dict[str, ColumnarHistory]:
+        return {
+            "performance": self.performance_tracker.metrics_history,
+            "grid": self.grid_analytics.grid_history,
+            "market": self.market_analytics.market_history
+        }
+    
     def get_system_status(self) -> Dict[str, Any]:
         """Retorna estado del sistema de analytics"""
         return {
@@ -990,6 +1005,7 @@ class AnalyticsManager:
             "performance_tracker": self.performance_tracker is not None,
             "grid_analytics": self.grid_analytics is not None,
             "market_analytics": self.market_analytics is not None,
+            "history": {kind: history.get_stats() for kind, history in self._histories().items()},
             "version": "1.3.0",
             "phase": "FASE_1.3_MARKET_ANALYTICS"
         }
@@ -999,6 +1015,7 @@ class AnalyticsManager:
         try:
             if self.analytics_active:
                 self.save_analytics_snapshot()
+            self.flush_history()
             
             self.analytics_active = False
             self.logger.log_success("AnalyticsManager cerrado correctamente")
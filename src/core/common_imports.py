@@ -23,52 +23,52 @@ from dataclasses import dataclass, field
 import json
 import logging
 
-# === LIBRERÍAS DE DATOS Y ANÁLISIS ===
-import pandas as pd
-import numpy as np
-
-# === LIBRERÍAS DE TRADING ===
-try:
-    import MetaTrader5 as mt5
-    MT5_AVAILABLE = True
-except ImportError:
-    MT5_AVAILABLE = False
-    mt5 = None
-
-# === LIBRERÍAS DE ANÁLISIS AVANZADO (OPCIONALES) ===
-try:
-    from scipy import stats
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.linear_model import LinearRegression
-    from sklearn.preprocessing import StandardScaler
-    ADVANCED_ANALYTICS_AVAILABLE = True
-except ImportError:
-    ADVANCED_ANALYTICS_AVAILABLE = False
-    stats = None
-    RandomForestRegressor = None
-    LinearRegression = None
-    StandardScaler = None
-
-# === PYTEST PARA TESTS ===
+# === IMPORTACIÓN DIFERIDA ===
+# pandas, numpy, MetaTrader5, scipy, sklearn y pytest se importan en el primer
+# acceso (PEP 562 __getattr__); importar este módulo ya no los carga.
 try:
-    import pytest
-    from unittest.mock import Mock, patch, MagicMock
-    TESTING_AVAILABLE = True
+    from src.core.lazy_loader import lazy_exports, module_available
 except ImportError:
-    TESTING_AVAILABLE = False
-    pytest = None
-    Mock = None
-    patch = None
-    MagicMock = None
+    from lazy_loader import lazy_exports, module_available
 
 # === CONSTANTES DE CONFIGURACIÓN ===
 # Versión del sistema de imports
-IMPORTS_VERSION = "v1.0.0"
+IMPORTS_VERSION = "v1.1.0"
 
-# Configuración de pandas
-pd.set_option('display.max_columns', None)
-pd.set_option('display.width', None)
-pd.set_option('display.max_colwidth', None)
+# Disponibilidad comprobada sin importar las librerías
+MT5_AVAILABLE = module_available("MetaTrader5")
+ADVANCED_ANALYTICS_AVAILABLE = module_available("scipy") and module_available("sklearn")
+TESTING_AVAILABLE = module_available("pytest")
+
+_LAZY_EXPORTS = {
+    # Librerías de datos y análisis
+    'pd': 'pandas',
+    'np': 'numpy',
+    # Librerías de trading
+    'mt5': 'MetaTrader5',
+    # Librerías de análisis avanzado (opcionales)
+    'stats': ('scipy', 'stats'),
+    'RandomForestRegressor': ('sklearn.ensemble', 'RandomForestRegressor'),
+    'LinearRegression': ('sklearn.linear_model', 'LinearRegression'),
+    'StandardScaler': ('sklearn.preprocessing', 'StandardScaler'),
+    # Pytest para tests
+    'pytest': 'pytest',
+    'Mock': ('unittest.mock', 'Mock'),
+    'patch': ('unittest.mock', 'patch'),
+    'MagicMock': ('unittest.mock', 'MagicMock'),
+}
+
+_resolve_export = lazy_exports(globals(), _LAZY_EXPORTS, fallback=lambda name: None)
+
+
+def __getattr__(name: str):
+    value = _resolve_export(name)
+    if name == 'pd' and value is not None:
+        # Configuración de pandas al cargarlo por primera vez
+        value.set_option('display.max_columns', None)
+        value.set_option('display.width', None)
+        value.set_option('display.max_colwidth', None)
+    return value
 
 # === FUNCIONES DE UTILIDAD ===
 
@@ -80,8 +80,8 @@ def get_available_libraries() -> Dict[str, bool]:
         Dict con estado de cada librería
     """
     return {
-        'pandas': True,
-        'numpy': True,
+        'pandas': module_available('pandas'),
+        'numpy': module_available('numpy'),
         'mt5': MT5_AVAILABLE,
         'advanced_analytics': ADVANCED_ANALYTICS_AVAILABLE,
         'testing': TESTING_AVAILABLE,
@@ -103,9 +103,7 @@ def validate_dependencies() -> Tuple[bool, List[str]]:
     critical_deps = ['pandas', 'numpy']
     for dep in critical_deps:
         try:
-            if dep == 'pandas' and pd is None:
-                errors.append(f"Dependencia crítica faltante: {dep}")
-            elif dep == 'numpy' and np is None:
+            if not module_available(dep):
                 errors.append(f"Dependencia crítica faltante: {dep}")
         except Exception:
             errors.append(f"Error validando dependencia: {dep}")
@@ -149,15 +147,10 @@ __all__ = [
     # Librerías de datos
     'pd', 'np',
     
-    # Trading
-    'mt5', 'MT5_AVAILABLE',
-    
-    # Analytics avanzado
-    'stats', 'RandomForestRegressor', 'LinearRegression', 'StandardScaler',
-    'ADVANCED_ANALYTICS_AVAILABLE',
-    
-    # Testing
-    'pytest', 'Mock', 'patch', 'MagicMock', 'TESTING_AVAILABLE',
+    # Disponibilidad de librerías opcionales; mt5, stats, RandomForestRegressor,
+    # LinearRegression, StandardScaler, pytest, Mock, patch y MagicMock se
+    # importan por nombre (fuera de __all__ para que `import *` no las cargue)
+    'MT5_AVAILABLE', 'ADVANCED_ANALYTICS_AVAILABLE', 'TESTING_AVAILABLE',
     
     # Utilidades
     'get_available_libraries', 'validate_dependencies', 'log_dependencies_status',
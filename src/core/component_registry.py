@@ -0,0 +1,206 @@
+"""
+ComponentRegistry - Construcción diferida de componentes
+========================================================
+
+Registro de subsistemas (piso 3, piso 4, dashboard web, ML, analytics,
+optimizador) que se construyen la primera vez que se piden en lugar de
+todos al arrancar:
+
+- ``register`` guarda cómo construir un componente: una fábrica o una
+  ruta ``'paquete.modulo:Clase'`` que solo se importa al construir
+- ``get`` construye bajo demanda (una sola vez, seguro entre hilos) y
+  devuelve None si el componente no está disponible
+- ``add_listener`` avisa de cada construcción, p.ej. para conectar el
+  dashboard con los componentes que van apareciendo
+- ``status`` informa de qué está construido, pendiente o fallido sin
+  provocar ninguna construcción
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+try:
+    from src.core.lazy_loader import module_available
+except ImportError:
+    from lazy_loader import module_available
+
+Factory = Union[str, Callable[..., Any]]
+
+
+class ComponentSpec:
+    """Cómo y cuándo construir un componente"""
+
+    __slots__ = ('name', 'factory', 'args', 'kwargs', 'group', 'description',
+                 'instance', 'built', 'error', 'build_ms')
+
+    def __init__(self, name: str, factory: Factory, args: tuple, kwargs: Dict[str, Any],
+                 group: str, description: str):
+        self.name = name
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        self.group = group
+        self.description = description
+        self.instance: Any = None
+        self.built = False
+        self.error: Optional[str] = None
+        self.build_ms = 0.0
+
+    @property
+    def module_name(self) -> Optional[str]:
+        return self.factory.split(":", 1)[0] if isinstance(self.factory, str) else None
+
+
+def resolve_factory(factory: Factory) -> Callable[..., Any]:
+    """Importar la ruta 'modulo:atributo' (o devolver el callable tal cual)"""
+    if callable(factory):
+        return factory
+    module_name, _, attribute = factory.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+
+class ComponentRegistry:
+    """
+    Registro de componentes construidos en el primer uso
+
+    Args:
+        logger: LoggerManager opcional para registrar construcciones y fallos
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self._specs: Dict[str, ComponentSpec] = {}
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._lock = threading.RLock()
+
+    # ========================================================================
+    # 📝 REGISTRO
+    # ========================================================================
+
+    def register(self, name: str, factory: Factory, *args, group: str = "general",
+                 description: str = "", **kwargs):
+        """
+        Registrar un componente
+
+        Args:
+            name: Nombre del componente
+            factory: Callable o ruta 'paquete.modulo:Clase'; para argumentos
+                que deben resolverse al construir, usar una lambda como fábrica
+            *args: Argumentos posicionales de la fábrica
+            group: Subsistema al que pertenece (p.ej. 'piso_3', 'dashboard')
+            description: Texto para informes de estado
+            **kwargs: Argumentos con nombre de la fábrica
+        """
+        with self._lock:
+            self._specs[name] = ComponentSpec(name, factory, args, kwargs, group, description)
+
+    def add_listener(self, listener: Callable[[str, Any], None]):
+        """Registrar un callable (nombre, instancia) invocado tras cada construcción"""
+        self._listeners.append(listener)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def names(self, group: Optional[str] = None) -> List[str]:
+        return [name for name, spec in self._specs.items() if group is None or spec.group == group]
+
+    # ========================================================================
+    # 🏗️ CONSTRUCCIÓN
+    # ========================================================================
+
+    def get(self, name: str) -> Any:
+        """
+        Obtener un componente, construyéndolo si es la primera vez
+
+        Args:
+            name: Nombre registrado
+
+        Returns:
+            Any: Instancia, o None si no está disponible o falló al construirse
+        """
+        spec = self._specs[name]
+        if spec.built:
+            return spec.instance
+        with self._lock:
+            if spec.built:
+                return spec.instance
+            self._build(spec)
+        if spec.instance is not None:
+            for listener in list(self._listeners):
+                try:
+                    listener(name, spec.instance)
+                except Exception as e:
+                    self._log_warning(f"Listener de {name} falló: {e}")
+        return spec.instance
+
+    def build(self, names: Optional[Iterable[str]] = None, group: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Construir varios componentes por adelantado (arranque no diferido)
+
+        Returns:
+            dict: Nombre → True si quedó construido
+        """
+        targets = list(names) if names is not None else self.names(group)
+        return {name: self.get(name) is not None for name in targets}
+
+    def peek(self, name: str) -> Any:
+        """Instancia si ya está construida, sin construirla"""
+        spec = self._specs.get(name)
+        return spec.instance if spec else None
+
+    def is_built(self, name: str) -> bool:
+        spec = self._specs.get(name)
+        return bool(spec and spec.built and spec.instance is not None)
+
+    def is_available(self, name: str) -> bool:
+        """Si el módulo del componente está instalado (sin importarlo)"""
+        spec = self._specs.get(name)
+        if spec is None or (spec.built and spec.instance is None):
+            return False
+        return spec.module_name is None or module_available(spec.module_name)
+
+    def _build(self, spec: ComponentSpec):
+        started = time.perf_counter()
+        try:
+            factory = resolve_factory(spec.factory)
+            spec.instance = factory(*spec.args, **spec.kwargs)
+            spec.error = None
+        except Exception as e:
+            spec.instance = None
+            spec.error = f"{type(e).__name__}: {e}"
+            self._log_warning(f"Componente {spec.name} no disponible: {spec.error}")
+        spec.build_ms = (time.perf_counter() - started) * 1000
+        spec.built = True
+        if spec.instance is not None and self.logger:
+            self.logger.log_info(f"Componente {spec.name} construido en {spec.build_ms:.0f} ms")
+
+    # ========================================================================
+    # 📊 ESTADO
+    # ========================================================================
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de cada componente: 'built', 'failed' o 'pending'"""
+        report = {}
+        for name, spec in self._specs.items():
+            if spec.built:
+                state = "built" if spec.instance is not None else "failed"
+            else:
+                state = "pending"
+            report[name] = {
+                "state": state,
+                "group": spec.group,
+                "description": spec.description,
+                "build_ms": round(spec.build_ms, 1),
+                "error": spec.error
+            }
+        return report
+
+    def _log_warning(self, message: str):
+        if self.logger:
+            self.logger.log_warning(message)
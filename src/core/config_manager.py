@@ -242,27 +242,19 @@ class ConfigManager:
         Returns:
             str: Nombre de la sesión actual
         """
-        from datetime import datetime
-        
-        now = datetime.utcnow()
-        current_hour = now.hour
+        # Import diferido: session_calendar carga pandas/numpy
+        try:
+            from src.core.session_calendar import SessionWindow, get_session_calendar
+        except ImportError:
+            from session_calendar import SessionWindow, get_session_calendar
         
         sessions = self.get_sessions_config()
-        
-        for session_name, session_info in sessions.items():
-            start_hour = int(session_info['start'].split(':')[0])
-            end_hour = int(session_info['end'].split(':')[0])
-            
-            if start_hour <= end_hour:
-                # Sesión normal (no cruza medianoche)
-                if start_hour <= current_hour < end_hour:
-                    return session_name.upper()
-            else:
-                # Sesión que cruza medianoche
-                if current_hour >= start_hour or current_hour < end_hour:
-                    return session_name.upper()
-        
-        return 'UNKNOWN'
+        calendar = get_session_calendar([
+            SessionWindow(session_name.upper(), session_info['start'], session_info['end'],
+                          tz=session_info.get('timezone', 'UTC'))
+            for session_name, session_info in sessions.items()
+        ])
+        return calendar.session_at(default='UNKNOWN')
     
     def get_market_trend_config(self) -> Dict[str, Any]:
         """Obtiene la configuración de tendencias de mercado"""
@@ -0,0 +1,550 @@
+"""
+CorrelationService - Correlaciones y clusters de volatilidad vectorizados
+========================================================================
+
+Núcleo numérico del análisis de correlaciones y volatilidad de
+AdvancedAnalyzer, compartido con los gestores de riesgo para limitar la
+exposición correlacionada.
+
+- ``RollingCorrelation``: matriz de correlación deslizante de un universo
+  de símbolos con covarianza incremental. Cada vela suma el producto
+  exterior del vector de retornos nuevo y resta el del que sale de la
+  ventana: actualizar 28×28 correlaciones es una operación N×N.
+- ``detect_volatility_clusters``: volatilidad deslizante (sumas
+  acumuladas) y rachas de volatilidad alta/baja sobre la matriz de
+  retornos alineados, todas las columnas a la vez
+- ``CorrelationService``: alinea los cierres por vela, mantiene ambos
+  análisis, cachea los resultados hasta la siguiente vela y calcula la
+  exposición correlacionada de una operación candidata
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Universo por defecto: los 28 cruces de las 8 divisas principales
+MAJOR_CURRENCIES = ('EUR', 'GBP', 'AUD', 'NZD', 'USD', 'CAD', 'CHF', 'JPY')
+DEFAULT_SYMBOLS = tuple(base + quote for base, quote in itertools.combinations(MAJOR_CURRENCIES, 2))
+
+
+class RollingCorrelation:
+    """
+    Correlación deslizante con covarianza incremental
+
+    Args:
+        symbols: Universo de símbolos (columnas)
+        window: Velas de la ventana
+        min_periods: Velas mínimas para devolver correlaciones
+        resync_every: Velas entre recálculos completos de las sumas
+    """
+
+    def __init__(self, symbols: Sequence[str], window: int = 100, min_periods: int = 50,
+                 resync_every: int = 1000):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.min_periods = min_periods
+        self.resync_every = resync_every
+        n = len(self.symbols)
+        self._buffer = np.zeros((window, n))
+        self._pos = 0
+        self.count = 0
+        self.updates = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+
+    def push(self, returns: np.ndarray):
+        """Incorporar el vector de retornos de una vela (NaN = sin movimiento)"""
+        r = np.nan_to_num(np.asarray(returns, dtype=float))
+        if self.count == self.window:
+            old = self._buffer[self._pos]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        else:
+            self.count += 1
+        self._buffer[self._pos] = r
+        self._sum += r
+        self._cross += np.outer(r, r)
+        self._pos = (self._pos + 1) % self.window
+
+        self.updates += 1
+        if self.updates % self.resync_every == 0:
+            self.resync()
+
+    def seed(self, returns: np.ndarray):
+        """Cargar un histórico (T×N) de una vez; se conservan las últimas ``window`` filas"""
+        rows = np.nan_to_num(np.asarray(returns, dtype=float))[-self.window:]
+        self._buffer[:] = 0.0
+        self._buffer[:len(rows)] = rows
+        self.count = len(rows)
+        self._pos = len(rows) % self.window
+        self.resync()
+
+    def resync(self):
+        """Recalcular las sumas desde el buffer para limitar el error acumulado"""
+        rows = self._buffer[:self.count] if self.count < self.window else self._buffer
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+
+    def covariance(self) -> np.ndarray:
+        """Matriz de covarianza muestral (ddof=1) de la ventana"""
+        n = self.count
+        if n < 2:
+            return np.full(self._cross.shape, np.nan)
+        return (self._cross - np.outer(self._sum, self._sum) / n) / (n - 1)
+
+    def correlation(self) -> np.ndarray:
+        """Matriz de correlación (NaN si faltan velas o un símbolo no se mueve)"""
+        if self.count < max(self.min_periods, 2):
+            return np.full(self._cross.shape, np.nan)
+        cov = self.covariance()
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[:, std == 0] = np.nan
+        corr[std == 0, :] = np.nan
+        return corr
+
+
+def detect_volatility_clusters(returns: np.ndarray, window: int = 20, threshold: float = 2.0,
+                               low_threshold: float = 1.0, min_bars: int = 2) -> List[List[Dict[str, Any]]]:
+    """
+    Rachas de volatilidad alta/baja en cada columna de una matriz de retornos
+
+    La volatilidad deslizante se obtiene de sumas acumuladas de retornos al
+    cuadrado y se normaliza (z-score) contra su media y desviación en el
+    propio histórico.
+
+    Args:
+        returns: Retornos alineados (T×N)
+        window: Velas de la volatilidad deslizante
+        threshold: z-score a partir del que la volatilidad es alta
+        low_threshold: z-score (negativo) por debajo del que es baja
+        min_bars: Velas mínimas de una racha
+
+    Returns:
+        list: Por columna, lista de clusters con type ('high'/'low'),
+        start/end (índices de fila, fin inclusivo), average/peak volatility,
+        strength (|z| medio) y ongoing
+    """
+    r = np.nan_to_num(np.atleast_2d(np.asarray(returns, dtype=float).T).T)
+    t, n = r.shape
+    if t < window:
+        return [[] for _ in range(n)]
+
+    squared = np.vstack([np.zeros((1, n)), np.cumsum(r * r, axis=0)])
+    volatility = np.sqrt((squared[window:] - squared[:-window]) / window)  # (T-w+1)×N
+    mean = volatility.mean(axis=0)
+    std = volatility.std(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(std > 0, (volatility - mean) / std, 0.0)
+    labels = np.select([z > threshold, z < -low_threshold], [1, -1], 0)
+
+    offset = window - 1  # Fila de retornos de la primera volatilidad
+    last_row = t - 1
+    clusters: List[List[Dict[str, Any]]] = []
+    for col in range(n):
+        column = labels[:, col]
+        # Límites de rachas: posiciones donde cambia la etiqueta
+        edges = np.flatnonzero(np.diff(column)) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [len(column)])) - 1
+        found = []
+        for start, end in zip(starts, ends):
+            label = column[start]
+            if label == 0 or end - start + 1 < min_bars:
+                continue
+            segment = volatility[start:end + 1, col]
+            found.append({
+                'type': 'high' if label > 0 else 'low',
+                'start': int(start + offset),
+                'end': int(end + offset),
+                'bars': int(end - start + 1),
+                'average_volatility': float(segment.mean()),
+                'peak_volatility': float(segment.max()),
+                'strength': float(np.abs(z[start:end + 1, col]).mean()),
+                'ongoing': bool(end + offset == last_row)
+            })
+        clusters.append(found)
+    return clusters
+
+
+def _rates_to_closes(rates: Any) -> Optional[pd.Series]:
+    """Cierres indexados por epoch (s) desde rates de MT5 o un DataFrame de DataManager"""
+    if rates is None or len(rates) == 0:
+        return None
+    frame = pd.DataFrame(rates)
+    if 'time' in frame:
+        times = frame['time']
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    else:
+        times = pd.to_datetime(frame['datetime']).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    return pd.Series(frame['close'].to_numpy(dtype=float), index=np.asarray(times, dtype=np.int64))
+
+
+class CorrelationService:
+    """
+    Correlaciones deslizantes y clusters de volatilidad de un universo
+
+    Args:
+        symbols: Universo de símbolos (por defecto los 28 cruces principales)
+        timeframe: Timeframe de las velas
+        window: Velas de la ventana de correlación
+        min_periods: Velas mínimas para publicar correlaciones
+        vol_window: Velas de la volatilidad deslizante
+        cluster_threshold: z-score de volatilidad alta
+        low_cluster_threshold: z-score (negativo) de volatilidad baja
+        min_cluster_bars: Velas mínimas de un cluster
+        history_size: Velas de retornos conservadas para los clusters
+    """
+
+    def __init__(self, symbols: Optional[Sequence[str]] = None, timeframe: str = 'H1',
+                 window: int = 100, min_periods: int = 50, vol_window: int = 20,
+                 cluster_threshold: float = 2.0, low_cluster_threshold: float = 1.0,
+                 min_cluster_bars: int = 2, history_size: int = 500):
+        self._lock = threading.RLock()
+        self.stats = {'bars': 0, 'correlation_builds': 0, 'cluster_builds': 0, 'cache_hits': 0,
+                      'reconfigurations': 0}
+        self._setup(symbols=list(symbols or DEFAULT_SYMBOLS), timeframe=timeframe, window=window,
+                    min_periods=min_periods, vol_window=vol_window, cluster_threshold=cluster_threshold,
+                    low_cluster_threshold=low_cluster_threshold, min_cluster_bars=min_cluster_bars,
+                    history_size=history_size)
+
+    def _setup(self, **settings):
+        """Aplicar la configuración y vaciar las series (se recargan en el próximo refresh)"""
+        self.settings = settings
+        self.symbols = settings['symbols']
+        self.timeframe = settings['timeframe']
+        self.vol_window = settings['vol_window']
+        self.cluster_threshold = settings['cluster_threshold']
+        self.low_cluster_threshold = settings['low_cluster_threshold']
+        self.min_cluster_bars = settings['min_cluster_bars']
+        self.history_size = history_size = settings['history_size']
+        self.rolling = RollingCorrelation(self.symbols, settings['window'], settings['min_periods'])
+
+        n = len(self.symbols)
+        self._last_close = np.full(n, np.nan)
+        self._history = np.zeros((history_size, n))
+        self._history_times = np.zeros(history_size, dtype=np.int64)
+        self._history_pos = 0
+        self._history_count = 0
+        self.last_bar_time: Optional[int] = None
+
+        self._corr_cache: Optional[np.ndarray] = None
+        self._cluster_cache: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._last_refresh: Optional[float] = None  # monotonic del último refresh
+
+    def configure(self, **options) -> bool:
+        """
+        Cambiar la configuración del servicio compartido
+
+        Args:
+            **options: Argumentos de CorrelationService a cambiar
+
+        Returns:
+            bool: True si la configuración cambió (las series se vacían y la
+                siguiente llamada a ``refresh`` recarga el histórico)
+        """
+        if 'symbols' in options:
+            options['symbols'] = list(options['symbols'] or DEFAULT_SYMBOLS)
+        with self._lock:
+            settings = {**self.settings, **options}
+            if settings == self.settings:
+                return False
+            self._setup(**settings)
+            self.stats['reconfigurations'] += 1
+            return True
+
+    # ========================================================================
+    # 🕯️ ALIMENTACIÓN
+    # ========================================================================
+
+    def update_bar(self, bar_time: int, closes: Dict[str, float]) -> bool:
+        """
+        Incorporar los cierres de una vela
+
+        Los símbolos sin cierre en la vela cuentan como retorno 0 y
+        conservan su último cierre.
+
+        Returns:
+            bool: True si la vela era nueva
+        """
+        vector = np.full(len(self.symbols), np.nan)
+        for symbol, close in closes.items():
+            i = self.rolling.index.get(symbol)
+            if i is not None:
+                vector[i] = close
+        return self._push(int(bar_time), vector)
+
+    def update_frame(self, closes: pd.DataFrame) -> int:
+        """
+        Incorporar varias velas (filas = epoch de la vela, columnas = símbolos)
+
+        Returns:
+            int: Velas nuevas incorporadas
+        """
+        if closes is None or closes.empty:
+            return 0
+        table = closes.reindex(columns=self.symbols).sort_index()
+        if self.last_bar_time is not None:
+            table = table[table.index > self.last_bar_time]
+        if table.empty:
+            return 0
+        with self._lock:
+            if self.rolling.count == 0 and len(table) > 1:
+                return self._seed(table)
+            added = 0
+            for bar_time, row in zip(table.index.tolist(), table.to_numpy(dtype=float)):
+                added += self._push(int(bar_time), row)
+            return added
+
+    def refresh(self, loader: Callable[[str, int], Any], count: Optional[int] = None,
+                min_interval: Optional[float] = None) -> int:
+        """
+        Traer las velas cerradas nuevas de cada símbolo
+
+        Args:
+            loader: Callable(symbol, count) → rates o DataFrame con
+                time/datetime y close (la última vela está en formación)
+            count: Velas por símbolo; por defecto el histórico completo en
+                la primera carga y 3 después
+            min_interval: Si se indica, no hacer nada cuando otro componente
+                refrescó el servicio hace menos de estos segundos
+
+        Returns:
+            int: Velas nuevas incorporadas
+        """
+        now = time.monotonic()
+        if (min_interval is not None and self._last_refresh is not None
+                and now - self._last_refresh < min_interval):
+            return 0
+        self._last_refresh = now
+        if count is None:
+            count = self.history_size + 1 if self.last_bar_time is None else 3
+        series = {}
+        for symbol in self.symbols:
+            try:
+                closes = _rates_to_closes(loader(symbol, count))
+            except Exception:
+                closes = None
+            if closes is not None and len(closes) > 1:
+                series[symbol] = closes.iloc[:-1]
+        if not series:
+            return 0
+        return self.update_frame(pd.DataFrame(series))
+
+    def _push(self, bar_time: int, closes: np.ndarray) -> bool:
+        with self._lock:
+            if self.last_bar_time is not None and bar_time <= self.last_bar_time:
+                return False
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.log(closes / self._last_close)
+            returns[~np.isfinite(returns)] = 0.0
+            self._last_close = np.where(np.isnan(closes), self._last_close, closes)
+
+            self.rolling.push(returns)
+            self._history[self._history_pos] = returns
+            self._history_times[self._history_pos] = bar_time
+            self._history_pos = (self._history_pos + 1) % self.history_size
+            self._history_count = min(self._history_count + 1, self.history_size)
+            self._invalidate(bar_time)
+            return True
+
+    def _seed(self, table: pd.DataFrame) -> int:
+        """Primera carga: retornos de todo el bloque con operaciones de matriz"""
+        closes = table.ffill().to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(closes), axis=0, prepend=np.nan)
+        returns[~np.isfinite(returns)] = 0.0
+        self.rolling.seed(returns)
+
+        rows = returns[-self.history_size:]
+        times = table.index.to_numpy(dtype=np.int64)[-self.history_size:]
+        self._history[:len(rows)] = rows
+        self._history_times[:len(rows)] = times
+        self._history_count = len(rows)
+        self._history_pos = len(rows) % self.history_size
+
+        last = table.ffill().iloc[-1].to_numpy(dtype=float)
+        self._last_close = np.where(np.isnan(last), self._last_close, last)
+        self._invalidate(int(table.index[-1]))
+        self.stats['bars'] += len(table) - 1
+        return len(table)
+
+    def _invalidate(self, bar_time: int):
+        self.last_bar_time = bar_time
+        self._corr_cache = None
+        self._cluster_cache = None
+        self.stats['bars'] += 1
+
+    # ========================================================================
+    # 📊 RESULTADOS (cacheados hasta la siguiente vela)
+    # ========================================================================
+
+    def correlation_matrix(self) -> np.ndarray:
+        """Matriz de correlación actual (N×N)"""
+        with self._lock:
+            if self._corr_cache is None:
+                self._corr_cache = self.rolling.correlation()
+                self.stats['correlation_builds'] += 1
+            else:
+                self.stats['cache_hits'] += 1
+            return self._corr_cache
+
+    def correlation_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.correlation_matrix(), index=self.symbols, columns=self.symbols)
+
+    def get_correlation(self, symbol_a: str, symbol_b: str) -> float:
+        """Correlación entre dos símbolos (NaN si no hay datos)"""
+        if symbol_a == symbol_b:
+            return 1.0
+        i = self.rolling.index.get(symbol_a)
+        j = self.rolling.index.get(symbol_b)
+        if i is None or j is None:
+            return np.nan
+        return float(self.correlation_matrix()[i, j])
+
+    def returns_history(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retornos alineados (T×N) y epoch de cada vela, en orden cronológico"""
+        with self._lock:
+            count = self._history_count
+            if count < self.history_size:
+                return self._history[:count].copy(), self._history_times[:count].copy()
+            order = np.roll(np.arange(self.history_size), -self._history_pos)
+            return self._history[order], self._history_times[order]
+
+    def volatility_clusters(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Clusters de volatilidad de cada símbolo sobre el histórico de retornos
+
+        Returns:
+            dict: símbolo → clusters de ``detect_volatility_clusters`` con
+            start_time/end_time (epoch) añadidos
+        """
+        with self._lock:
+            if self._cluster_cache is not None:
+                self.stats['cache_hits'] += 1
+                return self._cluster_cache
+            returns, times = self.returns_history()
+            per_column = detect_volatility_clusters(
+                returns, self.vol_window, self.cluster_threshold,
+                self.low_cluster_threshold, self.min_cluster_bars
+            )
+            result = {}
+            for symbol, clusters in zip(self.symbols, per_column):
+                for cluster in clusters:
+                    cluster['start_time'] = int(times[cluster['start']])
+                    cluster['end_time'] = int(times[cluster['end']])
+                result[symbol] = clusters
+            self._cluster_cache = result
+            self.stats['cluster_builds'] += 1
+            return result
+
+    def current_volatility(self) -> Dict[str, float]:
+        """Volatilidad (desviación de retornos) de la ventana de correlación"""
+        cov = self.rolling.covariance()
+        return {symbol: float(np.sqrt(max(cov[i, i], 0.0))) if np.isfinite(cov[i, i]) else np.nan
+                for i, symbol in enumerate(self.symbols)}
+
+    # ========================================================================
+    # 🛡️ EXPOSICIÓN CORRELACIONADA
+    # ========================================================================
+
+    def correlated_exposure(self, symbol: str, net_volumes: Dict[str, float],
+                            threshold: float = 0.7) -> float:
+        """
+        Exposición neta equivalente en ``symbol`` de las posiciones abiertas
+
+        Suma el volumen neto (compras +, ventas -) de cada símbolo ponderado
+        por su correlación con ``symbol``; solo cuentan las correlaciones
+        con |ρ| >= threshold (el propio símbolo pesa 1).
+
+        Args:
+            symbol: Símbolo de la operación candidata
+            net_volumes: Volumen neto en lotes por símbolo
+            threshold: Correlación mínima para considerar dos símbolos ligados
+
+        Returns:
+            float: Lotes equivalentes (positivo = largo)
+        """
+        exposure = 0.0
+        for other, volume in net_volumes.items():
+            if not volume:
+                continue
+            rho = self.get_correlation(symbol, other)
+            if np.isfinite(rho) and abs(rho) >= threshold:
+                exposure += rho * volume
+        return exposure
+
+    def check_exposure_limit(self, symbol: str, side: str, volume: float,
+                             net_volumes: Dict[str, float], max_lots: float,
+                             threshold: float = 0.7) -> Tuple[bool, float]:
+        """
+        Comprobar si una operación respeta el límite de exposición correlacionada
+
+        Una operación que reduce la exposición correlacionada siempre se permite.
+
+        Args:
+            symbol: Símbolo de la operación
+            side: 'BUY' o 'SELL'
+            volume: Lotes de la operación
+            net_volumes: Volumen neto en lotes por símbolo
+            max_lots: Exposición correlacionada máxima (en valor absoluto)
+            threshold: Correlación mínima considerada
+
+        Returns:
+            tuple: (permitida, exposición correlacionada resultante)
+        """
+        current = self.correlated_exposure(symbol, net_volumes, threshold)
+        signed = volume if side == 'BUY' else -volume
+        resulting = current + signed
+        allowed = abs(resulting) <= max_lots or abs(resulting) < abs(current)
+        return allowed, resulting
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats.update({
+            'symbols': len(self.symbols),
+            'timeframe': self.timeframe,
+            'window_bars': self.rolling.count,
+            'history_bars': self._history_count,
+            'last_bar_time': self.last_bar_time
+        })
+        return stats
+
+
+# Servicio compartido por el analizador y los gestores de riesgo
+_shared_service: Optional[CorrelationService] = None
+_shared_lock = threading.Lock()
+
+
+def get_correlation_service(**options) -> CorrelationService:
+    """
+    Obtener el CorrelationService compartido del proceso
+
+    La configuración la fija AdvancedAnalyzer: si el servicio ya existe, las
+    opciones indicadas se aplican con ``configure``, así que da igual quién
+    lo pidiera primero. Los consumidores que solo leen lo piden sin opciones.
+
+    Args:
+        **options: Argumentos de CorrelationService
+
+    Returns:
+        CorrelationService: Instancia compartida
+    """
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CorrelationService(**options)
+        elif options:
+            _shared_service.configure(**options)
+        return _shared_service
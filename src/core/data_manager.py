@@ -27,6 +27,11 @@ try:
 except ImportError:
     MT5_AVAILABLE = False
 
+try:
+    from src.core.stochastic_state import compute_stochastic
+except ImportError:
+    from stochastic_state import compute_stochastic
+
 class DataManager:
     """
     Sistema de manejo de datos centralizado para Trading Grid.
@@ -139,6 +144,11 @@ class DataManager:
         else:
             print(f"INFO: {message}")
     
+    def _log_debug(self, message: str):
+        """Helper para logging de debug (rutas calientes: no se imprime sin logger)."""
+        if self.logger and hasattr(self.logger, 'log_debug'):
+            self.logger.log_debug(message)
+    
     def _log_error(self, message: str):
         """Helper para logging de errores."""
         if self.logger:
@@ -248,7 +258,7 @@ class DataManager:
         
         # Cache hit
         self.cache_stats['hits'] += 1
-        self._log_info(f"Cache hit: {key}")
+        self._log_debug(f"Cache hit: {key}")
         return self.cache[key]
     
     def clear_cache(self, pattern: str = ""):
@@ -462,14 +472,11 @@ class DataManager:
                 self._log_error(f"Columnas requeridas para Estocástico: {missing_cols}")
                 return data
             
-            # Calcular %K
-            lowest_low = data['low'].rolling(window=k_period).min()
-            highest_high = data['high'].rolling(window=k_period).max()
-            
-            data['stoch_k'] = 100 * ((data['close'] - lowest_low) / (highest_high - lowest_low))
-            
-            # Calcular %D (media móvil de %K)
-            data['stoch_d'] = data['stoch_k'].rolling(window=d_period).mean()
+            # %K y %D en una pasada con el cálculo compartido de StochasticState
+            data['stoch_k'], data['stoch_d'] = compute_stochastic(
+                data['high'].to_numpy(), data['low'].to_numpy(), data['close'].to_numpy(),
+                k_period, d_period
+            )
             
             self._log_info(f"Estocástico calculado (K: {k_period}, D: {d_period})")
             return data
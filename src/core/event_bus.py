@@ -0,0 +1,454 @@
+"""
+AlertEventBus - Bus de eventos asíncrono con prioridades
+========================================================
+
+Bus compartido por los sistemas de alertas (AlertEngine, FVGAlertSystem,
+AlertSystem de integración) para despachar notificaciones sin bloquear al
+hilo que genera la alerta.
+
+Funcionamiento:
+- Cada canal registrado tiene su propia cola de prioridad y sus workers,
+  de modo que un canal lento (webhook, SMTP) solo retrasa su propia cola
+- Un evento publicado se reparte a todos sus canales en paralelo
+- Las alertas CRITICAL se atienden antes que el resto y nunca se descartan
+  por cola llena
+- Métricas de backpressure por canal: profundidad, máximo, descartes,
+  timeouts y latencia publicación→entrega
+
+El bus corre su propio event loop en un hilo daemon, así que puede usarse
+igual desde código síncrono (``publish``) que asíncrono (``publish_async``).
+Los handlers síncronos se ejecutan en un pool de hilos del bus.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import asyncio
+import atexit
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    from src.core.live_trading.order_pipeline import LatencyHistogram
+except ImportError:
+    from live_trading.order_pipeline import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Rango de prioridad: menor = se atiende antes
+PRIORITY_RANK = {
+    'CRITICAL': 0,
+    'HIGH': 1,
+    'MEDIUM': 2,
+    'LOW': 3
+}
+_CRITICAL_RANK = PRIORITY_RANK['CRITICAL']
+_STOP_RANK = len(PRIORITY_RANK)  # Señal de parada: después de lo pendiente
+
+
+def priority_rank(priority: Any) -> int:
+    """
+    Rango numérico de una prioridad
+
+    Args:
+        priority: Enum AlertPriority (de cualquiera de los sistemas) o string
+
+    Returns:
+        int: 0 para CRITICAL ... 3 para LOW (MEDIUM si no se reconoce)
+    """
+    name = str(getattr(priority, 'value', priority)).upper()
+    return PRIORITY_RANK.get(name, PRIORITY_RANK['MEDIUM'])
+
+
+class _Delivery:
+    """Seguimiento de un evento publicado en varios canales"""
+
+    def __init__(self, future: Future, channels: List[str]):
+        self.future = future
+        self.results: Dict[str, bool] = {}
+        self.pending = len(channels)
+        self._lock = threading.Lock()
+
+    def complete(self, channel: str, success: bool):
+        with self._lock:
+            self.results[channel] = success
+            self.pending -= 1
+            done = self.pending == 0
+        if done and not self.future.done():
+            self.future.set_result(dict(self.results))
+
+
+@dataclass
+class BusChannel:
+    """Canal registrado en el bus"""
+    name: str
+    handler: Callable[[Any], Any]
+    is_async: bool
+    workers: int = 1
+    max_queue: int = 1000
+    timeout: Optional[float] = None
+    queue: asyncio.PriorityQueue = field(default_factory=asyncio.PriorityQueue)
+    tasks: List[asyncio.Task] = field(default_factory=list)
+    depth: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        'published': 0,
+        'delivered': 0,
+        'failed': 0,
+        'timeouts': 0,
+        'dropped': 0,
+        'critical_overflow': 0,
+        'max_depth': 0
+    })
+
+
+class AlertEventBus:
+    """
+    Bus de eventos con colas de prioridad por canal
+
+    Args:
+        executor_workers: Hilos para handlers síncronos (compartidos por canales)
+        default_max_queue: Tamaño de cola por defecto de cada canal
+        default_timeout: Timeout por defecto de cada entrega (None = sin límite)
+    """
+
+    def __init__(self, executor_workers: int = 8, default_max_queue: int = 1000,
+                 default_timeout: Optional[float] = 30.0):
+        self.executor_workers = executor_workers
+        self.default_max_queue = default_max_queue
+        self.default_timeout = default_timeout
+
+        self._lock = threading.RLock()
+        self._channels: Dict[str, BusChannel] = {}
+        self._namespaces: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+
+        self.stats = {'published': 0, 'no_channels': 0}
+
+    # ========================================================================
+    # 🔌 CANALES
+    # ========================================================================
+
+    def reserve_namespace(self, prefix: str) -> str:
+        """
+        Prefijo único para los canales de un sistema de alertas
+
+        Args:
+            prefix: Prefijo deseado (p.ej. 'fvg_alerts')
+
+        Returns:
+            str: El prefijo, o 'prefix#N' si ya estaba en uso
+        """
+        with self._lock:
+            count = self._namespaces.get(prefix, 0) + 1
+            self._namespaces[prefix] = count
+            return prefix if count == 1 else f"{prefix}#{count}"
+
+    def register_channel(self, name: str, handler: Callable[[Any], Any], workers: int = 1,
+                         max_queue: Optional[int] = None, timeout: Optional[float] = -1,
+                         is_async: Optional[bool] = None) -> BusChannel:
+        """
+        Registrar (o reemplazar) un canal
+
+        Args:
+            name: Nombre único del canal en el bus
+            handler: Callable(evento) síncrono o corrutina; devolver False
+                cuenta como fallo de entrega
+            workers: Entregas simultáneas en el canal
+            max_queue: Eventos encolados como máximo (CRITICAL no cuenta para el límite)
+            timeout: Segundos por entrega (-1 = valor por defecto del bus, None = sin límite)
+            is_async: Forzar el tipo de handler (por defecto se detecta)
+
+        Returns:
+            BusChannel registrado
+        """
+        if is_async is None:
+            is_async = asyncio.iscoroutinefunction(handler)
+        channel = BusChannel(
+            name=name,
+            handler=handler,
+            is_async=is_async,
+            workers=max(1, workers),
+            max_queue=self.default_max_queue if max_queue is None else max_queue,
+            timeout=self.default_timeout if timeout == -1 else timeout
+        )
+        with self._lock:
+            previous = self._channels.get(name)
+            self._channels[name] = channel
+            if self._loop is not None:
+                if previous is not None:
+                    self._loop.call_soon_threadsafe(self._stop_workers, previous)
+                self._loop.call_soon_threadsafe(self._start_workers, channel)
+        return channel
+
+    def unregister_channel(self, name: str) -> bool:
+        """Quitar un canal; sus eventos pendientes se entregan antes de parar"""
+        with self._lock:
+            channel = self._channels.pop(name, None)
+            if channel is not None and self._loop is not None:
+                self._loop.call_soon_threadsafe(self._stop_workers, channel)
+        return channel is not None
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]):
+        """
+        Registrar una corrutina que se ejecuta en el loop del bus al parar
+
+        Se llama tras drenar las colas, p.ej. para enviar digests pendientes.
+        """
+        with self._lock:
+            self._shutdown_hooks.append(hook)
+
+    def has_channel(self, name: str) -> bool:
+        return name in self._channels
+
+    # ========================================================================
+    # 📤 PUBLICACIÓN
+    # ========================================================================
+
+    def publish(self, event: Any, priority: Any = 'MEDIUM',
+                channels: Optional[Iterable[str]] = None) -> Future:
+        """
+        Publicar un evento en uno o varios canales sin esperar la entrega
+
+        Args:
+            event: Objeto que reciben los handlers (p.ej. la Alert)
+            priority: Prioridad del evento (enum o string)
+            channels: Canales destino (por defecto todos)
+
+        Returns:
+            Future que se resuelve con {canal: entregado} cuando todos los
+            canales han terminado (los descartes cuentan como False)
+        """
+        self.start()
+        rank = priority_rank(priority)
+        future: Future = Future()
+        enqueued_at = time.perf_counter()
+
+        with self._lock:
+            targets = [self._channels[n] for n in (self._channels if channels is None else channels)
+                       if n in self._channels]
+            self.stats['published'] += 1
+            if not targets:
+                self.stats['no_channels'] += 1
+                future.set_result({})
+                return future
+
+            delivery = _Delivery(future, [c.name for c in targets])
+            accepted = []
+            for channel in targets:
+                # Backpressure: cola llena → se descarta salvo CRITICAL
+                if channel.depth >= channel.max_queue:
+                    if rank != _CRITICAL_RANK:
+                        channel.stats['dropped'] += 1
+                        delivery.complete(channel.name, False)
+                        continue
+                    channel.stats['critical_overflow'] += 1
+                channel.depth += 1
+                channel.stats['published'] += 1
+                channel.stats['max_depth'] = max(channel.stats['max_depth'], channel.depth)
+                accepted.append(channel)
+
+            seq = next(self._seq)
+            for channel in accepted:
+                self._loop.call_soon_threadsafe(
+                    channel.queue.put_nowait, (rank, seq, event, delivery, enqueued_at)
+                )
+        return future
+
+    async def publish_async(self, event: Any, priority: Any = 'MEDIUM',
+                            channels: Optional[Iterable[str]] = None,
+                            wait: bool = False) -> Dict[str, bool]:
+        """
+        Publicar desde código asíncrono
+
+        Args:
+            wait: Esperar a que terminen todas las entregas
+
+        Returns:
+            dict: {canal: entregado} si wait=True, vacío en caso contrario
+        """
+        future = self.publish(event, priority, channels)
+        if not wait:
+            return {}
+        return await asyncio.wrap_future(future)
+
+    # ========================================================================
+    # ⚙️ EVENT LOOP Y WORKERS
+    # ========================================================================
+
+    def start(self):
+        """Arrancar el hilo del event loop (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.executor_workers,
+                                                thread_name_prefix="AlertEventBus")
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,),
+                                            name="AlertEventBus", daemon=True)
+            self._thread.start()
+            ready.wait()
+            for channel in self._channels.values():
+                self._loop.call_soon_threadsafe(self._start_workers, channel)
+
+    def stop(self, timeout: float = 5.0):
+        """Entregar lo pendiente (hasta timeout) y detener el event loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None:
+                return
+            channels = list(self._channels.values())
+            hooks = list(self._shutdown_hooks)
+            self._loop = None
+            self._thread = None
+
+        async def _shutdown():
+            for channel in channels:
+                self._stop_workers(channel)
+            tasks = [t for c in channels for t in c.tasks]
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+            for hook in hooks:
+                try:
+                    await asyncio.wait_for(hook(), timeout)
+                except Exception as e:
+                    logger.warning(f"AlertEventBus: hook de parada falló ({e})")
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout * (1 + len(hooks)) + 1)
+        except Exception as e:
+            logger.warning(f"AlertEventBus: parada con eventos pendientes ({e})")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=timeout)
+        self._executor.shutdown(wait=False)
+        for channel in channels:
+            channel.tasks.clear()
+            channel.queue = asyncio.PriorityQueue()
+            channel.depth = 0
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def _start_workers(self, channel: BusChannel):
+        channel.tasks = [
+            self._loop.create_task(self._worker(channel))
+            for _ in range(channel.workers)
+        ]
+
+    def _stop_workers(self, channel: BusChannel):
+        for _ in channel.tasks:
+            channel.queue.put_nowait((_STOP_RANK, next(self._seq), None, None, 0.0))
+
+    async def _worker(self, channel: BusChannel):
+        """Consumir la cola del canal en orden de prioridad"""
+        loop = asyncio.get_running_loop()
+        while True:
+            rank, _, event, delivery, enqueued_at = await channel.queue.get()
+            if delivery is None:
+                return
+            with self._lock:
+                channel.depth -= 1
+            channel.queue_wait.record((time.perf_counter() - enqueued_at) * 1000)
+
+            success = False
+            try:
+                if channel.is_async:
+                    call = channel.handler(event)
+                else:
+                    call = loop.run_in_executor(self._executor, channel.handler, event)
+                if channel.timeout:
+                    result = await asyncio.wait_for(call, channel.timeout)
+                else:
+                    result = await call
+                success = result is not False
+            except asyncio.TimeoutError:
+                channel.stats['timeouts'] += 1
+                logger.warning(f"AlertEventBus: timeout entregando en {channel.name}")
+            except Exception as e:
+                logger.error(f"AlertEventBus: error en canal {channel.name}: {e}")
+
+            channel.stats['delivered' if success else 'failed'] += 1
+            channel.latency.record((time.perf_counter() - enqueued_at) * 1000)
+            delivery.complete(channel.name, success)
+
+    # ========================================================================
+    # 📊 MÉTRICAS
+    # ========================================================================
+
+    def queue_depth(self, name: str) -> int:
+        channel = self._channels.get(name)
+        return channel.depth if channel else 0
+
+    def get_stats(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Métricas de backpressure por canal
+
+        Args:
+            prefix: Limitar a los canales de un namespace
+
+        Returns:
+            dict: Totales del bus y detalle por canal
+        """
+        with self._lock:
+            channels = {
+                name: {
+                    **channel.stats,
+                    'depth': channel.depth,
+                    'max_queue': channel.max_queue,
+                    'workers': channel.workers,
+                    'queue_wait': channel.queue_wait.to_dict(),
+                    'latency': channel.latency.to_dict()
+                }
+                for name, channel in self._channels.items()
+                if prefix is None or name.startswith(f"{prefix}.")
+            }
+            return {
+                **self.stats,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'channels': channels
+            }
+
+
+# Instancia compartida por todos los sistemas de alertas del proceso
+_shared_bus: Optional[AlertEventBus] = None
+_shared_lock = threading.Lock()
+
+
+def get_event_bus(**options) -> AlertEventBus:
+    """
+    Obtener el AlertEventBus compartido del proceso
+
+    Args:
+        **options: Argumentos de AlertEventBus (solo se usan en la primera llamada)
+
+    Returns:
+        AlertEventBus: Instancia compartida
+    """
+    global _shared_bus
+    with _shared_lock:
+        if _shared_bus is None:
+            _shared_bus = AlertEventBus(**options)
+        return _shared_bus
+
+
+@atexit.register
+def _stop_shared_bus():
+    """Entregar lo pendiente del bus compartido al salir del proceso"""
+    if _shared_bus is not None:
+        _shared_bus.stop()
@@ -0,0 +1,395 @@
+"""
+ExposureEngine - Motor unificado de exposición y riesgo
+=======================================================
+
+Vista única de la exposición abierta compartida por MT5Manager,
+PositionMonitor, RiskPositionManager, FVGRiskManager y DailyCycleManager.
+
+Mantiene de forma incremental, a partir de eventos de posición:
+- Volumen comprado/vendido/neto, P&L flotante y margen por símbolo
+- Exposición neta por divisa (base +, cotizada -) en lotes
+- Totales de cuenta (balance, equity, margen) del último snapshot
+
+Las lecturas de riesgo son O(1) sobre agregados ya calculados; el terminal
+solo se consulta cuando la vista está vacía o caducada (``ensure_fresh``).
+Los eventos de PositionMonitor llegan agrupados (el P&L solo se reenvía al
+cambiar más de un umbral), así que la caducidad se mide desde la última
+conciliación completa (``sync``), no desde el último evento.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# MT5: POSITION_TYPE_BUY = 0, POSITION_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+
+
+def _field(position: Any, name: str, default: Any = 0) -> Any:
+    """Leer un campo de una posición MT5 (namedtuple) o de su _asdict()"""
+    if isinstance(position, dict):
+        return position.get(name, default)
+    return getattr(position, name, default)
+
+
+def split_symbol_currencies(symbol: str) -> tuple:
+    """
+    Separar un símbolo FX en divisa base y cotizada
+
+    Args:
+        symbol: Símbolo (p.ej. 'EURUSD', 'GBPJPY.r')
+
+    Returns:
+        tuple: (base, cotizada); para no-FX devuelve (symbol, None)
+    """
+    letters = ''.join(ch for ch in symbol[:6] if ch.isalpha())
+    if len(letters) == 6 and letters.isupper():
+        return letters[:3], letters[3:]
+    return symbol, None
+
+
+def _empty_symbol_bucket() -> Dict[str, float]:
+    return {
+        "total_volume": 0.0,
+        "buy_volume": 0.0,
+        "sell_volume": 0.0,
+        "net_volume": 0.0,
+        "positions_count": 0,
+        "floating_pnl": 0.0,
+        "margin": 0.0
+    }
+
+
+class ExposureEngine:
+    """
+    Motor incremental de exposición
+
+    Cada posición se guarda con su contribución; una actualización resta la
+    contribución anterior y suma la nueva, de modo que los agregados nunca
+    se recalculan desde cero.
+    """
+
+    def __init__(self, margin_fn: Optional[Callable[[str, int, float, float], Optional[float]]] = None,
+                 max_age: float = 5.0):
+        """
+        Args:
+            margin_fn: Callable (symbol, type, volume, price) → margen, p.ej.
+                envoltorio de ``mt5.order_calc_margin``. Solo se invoca cuando
+                cambia el volumen de una posición.
+            max_age: Segundos tras los cuales la vista se considera caducada
+        """
+        self.margin_fn = margin_fn
+        self.max_age = max_age
+        self._lock = threading.RLock()
+
+        self._positions: Dict[int, Dict[str, Any]] = {}
+        self._symbols: Dict[str, Dict[str, float]] = {}
+        self._currencies: Dict[str, float] = {}
+        self._totals = {
+            "positions_count": 0,
+            "total_volume": 0.0,
+            "buy_volume": 0.0,
+            "sell_volume": 0.0,
+            "net_volume": 0.0,
+            "floating_pnl": 0.0,
+            "margin": 0.0
+        }
+        self._account: Dict[str, float] = {}
+        self._comment_counts: Dict[str, int] = {}
+
+        self.last_position_update: Optional[float] = None   # último evento aplicado
+        self.last_sync: Optional[float] = None              # última conciliación completa
+        self.last_account_update: Optional[float] = None
+
+    def configure(self, margin_fn: Optional[Callable[[str, int, float, float], Optional[float]]] = None,
+                  max_age: Optional[float] = None):
+        """
+        Completar la configuración de la instancia compartida
+
+        El primer componente que pide el motor no tiene por qué ser el que
+        sabe calcular márgenes (MT5Manager); al recibir ``margin_fn`` se
+        recalcula el margen de las posiciones ya registradas.
+        """
+        with self._lock:
+            if max_age is not None:
+                self.max_age = max_age
+            if margin_fn is not None and margin_fn is not self.margin_fn:
+                self.margin_fn = margin_fn
+                for record in self._positions.values():
+                    self._contribute(record, -1)
+                    record["margin"] = self._calc_margin(record["symbol"], record["type"],
+                                                         record["volume"], record["price_open"])
+                    self._contribute(record, +1)
+
+    # ========================================================================
+    # 🔄 ALIMENTACIÓN
+    # ========================================================================
+
+    def apply_position(self, position: Any):
+        """Registrar o actualizar una posición abierta"""
+        ticket = int(_field(position, "ticket"))
+        symbol = _field(position, "symbol", "")
+        pos_type = int(_field(position, "type", POSITION_TYPE_BUY))
+        volume = float(_field(position, "volume", 0.0))
+
+        with self._lock:
+            previous = self._positions.get(ticket)
+            if previous and previous["volume"] == volume and previous["type"] == pos_type:
+                margin = previous["margin"]
+            else:
+                margin = self._calc_margin(symbol, pos_type, volume,
+                                           float(_field(position, "price_open", 0.0)))
+
+            record = {
+                "ticket": ticket,
+                "symbol": symbol,
+                "type": pos_type,
+                "volume": volume,
+                "price_open": float(_field(position, "price_open", 0.0)),
+                "profit": float(_field(position, "profit", 0.0)),
+                "margin": margin,
+                "comment": str(_field(position, "comment", "") or "")
+            }
+            if previous:
+                self._contribute(previous, -1)
+            self._contribute(record, +1)
+            self._positions[ticket] = record
+            self.last_position_update = time.time()
+
+    def remove_position(self, ticket: int) -> bool:
+        """Quitar una posición cerrada"""
+        with self._lock:
+            record = self._positions.pop(int(ticket), None)
+            if record is None:
+                return False
+            self._contribute(record, -1)
+            self.last_position_update = time.time()
+            return True
+
+    def apply_changes(self, changes: Iterable[Dict[str, Any]]):
+        """
+        Aplicar un lote de eventos de PositionMonitor
+
+        No cuenta como conciliación: los eventos de P&L vienen agrupados
+        por umbral y ``ensure_fresh`` sigue recargando al caducar ``last_sync``.
+
+        Args:
+            changes: Eventos NEW_POSITION / POSITION_UPDATE / CLOSED_POSITION
+        """
+        with self._lock:
+            for change in changes:
+                if change["type"] == "CLOSED_POSITION":
+                    self.remove_position(change["ticket"])
+                else:
+                    position = dict(change["position"])
+                    position.setdefault("ticket", change["ticket"])
+                    self.apply_position(position)
+
+    def sync(self, positions: Optional[Iterable[Any]]):
+        """
+        Conciliar con la lista completa de posiciones del terminal
+
+        Args:
+            positions: Resultado de ``positions_get()`` o de ``MT5Manager.get_positions()``;
+                None (error del terminal) no modifica la vista
+        """
+        if positions is None:
+            return
+        positions = list(positions)
+        with self._lock:
+            seen = set()
+            for position in positions:
+                self.apply_position(position)
+                seen.add(int(_field(position, "ticket")))
+            for ticket in list(self._positions.keys() - seen):
+                self.remove_position(ticket)
+            self.last_position_update = self.last_sync = time.time()
+
+    def update_account(self, account_info: Any):
+        """Guardar el snapshot de cuenta (``mt5.account_info()``)"""
+        if account_info is None:
+            return
+        with self._lock:
+            for name in ("balance", "equity", "margin", "margin_free", "margin_level", "profit"):
+                self._account[name] = float(_field(account_info, name, 0.0) or 0.0)
+            self.last_account_update = time.time()
+
+    def ensure_fresh(self, positions_loader: Optional[Callable[[], Any]] = None,
+                     account_loader: Optional[Callable[[], Any]] = None,
+                     max_age: Optional[float] = None) -> bool:
+        """
+        Recargar desde el terminal solo si la vista está vacía o caducada
+
+        Las posiciones caducan ``max_age`` segundos después de la última
+        conciliación completa, aunque entretanto hayan llegado eventos.
+
+        Args:
+            positions_loader: Callable que devuelve las posiciones abiertas
+            account_loader: Callable que devuelve account_info
+            max_age: Edad máxima en segundos (por defecto self.max_age)
+
+        Returns:
+            bool: True si se consultó el terminal
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        reloaded = False
+        if positions_loader and (self.last_sync is None or now - self.last_sync > max_age):
+            self.sync(positions_loader())
+            reloaded = True
+        if account_loader and (self.last_account_update is None
+                               or now - self.last_account_update > max_age):
+            self.update_account(account_loader())
+            reloaded = True
+        return reloaded
+
+    # ========================================================================
+    # 📊 LECTURAS O(1)
+    # ========================================================================
+
+    @property
+    def positions_count(self) -> int:
+        return self._totals["positions_count"]
+
+    @property
+    def floating_pnl(self) -> float:
+        return self._totals["floating_pnl"]
+
+    @property
+    def balance(self) -> float:
+        return self._account.get("balance", 0.0)
+
+    @property
+    def equity(self) -> float:
+        return self._account.get("equity", self.balance + self.floating_pnl)
+
+    def symbol_positions_count(self, symbol: str) -> int:
+        bucket = self._symbols.get(symbol)
+        return bucket["positions_count"] if bucket else 0
+
+    def comment_positions_count(self, tag: str) -> int:
+        """Posiciones cuyo comentario contiene el tag (p.ej. 'FVG')"""
+        return self._comment_counts.get(tag, 0)
+
+    def get_symbol_exposure(self, symbol: str) -> Dict[str, float]:
+        bucket = self._symbols.get(symbol)
+        return dict(bucket) if bucket else _empty_symbol_bucket()
+
+    def net_volumes(self) -> Dict[str, float]:
+        """Volumen neto en lotes por símbolo (compras +, ventas -)"""
+        with self._lock:
+            return {s: b["net_volume"] for s, b in self._symbols.items()}
+
+    def get_currency_exposure(self, currency: Optional[str] = None):
+        """Exposición neta en lotes por divisa (o de una divisa)"""
+        if currency is not None:
+            return self._currencies.get(currency, 0.0)
+        return dict(self._currencies)
+
+    def floating_pnl_percent(self) -> float:
+        """P&L flotante como % del balance (0 si no hay balance)"""
+        balance = self.balance
+        return (self.floating_pnl / balance) * 100 if balance > 0 else 0.0
+
+    def get_total_exposure(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Exposición en el formato de ``MT5Manager.get_total_exposure``
+
+        Args:
+            symbol: Símbolo específico (opcional)
+
+        Returns:
+            dict: Totales y desglose por símbolo
+        """
+        with self._lock:
+            if symbol is not None:
+                bucket = self.get_symbol_exposure(symbol)
+                exposure = {k: bucket[k] for k in ("total_volume", "buy_volume", "sell_volume",
+                                                   "net_volume", "positions_count")}
+                exposure["symbols"] = {symbol: bucket} if bucket["positions_count"] else {}
+                return exposure
+
+            exposure = {k: self._totals[k] for k in ("total_volume", "buy_volume", "sell_volume",
+                                                     "net_volume", "positions_count")}
+            exposure["symbols"] = {s: dict(b) for s, b in self._symbols.items()}
+            return exposure
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Vista completa para dashboards y reporting"""
+        with self._lock:
+            return {
+                "totals": dict(self._totals),
+                "symbols": {s: dict(b) for s, b in self._symbols.items()},
+                "currencies": dict(self._currencies),
+                "account": dict(self._account),
+                "last_position_update": self.last_position_update,
+                "last_sync": self.last_sync,
+                "last_account_update": self.last_account_update
+            }
+
+    # ========================================================================
+    # 🔧 INTERNOS
+    # ========================================================================
+
+    def _calc_margin(self, symbol: str, pos_type: int, volume: float, price: float) -> float:
+        if not self.margin_fn:
+            return 0.0
+        try:
+            return float(self.margin_fn(symbol, pos_type, volume, price) or 0.0)
+        except Exception:
+            return 0.0
+
+    def _contribute(self, record: Dict[str, Any], sign: int):
+        """Sumar (sign=+1) o restar (sign=-1) la contribución de una posición"""
+        volume = record["volume"] * sign
+        signed = volume if record["type"] == POSITION_TYPE_BUY else -volume
+        side = "buy_volume" if record["type"] == POSITION_TYPE_BUY else "sell_volume"
+
+        for bucket in (self._totals, self._symbols.setdefault(record["symbol"], _empty_symbol_bucket())):
+            # Redondeo a 8 decimales: evita residuos de coma flotante al restar
+            bucket["total_volume"] = round(bucket["total_volume"] + volume, 8)
+            bucket[side] = round(bucket[side] + volume, 8)
+            bucket["net_volume"] = round(bucket["net_volume"] + signed, 8)
+            bucket["positions_count"] += sign
+            bucket["floating_pnl"] += record["profit"] * sign
+            bucket["margin"] += record["margin"] * sign
+
+        if self._symbols[record["symbol"]]["positions_count"] == 0:
+            del self._symbols[record["symbol"]]
+
+        base, quote = split_symbol_currencies(record["symbol"])
+        self._currencies[base] = round(self._currencies.get(base, 0.0) + signed, 8)
+        if quote:
+            self._currencies[quote] = round(self._currencies.get(quote, 0.0) - signed, 8)
+
+        for tag in ("FVG", "GRID"):
+            if tag in record["comment"]:
+                self._comment_counts[tag] = self._comment_counts.get(tag, 0) + sign
+
+
+# Instancia compartida por todos los componentes del proceso
+_shared_engine: Optional[ExposureEngine] = None
+_shared_lock = threading.Lock()
+
+
+def get_exposure_engine(**options) -> ExposureEngine:
+    """
+    Obtener el ExposureEngine compartido del proceso
+
+    Args:
+        **options: Argumentos de ExposureEngine; si la instancia ya existe
+            se aplican con ``configure`` (p.ej. el margin_fn de MT5Manager)
+
+    Returns:
+        ExposureEngine: Instancia compartida
+    """
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = ExposureEngine(**options)
+        elif options:
+            _shared_engine.configure(**options)
+        return _shared_engine
@@ -0,0 +1,276 @@
+"""
+GridLevelIndex - Índice de niveles del grid
+===========================================
+
+Índice de niveles de precio del grid con acumuladores por nivel. Cada
+acción (activar, tocar, ejecutar, desactivar) actualiza en O(1) el nivel
+afectado y los agregados globales, de modo que GridAnalytics sirve sus
+métricas e informes sin recorrer el historial de ciclos:
+
+- Los precios se discretizan a enteros (``round(precio / tick_size)``);
+  dos llamadas con 1.10000 y 1.1000000001 caen en el mismo nivel
+- ``LevelStats`` acumula toques, ejecuciones, volumen, P&L, ciclos y
+  tiempo activo del nivel
+- Los niveles activos se mantienen ordenados (bisect) para el spread
+- Los últimos N eventos y ciclos completados quedan en buffers circulares
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import bisect
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ACTIONS = ("ACTIVATE", "HIT", "FILL", "DEACTIVATE")
+
+
+class LevelStats:
+    """Acumuladores de un nivel de precio"""
+
+    __slots__ = ('price', 'level_type', 'hits', 'fills', 'volume', 'fill_volume', 'pnl', 'activations',
+                 'cycles', 'cycle_hits', 'active_since', 'time_in_level', 'last_hit')
+
+    def __init__(self, price: float):
+        self.price = price
+        self.level_type: Optional[str] = None
+        self.hits = 0
+        self.fills = 0
+        self.volume = 0.0            # volumen de los toques
+        self.fill_volume = 0.0       # volumen ejecutado
+        self.pnl = 0.0
+        self.activations = 0
+        self.cycles = 0
+        self.cycle_hits = 0          # toques desde la última activación
+        self.active_since: Optional[float] = None
+        self.time_in_level = 0.0     # segundos activos en ciclos cerrados
+        self.last_hit: Optional[float] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.active_since is not None
+
+    def total_time(self, now: float) -> float:
+        """Tiempo activo acumulado incluyendo el ciclo en curso"""
+        return self.time_in_level + (now - self.active_since if self.active_since is not None else 0.0)
+
+
+class GridLevelIndex:
+    """
+    Índice de niveles del grid con agregados O(1)
+
+    Args:
+        tick_size: Resolución de discretización de los niveles
+        event_capacity: Eventos recientes retenidos
+        cycle_capacity: Ciclos completados recientes retenidos
+        clock: Fuente de tiempo en segundos (por defecto ``time.time``)
+    """
+
+    def __init__(self, tick_size: float = 0.00001, event_capacity: int = 1000,
+                 cycle_capacity: int = 500, clock=time.time):
+        self.tick_size = tick_size
+        self.digits = max(0, -int(math.floor(math.log10(tick_size))))
+        self.clock = clock
+        self._lock = threading.RLock()
+
+        self.levels: Dict[int, LevelStats] = {}
+        self._active: List[int] = []    # claves activas ordenadas
+        self.events: deque = deque(maxlen=event_capacity)
+        self.cycles: deque = deque(maxlen=cycle_capacity)
+
+        # Agregados globales
+        self.active_by_type: Dict[str, int] = {"BUY": 0, "SELL": 0}
+        self.total_hits = 0
+        self.total_fills = 0
+        self.total_volume = 0.0
+        self.total_fill_volume = 0.0
+        self.total_pnl = 0.0
+        self.levels_hit = 0
+        self.completed_cycles = 0
+        self.cycle_time_sum = 0.0
+
+    def key(self, price: float) -> int:
+        """Clave entera del nivel más cercano a ``price``"""
+        return int(round(price / self.tick_size))
+
+    def label(self, key: int) -> str:
+        return f"{key * self.tick_size:.{self.digits}f}"
+
+    # ========================================================================
+    # 🔄 ACTUALIZACIÓN O(1)
+    # ========================================================================
+
+    def record(self, level: float, action: str, price: float, volume: float = 0.0,
+               pnl: float = 0.0, level_type: Optional[str] = None) -> LevelStats:
+        """
+        Registrar una acción sobre un nivel
+
+        Args:
+            level: Precio del nivel
+            action: 'ACTIVATE', 'HIT', 'FILL' o 'DEACTIVATE'
+            price: Precio de mercado en el evento
+            volume: Volumen del toque o de la ejecución
+            pnl: P&L realizado atribuido al nivel
+            level_type: 'BUY' o 'SELL' (al activar)
+
+        Returns:
+            LevelStats: Acumuladores del nivel actualizado
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Acción de nivel desconocida: {action}")
+
+        now = self.clock()
+        key = self.key(level)
+        with self._lock:
+            stats = self.levels.get(key)
+            if stats is None:
+                stats = self.levels[key] = LevelStats(round(key * self.tick_size, self.digits))
+
+            if action == "ACTIVATE":
+                self._activate(key, stats, now, level_type)
+            elif action == "HIT":
+                if stats.hits == 0:
+                    self.levels_hit += 1
+                stats.hits += 1
+                stats.cycle_hits += 1
+                stats.volume += volume
+                stats.last_hit = now
+                self.total_hits += 1
+                self.total_volume += volume
+            elif action == "FILL":
+                stats.fills += 1
+                stats.fill_volume += volume
+                self.total_fills += 1
+                self.total_fill_volume += volume
+            elif action == "DEACTIVATE":
+                self._deactivate(key, stats, now)
+
+            if pnl:
+                stats.pnl += pnl
+                self.total_pnl += pnl
+
+            self.events.append((now, action, key, price, volume, pnl))
+            return stats
+
+    def _activate(self, key: int, stats: LevelStats, now: float, level_type: Optional[str]):
+        if stats.is_active:
+            # Reactivar un nivel ya activo no abre un ciclo nuevo
+            if level_type and level_type != stats.level_type:
+                self._count_type(stats.level_type, -1)
+                stats.level_type = level_type
+                self._count_type(level_type, +1)
+            return
+        stats.active_since = now
+        stats.activations += 1
+        stats.cycle_hits = 0
+        stats.level_type = level_type or stats.level_type
+        self._count_type(stats.level_type, +1)
+        bisect.insort(self._active, key)
+
+    def _deactivate(self, key: int, stats: LevelStats, now: float):
+        if not stats.is_active:
+            return
+        duration = now - stats.active_since
+        stats.time_in_level += duration
+        stats.active_since = None
+        self._count_type(stats.level_type, -1)
+        del self._active[bisect.bisect_left(self._active, key)]
+
+        # Solo cuenta como ciclo si el nivel fue tocado mientras estaba activo
+        if stats.cycle_hits > 0:
+            stats.cycles += 1
+            self.completed_cycles += 1
+            self.cycle_time_sum += duration
+            self.cycles.append({
+                'level': stats.price,
+                'duration': duration,
+                'hits': stats.cycle_hits,
+                'completed_at': datetime.fromtimestamp(now)
+            })
+
+    def _count_type(self, level_type: Optional[str], sign: int):
+        if level_type in self.active_by_type:
+            self.active_by_type[level_type] += sign
+
+    # ========================================================================
+    # 📊 LECTURAS
+    # ========================================================================
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def active_levels(self) -> List[float]:
+        """Precios de los niveles activos en orden ascendente"""
+        return [self.levels[key].price for key in self._active]
+
+    def spread(self) -> float:
+        """Distancia entre el nivel activo más alto y el más bajo"""
+        if len(self._active) < 2:
+            return 0.0
+        return (self._active[-1] - self._active[0]) * self.tick_size
+
+    def average_cycle_time(self) -> float:
+        return self.cycle_time_sum / self.completed_cycles if self.completed_cycles else 0.0
+
+    def level(self, price: float) -> Optional[LevelStats]:
+        return self.levels.get(self.key(price))
+
+    def top_levels(self, n: int = 5, by: str = "hits") -> List[Dict[str, Any]]:
+        """
+        Niveles con mayor valor de un acumulador (se omiten los que están a 0)
+
+        Args:
+            n: Número de niveles
+            by: Acumulador de LevelStats ('hits', 'fills', 'volume', 'pnl', ...)
+        """
+        now = self.clock()
+        with self._lock:
+            candidates = [item for item in self.levels.items() if getattr(item[1], by)]
+            top = heapq.nlargest(n, candidates, key=lambda item: getattr(item[1], by))
+            return [self._level_row(key, stats, now) for key, stats in top]
+
+    def level_table(self) -> List[Dict[str, Any]]:
+        """Acumuladores de todos los niveles en orden de precio"""
+        now = self.clock()
+        with self._lock:
+            return [self._level_row(key, self.levels[key], now) for key in sorted(self.levels)]
+
+    def recent_events(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            events = list(self.events)[-n:] if n else list(self.events)
+        return [{'timestamp': ts, 'action': action, 'level': self.label(key), 'price': price,
+                 'volume': volume, 'pnl': pnl} for ts, action, key, price, volume, pnl in events]
+
+    def _level_row(self, key: int, stats: LevelStats, now: float) -> Dict[str, Any]:
+        return {
+            'level': self.label(key),
+            'type': stats.level_type,
+            'active': stats.is_active,
+            'hits': stats.hits,
+            'fills': stats.fills,
+            'volume': stats.volume,
+            'fill_volume': stats.fill_volume,
+            'pnl': stats.pnl,
+            'cycles': stats.cycles,
+            'time_in_level': stats.total_time(now)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "levels_tracked": len(self.levels),
+            "active_levels": self.active_count,
+            "levels_hit": self.levels_hit,
+            "total_hits": self.total_hits,
+            "total_fills": self.total_fills,
+            "total_fill_volume": self.total_fill_volume,
+            "total_volume": self.total_volume,
+            "total_pnl": self.total_pnl,
+            "completed_cycles": self.completed_cycles,
+            "events_buffered": len(self.events)
+        }
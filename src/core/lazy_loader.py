@@ -0,0 +1,208 @@
+"""
+LazyLoader - Importación diferida de módulos
+============================================
+
+Utilidades para que importar el sistema no arrastre pandas, MetaTrader5,
+scipy, sklearn, Flask o pytest hasta que alguien los use de verdad:
+
+- ``module_available``: comprobar si un módulo existe sin importarlo
+- ``lazy_import``: proxy de módulo que importa en el primer acceso
+- ``lazy_exports``: ``__getattr__`` de módulo (PEP 562) para paquetes que
+  re-exportan nombres de otros módulos (``src/__init__.py``)
+- ``measure_import_time``: coste de importación medido con ``-X importtime``
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+# ============================================================================
+# 📦 MÓDULOS DIFERIDOS
+# ============================================================================
+
+
+def module_available(name: str) -> bool:
+    """
+    Comprobar si un módulo se puede importar sin ejecutarlo
+
+    Args:
+        name: Nombre del módulo (p.ej. 'sklearn.ensemble')
+
+    Returns:
+        bool: True si el módulo está instalado
+    """
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """
+    Proxy de un módulo que se importa en el primer acceso a un atributo
+
+    Args:
+        name: Nombre del módulo real
+        on_load: Callable (módulo) ejecutado una vez tras importarlo
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_on_load'] = on_load
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    on_load = self.__dict__['_lazy_on_load']
+                    if on_load:
+                        on_load(module)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None) -> Optional[LazyModule]:
+    """
+    Módulo diferido, o None si no está instalado
+
+    Args:
+        name: Nombre del módulo
+        on_load: Callable (módulo) ejecutado tras la importación real
+
+    Returns:
+        LazyModule | None: Proxy del módulo
+    """
+    if not module_available(name):
+        return None
+    return LazyModule(name, on_load)
+
+
+def lazy_exports(namespace: Dict[str, Any], exports: Mapping[str, Union[str, Tuple[str, str]]],
+                 fallback: Any = None) -> Callable[[str], Any]:
+    """
+    Construir el ``__getattr__`` (PEP 562) de un módulo con re-exports diferidos
+
+    Cada nombre se importa en el primer acceso y se guarda en el módulo, de
+    modo que los accesos siguientes no vuelven a pasar por ``__getattr__``.
+
+    Args:
+        namespace: ``globals()`` del módulo que re-exporta
+        exports: Nombre → 'modulo' o ('modulo', 'atributo')
+        fallback: Valor si la importación falla (None = se propaga el error)
+
+    Returns:
+        Callable: Función para asignar a ``__getattr__`` del módulo
+    """
+    lock = threading.RLock()
+
+    def __getattr__(name: str) -> Any:
+        target = exports.get(name)
+        if target is None:
+            raise AttributeError(f"module {namespace.get('__name__')!r} has no attribute {name!r}")
+        with lock:
+            if name in namespace:
+                return namespace[name]
+            module_name, attribute = target if isinstance(target, tuple) else (target, None)
+            try:
+                module = importlib.import_module(module_name)
+                value = getattr(module, attribute) if attribute else module
+            except Exception:
+                if fallback is None:
+                    raise
+                value = fallback(name) if callable(fallback) else fallback
+            namespace[name] = value
+            return value
+
+    return __getattr__
+
+
+# ============================================================================
+# ⏱️ MEDICIÓN DE IMPORTACIÓN
+# ============================================================================
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Interpretar la salida de ``python -X importtime``
+
+    Args:
+        output: stderr del intérprete
+
+    Returns:
+        list: Filas {'module', 'self_us', 'cumulative_us', 'depth'}
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip())) // 2
+        })
+    return rows
+
+
+def measure_import_time(module: str, cwd: Optional[Union[str, Path]] = None, top: int = 15,
+                        python: str = sys.executable, timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Medir el coste de importar un módulo en un intérprete limpio
+
+    Args:
+        module: Módulo a importar
+        cwd: Directorio de trabajo (raíz del proyecto)
+        top: Número de módulos más costosos (tiempo propio) a devolver
+        python: Intérprete a usar
+        timeout: Segundos máximos de la medición
+
+    Returns:
+        dict: total_ms, módulos importados, los más costosos y error si falló
+    """
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(cwd) if cwd else None, capture_output=True, text=True, timeout=timeout
+    )
+    rows = parse_importtime(process.stderr)
+    target = next((row for row in reversed(rows) if row["module"] == module and row["depth"] == 0), None)
+    total_us = target["cumulative_us"] if target else sum(row["self_us"] for row in rows)
+    slowest = sorted(rows, key=lambda row: row["self_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "ok": process.returncode == 0,
+        "total_ms": total_us / 1000.0,
+        "modules_imported": len(rows),
+        "slowest": [{"module": row["module"], "self_ms": row["self_us"] / 1000.0,
+                     "cumulative_ms": row["cumulative_us"] / 1000.0} for row in slowest],
+        "error": None if process.returncode == 0 else process.stderr.strip().splitlines()[-1:]
+    }
@@ -26,7 +26,10 @@ __all__ = [
     'OrderExecutor',
     'PositionMonitor', 
     'LiveRiskManager',
-    'AlertEngine'
+    'AlertEngine',
+    'OrderReconciler',
+    'OrderPipeline',
+    'SimulatedTerminal'
 ]
 
 # Versión del piso ejecutor
@@ -20,9 +20,10 @@ Autor: Sistema Trading Grid Avanzado
 Fecha: Agosto 13, 2025
 """
 
+import calendar
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
@@ -109,7 +110,8 @@ try:
 except ImportError:
     FVGDatabaseManager = None
 
-import MetaTrader5 as mt5
+from src.core.live_trading.order_reconciler import OrderReconciler, OrderStateEvent, OrderTransition
+from src.core.symbol_specs import get_symbol_spec_cache
 
 
 class FVGLimitOrderType(Enum):
@@ -160,7 +162,11 @@ class EnhancedOrderExecutor:
                  error_manager: Optional[ErrorManager] = None,
                  fvg_detector: Optional[Any] = None,  # FVGDetector cuando esté disponible
                  fvg_quality_analyzer: Optional[Any] = None,  # FVGQualityAnalyzer cuando esté disponible
-                 ml_foundation: Optional[Any] = None):  # FVGDatabaseManager cuando esté disponible
+                 ml_foundation: Optional[Any] = None,  # FVGDatabaseManager cuando esté disponible
+                 terminal: Optional[Any] = None):  # MetaTrader5 o SimulatedTerminal
+        
+        # Terminal de trading (inyectable para pruebas offline)
+        self.terminal = terminal or mt5
         
         # Managers principales
         self.config = config_manager or ConfigManager()
@@ -184,6 +190,16 @@ class EnhancedOrderExecutor:
         self.active_fvg_orders: Dict[int, FVGLimitOrder] = {}
         self.completed_fvg_orders: List[FVGLimitOrder] = []
         self.expired_fvg_orders: List[FVGLimitOrder] = []
+        self.cancelled_fvg_orders: List[FVGLimitOrder] = []
+        
+        # Especificaciones de símbolos compartidas (sin consultas por orden)
+        self.symbol_specs = get_symbol_spec_cache()
+        
+        # Desfase hora del servidor - reloj local, estimado con tick.time
+        self._server_offset: Optional[timedelta] = None
+        
+        # Conciliación masiva contra el terminal (2 llamadas por pasada), en hora del servidor
+        self.order_reconciler = OrderReconciler(self.terminal, clock=self.server_now)
         
         # Configuración específica para órdenes FVG
         self.fvg_order_config = {
@@ -204,6 +220,7 @@ class EnhancedOrderExecutor:
             'total_limit_orders_placed': 0,
             'total_limit_orders_filled': 0,
             'total_limit_orders_expired': 0,
+            'total_limit_orders_cancelled': 0,
             'avg_fill_time_hours': 0.0,
             'success_rate_by_quality': {},
             'best_performing_timeframe': 'UNKNOWN'
@@ -256,6 +273,10 @@ class EnhancedOrderExecutor:
             
             if success:
                 self.active_fvg_orders[fvg_order.mt5_order_id] = fvg_order
+                self.order_reconciler.track(
+                    fvg_order.mt5_order_id, fvg_order.symbol,
+                    expiry_time=fvg_order.expiry_time, placed_time=fvg_order.creation_time
+                )
                 self.fvg_metrics['total_limit_orders_placed'] += 1
                 
                 # 7. Almacenar en ML Foundation si está disponible
@@ -292,7 +313,7 @@ class EnhancedOrderExecutor:
                 return False
             
             # Validar símbolo en MT5
-            symbol_info = mt5.symbol_info(fvg_data.symbol)  # type: ignore
+            symbol_info = self.terminal.symbol_info(fvg_data.symbol)  # type: ignore
             if symbol_info is None:
                 self.logger.log_error(f"❌ Símbolo no disponible en MT5: {fvg_data.symbol}")
                 return False
@@ -344,9 +365,10 @@ class EnhancedOrderExecutor:
         """
         try:
             # Obtener precios actuales
-            tick = mt5.symbol_info_tick(fvg_data.symbol)  # type: ignore
+            tick = self.terminal.symbol_info_tick(fvg_data.symbol)  # type: ignore
             if not tick:
                 return None
+            self._observe_server_time(tick)
             
             current_price = tick.bid if fvg_data.type == 'BEARISH' else tick.ask
             
@@ -489,7 +511,20 @@ class EnhancedOrderExecutor:
         # Órdenes de mayor calidad duran más tiempo
         expiry_hours = base_hours * (1 + (quality_score * quality_multiplier))
         
-        return datetime.now() + timedelta(hours=expiry_hours)
+        return self.server_now() + timedelta(hours=expiry_hours)
+    
+    def server_now(self) -> datetime:
+        """Hora actual del servidor MT5 (naive), la de time_setup, deals y expiraciones"""
+        return datetime.now() + (self._server_offset or timedelta(0))
+    
+    def _observe_server_time(self, tick: Any):
+        """Ajustar el desfase con la hora de un tick (un tick viejo nunca lo reduce)"""
+        tick_time = getattr(tick, 'time', 0)
+        if not tick_time:
+            return
+        offset = datetime.fromtimestamp(tick_time, timezone.utc).replace(tzinfo=None) - datetime.now()
+        if self._server_offset is None or offset > self._server_offset:
+            self._server_offset = offset
     
     
     def _create_fvg_limit_order(self, fvg_data: Any, params: Dict, quality_score: float) -> FVGLimitOrder:
@@ -514,6 +549,7 @@ class EnhancedOrderExecutor:
             quality_score=quality_score,
             confidence=confidence,
             expiry_time=params['expiry_time'],
+            creation_time=self.server_now(),
             comment=f"FVG_{fvg_data.type}_{fvg_data.timeframe}_{quality_score:.2f}"
         )
     
@@ -521,14 +557,8 @@ class EnhancedOrderExecutor:
     def _normalize_price(self, symbol: str, price: float) -> float:
         """Normalizar precio según las especificaciones del símbolo"""
         try:
-            symbol_info = mt5.symbol_info(symbol)  # type: ignore
-            if symbol_info:
-                digits = symbol_info.digits
-                # Redondear al número correcto de dígitos decimales
-                return round(price, digits)
-            else:
-                # Fallback para EURUSD (5 dígitos)
-                return round(price, 5)
+            # Ajuste al tick y dígitos desde el cache de specs (fallback: 5 dígitos)
+            return self.symbol_specs.get(symbol).round_price(price)
         except Exception:
             # Fallback conservador
             return round(price, 5)
@@ -538,9 +568,9 @@ class EnhancedOrderExecutor:
         try:
             # Determinar tipo de orden MT5
             if fvg_order.order_type == FVGLimitOrderType.BUY_LIMIT_FVG_RETRACEMENT:
-                mt5_order_type = mt5.ORDER_TYPE_BUY_LIMIT
+                mt5_order_type = self.terminal.ORDER_TYPE_BUY_LIMIT
             else:
-                mt5_order_type = mt5.ORDER_TYPE_SELL_LIMIT
+                mt5_order_type = self.terminal.ORDER_TYPE_SELL_LIMIT
             
             # Normalizar precios según las especificaciones del símbolo
             normalized_price = self._normalize_price(fvg_order.symbol, fvg_order.entry_price)
@@ -549,9 +579,9 @@ class EnhancedOrderExecutor:
             
             # Crear request MT5
             request = {
-                "action": mt5.TRADE_ACTION_PENDING,
+                "action": self.terminal.TRADE_ACTION_PENDING,
                 "symbol": fvg_order.symbol,
-                "volume": fvg_order.volume,
+                "volume": self.symbol_specs.get(fvg_order.symbol).snap_volume(fvg_order.volume),
                 "type": mt5_order_type,
                 "price": normalized_price,
                 "sl": normalized_sl,
@@ -559,18 +589,18 @@ class EnhancedOrderExecutor:
                 "deviation": 10,
                 "magic": fvg_order.magic,
                 "comment": fvg_order.comment,
-                "type_time": mt5.ORDER_TIME_SPECIFIED,
-                "expiration": int(fvg_order.expiry_time.timestamp()),
-                "type_filling": mt5.ORDER_FILLING_RETURN,
+                "type_time": self.terminal.ORDER_TIME_SPECIFIED,
+                "expiration": calendar.timegm(fvg_order.expiry_time.timetuple()),
+                "type_filling": self.terminal.ORDER_FILLING_RETURN,
             }
             
             self.logger.log_info(f"🚀 Colocando orden límite FVG: {fvg_order.symbol}")
             self.logger.log_info(f"📊 Precios normalizados - Entry: {normalized_price:.5f}, SL: {normalized_sl:.5f}, TP: {normalized_tp:.5f}")
             
             # Ejecutar en MT5
-            result = mt5.order_send(request)  # type: ignore
+            result = self.terminal.order_send(request)  # type: ignore
             
-            if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+            if result and result.retcode == self.terminal.TRADE_RETCODE_DONE:
                 fvg_order.mt5_order_id = result.order
                 fvg_order.status = "PLACED"
                 
@@ -580,7 +610,7 @@ class EnhancedOrderExecutor:
                 
                 return True
             else:
-                error_code = result.retcode if result else mt5.last_error()  # type: ignore
+                error_code = result.retcode if result else self.terminal.last_error()  # type: ignore
                 self.logger.log_error(f"❌ Error colocando orden límite: {error_code}")
                 
                 # Log adicional para debugging
@@ -631,35 +661,45 @@ class EnhancedOrderExecutor:
             self.logger.log_error(f"Error almacenando en ML Foundation: {e}")
     
     
-    def monitor_active_orders(self):
-        """Monitorear órdenes FVG activas para updates de estado"""
+    def monitor_active_orders(self) -> List[OrderStateEvent]:
+        """
+        Monitorear órdenes FVG activas para updates de estado
+        
+        Usa el OrderReconciler: una llamada orders_get() para todo el libro y,
+        solo si falta alguna orden, una llamada history_deals_get() por rango.
+        
+        Returns:
+            Eventos de transición (FILLED/EXPIRED/CANCELLED) de esta pasada
+        """
         try:
-            for order_id, fvg_order in list(self.active_fvg_orders.items()):
-                # Verificar estado en MT5
-                mt5_orders = mt5.orders_get(ticket=order_id)  # type: ignore
-                
-                if not mt5_orders:  # Orden no encontrada = fue ejecutada o cancelada
-                    # Buscar en historial
-                    deals = mt5.history_deals_get(ticket=order_id)  # type: ignore
-                    if deals:
-                        # Orden fue ejecutada
-                        fvg_order.status = "FILLED"
-                        self.completed_fvg_orders.append(fvg_order)
-                        self.fvg_metrics['total_limit_orders_filled'] += 1
-                        self.logger.log_success(f"✅ Orden FVG ejecutada: #{order_id}")
-                    else:
-                        # Verificar si expiró
-                        if datetime.now() > fvg_order.expiry_time:
-                            fvg_order.status = "EXPIRED"
-                            self.expired_fvg_orders.append(fvg_order)
-                            self.fvg_metrics['total_limit_orders_expired'] += 1
-                            self.logger.log_info(f"⏰ Orden FVG expirada: #{order_id}")
-                    
-                    # Remover de órdenes activas
-                    del self.active_fvg_orders[order_id]
+            events = self.order_reconciler.reconcile()
+            for event in events:
+                self._apply_order_event(event)
+            return events
                     
         except Exception as e:
             self.logger.log_error(f"Error monitoreando órdenes activas: {e}")
+            return []
+    
+    def _apply_order_event(self, event: OrderStateEvent):
+        """Aplicar una transición conciliada al libro de órdenes FVG"""
+        fvg_order = self.active_fvg_orders.pop(event.ticket, None)
+        if fvg_order is None:
+            return
+        
+        fvg_order.status = event.transition.value
+        if event.transition == OrderTransition.FILLED:
+            self.completed_fvg_orders.append(fvg_order)
+            self.fvg_metrics['total_limit_orders_filled'] += 1
+            self.logger.log_success(f"✅ Orden FVG ejecutada: #{event.ticket}")
+        elif event.transition == OrderTransition.EXPIRED:
+            self.expired_fvg_orders.append(fvg_order)
+            self.fvg_metrics['total_limit_orders_expired'] += 1
+            self.logger.log_info(f"⏰ Orden FVG expirada: #{event.ticket}")
+        else:
+            self.cancelled_fvg_orders.append(fvg_order)
+            self.fvg_metrics['total_limit_orders_cancelled'] += 1
+            self.logger.log_warning(f"🚫 Orden FVG cancelada fuera del sistema: #{event.ticket}")
     
     
     def get_fvg_order_status(self) -> Dict[str, Any]:
@@ -672,6 +712,8 @@ class EnhancedOrderExecutor:
             'active_orders_count': len(self.active_fvg_orders),
             'completed_orders_count': len(self.completed_fvg_orders),
             'expired_orders_count': len(self.expired_fvg_orders),
+            'cancelled_orders_count': len(self.cancelled_fvg_orders),
+            'reconciler': self.order_reconciler.get_stats(),
             'metrics': self.fvg_metrics.copy(),
             'config': self.fvg_order_config.copy()
         }
@@ -691,10 +733,11 @@ class EnhancedOrderExecutor:
             for order_id in list(self.active_fvg_orders.keys()):
                 try:
                     cancel_request = {
-                        "action": mt5.TRADE_ACTION_REMOVE,
+                        "action": self.terminal.TRADE_ACTION_REMOVE,
                         "order": order_id
                     }
-                    mt5.order_send(cancel_request)  # type: ignore
+                    self.terminal.order_send(cancel_request)  # type: ignore
+                    self.order_reconciler.untrack(order_id)
                 except:
                     pass  # Continuar aunque falle
             
@@ -15,6 +15,9 @@ FUNCIONALIDADES:
 - Validación de señales pre-ejecución
 - Ejecución segura en MT5 real
 - Tracking completo de órdenes
+- Pipeline asíncrono con concurrencia acotada e idempotencia (process_signal
+  y process_signal_async envían por él)
+- Terminal inyectable (MetaTrader5 o SimulatedTerminal) para pruebas offline
 - Error handling robusto
 - Integration con sistema de riesgo
 
@@ -26,6 +29,8 @@ FECHA: 2025-08-12
 import os
 import sys
 import time
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
@@ -36,8 +41,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.core.config_manager import ConfigManager
 from src.core.logger_manager import LoggerManager
 from src.core.error_manager import ErrorManager
-from src.core.mt5_manager import MT5Manager
-from src.core.fundednext_mt5_manager import FundedNextMT5Manager
+from src.core.live_trading.order_pipeline import OrderPipeline, PipelineRejectedError
+
+try:
+    from src.core.fundednext_mt5_manager import FundedNextMT5Manager
+except ImportError:
+    FundedNextMT5Manager = None
 
 # Import del StrategyEngine para TradingSignal
 try:
@@ -51,7 +60,13 @@ except ImportError as e:
         price: float
         confidence: float
 
-import MetaTrader5 as mt5
+# MetaTrader 5 (opcional: sin él se requiere un terminal inyectado)
+try:
+    import MetaTrader5 as mt5
+    MT5_AVAILABLE = True
+except ImportError:
+    mt5 = None
+    MT5_AVAILABLE = False
 
 
 class OrderStatus(Enum):
@@ -64,13 +79,13 @@ class OrderStatus(Enum):
     REJECTED = "rejected"
 
 class OrderType(Enum):
-    """Tipos de órdenes MT5"""
-    BUY = mt5.ORDER_TYPE_BUY
-    SELL = mt5.ORDER_TYPE_SELL
-    BUY_LIMIT = mt5.ORDER_TYPE_BUY_LIMIT
-    SELL_LIMIT = mt5.ORDER_TYPE_SELL_LIMIT
-    BUY_STOP = mt5.ORDER_TYPE_BUY_STOP
-    SELL_STOP = mt5.ORDER_TYPE_SELL_STOP
+    """Tipos de órdenes MT5 (valores ORDER_TYPE_* de la API)"""
+    BUY = 0
+    SELL = 1
+    BUY_LIMIT = 2
+    SELL_LIMIT = 3
+    BUY_STOP = 4
+    SELL_STOP = 5
 
 @dataclass
 class OrderRequest:
@@ -113,7 +128,11 @@ class OrderExecutor:
                  config_manager: Optional[ConfigManager] = None,
                  logger_manager: Optional[LoggerManager] = None,
                  error_manager: Optional[ErrorManager] = None,
-                 fundednext_manager: Optional[FundedNextMT5Manager] = None):
+                 fundednext_manager: Optional[Any] = None,  # FundedNextMT5Manager
+                 terminal: Optional[Any] = None):  # MetaTrader5 o SimulatedTerminal
+        
+        # Terminal de trading (inyectable para pruebas offline)
+        self.terminal = terminal or mt5
         
         # Managers principales del sistema
         self.config_manager = config_manager or ConfigManager()
@@ -123,12 +142,14 @@ class OrderExecutor:
             config_manager=self.config_manager
         )
         
-        # Manager MT5 exclusivo
-        self.fundednext_manager = fundednext_manager or FundedNextMT5Manager(
-            config_manager=self.config_manager,
-            logger_manager=self.logger_manager,
-            error_manager=self.error_manager
-        )
+        # Manager MT5 exclusivo (no aplica con un terminal inyectado)
+        if fundednext_manager is None and terminal is None and FundedNextMT5Manager:
+            fundednext_manager = FundedNextMT5Manager(
+                config_manager=self.config_manager,
+                logger_manager=self.logger_manager,
+                error_manager=self.error_manager
+            )
+        self.fundednext_manager = fundednext_manager
         
         # Configuración del componente
         self.component_id = "PUERTA-PE-EXECUTOR"
@@ -151,7 +172,9 @@ class OrderExecutor:
             'default_deviation': 20,
             'magic_number': 123456,
             'max_orders_per_minute': 10,
-            'enable_sl_tp': True
+            'enable_sl_tp': True,
+            'pipeline_workers': 4,          # Órdenes en vuelo simultáneas
+            'pipeline_max_pending': 64      # Órdenes encoladas como máximo
         }
         
         # Métricas
@@ -163,14 +186,33 @@ class OrderExecutor:
             'avg_execution_time_ms': 0.0,
             'last_24h_orders': 0
         }
+        self._metrics_lock = threading.Lock()
+        
+        # Pipeline asíncrono: FIFO por símbolo, workers dedicados
+        self.order_pipeline = OrderPipeline(
+            self._pipeline_send,
+            max_workers=self.execution_config['pipeline_workers'],
+            max_pending=self.execution_config['pipeline_max_pending'],
+            result_ok=lambda executed: executed is not None and executed.status == OrderStatus.EXECUTED
+        )
         
         # Log de inicialización
         self.logger_manager.log_info(f"✅ {self.component_id} {self.version} inicializado")
-        self.logger_manager.log_info(f"🔗 Integrado con FundedNextMT5Manager")
+        if self.fundednext_manager:
+            self.logger_manager.log_info(f"🔗 Integrado con FundedNextMT5Manager")
     
     def initialize_executor(self) -> bool:
         """Inicializar el ejecutor de órdenes"""
         try:
+            if self.fundednext_manager is None:
+                if self.terminal is None:
+                    self.logger_manager.log_error("❌ Sin terminal MT5 disponible")
+                    return False
+                # Terminal inyectado: no hay conexión que gestionar
+                self.is_active = True
+                self.logger_manager.log_info("✅ OrderExecutor inicializado con terminal inyectado")
+                return True
+            
             # Verificar conexión MT5
             if not self.fundednext_manager.ensure_fundednext_terminal():
                 self.logger_manager.log_error("❌ FundedNext Terminal no disponible")
@@ -193,48 +235,108 @@ class OrderExecutor:
         """
         FUNCIÓN CRÍTICA: Procesar señal del StrategyEngine
         
-        Esta es la función principal que conecta el StrategyEngine con MT5
+        Esta es la función principal que conecta el StrategyEngine con MT5.
+        Envía por el mismo pipeline que process_signal_async (orden FIFO por
+        símbolo, concurrencia acotada, idempotencia) y espera el resultado.
+        """
+        try:
+            future = self.process_signal_async(signal)
+            if future is None:
+                return False
+            
+            executed_order = future.result()
+            if executed_order and executed_order.status == OrderStatus.EXECUTED:
+                self.logger_manager.log_info(f"✅ Orden ejecutada: {executed_order.ticket}")
+                return True
+            return False
+                
+        except Exception as e:
+            self.error_manager.handle_system_error("OrderExecutor", e, {"signal": signal.symbol})
+            self._update_failure_metrics()
+            return False
+    
+    def process_signal_async(self, signal: TradingSignal) -> Optional[Future]:
+        """
+        Procesar señal vía pipeline asíncrono
+        
+        Valida y convierte la señal en el hilo llamador y encola la orden;
+        el order_send se ejecuta en un worker sin bloquear otras señales.
+        Reenviar la misma señal devuelve el Future de la primera sin volver
+        a validarla ni contarla; tras un envío fallido se puede reintentar.
+        
+        Returns:
+            Future con el ExecutedOrder, o None si la señal no se encoló
         """
         try:
             if not self.is_active:
                 self.logger_manager.log_warning("⚠️ OrderExecutor no está activo")
-                return False
+                return None
             
             if not self.orders_enabled:
                 self.logger_manager.log_warning("⚠️ Ejecución de órdenes deshabilitada")
-                return False
-            
-            # Incrementar métricas
-            self.execution_metrics['total_signals_received'] += 1
+                return None
             
-            self.logger_manager.log_info(f"📡 Procesando señal: {signal.symbol} {signal.signal_type}")
+            idempotency_key = self._idempotency_key(signal)
+            duplicate = self.order_pipeline.find_duplicate(idempotency_key)
+            if duplicate is not None:
+                return duplicate
             
-            # 1. Validar señal
-            if not self._validate_signal(signal):
-                self.logger_manager.log_warning(f"❌ Señal inválida: {signal.symbol}")
-                return False
-            
-            # 2. Convertir a orden MT5
-            order_request = self._convert_signal_to_order(signal)
+            order_request = self._prepare_order(signal)
             if not order_request:
-                self.logger_manager.log_error(f"❌ Falló conversión señal→orden: {signal.symbol}")
-                return False
+                return None
             
-            # 3. Ejecutar orden
-            executed_order = self._execute_order(order_request, signal)
-            if executed_order and executed_order.status == OrderStatus.EXECUTED:
-                self.logger_manager.log_info(f"✅ Orden ejecutada: {executed_order.ticket}")
-                self._update_success_metrics(executed_order)
-                return True
-            else:
-                self.logger_manager.log_error(f"❌ Ejecución falló: {signal.symbol}")
-                self._update_failure_metrics()
-                return False
-                
+            return self.order_pipeline.submit(
+                signal.symbol, order_request,
+                idempotency_key=idempotency_key,
+                context=signal
+            )
+            
+        except PipelineRejectedError as e:
+            self.logger_manager.log_warning(f"⚠️ Orden rechazada por el pipeline: {signal.symbol} - {e}")
+            self._update_failure_metrics()
+            return None
         except Exception as e:
             self.error_manager.handle_system_error("OrderExecutor", e, {"signal": signal.symbol})
+            return None
+    
+    def _prepare_order(self, signal: TradingSignal) -> Optional[OrderRequest]:
+        """Validar señal y convertirla a OrderRequest"""
+        with self._metrics_lock:
+            self.execution_metrics['total_signals_received'] += 1
+        
+        self.logger_manager.log_info(f"📡 Procesando señal: {signal.symbol} {signal.signal_type}")
+        
+        if not self._validate_signal(signal):
+            self.logger_manager.log_warning(f"❌ Señal inválida: {signal.symbol}")
+            return None
+        
+        order_request = self._convert_signal_to_order(signal)
+        if not order_request:
+            self.logger_manager.log_error(f"❌ Falló conversión señal→orden: {signal.symbol}")
+            return None
+        
+        return order_request
+    
+    def _idempotency_key(self, signal: TradingSignal) -> str:
+        """Clave de idempotencia: identifica la intención de orden de una señal"""
+        timestamp = getattr(signal, 'timestamp', None)
+        return "|".join(str(part) for part in (
+            signal.symbol,
+            getattr(signal, 'timeframe', ''),
+            signal.signal_type,
+            getattr(signal, 'source', ''),
+            timestamp.isoformat() if timestamp else signal.price
+        ))
+    
+    def _pipeline_send(self, order_request: OrderRequest, signal: TradingSignal) -> Optional[ExecutedOrder]:
+        """Worker del pipeline: ejecutar orden y actualizar métricas"""
+        executed_order = self._execute_order(order_request, signal)
+        if executed_order and executed_order.status == OrderStatus.EXECUTED:
+            self._update_success_metrics(executed_order)
+        else:
+            self.logger_manager.log_error(f"❌ Ejecución falló: {order_request.symbol}")
             self._update_failure_metrics()
-            return False
+        return executed_order
     
     def _validate_signal(self, signal: TradingSignal) -> bool:
         """Validar señal antes de ejecutar"""
@@ -256,7 +358,7 @@ class OrderExecutor:
                     return False
             
             # Validar symbol en MT5
-            symbol_info = mt5.symbol_info(signal.symbol)
+            symbol_info = self.terminal.symbol_info(signal.symbol)
             if symbol_info is None:
                 self.logger_manager.log_error(f"❌ Símbolo no disponible en MT5: {signal.symbol}")
                 return False
@@ -289,7 +391,7 @@ class OrderExecutor:
             # Crear request de orden
             order_request = OrderRequest(
                 symbol=signal.symbol,
-                action=mt5.TRADE_ACTION_DEAL,
+                action=self.terminal.TRADE_ACTION_DEAL,
                 type=order_type,
                 volume=volume,
                 price=signal.price,
@@ -322,18 +424,18 @@ class OrderExecutor:
                 "deviation": order_request.deviation,
                 "magic": order_request.magic,
                 "comment": order_request.comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
+                "type_time": self.terminal.ORDER_TIME_GTC,
+                "type_filling": self.terminal.ORDER_FILLING_IOC,
             }
             
             self.logger_manager.log_info(f"🚀 Ejecutando orden: {order_request.symbol}")
             
             # Ejecutar en MT5
-            result = mt5.order_send(mt5_request)
+            result = self.terminal.order_send(mt5_request)
             execution_time = int((time.time() - start_time) * 1000)
             
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.terminal.last_error()
                 error_msg = f"MT5 Error: {error_code}"
                 self.logger_manager.log_error(f"❌ {error_msg}")
                 
@@ -357,7 +459,7 @@ class OrderExecutor:
                 return failed_order
             
             # Procesar resultado exitoso
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
+            if result.retcode == self.terminal.TRADE_RETCODE_DONE:
                 executed_order = ExecutedOrder(
                     order_id=result.order,
                     ticket=result.deal if hasattr(result, 'deal') else result.order,
@@ -424,6 +526,10 @@ class OrderExecutor:
     
     def _update_success_metrics(self, executed_order: ExecutedOrder):
         """Actualizar métricas de éxito"""
+        with self._metrics_lock:
+            self._apply_success_metrics(executed_order)
+    
+    def _apply_success_metrics(self, executed_order: ExecutedOrder):
         self.execution_metrics['total_orders_executed'] += 1
         
         # Actualizar tiempo promedio de ejecución
@@ -440,11 +546,12 @@ class OrderExecutor:
     
     def _update_failure_metrics(self):
         """Actualizar métricas de fallo"""
-        self.execution_metrics['total_orders_failed'] += 1
-        
-        # Actualizar tasa de éxito
-        total_attempts = self.execution_metrics['total_orders_executed'] + self.execution_metrics['total_orders_failed']
-        self.execution_metrics['success_rate'] = self.execution_metrics['total_orders_executed'] / total_attempts if total_attempts > 0 else 0
+        with self._metrics_lock:
+            self.execution_metrics['total_orders_failed'] += 1
+            
+            # Actualizar tasa de éxito
+            total_attempts = self.execution_metrics['total_orders_executed'] + self.execution_metrics['total_orders_failed']
+            self.execution_metrics['success_rate'] = self.execution_metrics['total_orders_executed'] / total_attempts if total_attempts > 0 else 0
     
     def get_execution_status(self) -> Dict[str, Any]:
         """Obtener estado del ejecutor"""
@@ -455,6 +562,7 @@ class OrderExecutor:
             'orders_enabled': self.orders_enabled,
             'last_execution': self.last_execution.isoformat() if self.last_execution else None,
             'metrics': self.execution_metrics.copy(),
+            'pipeline': self.order_pipeline.get_stats(),
             'recent_orders': len([o for o in self.executed_orders if o.timestamp > datetime.now().replace(hour=datetime.now().hour-1)]),
             'connection_status': self.fundednext_manager.get_connection_status() if self.fundednext_manager else "unknown"
         }
@@ -470,6 +578,9 @@ class OrderExecutor:
         try:
             self.is_active = False
             self.orders_enabled = False
+            
+            # Terminar las órdenes ya encoladas antes de cerrar
+            self.order_pipeline.shutdown(wait=True)
             self.logger_manager.log_info(f"🧹 {self.component_id} cleanup completado")
         except Exception as e:
             self.error_manager.handle_system_error("OrderExecutor", e, {"operation": "cleanup"})
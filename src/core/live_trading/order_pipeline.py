@@ -0,0 +1,337 @@
+"""
+🚦 ORDER PIPELINE - EJECUCIÓN ASÍNCRONA DE ÓRDENES
+==================================================
+
+Cola de ejecución de órdenes con pool de workers dedicado, para que un
+``order_send`` lento no bloquee el procesamiento de señales del resto de
+símbolos.
+
+GARANTÍAS:
+- Orden FIFO por símbolo (nunca hay dos órdenes del mismo símbolo en vuelo)
+- Concurrencia global limitada por el tamaño del pool
+- Cola acotada: si está llena, el submit se rechaza inmediatamente
+- Claves de idempotencia: reenviar la misma clave devuelve el mismo Future
+  en lugar de volver a enviar la orden; si el envío falla (excepción o
+  resultado rechazado por ``result_ok``) la clave se libera para reintentar
+- Histogramas de latencia submit→ack, globales y por símbolo
+
+Autor: Sistema Trading Grid Avanzado
+Fecha: Agosto 2025
+"""
+
+import bisect
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class PipelineRejectedError(Exception):
+    """La orden no se aceptó en la cola (llena o pipeline detenido)"""
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con buckets fijos en milisegundos
+
+    Registra en O(log B) y estima percentiles por interpolación dentro
+    del bucket, sin guardar las muestras individuales.
+    """
+
+    DEFAULT_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, bounds_ms: Tuple[float, ...] = DEFAULT_BOUNDS_MS):
+        self.bounds = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # último bucket = +inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def record(self, latency_ms: float):
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.min_ms = latency_ms if self.min_ms is None else min(self.min_ms, latency_ms)
+        self.max_ms = latency_ms if self.max_ms is None else max(self.max_ms, latency_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Percentil estimado (pct en 0-100)"""
+        if not self.count:
+            return None
+        target = self.count * pct / 100.0
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= target:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max_ms
+                fraction = (target - cumulative) / bucket_count
+                estimate = lower + (upper - lower) * fraction
+                return max(self.min_ms, min(self.max_ms, estimate))
+            cumulative += bucket_count
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in self.bounds] + [f">{self.bounds[-1]}ms"]
+        return {
+            'count': self.count,
+            'avg_ms': self.total_ms / self.count if self.count else 0.0,
+            'min_ms': self.min_ms,
+            'max_ms': self.max_ms,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+@dataclass
+class PipelineJob:
+    """Orden encolada en el pipeline"""
+    symbol: str
+    payload: Any
+    idempotency_key: Optional[str]
+    future: Future
+    context: Any = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class OrderPipeline:
+    """
+    🚦 Pipeline de órdenes con concurrencia acotada
+
+    Args:
+        send_fn: Callable(payload, context) que envía la orden y devuelve el
+            resultado (se ejecuta en los workers)
+        max_workers: Órdenes en vuelo simultáneas como máximo
+        max_pending: Órdenes encoladas como máximo (en todos los símbolos)
+        idempotency_ttl: Segundos que se recuerda una clave de idempotencia
+        max_idempotency_keys: Claves recordadas como máximo
+        result_ok: Callable(resultado) → bool que distingue un envío correcto
+            de uno fallido sin excepción (por defecto todo resultado es correcto)
+    """
+
+    def __init__(self, send_fn: Callable[[Any, Any], Any], max_workers: int = 4,
+                 max_pending: int = 256, idempotency_ttl: float = 3600.0,
+                 max_idempotency_keys: int = 10000,
+                 result_ok: Optional[Callable[[Any], bool]] = None):
+        self.send_fn = send_fn
+        self.result_ok = result_ok
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.idempotency_ttl = idempotency_ttl
+        self.max_idempotency_keys = max_idempotency_keys
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="OrderPipeline")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queues: Dict[str, Deque[PipelineJob]] = {}
+        self._active_symbols = set()
+        self._pending = 0
+        self._running = True
+
+        # clave → (Future, instante de registro)
+        self._idempotency: "OrderedDict[str, Tuple[Future, float]]" = OrderedDict()
+
+        self.latency = LatencyHistogram()
+        self.latency_by_symbol: Dict[str, LatencyHistogram] = {}
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'duplicates': 0,
+            'max_in_flight': 0
+        }
+        self._in_flight = 0
+
+    # ========================================================================
+    # 📥 ENVÍO
+    # ========================================================================
+
+    def find_duplicate(self, idempotency_key: Optional[str]) -> Optional[Future]:
+        """
+        Future de una orden ya enviada con la misma clave (sin encolar nada)
+
+        Permite al llamador saltarse la preparación de una orden repetida;
+        ``submit`` vuelve a comprobarlo de forma atómica.
+        """
+        if idempotency_key is None:
+            return None
+        with self._lock:
+            self._expire_idempotency_keys()
+            known = self._idempotency.get(idempotency_key)
+            if known is None:
+                return None
+            self.stats['duplicates'] += 1
+            return known[0]
+
+    def submit(self, symbol: str, payload: Any, idempotency_key: Optional[str] = None,
+               context: Any = None) -> Future:
+        """
+        Encolar una orden
+
+        Args:
+            symbol: Símbolo (define el orden FIFO)
+            payload: Request de la orden (p.ej. OrderRequest)
+            idempotency_key: Clave única de la intención de orden
+            context: Datos adicionales para send_fn (p.ej. la señal original)
+
+        Returns:
+            Future con el resultado de send_fn
+
+        Raises:
+            PipelineRejectedError: Si la cola está llena o el pipeline detenido
+        """
+        with self._lock:
+            if idempotency_key is not None:
+                self._expire_idempotency_keys()
+                known = self._idempotency.get(idempotency_key)
+                if known is not None:
+                    self.stats['duplicates'] += 1
+                    return known[0]
+
+            if not self._running:
+                self.stats['rejected'] += 1
+                raise PipelineRejectedError("Pipeline detenido")
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise PipelineRejectedError(f"Cola llena ({self._pending}/{self.max_pending})")
+
+            job = PipelineJob(symbol=symbol, payload=payload, idempotency_key=idempotency_key,
+                              future=Future(), context=context)
+            if idempotency_key is not None:
+                self._idempotency[idempotency_key] = (job.future, time.time())
+                while len(self._idempotency) > self.max_idempotency_keys:
+                    self._idempotency.popitem(last=False)
+
+            self._queues.setdefault(symbol, deque()).append(job)
+            self._pending += 1
+            self.stats['submitted'] += 1
+
+            if symbol not in self._active_symbols:
+                self._active_symbols.add(symbol)
+                self._pool.submit(self._run_next, symbol)
+
+        return job.future
+
+    # ========================================================================
+    # ⚙️ WORKERS
+    # ========================================================================
+
+    def _run_next(self, symbol: str):
+        """Ejecutar la siguiente orden del símbolo y re-planificar si quedan más"""
+        with self._lock:
+            job = self._queues[symbol].popleft()
+            self._pending -= 1
+            self._in_flight += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+
+        if job.future.set_running_or_notify_cancel():
+            try:
+                result = self.send_fn(job.payload, job.context)
+            except Exception as e:
+                self._record_latency(symbol, job)
+                self._release_key(job)
+                job.future.set_exception(e)
+                self._count('failed')
+            else:
+                self._record_latency(symbol, job)
+                succeeded = self.result_ok is None or self.result_ok(result)
+                if not succeeded:
+                    self._release_key(job)
+                job.future.set_result(result)
+                self._count('completed' if succeeded else 'failed')
+
+        with self._lock:
+            self._in_flight -= 1
+            if self._queues[symbol]:
+                try:
+                    # Volver al final de la cola del pool: reparto justo entre símbolos
+                    self._pool.submit(self._run_next, symbol)
+                    return
+                except RuntimeError:
+                    # Pool detenido sin esperar: las órdenes restantes no se envían
+                    for pending_job in self._queues[symbol]:
+                        pending_job.future.cancel()
+                    self._pending -= len(self._queues[symbol])
+            del self._queues[symbol]
+            self._active_symbols.discard(symbol)
+            if not self._pending and not self._in_flight:
+                self._idle.notify_all()
+
+    def _record_latency(self, symbol: str, job: PipelineJob):
+        latency_ms = (time.perf_counter() - job.submitted_at) * 1000
+        with self._lock:
+            self.latency.record(latency_ms)
+            self.latency_by_symbol.setdefault(symbol, LatencyHistogram()).record(latency_ms)
+
+    def _release_key(self, job: PipelineJob):
+        """Un envío fallido puede reintentarse con la misma clave"""
+        if job.idempotency_key is not None:
+            with self._lock:
+                known = self._idempotency.get(job.idempotency_key)
+                if known is not None and known[0] is job.future:
+                    del self._idempotency[job.idempotency_key]
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _expire_idempotency_keys(self):
+        """Olvidar claves más antiguas que el TTL (las más viejas van primero)"""
+        cutoff = time.time() - self.idempotency_ttl
+        while self._idempotency:
+            key, (future, registered) = next(iter(self._idempotency.items()))
+            if registered >= cutoff or not future.done():
+                break
+            self._idempotency.popitem(last=False)
+
+    # ========================================================================
+    # 📊 ESTADO
+    # ========================================================================
+
+    def pending_count(self, symbol: Optional[str] = None) -> int:
+        with self._lock:
+            if symbol is None:
+                return self._pending
+            return len(self._queues.get(symbol, ()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self.stats.copy()
+            stats['pending'] = self._pending
+            stats['in_flight'] = self._in_flight
+            stats['latency'] = self.latency.to_dict()
+            stats['latency_by_symbol'] = {s: h.to_dict() for s, h in self.latency_by_symbol.items()}
+        return stats
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que no queden órdenes encoladas ni en vuelo
+
+        Returns:
+            bool: True si el pipeline quedó vacío antes del timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        Detener el pipeline
+
+        Args:
+            wait: Esperar a que terminen las órdenes en curso
+            cancel_pending: Cancelar las órdenes encoladas que no han empezado
+        """
+        with self._lock:
+            self._running = False
+            if cancel_pending:
+                for queue in self._queues.values():
+                    for job in queue:
+                        job.future.cancel()
+        if wait:
+            self.drain()
+        self._pool.shutdown(wait=wait)
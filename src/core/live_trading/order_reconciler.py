@@ -0,0 +1,233 @@
+"""
+🔄 ORDER RECONCILER - CONCILIACIÓN MASIVA DE ÓRDENES
+====================================================
+
+Concilia el libro local de órdenes pendientes contra el terminal MT5 con
+dos llamadas por pasada, independientemente del número de órdenes:
+
+1. ``orders_get()`` → todas las órdenes pendientes del terminal
+2. ``history_deals_get(date_from, date_to)`` → deals recientes, solo si
+   alguna orden local ya no está pendiente
+
+La diferencia entre el conjunto de tickets locales y el del terminal da
+las órdenes que han salido del libro. Cada una se clasifica como:
+
+- FILLED:    tiene al menos un deal asociado (``deal.order``)
+- EXPIRED:   sin deals y con la expiración ya vencida
+- CANCELLED: sin deals y antes de su expiración
+
+El historial de deals puede llegar con retraso respecto al libro de
+órdenes, así que una orden que falta sin deals no se cierra en la primera
+pasada: queda sin confirmar y solo se da por EXPIRED/CANCELLED si sigue
+sin deals pasado ``confirm_after``. Todas las fechas se expresan en hora
+del servidor (``clock``), la misma que usan ``time_setup`` y los deals.
+
+Las transiciones se emiten como ``OrderStateEvent`` a los listeners
+registrados y se devuelven al llamador.
+
+Autor: Sistema Trading Grid Avanzado
+Fecha: Agosto 2025
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class OrderTransition(Enum):
+    """Transiciones de estado detectadas por la conciliación"""
+    FILLED = "FILLED"
+    EXPIRED = "EXPIRED"
+    CANCELLED = "CANCELLED"
+
+
+@dataclass
+class TrackedOrder:
+    """Orden pendiente registrada en el libro local"""
+    ticket: int
+    symbol: str
+    placed_time: datetime
+    expiry_time: Optional[datetime] = None
+
+
+@dataclass
+class OrderStateEvent:
+    """Evento de transición de una orden pendiente"""
+    ticket: int
+    symbol: str
+    transition: OrderTransition
+    timestamp: datetime
+    deals: List[Any] = field(default_factory=list)
+
+    @property
+    def fill_price(self) -> Optional[float]:
+        """Precio medio ponderado de los deals (solo FILLED)"""
+        volume = sum(getattr(d, 'volume', 0.0) for d in self.deals)
+        if not volume:
+            return None
+        return sum(d.price * d.volume for d in self.deals) / volume
+
+
+class OrderReconciler:
+    """
+    🔄 Motor de conciliación de órdenes pendientes
+
+    Mantiene los tickets locales en un dict (hash) y compara contra el set
+    de tickets pendientes del terminal en cada pasada.
+    """
+
+    def __init__(self, terminal: Any, history_margin: timedelta = timedelta(minutes=5),
+                 confirm_after: timedelta = timedelta(seconds=10),
+                 clock: Optional[Callable[[], datetime]] = None):
+        """
+        Args:
+            terminal: Módulo MetaTrader5 o terminal compatible (SimulatedTerminal)
+            history_margin: Margen hacia atrás al pedir deals, para cubrir
+                desfases de reloj entre el terminal y el sistema
+            confirm_after: Tiempo que una orden debe seguir fuera del libro y
+                sin deals antes de darla por expirada/cancelada
+            clock: Hora del servidor como datetime naive (por defecto datetime.now)
+        """
+        self.terminal = terminal
+        self.history_margin = history_margin
+        self.confirm_after = confirm_after
+        self.clock = clock or datetime.now
+        self._tracked: Dict[int, TrackedOrder] = {}
+        self._unconfirmed: Dict[int, datetime] = {}   # ticket → primera pasada sin deals
+        self._listeners: List[Callable[[List[OrderStateEvent]], None]] = []
+
+        self.stats = {
+            'passes': 0,
+            'terminal_calls': 0,
+            'filled': 0,
+            'expired': 0,
+            'cancelled': 0,
+            'deferred': 0,
+            'last_pass': None
+        }
+
+    # ========================================================================
+    # 📒 LIBRO LOCAL
+    # ========================================================================
+
+    def track(self, ticket: int, symbol: str, expiry_time: Optional[datetime] = None,
+              placed_time: Optional[datetime] = None):
+        """Registrar una orden pendiente para conciliación"""
+        self._tracked[ticket] = TrackedOrder(
+            ticket=ticket,
+            symbol=symbol,
+            placed_time=placed_time or self.clock(),
+            expiry_time=expiry_time
+        )
+
+    def untrack(self, ticket: int) -> bool:
+        """Dejar de seguir una orden (p.ej. cancelada por el propio sistema)"""
+        self._unconfirmed.pop(ticket, None)
+        return self._tracked.pop(ticket, None) is not None
+
+    @property
+    def tracked_tickets(self) -> Set[int]:
+        return set(self._tracked)
+
+    def add_listener(self, callback: Callable[[List[OrderStateEvent]], None]):
+        """Registrar un callback que recibe cada lote de eventos"""
+        self._listeners.append(callback)
+
+    # ========================================================================
+    # 🔄 CONCILIACIÓN
+    # ========================================================================
+
+    def reconcile(self, now: Optional[datetime] = None) -> List[OrderStateEvent]:
+        """
+        Ejecutar una pasada de conciliación
+
+        Args:
+            now: Hora del servidor de referencia (por defecto ``clock()``)
+
+        Returns:
+            Lista de eventos emitidos en esta pasada
+        """
+        if not self._tracked:
+            return []
+
+        now = now or self.clock()
+        self.stats['passes'] += 1
+        self.stats['last_pass'] = now
+
+        # 1. Una sola llamada para todas las órdenes pendientes
+        pending = self.terminal.orders_get()
+        self.stats['terminal_calls'] += 1
+        if pending is None:
+            # Error de terminal: no se puede distinguir "sin órdenes" de "fallo"
+            return []
+
+        pending_tickets = {order.ticket for order in pending}
+        for ticket in self._unconfirmed.keys() & pending_tickets:
+            del self._unconfirmed[ticket]
+        missing = [self._tracked[t] for t in self._tracked.keys() - pending_tickets]
+        if not missing:
+            return []
+
+        # 2. Una sola llamada para los deals desde la orden más antigua que falta
+        date_from = min(order.placed_time for order in missing) - self.history_margin
+        deals = self.terminal.history_deals_get(self._as_server_utc(date_from),
+                                                self._as_server_utc(now + timedelta(days=1)))
+        self.stats['terminal_calls'] += 1
+        if deals is None:
+            return []
+
+        deals_by_order: Dict[int, List[Any]] = {}
+        for deal in deals:
+            deals_by_order.setdefault(deal.order, []).append(deal)
+
+        events = []
+        for order in missing:
+            order_deals = deals_by_order.get(order.ticket, [])
+            if order_deals:
+                transition = OrderTransition.FILLED
+            elif not self._confirmed_gone(order.ticket, now):
+                # Sin deals todavía: puede ser retraso del historial
+                continue
+            elif order.expiry_time is not None and now >= order.expiry_time:
+                transition = OrderTransition.EXPIRED
+            else:
+                transition = OrderTransition.CANCELLED
+
+            self.stats[transition.value.lower()] += 1
+            del self._tracked[order.ticket]
+            self._unconfirmed.pop(order.ticket, None)
+            events.append(OrderStateEvent(
+                ticket=order.ticket,
+                symbol=order.symbol,
+                transition=transition,
+                timestamp=now,
+                deals=order_deals
+            ))
+
+        if events:
+            for listener in self._listeners:
+                listener(events)
+
+        return events
+
+    def _confirmed_gone(self, ticket: int, now: datetime) -> bool:
+        """Si una orden sin deals lleva fuera del libro al menos ``confirm_after``"""
+        first_missing = self._unconfirmed.setdefault(ticket, now)
+        if now - first_missing >= self.confirm_after:
+            return True
+        if first_missing == now:
+            self.stats['deferred'] += 1
+        return False
+
+    @staticmethod
+    def _as_server_utc(moment: datetime) -> datetime:
+        """Hora del servidor marcada como UTC: MetaTrader5 no le aplica la zona local"""
+        return moment.replace(tzinfo=timezone.utc)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de conciliación"""
+        stats = self.stats.copy()
+        stats['tracked_orders'] = len(self._tracked)
+        stats['unconfirmed_orders'] = len(self._unconfirmed)
+        return stats
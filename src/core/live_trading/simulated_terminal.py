@@ -0,0 +1,312 @@
+"""
+🧪 SIMULATED TERMINAL - MT5 OFFLINE
+===================================
+
+Terminal MT5 simulado en memoria para probar los componentes del piso
+ejecutor sin conexión a MetaTrader 5.
+
+Expone el subconjunto de la API de ``MetaTrader5`` que usan los
+ejecutores (``symbol_info``, ``symbol_info_tick``, ``orders_get``,
+``history_deals_get``, ``order_send``) con estructuras compatibles
+(``ticket``, ``symbol``, ``order``, ``price``...), más helpers para dirigir
+la simulación: cotizar, llenar, cancelar o expirar órdenes.
+
+``clock`` es la hora del servidor (datetime naive). Como en MT5, los
+timestamps enteros (``tick.time``, ``expiration``) son esa hora expresada
+como si fuera UTC, y ``deal_delay`` retrasa la aparición de los deals en el
+historial para reproducir el desfase entre libro de órdenes e historial.
+
+Cada llamada al terminal queda contabilizada en ``call_counts`` para poder
+verificar cuántas consultas hace un componente por pasada. La latencia de
+``order_send`` es configurable para pruebas de carga del pipeline de órdenes.
+
+Autor: Sistema Trading Grid Avanzado
+Fecha: Agosto 2025
+"""
+
+import calendar
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# Estructuras compatibles con TradeOrder / TradeDeal / OrderSendResult de MT5
+SimOrder = namedtuple('SimOrder', [
+    'ticket', 'symbol', 'type', 'volume_initial', 'volume_current',
+    'price_open', 'sl', 'tp', 'magic', 'comment', 'time_setup', 'time_expiration'
+])
+SimDeal = namedtuple('SimDeal', [
+    'ticket', 'order', 'position_id', 'symbol', 'type', 'volume',
+    'price', 'magic', 'comment', 'time'
+])
+SimOrderSendResult = namedtuple('SimOrderSendResult', [
+    'retcode', 'order', 'deal', 'volume', 'price', 'comment'
+])
+SimSymbolInfo = namedtuple('SimSymbolInfo', [
+    'name', 'digits', 'point', 'trade_tick_size', 'trade_tick_value',
+    'volume_min', 'volume_max', 'volume_step', 'trade_contract_size', 'bid', 'ask'
+])
+SimTick = namedtuple('SimTick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc'])
+
+
+def _server_timestamp(moment: datetime) -> int:
+    """Hora del servidor (naive) como timestamp MT5"""
+    return calendar.timegm(moment.timetuple())
+
+
+def _server_naive(moment: Optional[datetime]) -> Optional[datetime]:
+    """Fechas aware (UTC = hora del servidor, convención MT5) a naive"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class SimulatedTerminal:
+    """
+    🧪 Terminal MT5 simulado
+
+    Mantiene un libro de órdenes pendientes y un historial de deals en
+    memoria. Es thread-safe para poder usarse desde hilos de monitoreo.
+    """
+
+    # Constantes MT5 utilizadas por los ejecutores
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_REMOVE = 8
+    ORDER_TIME_GTC = 0
+    ORDER_TIME_SPECIFIED = 2
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+
+    def __init__(self, clock=None, first_ticket: int = 100000,
+                 latency: Union[float, Tuple[float, float], Callable[[], float], None] = None,
+                 max_concurrent_sends: Optional[int] = None,
+                 deal_delay: timedelta = timedelta(0)):
+        """
+        Args:
+            clock: Callable que devuelve la hora del servidor (por defecto datetime.now)
+            first_ticket: Primer ticket asignado por el terminal
+            latency: Latencia de order_send en segundos: fija, rango (min, max)
+                uniforme o callable que devuelve la latencia de cada envío
+            max_concurrent_sends: Envíos simultáneos que acepta el terminal
+                (None = sin límite); el resto espera turno
+            deal_delay: Retraso con el que un deal aparece en history_deals_get
+        """
+        self.clock = clock or datetime.now
+        self.latency = latency
+        self.deal_delay = deal_delay
+        self._send_slots = threading.BoundedSemaphore(max_concurrent_sends) if max_concurrent_sends else None
+        self._concurrent_sends = 0
+        self.max_observed_concurrency = 0
+        self._lock = threading.RLock()
+        self._next_ticket = first_ticket
+        self._orders: Dict[int, SimOrder] = {}
+        self._deals: List[SimDeal] = []
+        self._symbols: Dict[str, SimSymbolInfo] = {}
+        self.call_counts: Dict[str, int] = {}
+        self._last_error: Tuple[int, str] = (1, 'Success')
+
+    # ========================================================================
+    # 🔌 API COMPATIBLE CON MetaTrader5
+    # ========================================================================
+
+    def symbol_info(self, symbol: str) -> Optional[SimSymbolInfo]:
+        """Especificación del símbolo (None si no se ha cotizado)"""
+        self._count('symbol_info')
+        with self._lock:
+            return self._symbols.get(symbol)
+
+    def symbol_info_tick(self, symbol: str) -> Optional[SimTick]:
+        """Último precio del símbolo con la hora del servidor"""
+        self._count('symbol_info_tick')
+        with self._lock:
+            info = self._symbols.get(symbol)
+        if info is None:
+            return None
+        stamp = _server_timestamp(self.clock())
+        return SimTick(stamp, info.bid, info.ask, 0.0, 0, stamp * 1000)
+
+    def orders_get(self, symbol: Optional[str] = None, ticket: Optional[int] = None,
+                   group: Optional[str] = None) -> Tuple[SimOrder, ...]:
+        """Órdenes pendientes (todas, por símbolo o por ticket)"""
+        self._count('orders_get')
+        with self._lock:
+            if ticket is not None:
+                order = self._orders.get(ticket)
+                return (order,) if order else ()
+            return tuple(o for o in self._orders.values()
+                         if symbol is None or o.symbol == symbol)
+
+    def history_deals_get(self, date_from: Optional[datetime] = None,
+                          date_to: Optional[datetime] = None,
+                          ticket: Optional[int] = None,
+                          position: Optional[int] = None,
+                          group: Optional[str] = None) -> Tuple[SimDeal, ...]:
+        """Deals del historial por rango de fechas, orden o posición"""
+        self._count('history_deals_get')
+        date_from, date_to = _server_naive(date_from), _server_naive(date_to)
+        visible_until = self.clock() - self.deal_delay
+        with self._lock:
+            deals = [d for d in self._deals if d.time <= visible_until]
+            if ticket is not None:
+                return tuple(d for d in deals if d.order == ticket)
+            if position is not None:
+                return tuple(d for d in deals if d.position_id == position)
+            return tuple(
+                d for d in deals
+                if (date_from is None or d.time >= date_from)
+                and (date_to is None or d.time <= date_to)
+            )
+
+    def order_send(self, request: Dict[str, Any]) -> SimOrderSendResult:
+        """Procesar request de trading (pendientes, mercado y cancelación)"""
+        self._count('order_send')
+        self._simulate_latency()
+        action = request.get('action')
+
+        with self._lock:
+            if action == self.TRADE_ACTION_REMOVE:
+                ticket = request.get('order')
+                if self._orders.pop(ticket, None) is None:
+                    return self._reject('Order not found')
+                return SimOrderSendResult(self.TRADE_RETCODE_DONE, ticket, 0, 0.0, 0.0, 'Removed')
+
+            if action == self.TRADE_ACTION_PENDING:
+                ticket = self._new_ticket()
+                expiration = request.get('expiration')
+                self._orders[ticket] = SimOrder(
+                    ticket=ticket,
+                    symbol=request.get('symbol', ''),
+                    type=request.get('type', self.ORDER_TYPE_BUY_LIMIT),
+                    volume_initial=request.get('volume', 0.0),
+                    volume_current=request.get('volume', 0.0),
+                    price_open=request.get('price', 0.0),
+                    sl=request.get('sl', 0.0),
+                    tp=request.get('tp', 0.0),
+                    magic=request.get('magic', 0),
+                    comment=request.get('comment', ''),
+                    time_setup=self.clock(),
+                    time_expiration=datetime.fromtimestamp(expiration, timezone.utc).replace(tzinfo=None)
+                    if expiration else None
+                )
+                return SimOrderSendResult(self.TRADE_RETCODE_DONE, ticket, 0,
+                                          request.get('volume', 0.0), request.get('price', 0.0), 'Placed')
+
+            if action == self.TRADE_ACTION_DEAL:
+                ticket = self._new_ticket()
+                deal = self._add_deal(ticket, request.get('symbol', ''), request.get('type', 0),
+                                      request.get('volume', 0.0), request.get('price', 0.0),
+                                      request.get('magic', 0), request.get('comment', ''))
+                return SimOrderSendResult(self.TRADE_RETCODE_DONE, ticket, deal.ticket,
+                                          deal.volume, deal.price, 'Done')
+
+            return self._reject(f'Unsupported action: {action}')
+
+    def last_error(self) -> Tuple[int, str]:
+        """Último error del terminal"""
+        return self._last_error
+
+    # ========================================================================
+    # 🎮 CONTROL DE LA SIMULACIÓN
+    # ========================================================================
+
+    def set_quote(self, symbol: str, bid: float, ask: float, digits: int = 5,
+                  tick_value: float = 1.0, volume_step: float = 0.01):
+        """Cotizar un símbolo (lo da de alta si no existía)"""
+        point = 10 ** -digits
+        with self._lock:
+            self._symbols[symbol] = SimSymbolInfo(
+                name=symbol, digits=digits, point=point, trade_tick_size=point,
+                trade_tick_value=tick_value, volume_min=volume_step, volume_max=100.0,
+                volume_step=volume_step, trade_contract_size=100000.0, bid=bid, ask=ask
+            )
+
+    def fill_order(self, ticket: int, price: Optional[float] = None) -> Optional[SimDeal]:
+        """Ejecutar una orden pendiente, generando su deal en el historial"""
+        with self._lock:
+            order = self._orders.pop(ticket, None)
+            if order is None:
+                return None
+            deal_type = self.ORDER_TYPE_BUY if order.type in (
+                self.ORDER_TYPE_BUY, self.ORDER_TYPE_BUY_LIMIT) else self.ORDER_TYPE_SELL
+            return self._add_deal(ticket, order.symbol, deal_type, order.volume_current,
+                                  order.price_open if price is None else price,
+                                  order.magic, order.comment)
+
+    def cancel_order(self, ticket: int) -> bool:
+        """Cancelar una orden pendiente sin generar deals"""
+        with self._lock:
+            return self._orders.pop(ticket, None) is not None
+
+    def expire_orders(self, now: Optional[datetime] = None) -> List[int]:
+        """Retirar las órdenes cuya expiración ya pasó"""
+        now = now or self.clock()
+        with self._lock:
+            expired = [t for t, o in self._orders.items()
+                       if o.time_expiration is not None and o.time_expiration <= now]
+            for ticket in expired:
+                del self._orders[ticket]
+        return expired
+
+    def reset_call_counts(self):
+        """Reiniciar los contadores de llamadas"""
+        self.call_counts.clear()
+
+    # ========================================================================
+    # 🔧 INTERNOS
+    # ========================================================================
+
+    def _count(self, name: str):
+        with self._lock:
+            self.call_counts[name] = self.call_counts.get(name, 0) + 1
+
+    def _simulate_latency(self):
+        """Dormir la latencia configurada (fuera del lock del libro)"""
+        if self.latency is None:
+            return
+        if callable(self.latency):
+            delay = self.latency()
+        elif isinstance(self.latency, tuple):
+            delay = random.uniform(*self.latency)
+        else:
+            delay = self.latency
+
+        if self._send_slots:
+            self._send_slots.acquire()
+        try:
+            with self._lock:
+                self._concurrent_sends += 1
+                self.max_observed_concurrency = max(self.max_observed_concurrency, self._concurrent_sends)
+            time.sleep(max(0.0, delay))
+        finally:
+            with self._lock:
+                self._concurrent_sends -= 1
+            if self._send_slots:
+                self._send_slots.release()
+
+    def _new_ticket(self) -> int:
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    def _add_deal(self, order_ticket: int, symbol: str, deal_type: int, volume: float,
+                  price: float, magic: int, comment: str) -> SimDeal:
+        deal = SimDeal(
+            ticket=self._new_ticket(), order=order_ticket, position_id=order_ticket,
+            symbol=symbol, type=deal_type, volume=volume, price=price,
+            magic=magic, comment=comment, time=self.clock()
+        )
+        self._deals.append(deal)
+        return deal
+
+    def _reject(self, message: str) -> SimOrderSendResult:
+        self._last_error = (self.TRADE_RETCODE_INVALID, message)
+        return SimOrderSendResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, message)
@@ -16,18 +16,47 @@ ESTRUCTURA DE CAJA NEGRA:
 - logs/signals/       - Logs de señales generadas
 - logs/archive/       - Logs archivados por fecha
 
+ESCRITURA:
+- Los métodos log_* solo filtran por nivel y encolan el registro
+- Un hilo AsyncLogWriter (compartido por directorio) formatea y escribe en lotes
+- Cola acotada con contadores de descartes por categoría (get_session_stats)
+
+SEGMENTOS:
+- Archivo activo: logs/<cat>/<cat>_YYYYMMDD.log (rota por tamaño, antigüedad o día)
+- Segmentos cerrados: <cat>_YYYYMMDD_NNNN.log.gz, gzip multi-miembro por bloques
+- Sidecar <segmento>.idx (JSON): bloques con offset/longitud y rango de timestamps,
+  para leer una ventana de tiempo sin descomprimir el archivo completo
+
 Autor: GitHub Copilot
 Fecha: Agosto 12, 2025
 """
 
 import os
+import re
+import gzip
+import shutil
 import logging
 import json
+import time
+import queue
+import atexit
+import threading
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Tuple, Iterator, Union
 from enum import Enum
 
+# Encoder JSON rápido opcional (orjson); fallback a un JSONEncoder precompilado
+try:
+    import orjson
+    
+    def _encode_json(entry: Dict[str, Any]) -> str:
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+except ImportError:
+    orjson = None
+    _encode_json = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
 class LogCategory(Enum):
     """Categorías de logs para la caja negra"""
     SYSTEM = "system"
@@ -50,15 +79,546 @@ class LogLevel(Enum):
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
+# Prioridad numérica por nivel (filtrado antes de formatear)
+LEVEL_PRIORITY = {
+    LogLevel.DEBUG: 10,
+    LogLevel.INFO: 20,
+    LogLevel.SUCCESS: 25,
+    LogLevel.WARNING: 30,
+    LogLevel.ERROR: 40,
+    LogLevel.CRITICAL: 50,
+}
+
+# Nivel escrito en la columna levelname del archivo (SUCCESS como INFO)
+_FILE_LEVEL_NAMES = {
+    LogLevel.DEBUG.value: "DEBUG",
+    LogLevel.INFO.value: "INFO",
+    LogLevel.SUCCESS.value: "INFO",
+    LogLevel.WARNING.value: "WARNING",
+    LogLevel.ERROR.value: "ERROR",
+    LogLevel.CRITICAL.value: "CRITICAL",
+}
+
+# Registro pre-estructurado: (created, session_id, category, level, message, metadata)
+LogRecord = Tuple[float, str, str, str, str, Optional[Dict[str, Any]]]
+
+
+# Segmento cerrado: <cat>_YYYYMMDD_NNNN.log(.gz)
+SEGMENT_NAME_RE = re.compile(r"^(?P<category>[a-z0-9]+)_(?P<date>\d{8})(?:_(?P<seq>\d{4}))?\.log(?:\.gz)?$")
+SEGMENT_BLOCK_BYTES = 64 * 1024
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _segment_index_path(segment_path: Path) -> Path:
+    return segment_path.with_name(segment_path.name + ".idx")
+
+
+def compress_log_segment(source: Path, target_dir: Optional[Path] = None,
+                         block_bytes: int = SEGMENT_BLOCK_BYTES) -> Path:
+    """
+    Comprimir un segmento cerrado en bloques gzip independientes + sidecar .idx
+    
+    Lectura en streaming línea a línea; cada bloque de ~block_bytes es un
+    miembro gzip propio, así que el resultado sigue siendo un .gz estándar
+    pero se puede leer por bloques con seek.
+    
+    Args:
+        source: Segmento .log cerrado
+        target_dir: Directorio destino (por defecto, el del origen)
+        block_bytes: Tamaño sin comprimir de cada bloque
+        
+    Returns:
+        Ruta del .log.gz generado
+    """
+    source = Path(source)
+    target_dir = Path(target_dir) if target_dir else source.parent
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / (source.name + ".gz")
+    partial = target.with_name(target.name + ".tmp")
+    
+    blocks = []
+    block_lines: List[bytes] = []
+    block_size = 0
+    block_min = block_max = None
+    offset = 0
+    
+    with open(source, 'rb') as src, open(partial, 'wb') as out:
+        def emit_block():
+            nonlocal offset, block_lines, block_size, block_min, block_max
+            data = gzip.compress(b''.join(block_lines))
+            out.write(data)
+            blocks.append({"offset": offset, "length": len(data), "lines": len(block_lines),
+                           "first_ts": block_min, "last_ts": block_max})
+            offset += len(data)
+            block_lines, block_size, block_min, block_max = [], 0, None, None
+        
+        for line in src:
+            ts = line[:19].decode('ascii', errors='replace')
+            if block_min is None or ts < block_min:
+                block_min = ts
+            if block_max is None or ts > block_max:
+                block_max = ts
+            block_lines.append(line)
+            block_size += len(line)
+            if block_size >= block_bytes:
+                emit_block()
+        if block_lines:
+            emit_block()
+    
+    index = {
+        "version": 1,
+        "segment": target.name,
+        "lines": sum(block["lines"] for block in blocks),
+        "first_ts": min((block["first_ts"] for block in blocks), default=None),
+        "last_ts": max((block["last_ts"] for block in blocks), default=None),
+        "blocks": blocks
+    }
+    index_path = _segment_index_path(target)
+    with open(index_path.with_name(index_path.name + ".tmp"), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path.with_name(index_path.name + ".tmp"), index_path)
+    os.replace(partial, target)
+    source.unlink()
+    return target
+
+
+def load_segment_index(segment_path: Path) -> Optional[Dict[str, Any]]:
+    """Leer el sidecar .idx de un segmento comprimido (None si no existe)"""
+    index_path = _segment_index_path(Path(segment_path))
+    if not index_path.exists():
+        return None
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _ts_bound(value: Union[None, str, datetime]) -> Optional[str]:
+    """Normalizar un límite temporal al formato 'YYYY-MM-DD HH:MM:SS' del prefijo de línea"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', ''))
+    return value.strftime(_TS_FORMAT)
+
+
+def read_log_segment(segment_path: Path, start: Union[None, str, datetime] = None,
+                     end: Union[None, str, datetime] = None) -> Iterator[str]:
+    """
+    Iterar líneas de un segmento (plano o comprimido) dentro de [start, end]
+    
+    Para .log.gz con sidecar solo se leen y descomprimen los bloques cuyo
+    rango de timestamps se solapa con la ventana. Los límites se comparan
+    con resolución de segundo (prefijo asctime de cada línea).
+    """
+    segment_path = Path(segment_path)
+    start_ts, end_ts = _ts_bound(start), _ts_bound(end)
+    
+    def in_window(line: str) -> bool:
+        ts = line[:19]
+        return (start_ts is None or ts >= start_ts) and (end_ts is None or ts <= end_ts)
+    
+    if segment_path.suffix != '.gz':
+        with open(segment_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if in_window(line):
+                    yield line
+        return
+    
+    index = load_segment_index(segment_path)
+    if index is None:
+        with gzip.open(segment_path, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if in_window(line):
+                    yield line
+        return
+    
+    if index["first_ts"] is None or (end_ts and index["first_ts"] > end_ts) or \
+            (start_ts and index["last_ts"] < start_ts):
+        return
+    
+    with open(segment_path, 'rb') as f:
+        for block in index["blocks"]:
+            if (end_ts and block["first_ts"] > end_ts) or (start_ts and block["last_ts"] < start_ts):
+                continue
+            f.seek(block["offset"])
+            data = gzip.decompress(f.read(block["length"]))
+            for line in data.decode('utf-8', errors='replace').splitlines(keepends=True):
+                if in_window(line):
+                    yield line
+
+
+def archive_log_file(log_file: Path, archive_root: Path, compress: bool = True) -> Path:
+    """
+    Mover un archivo/segmento cerrado a archive/YYYY/MM (comprimiendo si es plano)
+    
+    Returns:
+        Ruta final en el archivo
+    """
+    log_file = Path(log_file)
+    match = SEGMENT_NAME_RE.match(log_file.name)
+    if match:
+        stamp = datetime.strptime(match.group("date"), "%Y%m%d")
+    else:
+        stamp = datetime.fromtimestamp(log_file.stat().st_mtime)
+    target_dir = Path(archive_root) / stamp.strftime("%Y") / stamp.strftime("%m")
+    target_dir.mkdir(parents=True, exist_ok=True)
+    
+    if log_file.suffix == '.gz':
+        index_path = _segment_index_path(log_file)
+        if index_path.exists():
+            shutil.move(str(index_path), str(target_dir / index_path.name))
+        target = target_dir / log_file.name
+        shutil.move(str(log_file), str(target))
+        return target
+    if compress:
+        return compress_log_segment(log_file, target_dir)
+    target = target_dir / log_file.name
+    shutil.move(str(log_file), str(target))
+    return target
+
+
+class _SegmentCompressor:
+    """Hilo único que comprime segmentos cerrados fuera del camino de escritura"""
+    
+    def __init__(self):
+        self.queue: "queue.Queue[Path]" = queue.Queue()
+        self.pending: Set[Path] = set()   # encolados o comprimiéndose
+        self.compressed = 0
+        self.errors = 0
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def submit(self, segment_path: Path):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="BlackBoxCompressor", daemon=True)
+                self._thread.start()
+            self.pending.add(segment_path)
+        self.queue.put(segment_path)
+    
+    def _run(self):
+        while True:
+            segment_path = self.queue.get()
+            try:
+                if segment_path.exists():
+                    compress_log_segment(segment_path)
+                    self.compressed += 1
+            except OSError:
+                self.errors += 1
+            finally:
+                with self._lock:
+                    self.pending.discard(segment_path)
+                self.queue.task_done()
+    
+    def wait(self, timeout: float = 30.0) -> bool:
+        """Esperar a que no queden segmentos pendientes"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+_segment_compressor = _SegmentCompressor()
+
+
+class _ActiveSegment:
+    """Archivo activo de una categoría"""
+    
+    __slots__ = ("path", "date_stamp", "handle", "opened_at", "size")
+    
+    def __init__(self, path: Path, date_stamp: str):
+        self.path = path
+        self.date_stamp = date_stamp
+        self.handle = open(path, 'a', encoding='utf-8')
+        self.opened_at = time.time()
+        self.size = path.stat().st_size
+
+
+class LogFileWriter:
+    """
+    Escritor de archivos de la caja negra
+    
+    Formatea registros pre-estructurados con el layout de siempre
+    (asctime | level | BlackBox.<categoría> | JSON) y los agrupa por archivo
+    diario, con un único write + flush por archivo y lote.
+    """
+    
+    def __init__(self, base_path: Path, max_segment_bytes: int = 16 * 1024 * 1024,
+                 max_segment_seconds: float = 3600.0, compress_segments: bool = True):
+        self.base_path = Path(base_path)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.compress_segments = compress_segments
+        
+        # Segmento activo por categoría
+        self._files: Dict[str, _ActiveSegment] = {}
+        self._file_lock = threading.Lock()
+        self.rotations = 0
+        self._stats_lock = threading.Lock()
+        
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.dropped_by_category: Counter = Counter()
+    
+    def _format_record(self, record: LogRecord) -> str:
+        """Formatear un registro con el mismo layout que el FileHandler original"""
+        created, session_id, category, level, message, metadata = record
+        moment = datetime.fromtimestamp(created)
+        log_entry = {
+            "timestamp": moment.isoformat(),
+            "session_id": session_id,
+            "category": category,
+            "level": level,
+            "message": message,
+            "metadata": metadata or {}
+        }
+        return (f"{moment.strftime('%Y-%m-%d %H:%M:%S')} | {_FILE_LEVEL_NAMES.get(level, level):<8} | "
+                f"BlackBox.{category} | {_encode_json(log_entry)}\n")
+    
+    def _get_handle(self, category: str, date_stamp: str):
+        """Archivo activo de la categoría (rota por día, tamaño o antigüedad)"""
+        current = self._files.get(category)
+        if current:
+            if current.date_stamp == date_stamp and not self._needs_rotation(current):
+                return current.handle
+            self._close_segment(category, current)
+        
+        file_path = self.base_path / category / f"{category}_{date_stamp}.log"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        segment = _ActiveSegment(file_path, date_stamp)
+        self._files[category] = segment
+        return segment.handle
+    
+    def _needs_rotation(self, segment: _ActiveSegment) -> bool:
+        if segment.size >= self.max_segment_bytes:
+            return True
+        return segment.size > 0 and time.time() - segment.opened_at >= self.max_segment_seconds
+    
+    def _close_segment(self, category: str, segment: _ActiveSegment):
+        """Cerrar el segmento activo, renombrarlo con secuencia y encolar su compresión"""
+        segment.handle.close()
+        del self._files[category]
+        if segment.size == 0:
+            return
+        
+        directory = segment.path.parent
+        prefix = f"{category}_{segment.date_stamp}_"
+        sequences = [int(m.group("seq")) for m in
+                     (SEGMENT_NAME_RE.match(p.name) for p in directory.glob(f"{prefix}*"))
+                     if m and m.group("seq")]
+        closed = directory / f"{prefix}{max(sequences, default=0) + 1:04d}.log"
+        os.replace(segment.path, closed)
+        self.rotations += 1
+        if self.compress_segments:
+            _segment_compressor.submit(closed)
+    
+    def write_batch(self, records: List[LogRecord]):
+        """Formatear y escribir un lote (un write + flush por archivo)"""
+        grouped: Dict[Tuple[str, str], List[str]] = {}
+        errors = 0
+        for record in records:
+            try:
+                date_stamp = datetime.fromtimestamp(record[0]).strftime("%Y%m%d")
+                grouped.setdefault((record[2], date_stamp), []).append(self._format_record(record))
+            except Exception:
+                errors += 1
+        
+        with self._file_lock:
+            self.write_errors += errors
+            for (category, date_stamp), lines in grouped.items():
+                try:
+                    handle = self._get_handle(category, date_stamp)
+                    data = ''.join(lines)
+                    handle.write(data)
+                    handle.flush()
+                    self._files[category].size += len(data)
+                    self.written += len(lines)
+                except OSError:
+                    self.write_errors += len(lines)
+            self.batches += 1
+    
+    def submit(self, record: LogRecord) -> bool:
+        """Escritura síncrona en el hilo llamador"""
+        self.write_batch([record])
+        return True
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Nada pendiente: cada lote ya se vuelca al escribirse"""
+        return True
+    
+    def close(self, timeout: float = 5.0):
+        """Cerrar archivos abiertos (el segmento activo queda plano para la próxima sesión)"""
+        with self._file_lock:
+            for segment in self._files.values():
+                segment.handle.close()
+            self._files.clear()
+    
+    def busy_paths(self) -> Set[Path]:
+        """Archivos que el escritor mantiene abiertos o tiene pendientes de comprimir"""
+        with self._file_lock:
+            paths = {segment.path for segment in self._files.values()}
+        with _segment_compressor._lock:
+            paths |= _segment_compressor.pending
+        return {path.resolve() for path in paths}
+    
+    def rotate_all(self):
+        """Forzar el cierre y compresión de todos los segmentos activos"""
+        with self._file_lock:
+            for category, segment in list(self._files.items()):
+                self._close_segment(category, segment)
+    
+    def _queue_stats(self) -> Dict[str, Any]:
+        return {"queue_depth": 0, "queue_capacity": 0}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores del escritor"""
+        with self._stats_lock:
+            dropped = dict(self.dropped_by_category)
+        return {
+            **self._queue_stats(),
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "rotations": self.rotations,
+            "segments_compressed": _segment_compressor.compressed,
+            "dropped": sum(dropped.values()),
+            "dropped_by_category": dropped,
+            "encoder": "orjson" if orjson is not None else "json"
+        }
+
+
+class AsyncLogWriter(LogFileWriter):
+    """
+    Escritor de caja negra en segundo plano
+    
+    Los llamadores solo encolan registros ya estructurados; un hilo dedicado
+    los formatea en lotes y los escribe. La cola es acotada: si se llena,
+    el registro se descarta y se contabiliza por categoría.
+    """
+    
+    def __init__(self, base_path: Path, max_queue_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 0.2, **segment_options):
+        super().__init__(base_path, **segment_options)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[LogRecord]" = queue.Queue(maxsize=max_queue_size)
+        
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="BlackBoxWriter", daemon=True)
+        self._thread.start()
+    
+    @property
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+    
+    def submit(self, record: LogRecord) -> bool:
+        """Encolar registro sin bloquear; False si se descartó por cola llena"""
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped_by_category[record[2]] += 1
+            return False
+    
+    def _run(self):
+        """Bucle del hilo escritor: esperar, drenar hasta batch_size y escribir"""
+        while not self._stop_event.is_set():
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                self.write_batch(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Esperar a que la cola se vacíe; True si se drenó a tiempo"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not self.is_alive:
+                return False
+            time.sleep(0.005)
+        return True
+    
+    def close(self, timeout: float = 5.0):
+        """Drenar la cola, detener el hilo y cerrar archivos"""
+        self.flush(timeout)
+        self._stop_event.set()
+        self._thread.join(timeout)
+        
+        # Registros que llegaron después de detener el hilo
+        remaining = []
+        while True:
+            try:
+                remaining.append(self.queue.get_nowait())
+                self.queue.task_done()
+            except queue.Empty:
+                break
+        if remaining:
+            self.write_batch(remaining)
+        
+        super().close(timeout)
+    
+    def _queue_stats(self) -> Dict[str, Any]:
+        return {"queue_depth": self.queue.qsize(), "queue_capacity": self.queue.maxsize}
+
+
+# Un escritor compartido por directorio de logs (LoggerManager se instancia en muchos módulos)
+_shared_writers: Dict[str, AsyncLogWriter] = {}
+_shared_writers_lock = threading.Lock()
+
+
+def get_shared_writer(base_path: Path, **writer_options) -> AsyncLogWriter:
+    """Obtener (o crear) el escritor asíncrono de un directorio de logs"""
+    key = str(Path(base_path).resolve())
+    with _shared_writers_lock:
+        writer = _shared_writers.get(key)
+        if writer is None or not writer.is_alive:
+            writer = AsyncLogWriter(Path(base_path), **writer_options)
+            _shared_writers[key] = writer
+        return writer
+
+
+@atexit.register
+def _close_shared_writers():
+    """Drenar todos los escritores al salir del proceso"""
+    with _shared_writers_lock:
+        writers = list(_shared_writers.values())
+        _shared_writers.clear()
+    for writer in writers:
+        writer.close()
+
+
 class BlackBoxLogger:
     """Sistema de logging caja negra avanzado"""
     
-    def __init__(self, base_path: str = None):
+    def __init__(self, base_path: str = None, async_mode: bool = True,
+                 min_level: LogLevel = LogLevel.DEBUG,
+                 console_min_level: LogLevel = LogLevel.INFO,
+                 writer_options: Optional[Dict[str, Any]] = None):
         """
         Inicializar sistema de caja negra
         
         Args:
             base_path: Ruta base para logs (por defecto: proyecto/logs)
+            async_mode: Escribir en segundo plano mediante cola acotada
+            min_level: Nivel mínimo escrito en archivo
+            console_min_level: Nivel mínimo mostrado en consola
+            writer_options: Opciones del escritor (max_segment_bytes,
+                max_segment_seconds, compress_segments, max_queue_size...)
         """
         # Configurar rutas
         if base_path is None:
@@ -83,9 +643,22 @@ class BlackBoxLogger:
         except ImportError:
             pass
         
-        # Configurar loggers por categoría
-        self.loggers = {}
-        self._setup_category_loggers()
+        # Filtros de nivel (se evalúan antes de construir el registro)
+        self.min_level = min_level
+        self.console_min_level = console_min_level
+        self._min_priority = LEVEL_PRIORITY[min_level]
+        self._console_min_priority = LEVEL_PRIORITY[console_min_level]
+        
+        # Backend de escritura: hilo compartido o escritura síncrona
+        self.async_mode = async_mode
+        writer_options = writer_options or {}
+        if async_mode:
+            self.writer = get_shared_writer(self.base_path, **writer_options)
+        else:
+            self.writer = LogFileWriter(self.base_path, **{
+                key: value for key, value in writer_options.items()
+                if key in ('max_segment_bytes', 'max_segment_seconds', 'compress_segments')
+            })
         
         # Metadatos de sesión
         self.session_metadata = {
@@ -124,64 +697,14 @@ class BlackBoxLogger:
             dir_path = self.base_path / directory
             dir_path.mkdir(parents=True, exist_ok=True)
     
-    def _setup_category_loggers(self):
-        """Configurar loggers específicos por categoría"""
-        # Usar fecha del día en lugar de session_id para archivos únicos por día
-        date_stamp = datetime.now().strftime("%Y%m%d")
-        
-        for category in LogCategory:
-            logger = logging.getLogger(f"BlackBox.{category.value}")
-            logger.setLevel(logging.DEBUG)
-            
-            # Handler para archivo - UN ARCHIVO POR DÍA, NO POR SESIÓN
-            file_path = self.base_path / category.value / f"{category.value}_{date_stamp}.log"
-            
-            # Si el logger ya existe, no agregar handlers duplicados
-            if not logger.handlers:
-                file_handler = logging.FileHandler(file_path, encoding='utf-8', mode='a')  # Append mode
-                
-                # Formato detallado para archivos
-                formatter = logging.Formatter(
-                    '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S'
-                )
-                file_handler.setFormatter(formatter)
-                logger.addHandler(file_handler)
-            
-            self.loggers[category] = logger
-    
     def _log_to_file(self, category: LogCategory, level: LogLevel, message: str, metadata: Dict[str, Any] = None):
-        """Escribir log a archivo con metadatos"""
-        logger = self.loggers.get(category)
-        if not logger:
+        """Encolar log estructurado (el formateo JSON ocurre en el hilo escritor)"""
+        if LEVEL_PRIORITY[level] < self._min_priority:
             return
         
-        # Crear entrada de log estructurada
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "session_id": self.session_id,
-            "category": category.value,
-            "level": level.value,
-            "message": message,
-            "metadata": metadata or {}
-        }
-        
-        # Escribir como JSON en línea separada para fácil parsing
-        json_line = json.dumps(log_entry, ensure_ascii=False)
-        
-        # Usar el nivel de logging apropiado
-        if level == LogLevel.DEBUG:
-            logger.debug(json_line)
-        elif level == LogLevel.INFO:
-            logger.info(json_line)
-        elif level == LogLevel.SUCCESS:
-            logger.info(json_line)  # SUCCESS como INFO en archivo
-        elif level == LogLevel.WARNING:
-            logger.warning(json_line)
-        elif level == LogLevel.ERROR:
-            logger.error(json_line)
-        elif level == LogLevel.CRITICAL:
-            logger.critical(json_line)
+        record = (time.time(), self.session_id, category.value, level.value, message,
+                  dict(metadata) if metadata else None)
+        self.writer.submit(record)
         
         # Actualizar metadatos de sesión
         self.session_metadata["logs_created"] += 1
@@ -189,6 +712,9 @@ class BlackBoxLogger:
     
     def _display_console(self, level: LogLevel, message: str):
         """Mostrar mensaje en consola con formato Rich"""
+        if LEVEL_PRIORITY[level] < self._console_min_priority:
+            return
+        
         timestamp = datetime.now().strftime("%H:%M:%S")
         
         if self.has_rich and self.console:
@@ -289,21 +815,59 @@ class BlackBoxLogger:
         return {
             **self.session_metadata,
             "categories_used": list(self.session_metadata["categories_used"]),
-            "uptime": str(datetime.now() - datetime.fromisoformat(self.session_metadata["start_time"]))
+            "uptime": str(datetime.now() - datetime.fromisoformat(self.session_metadata["start_time"])),
+            "writer": self.writer.get_stats()
         }
     
-    def archive_old_logs(self, days_old: int = 7):
-        """Archivar logs antiguos"""
+    def set_min_level(self, level: LogLevel, console_level: Optional[LogLevel] = None):
+        """Cambiar niveles mínimos de archivo (y opcionalmente consola)"""
+        self.min_level = level
+        self._min_priority = LEVEL_PRIORITY[level]
+        if console_level is not None:
+            self.console_min_level = console_level
+            self._console_min_priority = LEVEL_PRIORITY[console_level]
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Esperar a que los logs encolados lleguen a disco"""
+        return self.writer.flush(timeout)
+    
+    def archive_old_logs(self, days_old: int = 7) -> Dict[str, Any]:
+        """
+        Archivar logs antiguos
+        
+        Los archivos y segmentos de días anteriores al corte se mueven a
+        archive/YYYY/MM; los planos se comprimen en streaming con su sidecar.
+        Se omiten los que el escritor aún tiene abiertos o en cola de
+        compresión (p. ej. el archivo de una categoría sin escrituras desde
+        el cambio de día); se archivan en una pasada posterior.
+        """
+        archived = 0
+        skipped = 0
         try:
-            cutoff_date = datetime.now() - timedelta(days=days_old)
-            archive_path = self.base_path / "archive" / cutoff_date.strftime("%Y-%m")
-            archive_path.mkdir(parents=True, exist_ok=True)
+            cutoff_stamp = (datetime.now() - timedelta(days=days_old)).strftime("%Y%m%d")
+            archive_root = self.base_path / "archive"
+            busy = self.writer.busy_paths()
             
-            # Implementar lógica de archivado aquí
-            self.log_system(LogLevel.INFO, f"Archivado de logs > {days_old} días iniciado")
+            for category in LogCategory:
+                category_path = self.base_path / category.value
+                for log_file in sorted(category_path.glob(f"{category.value}_*.log*")):
+                    match = SEGMENT_NAME_RE.match(log_file.name)
+                    if not match or match.group("date") >= cutoff_stamp:
+                        continue
+                    if log_file.resolve() in busy:
+                        skipped += 1
+                        continue
+                    archive_log_file(log_file, archive_root)
+                    archived += 1
             
+            self.log_system(LogLevel.INFO, f"Archivado de logs > {days_old} días completado", {
+                "files_archived": archived,
+                "files_in_use": skipped
+            })
         except Exception as e:
             self.log_error(f"Error archivando logs: {e}")
+        
+        return {"files_archived": archived, "files_in_use": skipped}
     
     def emergency_log(self, message: str, metadata: Dict[str, Any] = None):
         """Log de emergencia - siempre se escribe"""
@@ -325,6 +889,6 @@ class LoggerManager(BlackBoxLogger):
     para mantener la interfaz existente
     """
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **options):
+        super().__init__(**options)
         self.log_system(LogLevel.INFO, "🔄 LoggerManager (Caja Negra) inicializado")
\ No newline at end of file
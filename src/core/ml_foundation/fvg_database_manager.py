@@ -23,22 +23,37 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import threading
 import json
+import math
 import os
 from pathlib import Path
 
 class FVGDatabaseManager:
     """Gestor centralizado de base de datos FVG optimizada para ML"""
     
-    def __init__(self, db_path: str = "data/ml/fvg_master.db"):
+    # Estados finales: un FVG resuelto ya no cambia y puede salir de la partición viva
+    RESOLVED_STATUSES = ('FILLED', 'EXPIRED')
+    
+    # Tolerancia relativa al comparar sumas acumuladas por triggers con un recálculo
+    STATS_REL_TOLERANCE = 1e-9
+    
+    def __init__(self, db_path: str = "data/ml/fvg_master.db",
+                 partitions_dir: Optional[str] = None,
+                 archive_dir: Optional[str] = None):
         """
         Inicializar gestor de base de datos FVG
         
         Args:
-            db_path: Ruta a la base de datos SQLite
+            db_path: Ruta a la base de datos SQLite (partición viva)
+            partitions_dir: Directorio de particiones mensuales en línea
+            archive_dir: Directorio de particiones archivadas (fuera de línea)
         """
         self.db_path = db_path
+        db_dir = os.path.dirname(self.db_path)
+        self.partitions_dir = partitions_dir or os.path.join(db_dir, "partitions")
+        self.archive_dir = archive_dir or os.path.join(db_dir, "archive")
         self.connection = None
         self.lock = threading.Lock()
+        self._partition_stats_cache = {}
         self._create_database_structure()
         
     def _create_database_structure(self):
@@ -47,150 +62,157 @@ class FVGDatabaseManager:
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
         with sqlite3.connect(self.db_path) as conn:
-            # Tabla principal FVG
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS fvg_master (
-                    fvg_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp_creation DATETIME,
-                    symbol TEXT,
-                    timeframe TEXT,
-                    
-                    -- Datos OHLC vela 1
-                    vela1_open REAL,
-                    vela1_high REAL,
-                    vela1_low REAL,
-                    vela1_close REAL,
-                    vela1_volume INTEGER,
-                    
-                    -- Datos OHLC vela 2  
-                    vela2_open REAL,
-                    vela2_high REAL,
-                    vela2_low REAL,
-                    vela2_close REAL,
-                    vela2_volume INTEGER,
-                    
-                    -- Datos OHLC vela 3
-                    vela3_open REAL,
-                    vela3_high REAL,
-                    vela3_low REAL,
-                    vela3_close REAL,
-                    vela3_volume INTEGER,
-                    
-                    -- Características FVG
-                    gap_high REAL,
-                    gap_low REAL,
-                    gap_size_pips REAL,
-                    gap_type TEXT CHECK(gap_type IN ('BULLISH', 'BEARISH')),
-                    
-                    -- Estado y resultados
-                    status TEXT CHECK(status IN ('PENDING', 'FILLED', 'PARTIALLY_FILLED', 'EXPIRED')) DEFAULT 'PENDING',
-                    fill_timestamp DATETIME,
-                    fill_percentage REAL DEFAULT 0.0,
-                    time_to_fill_hours REAL,
-                    
-                    -- ML
-                    quality_score REAL,
-                    ml_features_calculated BOOLEAN DEFAULT FALSE,
-                    
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabla características ML
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS fvg_features (
-                    fvg_id INTEGER PRIMARY KEY,
-                    
-                    -- Features técnicos básicos
-                    atr_20 REAL,
-                    rsi_14 REAL,
-                    bb_position REAL,
-                    volume_ratio REAL,
-                    
-                    -- Features de contexto
-                    trend_direction TEXT CHECK(trend_direction IN ('UP', 'DOWN', 'SIDEWAYS')),
-                    trend_strength REAL,
-                    market_session TEXT CHECK(market_session IN ('ASIA', 'LONDON', 'NY', 'OVERLAP')),
-                    
-                    -- Features de estructura
-                    near_support_resistance BOOLEAN,
-                    distance_to_sr REAL,
-                    confluence_count INTEGER,
-                    
-                    -- Features temporales
-                    hour_of_day INTEGER,
-                    day_of_week INTEGER,
-                    is_news_time BOOLEAN,
-                    
-                    -- Features de volatilidad
-                    volatility_percentile REAL,
-                    volume_percentile REAL,
-                    
-                    -- Features avanzados
-                    fractal_dimension REAL,
-                    hurst_exponent REAL,
-                    entropy_measure REAL,
-                    
-                    calculated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    
-                    FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
-                )
-            ''')
-            
-            # Tabla predicciones ML
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS fvg_predictions (
-                    prediction_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fvg_id INTEGER,
-                    model_name TEXT,
-                    model_version TEXT,
-                    
-                    -- Predicciones
-                    predicted_fill_probability REAL,
-                    predicted_time_to_fill REAL,
-                    predicted_quality_score REAL,
-                    confidence_level REAL,
-                    
-                    -- Validación
-                    actual_filled BOOLEAN,
-                    actual_time_to_fill REAL,
-                    prediction_accuracy REAL,
-                    
-                    timestamp_prediction DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    
-                    FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
-                )
-            ''')
-            
-            # Tabla estado tiempo real
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS fvg_live_status (
-                    fvg_id INTEGER PRIMARY KEY,
-                    
-                    -- Estado actual
-                    current_price REAL,
-                    distance_to_gap REAL,
-                    partial_fill_percentage REAL DEFAULT 0.0,
-                    
-                    -- Monitoreo
-                    last_update DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    alert_triggered BOOLEAN DEFAULT FALSE,
-                    signal_generated BOOLEAN DEFAULT FALSE,
-                    
-                    -- Trading
-                    position_opened BOOLEAN DEFAULT FALSE,
-                    position_id TEXT,
-                    entry_price REAL,
-                    current_pnl REAL,
-                    
-                    FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
-                )
-            ''')
-            
-            # Crear índices optimizados
-            self._create_indexes(conn)
-            
+            self._create_schema(conn)
+    
+    def _create_schema(self, conn):
+        """Crear tablas, índices y estadísticas (partición viva o mensual)"""
+        # Tabla principal FVG
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_master (
+                fvg_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp_creation DATETIME,
+                symbol TEXT,
+                timeframe TEXT,
+                
+                -- Datos OHLC vela 1
+                vela1_open REAL,
+                vela1_high REAL,
+                vela1_low REAL,
+                vela1_close REAL,
+                vela1_volume INTEGER,
+                
+                -- Datos OHLC vela 2  
+                vela2_open REAL,
+                vela2_high REAL,
+                vela2_low REAL,
+                vela2_close REAL,
+                vela2_volume INTEGER,
+                
+                -- Datos OHLC vela 3
+                vela3_open REAL,
+                vela3_high REAL,
+                vela3_low REAL,
+                vela3_close REAL,
+                vela3_volume INTEGER,
+                
+                -- Características FVG
+                gap_high REAL,
+                gap_low REAL,
+                gap_size_pips REAL,
+                gap_type TEXT CHECK(gap_type IN ('BULLISH', 'BEARISH')),
+                
+                -- Estado y resultados
+                status TEXT CHECK(status IN ('PENDING', 'FILLED', 'PARTIALLY_FILLED', 'EXPIRED')) DEFAULT 'PENDING',
+                fill_timestamp DATETIME,
+                fill_percentage REAL DEFAULT 0.0,
+                time_to_fill_hours REAL,
+                
+                -- ML
+                quality_score REAL,
+                ml_features_calculated BOOLEAN DEFAULT FALSE,
+                
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Tabla características ML
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_features (
+                fvg_id INTEGER PRIMARY KEY,
+                
+                -- Features técnicos básicos
+                atr_20 REAL,
+                rsi_14 REAL,
+                bb_position REAL,
+                volume_ratio REAL,
+                
+                -- Features de contexto
+                trend_direction TEXT CHECK(trend_direction IN ('UP', 'DOWN', 'SIDEWAYS')),
+                trend_strength REAL,
+                market_session TEXT CHECK(market_session IN ('ASIA', 'LONDON', 'NY', 'OVERLAP')),
+                
+                -- Features de estructura
+                near_support_resistance BOOLEAN,
+                distance_to_sr REAL,
+                confluence_count INTEGER,
+                
+                -- Features temporales
+                hour_of_day INTEGER,
+                day_of_week INTEGER,
+                is_news_time BOOLEAN,
+                
+                -- Features de volatilidad
+                volatility_percentile REAL,
+                volume_percentile REAL,
+                
+                -- Features avanzados
+                fractal_dimension REAL,
+                hurst_exponent REAL,
+                entropy_measure REAL,
+                
+                calculated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                
+                FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
+            )
+        ''')
+        
+        # Tabla predicciones ML
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_predictions (
+                prediction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fvg_id INTEGER,
+                model_name TEXT,
+                model_version TEXT,
+                
+                -- Predicciones
+                predicted_fill_probability REAL,
+                predicted_time_to_fill REAL,
+                predicted_quality_score REAL,
+                confidence_level REAL,
+                
+                -- Validación
+                actual_filled BOOLEAN,
+                actual_time_to_fill REAL,
+                prediction_accuracy REAL,
+                
+                timestamp_prediction DATETIME DEFAULT CURRENT_TIMESTAMP,
+                
+                FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
+            )
+        ''')
+        
+        # Tabla estado tiempo real
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_live_status (
+                fvg_id INTEGER PRIMARY KEY,
+                
+                -- Estado actual
+                current_price REAL,
+                distance_to_gap REAL,
+                partial_fill_percentage REAL DEFAULT 0.0,
+                
+                -- Monitoreo
+                last_update DATETIME DEFAULT CURRENT_TIMESTAMP,
+                alert_triggered BOOLEAN DEFAULT FALSE,
+                signal_generated BOOLEAN DEFAULT FALSE,
+                
+                -- Trading
+                position_opened BOOLEAN DEFAULT FALSE,
+                position_id TEXT,
+                entry_price REAL,
+                current_pnl REAL,
+                
+                FOREIGN KEY (fvg_id) REFERENCES fvg_master(fvg_id)
+            )
+        ''')
+        
+        # Crear índices optimizados
+        self._create_indexes(conn)
+        
+        # Capa de estadísticas materializadas
+        self._create_stats_layer(conn)
+        
     def _create_indexes(self, conn):
         """Crear índices optimizados para consultas ML"""
         indexes = [
@@ -206,6 +228,181 @@ class FVGDatabaseManager:
         for index_sql in indexes:
             conn.execute(index_sql)
     
+    # Bucket de histograma de calidad (ancho 0.1), compartido por triggers y recálculo
+    _QUALITY_BUCKET_SQL = (
+        "CASE WHEN {col} IS NULL THEN 'NULL' "
+        "ELSE printf('%.1f', CAST({col} * 10 AS INTEGER) / 10.0) END"
+    )
+    
+    # Dimensiones mantenidas en fvg_stats: (dimensión, expresión SQL sobre la fila)
+    _STATS_DIMENSIONS = [
+        ('total', "'all'"),
+        ('status', "COALESCE({row}.status, '')"),
+        ('symbol', "COALESCE({row}.symbol, '')"),
+        ('timeframe', "COALESCE({row}.timeframe, '')"),
+        ('quality', None),
+    ]
+    
+    def _stats_key_sql(self, dimension: str, row: str) -> str:
+        """Expresión SQL del bucket de una dimensión para la fila NEW/OLD"""
+        for name, expr in self._STATS_DIMENSIONS:
+            if name == dimension:
+                if expr is None:
+                    return self._QUALITY_BUCKET_SQL.format(col=f"{row}.quality_score")
+                return expr.format(row=row)
+        raise ValueError(f"Dimensión de estadísticas desconocida: {dimension}")
+    
+    def _create_stats_layer(self, conn):
+        """
+        Crear tablas de estadísticas materializadas y sus triggers
+        
+        Los contadores se mantienen dentro de la misma transacción de escritura
+        que modifica fvg_master/fvg_predictions, así get_database_stats lee
+        unas pocas filas en lugar de agregar la tabla completa.
+        """
+        stats_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fvg_stats'"
+        ).fetchone() is not None
+        
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_stats (
+                dimension TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, bucket)
+            )
+        ''')
+        
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fvg_model_stats (
+                model_name TEXT PRIMARY KEY,
+                accuracy_sum REAL NOT NULL DEFAULT 0.0,
+                accuracy_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        
+        def upsert(row: str, delta: int) -> str:
+            return "\n".join(
+                f"INSERT INTO fvg_stats (dimension, bucket, count) "
+                f"VALUES ('{name}', {self._stats_key_sql(name, row)}, {delta}) "
+                f"ON CONFLICT(dimension, bucket) DO UPDATE SET count = count + ({delta});"
+                for name, _ in self._STATS_DIMENSIONS
+            )
+        
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fvg_stats_insert
+            AFTER INSERT ON fvg_master
+            BEGIN
+                {upsert('NEW', 1)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fvg_stats_delete
+            AFTER DELETE ON fvg_master
+            BEGIN
+                {upsert('OLD', -1)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fvg_stats_update
+            AFTER UPDATE OF status, symbol, timeframe, quality_score ON fvg_master
+            BEGIN
+                {upsert('OLD', -1)}
+                {upsert('NEW', 1)}
+            END
+        ''')
+        
+        model_upsert = (
+            "INSERT INTO fvg_model_stats (model_name, accuracy_sum, accuracy_count) "
+            "VALUES ({row}.model_name, {sign} {row}.prediction_accuracy, {sign}1) "
+            "ON CONFLICT(model_name) DO UPDATE SET "
+            "accuracy_sum = accuracy_sum + ({sign} {row}.prediction_accuracy), "
+            "accuracy_count = accuracy_count + ({sign}1);"
+        )
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_model_stats_insert
+            AFTER INSERT ON fvg_predictions
+            WHEN NEW.prediction_accuracy IS NOT NULL AND NEW.model_name IS NOT NULL
+            BEGIN
+                {model_upsert.format(row='NEW', sign='+')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_model_stats_delete
+            AFTER DELETE ON fvg_predictions
+            WHEN OLD.prediction_accuracy IS NOT NULL AND OLD.model_name IS NOT NULL
+            BEGIN
+                {model_upsert.format(row='OLD', sign='-')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_model_stats_update_old
+            AFTER UPDATE OF model_name, prediction_accuracy ON fvg_predictions
+            WHEN OLD.prediction_accuracy IS NOT NULL AND OLD.model_name IS NOT NULL
+            BEGIN
+                {model_upsert.format(row='OLD', sign='-')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_model_stats_update_new
+            AFTER UPDATE OF model_name, prediction_accuracy ON fvg_predictions
+            WHEN NEW.prediction_accuracy IS NOT NULL AND NEW.model_name IS NOT NULL
+            BEGIN
+                {model_upsert.format(row='NEW', sign='+')}
+            END
+        ''')
+        
+        # Base de datos existente sin capa de estadísticas: poblarla una vez
+        if not stats_exists:
+            self._rebuild_stats(conn)
+    
+    def _compute_stats_from_source(self, conn) -> Tuple[Dict, Dict]:
+        """Agregar contadores directamente desde las tablas fuente (escaneo completo)"""
+        counters = {}
+        for name, _ in self._STATS_DIMENSIONS:
+            key_sql = self._stats_key_sql(name, 'fm')
+            cursor = conn.execute(
+                f"SELECT {key_sql} AS bucket, COUNT(*) FROM fvg_master fm GROUP BY bucket"
+            )
+            for bucket, count in cursor.fetchall():
+                counters[(name, bucket)] = count
+        
+        cursor = conn.execute('''
+            SELECT model_name, SUM(prediction_accuracy), COUNT(*)
+            FROM fvg_predictions
+            WHERE prediction_accuracy IS NOT NULL AND model_name IS NOT NULL
+            GROUP BY model_name
+        ''')
+        models = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        return counters, models
+    
+    def _read_stats_tables(self, conn) -> Tuple[Dict, Dict]:
+        """Leer contadores materializados"""
+        cursor = conn.execute('SELECT dimension, bucket, count FROM fvg_stats WHERE count != 0')
+        counters = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+        
+        cursor = conn.execute(
+            'SELECT model_name, accuracy_sum, accuracy_count FROM fvg_model_stats WHERE accuracy_count != 0'
+        )
+        models = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        return counters, models
+    
+    def _rebuild_stats(self, conn):
+        """Reescribir las tablas de estadísticas desde las tablas fuente"""
+        counters, models = self._compute_stats_from_source(conn)
+        conn.execute('DELETE FROM fvg_stats')
+        conn.execute('DELETE FROM fvg_model_stats')
+        conn.executemany(
+            'INSERT INTO fvg_stats (dimension, bucket, count) VALUES (?, ?, ?)',
+            [(dimension, bucket, count) for (dimension, bucket), count in counters.items()]
+        )
+        conn.executemany(
+            'INSERT INTO fvg_model_stats (model_name, accuracy_sum, accuracy_count) VALUES (?, ?, ?)',
+            [(model, acc_sum, acc_count) for model, (acc_sum, acc_count) in models.items()]
+        )
+    
     def insert_fvg(self, fvg_data: Dict) -> int:
         """
         Insertar un FVG en la base de datos
@@ -299,14 +496,20 @@ class FVGDatabaseManager:
     
     def get_ml_training_data(self, limit: Optional[int] = None, 
                            symbol: Optional[str] = None,
-                           timeframe: Optional[str] = None) -> pd.DataFrame:
+                           timeframe: Optional[str] = None,
+                           include_partitions: bool = True) -> pd.DataFrame:
         """
         Obtener datos preparados para entrenamiento ML
         
+        Consulta la partición viva y, de forma transparente, las particiones
+        mensuales en línea (de la más reciente a la más antigua, deteniéndose
+        cuando el límite ya está cubierto).
+        
         Args:
             limit: Límite de registros
             symbol: Filtrar por símbolo
             timeframe: Filtrar por timeframe
+            include_partitions: Incluir particiones mensuales en línea
             
         Returns:
             DataFrame con datos ML listos
@@ -341,7 +544,41 @@ class FVGDatabaseManager:
             params.append(limit)
         
         with sqlite3.connect(self.db_path) as conn:
-            return pd.read_sql_query(query, conn, params=params)
+            result = pd.read_sql_query(query, conn, params=params)
+        
+        if not include_partitions:
+            return result
+        
+        frames = [result]
+        collected = len(result)
+        for month_key in reversed(self.list_partitions()):
+            if limit and collected >= limit:
+                # Todo lo de este mes es más antiguo que el corte actual
+                oldest_kept = self._sort_training_frames(frames).iloc[limit - 1]['timestamp_creation']
+                if self._month_bounds(month_key)[1] <= str(oldest_kept):
+                    break
+            with sqlite3.connect(self._partition_path(month_key)) as conn:
+                frame = pd.read_sql_query(query, conn, params=params)
+            if not frame.empty:
+                frames.append(frame)
+                collected += len(frame)
+        
+        if len(frames) == 1:
+            return result
+        
+        result = self._sort_training_frames(frames)
+        if limit:
+            result = result.head(limit)
+        return result.reset_index(drop=True)
+    
+    @staticmethod
+    def _sort_training_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """Unir resultados de varias particiones ordenados por fecha descendente"""
+        combined = pd.concat([frame for frame in frames if not frame.empty] or frames[:1],
+                             ignore_index=True)
+        # Columnas duplicadas (fvg_id de fm.* y ff.*): ordenar por posición
+        order = combined.iloc[:, list(combined.columns).index('timestamp_creation')].astype(str)
+        return combined.iloc[order.argsort()[::-1].values].reset_index(drop=True)
     
     def update_fvg_status(self, fvg_id: int, status: str, 
                          fill_percentage: float = 0.0,
@@ -385,6 +622,9 @@ class FVGDatabaseManager:
         """
         Obtener FVGs pendientes de llenado
         
+        Solo consulta la partición viva: los FVGs pendientes nunca se mueven
+        a particiones mensuales.
+        
         Args:
             symbol: Filtrar por símbolo
             
@@ -412,91 +652,340 @@ class FVGDatabaseManager:
         """
         Obtener estadísticas de la base de datos
         
+        Lee las tablas materializadas fvg_stats/fvg_model_stats (mantenidas por
+        triggers), por lo que el costo no depende del tamaño de fvg_master.
+        Las particiones mensuales en línea se suman desde una caché por archivo.
+        
         Returns:
             Diccionario con estadísticas
         """
         with sqlite3.connect(self.db_path) as conn:
-            stats = {}
+            counters, models = self._read_stats_tables(conn)
+        
+        partitions = self.list_partitions()
+        for month_key in partitions:
+            part_counters, part_models = self._get_partition_stats(month_key)
+            for key, count in part_counters.items():
+                counters[key] = counters.get(key, 0) + count
+            for model, (acc_sum, acc_count) in part_models.items():
+                prev_sum, prev_count = models.get(model, (0.0, 0))
+                models[model] = (prev_sum + acc_sum, prev_count + acc_count)
+        
+        stats = {}
+        grouped = {}
+        for (dimension, bucket), count in counters.items():
+            grouped.setdefault(dimension, {})[bucket] = count
+        
+        # Estadísticas generales
+        by_status = grouped.get('status', {})
+        stats['total_fvgs'] = grouped.get('total', {}).get('all', 0)
+        stats['pending_fvgs'] = by_status.get('PENDING', 0)
+        stats['filled_fvgs'] = by_status.get('FILLED', 0)
+        stats['by_status'] = by_status
+        
+        # Estadísticas por símbolo / timeframe
+        stats['by_symbol'] = grouped.get('symbol', {})
+        stats['by_timeframe'] = grouped.get('timeframe', {})
+        
+        # Histograma de calidad (buckets de 0.1)
+        stats['quality_histogram'] = dict(sorted(grouped.get('quality', {}).items()))
+        
+        # Accuracy de modelos
+        stats['model_performance'] = {
+            model: {'accuracy': acc_sum / acc_count, 'predictions': acc_count}
+            for model, (acc_sum, acc_count) in models.items()
+        }
+        
+        # Tamaño de la base de datos
+        db_size = os.path.getsize(self.db_path) / (1024 * 1024)  # MB
+        stats['database_size_mb'] = round(db_size, 2)
+        stats['partitions'] = partitions
+        
+        return stats
+    
+    def recompute_database_stats(self, repair: bool = True) -> Dict:
+        """
+        Recalcular y verificar las estadísticas materializadas
+        
+        Comando de mantenimiento: agrega las tablas fuente con un escaneo completo,
+        lo compara con los contadores mantenidos y, si repair=True, los reescribe.
+        Se verifica la partición viva y cada partición mensual en línea.
+        
+        Args:
+            repair: Reescribir los contadores si hay diferencias
+            
+        Returns:
+            Diccionario con el resultado de la verificación
+        """
+        targets = [('live', self.db_path)]
+        targets += [(month_key, self._partition_path(month_key)) for month_key in self.list_partitions()]
+        
+        mismatches = []
+        repaired = False
+        with self.lock:
+            for partition, path in targets:
+                with sqlite3.connect(path) as conn:
+                    found = self._verify_stats(conn)
+                    if found and repair:
+                        self._rebuild_stats(conn)
+                        repaired = True
+                for mismatch in found:
+                    mismatch['partition'] = partition
+                mismatches.extend(found)
+            self._partition_stats_cache.clear()
+        
+        return {
+            'consistent': not mismatches,
+            'mismatches': mismatches,
+            'repaired': repaired,
+            'checked_at': datetime.now().isoformat()
+        }
+    
+    def _verify_stats(self, conn) -> List[Dict]:
+        """Comparar contadores materializados con un recálculo completo"""
+        expected_counters, expected_models = self._compute_stats_from_source(conn)
+        stored_counters, stored_models = self._read_stats_tables(conn)
+        
+        mismatches = []
+        for key in sorted(set(expected_counters) | set(stored_counters)):
+            expected = expected_counters.get(key, 0)
+            stored = stored_counters.get(key, 0)
+            if expected != stored:
+                mismatches.append({
+                    'dimension': key[0], 'bucket': key[1],
+                    'expected': expected, 'stored': stored
+                })
+        
+        for model in sorted(set(expected_models) | set(stored_models)):
+            expected_sum, expected_count = expected_models.get(model, (0.0, 0))
+            stored_sum, stored_count = stored_models.get(model, (0.0, 0))
+            sums_match = math.isclose(expected_sum, stored_sum, rel_tol=self.STATS_REL_TOLERANCE)
+            if expected_count != stored_count or not sums_match:
+                mismatches.append({
+                    'dimension': 'model', 'bucket': model,
+                    'expected': expected_count, 'stored': stored_count
+                })
+        
+        return mismatches
+    
+    # ------------------------------------------------------------------
+    # Particiones mensuales
+    # ------------------------------------------------------------------
+    
+    def _partition_path(self, month_key: str, archived: bool = False) -> str:
+        """Ruta del archivo de una partición mensual (month_key = 'YYYY_MM')"""
+        directory = self.archive_dir if archived else self.partitions_dir
+        return os.path.join(directory, f"fvg_{month_key}.db")
+    
+    @staticmethod
+    def _month_bounds(month_key: str) -> Tuple[str, str]:
+        """Límites [inicio, fin) de un mes como texto comparable con timestamp_creation"""
+        year, month = (int(part) for part in month_key.split('_'))
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+    
+    def list_partitions(self, archived: bool = False) -> List[str]:
+        """
+        Listar particiones mensuales
+        
+        Args:
+            archived: Listar las archivadas en lugar de las en línea
             
-            # Estadísticas generales
-            stats['total_fvgs'] = conn.execute('SELECT COUNT(*) FROM fvg_master').fetchone()[0]
-            stats['pending_fvgs'] = conn.execute("SELECT COUNT(*) FROM fvg_master WHERE status = 'PENDING'").fetchone()[0]
-            stats['filled_fvgs'] = conn.execute("SELECT COUNT(*) FROM fvg_master WHERE status = 'FILLED'").fetchone()[0]
+        Returns:
+            Lista ordenada de claves 'YYYY_MM'
+        """
+        directory = Path(self.archive_dir if archived else self.partitions_dir)
+        if not directory.exists():
+            return []
+        return sorted(path.stem[len('fvg_'):] for path in directory.glob('fvg_*.db'))
+    
+    def _get_partition_stats(self, month_key: str) -> Tuple[Dict, Dict]:
+        """Estadísticas de una partición, cacheadas mientras el archivo no cambie"""
+        path = self._partition_path(month_key)
+        mtime = os.path.getmtime(path)
+        cached = self._partition_stats_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+        
+        with sqlite3.connect(path) as conn:
+            counters, models = self._read_stats_tables(conn)
+        self._partition_stats_cache[path] = (mtime, counters, models)
+        return counters, models
+    
+    def roll_resolved_fvgs(self, before: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Mover FVGs resueltos a sus particiones mensuales
+        
+        Los FVGs en estado final (FILLED/EXPIRED) creados antes de `before`
+        salen de la partición viva junto con sus features y predicciones,
+        un mes por transacción.
+        
+        Args:
+            before: Fecha de corte (por defecto, inicio del mes actual)
             
-            # Estadísticas por símbolo
-            cursor = conn.execute('SELECT symbol, COUNT(*) as count FROM fvg_master GROUP BY symbol')
-            stats['by_symbol'] = {row[0]: row[1] for row in cursor.fetchall()}
+        Returns:
+            Diccionario {'YYYY_MM': FVGs movidos}
+        """
+        if before is None:
+            before = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        cutoff = before.strftime('%Y-%m-%d %H:%M:%S')
+        statuses = ', '.join(f"'{status}'" for status in self.RESOLVED_STATUSES)
+        
+        moved = {}
+        with self.lock:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(f'''
+                    SELECT DISTINCT strftime('%Y_%m', timestamp_creation)
+                    FROM fvg_master
+                    WHERE status IN ({statuses}) AND timestamp_creation < ?
+                ''', (cutoff,))
+                months = sorted(row[0] for row in cursor.fetchall() if row[0])
             
-            # Estadísticas por timeframe
-            cursor = conn.execute('SELECT timeframe, COUNT(*) as count FROM fvg_master GROUP BY timeframe')
-            stats['by_timeframe'] = {row[0]: row[1] for row in cursor.fetchall()}
+            if not months:
+                return moved
+            os.makedirs(self.partitions_dir, exist_ok=True)
             
-            # Accuracy de modelos
-            cursor = conn.execute('''
-                SELECT model_name, AVG(prediction_accuracy) as avg_accuracy, COUNT(*) as predictions
-                FROM fvg_predictions 
-                WHERE prediction_accuracy IS NOT NULL
-                GROUP BY model_name
-            ''')
-            stats['model_performance'] = {row[0]: {'accuracy': row[1], 'predictions': row[2]} for row in cursor.fetchall()}
+            for month_key in months:
+                month_start, month_end = self._month_bounds(month_key)
+                condition = (f"status IN ({statuses}) AND timestamp_creation >= ? "
+                             f"AND timestamp_creation < ? AND timestamp_creation < ?")
+                params = (month_start, month_end, cutoff)
+                selected_ids = f"SELECT fvg_id FROM main.fvg_master WHERE {condition}"
+                
+                path = self._partition_path(month_key)
+                with sqlite3.connect(path) as part_conn:
+                    self._create_schema(part_conn)
+                
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    conn.execute('ATTACH DATABASE ? AS part', (path,))
+                    with conn:
+                        conn.execute(f'INSERT INTO part.fvg_master SELECT * FROM main.fvg_master WHERE {condition}', params)
+                        conn.execute(f'INSERT OR REPLACE INTO part.fvg_features SELECT * FROM main.fvg_features '
+                                     f'WHERE fvg_id IN ({selected_ids})', params)
+                        conn.execute(f'INSERT INTO part.fvg_predictions SELECT * FROM main.fvg_predictions '
+                                     f'WHERE fvg_id IN ({selected_ids})', params)
+                        for table in ('fvg_live_status', 'fvg_features', 'fvg_predictions'):
+                            conn.execute(f'DELETE FROM main.{table} WHERE fvg_id IN ({selected_ids})', params)
+                        moved[month_key] = conn.execute(
+                            f'DELETE FROM main.fvg_master WHERE {condition}', params
+                        ).rowcount
+                    conn.execute('DETACH DATABASE part')
+                finally:
+                    conn.close()
+        
+        return moved
+    
+    def archive_partition(self, month_key: str) -> str:
+        """
+        Archivar una partición mensual (sale de consultas y estadísticas)
+        
+        Es un simple movimiento de archivo: no toca la partición viva.
+        
+        Args:
+            month_key: Mes 'YYYY_MM'
             
-            # Tamaño de la base de datos
-            db_size = os.path.getsize(self.db_path) / (1024 * 1024)  # MB
-            stats['database_size_mb'] = round(db_size, 2)
+        Returns:
+            Ruta del archivo archivado
+        """
+        source = self._partition_path(month_key)
+        target = self._partition_path(month_key, archived=True)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with self.lock:
+            self._move_partition_file(source, target)
+            self._partition_stats_cache.pop(source, None)
+        return target
+    
+    def restore_partition(self, month_key: str) -> str:
+        """
+        Devolver una partición archivada a línea
+        
+        Args:
+            month_key: Mes 'YYYY_MM'
             
-            return stats
+        Returns:
+            Ruta del archivo restaurado
+        """
+        source = self._partition_path(month_key, archived=True)
+        target = self._partition_path(month_key)
+        os.makedirs(self.partitions_dir, exist_ok=True)
+        with self.lock:
+            self._move_partition_file(source, target)
+            self._partition_stats_cache.pop(target, None)
+        return target
+    
+    def _move_partition_file(self, source: str, target: str):
+        """Mover un archivo de partición; si el destino ya existe, fusionar filas"""
+        if not os.path.exists(target):
+            os.replace(source, target)
+            return
+        
+        conn = sqlite3.connect(target)
+        try:
+            conn.execute('ATTACH DATABASE ? AS src', (source,))
+            with conn:
+                conn.execute('INSERT INTO main.fvg_master SELECT * FROM src.fvg_master')
+                conn.execute('INSERT OR REPLACE INTO main.fvg_features SELECT * FROM src.fvg_features')
+                conn.execute('INSERT INTO main.fvg_predictions SELECT * FROM src.fvg_predictions')
+            conn.execute('DETACH DATABASE src')
+        finally:
+            conn.close()
+        os.remove(source)
     
     def cleanup_old_data(self, days_old: int = 90):
         """
         Limpiar datos antiguos para optimizar performance
         
+        Los FVGs resueltos se mueven a particiones mensuales y las particiones
+        completamente anteriores al corte se archivan (movimiento de archivo).
+        Solo los FVGs aún pendientes más antiguos que el corte se eliminan
+        de la partición viva.
+        
         Args:
-            days_old: Días de antigüedad para eliminar
+            days_old: Días de antigüedad para archivar/eliminar
+            
+        Returns:
+            Número de FVGs retirados de las consultas en línea
         """
         cutoff_date = datetime.now() - timedelta(days=days_old)
         
+        self.roll_resolved_fvgs()
+        
+        removed_count = 0
+        cutoff_text = cutoff_date.strftime('%Y-%m-%d')
+        for month_key in self.list_partitions():
+            if self._month_bounds(month_key)[1] <= cutoff_text:
+                counters, _ = self._get_partition_stats(month_key)
+                removed_count += counters.get(('total', 'all'), 0)
+                self.archive_partition(month_key)
+        
         with self.lock:
             with sqlite3.connect(self.db_path) as conn:
-                # Eliminar FVGs antiguos y sus datos relacionados
-                conn.execute('''
-                    DELETE FROM fvg_live_status 
-                    WHERE fvg_id IN (
-                        SELECT fvg_id FROM fvg_master 
-                        WHERE timestamp_creation < ?
-                    )
-                ''', (cutoff_date,))
-                
-                conn.execute('''
-                    DELETE FROM fvg_predictions 
-                    WHERE fvg_id IN (
-                        SELECT fvg_id FROM fvg_master 
-                        WHERE timestamp_creation < ?
-                    )
-                ''', (cutoff_date,))
-                
-                conn.execute('''
-                    DELETE FROM fvg_features 
-                    WHERE fvg_id IN (
-                        SELECT fvg_id FROM fvg_master 
-                        WHERE timestamp_creation < ?
-                    )
-                ''', (cutoff_date,))
+                # FVGs pendientes obsoletos: eliminar junto a sus datos relacionados.
+                # Los resueltos que aún no se movieron a su partición se conservan
+                statuses = ', '.join(f"'{status}'" for status in self.RESOLVED_STATUSES)
+                stale = f"timestamp_creation < ? AND status NOT IN ({statuses})"
+                stale_ids = f"SELECT fvg_id FROM fvg_master WHERE {stale}"
+                for table in ('fvg_live_status', 'fvg_predictions', 'fvg_features'):
+                    conn.execute(f'DELETE FROM {table} WHERE fvg_id IN ({stale_ids})', (cutoff_date,))
                 
-                deleted_count = conn.execute('''
-                    DELETE FROM fvg_master WHERE timestamp_creation < ?
-                ''', (cutoff_date,)).rowcount
-                
-                # Vacuum para recuperar espacio
-                conn.execute('VACUUM')
-                
-                return deleted_count
+                removed_count += conn.execute(
+                    f'DELETE FROM fvg_master WHERE {stale}', (cutoff_date,)
+                ).rowcount
+        
+        return removed_count
     
-    def backup_database(self, backup_path: Optional[str] = None):
+    def backup_database(self, backup_path: Optional[str] = None,
+                        include_partitions: bool = True):
         """
         Crear backup de la base de datos
         
+        La partición viva se copia completa; de las particiones mensuales solo
+        se copian las que no están respaldadas o cambiaron desde el último backup.
+        
         Args:
             backup_path: Ruta del backup (opcional)
+            include_partitions: Respaldar también las particiones mensuales
         """
         if not backup_path:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -509,6 +998,17 @@ class FVGDatabaseManager:
             with sqlite3.connect(backup_path) as backup:
                 source.backup(backup)
         
+        if include_partitions:
+            partitions_backup_dir = os.path.join(os.path.dirname(backup_path), "partitions")
+            for month_key in self.list_partitions():
+                target = os.path.join(partitions_backup_dir, f"fvg_{month_key}.db")
+                source_path = self._partition_path(month_key)
+                if not os.path.exists(target) or os.path.getmtime(source_path) > os.path.getmtime(target):
+                    os.makedirs(partitions_backup_dir, exist_ok=True)
+                    with sqlite3.connect(source_path) as source:
+                        with sqlite3.connect(target) as backup:
+                            source.backup(backup)
+        
         return backup_path
     
     def __del__(self):
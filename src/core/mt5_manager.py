@@ -15,6 +15,13 @@ from typing import Dict, List, Optional, Union, Any
 from datetime import datetime
 import time
 
+try:
+    from src.core.exposure_engine import get_exposure_engine
+    from src.core.symbol_specs import get_symbol_spec_cache, SymbolSpec
+except ImportError:
+    from exposure_engine import get_exposure_engine
+    from symbol_specs import get_symbol_spec_cache, SymbolSpec
+
 
 class MT5Manager:
     """
@@ -50,6 +57,12 @@ class MT5Manager:
         self._symbol_info_cache = {}
         self._cache_timeout = 60  # segundos
         
+        # Vista de exposición compartida con el resto de componentes
+        self.exposure = get_exposure_engine(margin_fn=self._calc_position_margin)
+        
+        # Especificaciones de símbolos compartidas (dígitos, lotaje, pip)
+        self.symbol_specs = get_symbol_spec_cache()
+        
         self.logger.log_info("MT5Manager inicializado")
     
     # =================================================================
@@ -85,6 +98,10 @@ class MT5Manager:
             self._is_connected = True
             self._last_connection_check = time.time()
             
+            # Recargar specs cargadas sin terminal y activar refresco programado
+            self.symbol_specs.refresh(force=True)
+            self.symbol_specs.start_auto_refresh()
+            
             self.logger.log_success("Conexión a MT5 establecida exitosamente")
             return True
             
@@ -487,60 +504,24 @@ class MT5Manager:
         """
         Calcula exposición total
         
+        Lee del ExposureEngine compartido; el terminal solo se consulta
+        si la vista está vacía o caducada.
+        
         Args:
             symbol: Símbolo específico (opcional)
             
         Returns:
             dict: Información de exposición
         """
-        positions = self.get_positions(symbol)
-        
-        exposure = {
-            "total_volume": 0.0,
-            "buy_volume": 0.0,
-            "sell_volume": 0.0,
-            "net_volume": 0.0,
-            "positions_count": len(positions),
-            "symbols": {}
-        }
-        
-        for pos in positions:
-            pos_symbol = pos.get("symbol")
-            volume = pos.get("volume", 0)
-            pos_type = pos.get("type")
-            
-            # Totales generales
-            exposure["total_volume"] += volume
-            
-            if pos_type == mt5.POSITION_TYPE_BUY:
-                exposure["buy_volume"] += volume
-                exposure["net_volume"] += volume
-            else:
-                exposure["sell_volume"] += volume
-                exposure["net_volume"] -= volume
-            
-            # Por símbolo
-            if pos_symbol not in exposure["symbols"]:
-                exposure["symbols"][pos_symbol] = {
-                    "total_volume": 0.0,
-                    "buy_volume": 0.0,
-                    "sell_volume": 0.0,
-                    "net_volume": 0.0,
-                    "positions_count": 0
-                }
-            
-            symbol_data = exposure["symbols"][pos_symbol]
-            symbol_data["total_volume"] += volume
-            symbol_data["positions_count"] += 1
-            
-            if pos_type == mt5.POSITION_TYPE_BUY:
-                symbol_data["buy_volume"] += volume
-                symbol_data["net_volume"] += volume
-            else:
-                symbol_data["sell_volume"] += volume
-                symbol_data["net_volume"] -= volume
-        
-        return exposure
+        if self.is_connected():
+            self.exposure.ensure_fresh(self.get_positions, mt5.account_info)
+        return self.exposure.get_total_exposure(symbol)
+    
+    def _calc_position_margin(self, symbol: str, position_type: int,
+                              volume: float, price: float) -> Optional[float]:
+        """Margen requerido por una posición (usado por ExposureEngine)"""
+        order_type = mt5.ORDER_TYPE_BUY if position_type == mt5.POSITION_TYPE_BUY else mt5.ORDER_TYPE_SELL
+        return mt5.order_calc_margin(order_type, symbol, volume, price)
     
     # =================================================================
     # INFORMACIÓN DE MERCADO
@@ -608,8 +589,9 @@ class MT5Manager:
             
             info_dict = symbol_info._asdict()
             
-            # Actualizar cache
+            # Actualizar cache (y specs compartidas de paso)
             self._symbol_info_cache[symbol] = (info_dict, current_time)
+            self.symbol_specs.update_from_info(info_dict)
             
             return info_dict
             
@@ -619,6 +601,18 @@ class MT5Manager:
                                {"symbol": symbol, "exception": str(e)})
             return None
     
+    def get_symbol_spec(self, symbol: str) -> SymbolSpec:
+        """
+        Obtiene la especificación precalculada de un símbolo
+        
+        Args:
+            symbol: Símbolo del instrumento
+            
+        Returns:
+            SymbolSpec: Reglas de redondeo de precio, lotaje y valor de pip
+        """
+        return self.symbol_specs.get(symbol)
+    
     def get_market_status(self, symbol: str) -> bool:
         """
         Verifica si el mercado está abierto para un símbolo
@@ -8,6 +8,7 @@ Integra streaming MT5, monitoreo de posiciones, alertas y análisis de rendimien
 Estructura:
 - mt5_streamer.py: Stream de datos MT5 en tiempo real
 - position_monitor.py: Monitoreo de posiciones y órdenes (próximamente)
+- position_table.py: Tabla compacta de posiciones con diff vectorizado
 - alert_engine.py: Sistema de alertas automático (próximamente)
 - performance_tracker.py: Seguimiento de métricas de rendimiento (próximamente)
 
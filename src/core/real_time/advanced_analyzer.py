@@ -9,6 +9,7 @@ FECHA: 2025-08-11
 """
 
 import logging
+import math
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -41,6 +42,9 @@ from src.core.config_manager import ConfigManager
 from src.core.logger_manager import LoggerManager
 from src.core.error_manager import ErrorManager
 from src.core.data_manager import DataManager
+from src.core.correlation_service import DEFAULT_SYMBOLS, get_correlation_service
+from src.core.seasonal_stats import DEFAULT_STATS_PATH, get_seasonal_stats
+from src.core.tick_microstructure import get_tick_microstructure
 
 
 @dataclass
@@ -56,6 +60,7 @@ class CorrelationAnalysis:
 @dataclass
 class VolatilityCluster:
     """Estructura para clusters de volatilidad"""
+    symbol: str = ""
     cluster_type: str = ""  # high/low/normal
     start_time: datetime = field(default_factory=datetime.now)
     end_time: Optional[datetime] = None
@@ -76,6 +81,10 @@ class SeasonalPattern:
     pattern_data: Dict[str, float] = field(default_factory=dict)
 
 
+# Eje del almacén estacional de cada tipo de patrón
+SEASONAL_PATTERN_AXES = {"hourly": "hour", "daily": "weekday", "session": "session"}
+
+
 @dataclass
 class MLPrediction:
     """Estructura para predicciones ML"""
@@ -91,12 +100,15 @@ class MLPrediction:
 @dataclass
 class MarketMicrostructure:
     """Estructura para análisis de microestructura"""
+    symbol: str = ""
     bid_ask_spread: float = 0.0
     spread_percentile: float = 0.0
     liquidity_score: float = 0.0
     orderflow_imbalance: float = 0.0
     price_impact: float = 0.0
     market_depth: Dict[str, float] = field(default_factory=dict)
+    tick_rate: float = 0.0
+    realized_volatility: float = 0.0
     timestamp: datetime = field(default_factory=datetime.now)
 
 
@@ -150,6 +162,32 @@ class AdvancedAnalyzer:
         # Configuración del analyzer
         self.analyzer_config = self._initialize_analyzer_config()
         
+        # Núcleo numérico compartido de correlaciones y volatilidad (también lo lee el riesgo)
+        self.correlation_service = get_correlation_service(
+            symbols=self.analyzer_config.get("correlation_symbols", DEFAULT_SYMBOLS),
+            timeframe=self.analyzer_config.get("correlation_timeframe", "H1"),
+            window=self.analyzer_config["correlation_window_size"],
+            min_periods=self.analyzer_config["correlation_min_periods"],
+            vol_window=self.analyzer_config["volatility_window_size"],
+            cluster_threshold=self.analyzer_config.get("volatility_cluster_threshold", 2.0),
+            history_size=self.analyzer_config.get("volatility_history_size", 500)
+        )
+        self._last_correlation_bar: Optional[int] = None
+        
+        # Estadísticas estacionales compartidas (calidad FVG, predictor, sesiones)
+        self.seasonal_stats = get_seasonal_stats(
+            path=self.analyzer_config.get("seasonal_stats_path", DEFAULT_STATS_PATH)
+        )
+        
+        # Microestructura real: ring buffers por símbolo alimentados por el streamer
+        self.microstructure = get_tick_microstructure(
+            capacity=self.analyzer_config.get("microstructure_tick_capacity", 1000),
+            rate_window=self.analyzer_config.get("microstructure_rate_window", 60.0)
+        )
+        if self.mt5_streamer is not None:
+            self.mt5_streamer.subscribe(self.microstructure.on_market_data)
+        self._last_volatility_bar: Optional[int] = None
+        
         # Estructuras de datos
         self.correlation_history: List[CorrelationAnalysis] = []
         self.volatility_clusters: List[VolatilityCluster] = []
@@ -203,16 +241,21 @@ class AdvancedAnalyzer:
                 "correlation_min_periods": 50,
                 "correlation_significance_level": 0.05,
                 "correlation_update_interval": 15,  # minutos
+                "correlation_symbols": list(DEFAULT_SYMBOLS),
+                "correlation_timeframe": "H1",
                 
                 # Configuración de volatilidad
                 "volatility_window_size": 50,
                 "volatility_cluster_threshold": 2.0,  # desviaciones estándar
                 "volatility_min_cluster_duration": 30,  # minutos
+                "volatility_history_size": 500,  # velas de retornos para clusters
                 
                 # Configuración de patrones estacionales
                 "seasonal_min_sample_size": 200,
                 "seasonal_significance_threshold": 0.01,
-                "seasonal_patterns_enabled": ["hourly", "daily", "weekly"],
+                "seasonal_patterns_enabled": ["hourly", "daily", "session"],
+                "seasonal_history_bars": 2000,  # velas de la carga inicial por símbolo
+                "seasonal_stats_path": str(DEFAULT_STATS_PATH),
                 
                 # Configuración ML
                 "ml_enabled": ADVANCED_ANALYTICS_AVAILABLE,
@@ -225,6 +268,8 @@ class AdvancedAnalyzer:
                 "microstructure_enabled": True,
                 "spread_analysis_interval": 1,  # minutos
                 "liquidity_window_size": 20,
+                "microstructure_tick_capacity": 1000,  # ticks de la ventana por símbolo
+                "microstructure_rate_window": 60.0,  # segundos de la tasa de ticks
                 
                 # Configuración de anomalías
                 "anomaly_detection_enabled": True,
@@ -422,9 +467,7 @@ class AdvancedAnalyzer:
     async def _async_correlation_analysis(self) -> None:
         """Análisis de correlaciones asíncrono"""
         try:
-            await asyncio.sleep(0.1)  # Simular trabajo asíncrono
-            self.logger.log_info("Análisis de correlaciones asíncrono completado")
-            self.analyzer_metrics["correlation_calculations"] += 1
+            await asyncio.get_running_loop().run_in_executor(None, self._update_correlation_analysis)
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de correlaciones asíncrono: {e}")
@@ -432,8 +475,7 @@ class AdvancedAnalyzer:
     async def _async_volatility_analysis(self) -> None:
         """Análisis de volatilidad asíncrono"""
         try:
-            await asyncio.sleep(0.1)  # Simular trabajo asíncrono
-            self.logger.log_info("Análisis de volatilidad asíncrono completado")
+            await asyncio.get_running_loop().run_in_executor(None, self._update_volatility_analysis)
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de volatilidad asíncrono: {e}")
@@ -454,8 +496,7 @@ class AdvancedAnalyzer:
     async def _async_microstructure_analysis(self) -> None:
         """Análisis de microestructura asíncrono"""
         try:
-            await asyncio.sleep(0.05)  # Simular trabajo asíncrono rápido
-            self.logger.log_info("Análisis de microestructura asíncrono completado")
+            await asyncio.get_running_loop().run_in_executor(None, self._update_microstructure_analysis)
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de microestructura asíncrono: {e}")
@@ -476,6 +517,9 @@ class AdvancedAnalyzer:
             if self._analysis_thread and self._analysis_thread.is_alive():
                 self._analysis_thread.join(timeout=5.0)
             
+            # Persistir también los FVGs/llenados registrados desde la última vela
+            self.seasonal_stats.flush()
+            
             self.status = "stopped"
             self.logger.log_info("Servicio de análisis detenido")
             return True
@@ -543,30 +587,139 @@ class AdvancedAnalyzer:
     def _update_correlation_analysis(self) -> None:
         """Actualizar análisis de correlaciones"""
         try:
-            # Placeholder - implementaremos en siguiente fase
-            self.logger.log_info("Análisis de correlaciones - placeholder")
+            service = self.correlation_service
+            service.refresh(self._load_bars)
+            if service.last_bar_time is None or service.last_bar_time == self._last_correlation_bar:
+                return  # Sin velas nuevas: el análisis cacheado sigue vigente
+            
+            matrix = service.correlation_matrix()
+            if np.isnan(matrix).all():
+                self.logger.log_info("Correlaciones: velas insuficientes en la ventana")
+                return
+            
+            analysis = self._build_correlation_analysis(matrix)
+            self._correlation_cache[service.timeframe] = analysis
+            self.correlation_history.append(analysis)
+            del self.correlation_history[:-self.analyzer_config["max_history_size"]]
+            self._last_correlation_bar = service.last_bar_time
+            self.analyzer_metrics["correlation_calculations"] += 1
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de correlaciones: {e}")
     
+    def _build_correlation_analysis(self, matrix: np.ndarray) -> CorrelationAnalysis:
+        """Clasificar todos los pares de la matriz en una pasada"""
+        symbols = self.correlation_service.symbols
+        rows, cols = np.triu_indices(len(symbols), k=1)
+        values = matrix[rows, cols]
+        valid = np.isfinite(values)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+        
+        strength = np.select([np.abs(values) >= 0.7, np.abs(values) >= 0.3], ["strong", "moderate"], "weak")
+        direction = np.where(values >= 0, "positive", "negative")
+        pairs = [f"{symbols[i]}/{symbols[j]}" for i, j in zip(rows.tolist(), cols.tolist())]
+        
+        return CorrelationAnalysis(
+            correlation_matrix=pd.DataFrame(matrix, index=symbols, columns=symbols).to_dict(),
+            correlation_strength=dict(zip(pairs, strength.tolist())),
+            correlation_direction=dict(zip(pairs, direction.tolist())),
+            timeframe=self.correlation_service.timeframe
+        )
+    
     def _update_volatility_analysis(self) -> None:
         """Actualizar análisis de volatilidad"""
         try:
-            # Placeholder - implementaremos en siguiente fase
-            self.logger.log_info("Análisis de volatilidad - placeholder")
+            service = self.correlation_service
+            if service.last_bar_time is None:
+                service.refresh(self._load_bars)
+            if service.last_bar_time is None or service.last_bar_time == self._last_volatility_bar:
+                return
+            
+            self.volatility_clusters = [
+                VolatilityCluster(
+                    symbol=symbol,
+                    cluster_type=cluster["type"],
+                    start_time=pd.Timestamp(cluster["start_time"], unit="s").to_pydatetime(),
+                    end_time=None if cluster["ongoing"] else pd.Timestamp(cluster["end_time"], unit="s").to_pydatetime(),
+                    duration_minutes=(cluster["end_time"] - cluster["start_time"]) / 60,
+                    average_volatility=cluster["average_volatility"],
+                    peak_volatility=cluster["peak_volatility"],
+                    cluster_strength=cluster["strength"]
+                )
+                for symbol, clusters in service.volatility_clusters().items()
+                for cluster in clusters
+            ][-self.analyzer_config["max_history_size"]:]
+            
+            # Últimas volatilidades de la ventana por símbolo
+            keep = self.analyzer_config["volatility_window_size"]
+            for symbol, volatility in service.current_volatility().items():
+                history = self._volatility_cache.setdefault(symbol, [])
+                history.append(volatility)
+                del history[:-keep]
+            self._last_volatility_bar = service.last_bar_time
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de volatilidad: {e}")
     
+    def _load_bars(self, symbol: str, count: int) -> pd.DataFrame:
+        """Velas de un símbolo para el servicio de correlaciones"""
+        return self.data.get_ohlc_data(symbol, self.correlation_service.timeframe, count, use_cache=False)
+    
+    def get_correlation_analysis(self) -> Optional[CorrelationAnalysis]:
+        """Último análisis de correlaciones (cacheado hasta la siguiente vela)"""
+        return self._correlation_cache.get(self.correlation_service.timeframe)
+    
     def _update_seasonal_patterns(self) -> None:
         """Actualizar análisis de patrones estacionales"""
         try:
-            # Placeholder - implementaremos en siguiente fase
-            self.logger.log_info("Análisis de patrones estacionales - placeholder")
+            store = self.seasonal_stats
+            new_bars = 0
+            for symbol in self.correlation_service.symbols:
+                count = 3 if store.last_bar_time(symbol) is not None else self.analyzer_config.get("seasonal_history_bars", 2000)
+                bars = self._load_bars(symbol, count + 1)
+                if bars is not None and len(bars) > 1:
+                    new_bars += store.update_bars(symbol, bars.iloc[:-1])  # La última vela está en formación
+            if new_bars == 0:
+                return  # Sin velas nuevas: los patrones siguen vigentes
+            
+            store.flush()
+            
+            min_samples = self.analyzer_config.get("seasonal_min_sample_size", 200)
+            for pattern_type in self.analyzer_config.get("seasonal_patterns_enabled", []):
+                axis = SEASONAL_PATTERN_AXES.get(pattern_type)
+                if axis is None:
+                    continue
+                for symbol in store.symbols():
+                    if store.sample_size(symbol) < min_samples:
+                        continue
+                    pattern = self._build_seasonal_pattern(pattern_type, store.profile(symbol, axis))
+                    self.seasonal_patterns[f"{symbol}_{pattern_type}"] = pattern
+                    self._pattern_cache[f"{symbol}_{pattern_type}"] = pattern
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de patrones estacionales: {e}")
     
+    def _build_seasonal_pattern(self, pattern_type: str, profile: pd.DataFrame) -> SeasonalPattern:
+        """Patrón a partir del perfil de retornos: el bin con mayor |t| marca la fuerza"""
+        t_stats = profile["t_stat"].abs()
+        if t_stats.notna().sum() == 0:
+            return SeasonalPattern(pattern_type=pattern_type, pattern_direction="neutral")
+        
+        strongest = t_stats.idxmax()
+        t_value = float(t_stats[strongest])
+        p_value = math.erfc(t_value / math.sqrt(2))  # Bilateral, aproximación normal
+        significant = p_value <= self.analyzer_config.get("seasonal_significance_threshold", 0.01)
+        mean_return = float(profile.at[strongest, "mean_return"])
+        
+        return SeasonalPattern(
+            pattern_type=pattern_type,
+            pattern_strength=t_value,
+            pattern_direction=("bullish" if mean_return > 0 else "bearish") if significant else "neutral",
+            confidence_level=1.0 - p_value,
+            statistical_significance=p_value,
+            pattern_data={str(label): float(value) for label, value in profile["mean_return"].dropna().items()}
+        )
+    
     def _update_ml_predictions(self) -> None:
         """Actualizar predicciones ML"""
         try:
@@ -582,8 +735,23 @@ class AdvancedAnalyzer:
     def _update_microstructure_analysis(self) -> None:
         """Actualizar análisis de microestructura"""
         try:
-            # Placeholder - implementaremos en siguiente fase
-            self.logger.log_info("Análisis de microestructura - placeholder")
+            for symbol, snapshot in self.microstructure.snapshots().items():
+                median_spread = snapshot["spread_p50"]
+                self.microstructure_data.append(MarketMicrostructure(
+                    symbol=symbol,
+                    bid_ask_spread=snapshot["spread"],
+                    spread_percentile=snapshot["spread_rank"],
+                    # 1 con el spread en su mediana o por debajo; cae al ensancharse
+                    liquidity_score=min(median_spread / snapshot["spread"], 1.0) if snapshot["spread"] > 0 else 1.0,
+                    orderflow_imbalance=snapshot["imbalance"],
+                    price_impact=snapshot["price_impact"],
+                    market_depth={"spread_p50": median_spread, "spread_p90": snapshot["spread_p90"],
+                                  "spread_p95": snapshot["spread_p95"], "volume": snapshot["volume"]},
+                    tick_rate=snapshot["tick_rate"],
+                    realized_volatility=snapshot["realized_volatility"],
+                    timestamp=datetime.fromtimestamp(snapshot["last_time"])
+                ))
+            del self.microstructure_data[:-self.analyzer_config["max_history_size"]]
             
         except Exception as e:
             self.error._log_error(f"Error en análisis de microestructura: {e}")
@@ -654,6 +822,9 @@ class AdvancedAnalyzer:
                     "ml_predictions_size": len(self.ml_predictions),
                     "microstructure_data_size": len(self.microstructure_data)
                 },
+                "correlation_service": self.correlation_service.get_stats(),
+                "seasonal_stats": self.seasonal_stats.get_stats(),
+                "tick_microstructure": self.microstructure.get_stats(),
                 "cache_status": {
                     "correlation_cache_size": len(self._correlation_cache),
                     "volatility_cache_size": len(self._volatility_cache),
@@ -22,6 +22,13 @@ from enum import Enum
 from dataclasses import dataclass
 import json
 
+try:
+    from ..event_bus import get_event_bus
+    from ..alert_throttle import AlertThrottle
+except ImportError:
+    from src.core.event_bus import get_event_bus
+    from src.core.alert_throttle import AlertThrottle
+
 
 class AlertPriority(Enum):
     """Prioridades de alertas"""
@@ -112,6 +119,10 @@ class AlertEngine:
             channel: [] for channel in AlertChannel
         }
         
+        # Bus de eventos compartido: cada canal despacha en su propia cola
+        self.event_bus = get_event_bus()
+        self.bus_namespace = self.event_bus.reserve_namespace(self.component_id)
+        
         # Configuración de alertas
         self.alert_config = {
             "enabled": True,
@@ -121,7 +132,10 @@ class AlertEngine:
             "auto_resolve_minutes": 60,
             "priority_escalation": True,
             "sound_enabled": False,
-            "email_enabled": False
+            "email_enabled": False,
+            "async_notifications": True,  # False = callbacks en el hilo del llamador
+            "channel_queue_size": 500,
+            "channel_timeout_seconds": 10.0
         }
         
         # Filtros y reglas
@@ -139,12 +153,17 @@ class AlertEngine:
             "uptime_start": datetime.now()
         }
         
-        # Throttling anti-spam
-        self.throttle_cache: Dict[str, datetime] = {}
-        
         # Cargar configuración
         self._load_configuration()
         
+        # Throttling anti-spam: token bucket por clave (1 alerta cada throttle_seconds)
+        throttle_seconds = self.alert_config["throttle_seconds"]
+        self.throttle = AlertThrottle(
+            key_rate=1.0 / throttle_seconds if throttle_seconds > 0 else None,
+            key_burst=1.0
+        )
+        self._register_bus_channels()
+        
         # Log inicialización
         if self.logger:
             self.logger.log_info(f"[{self.component_id}] Configuración cargada: {len(self.alert_config)} parámetros")
@@ -305,7 +324,7 @@ class AlertEngine:
             self.metrics["alerts_by_category"][category] += 1
             
             # Actualizar throttling
-            self.throttle_cache[throttle_key] = datetime.now()
+            self.throttle.record(throttle_key)
             
             # Procesar notificaciones
             self._process_notifications(alert)
@@ -322,11 +341,7 @@ class AlertEngine:
     
     def _is_throttled(self, throttle_key: str) -> bool:
         """Verificar si una alerta está siendo throttled"""
-        if throttle_key in self.throttle_cache:
-            last_sent = self.throttle_cache[throttle_key]
-            throttle_time = timedelta(seconds=self.alert_config["throttle_seconds"])
-            return datetime.now() - last_sent < throttle_time
-        return False
+        return self.throttle.check(throttle_key) is not None
     
     def _apply_filters(self, alert: Alert) -> bool:
         """
@@ -344,16 +359,43 @@ class AlertEngine:
                     self.error.handle_system_error("AlertEngine", e, {"method": "_apply_filters"})
         return False
     
+    def _register_bus_channels(self):
+        """Registrar un canal del bus por cada AlertChannel"""
+        for channel in AlertChannel:
+            self.event_bus.register_channel(
+                self._bus_channel_name(channel),
+                lambda alert, channel=channel: self._run_channel_callbacks(channel, alert),
+                max_queue=self.alert_config["channel_queue_size"],
+                timeout=self.alert_config["channel_timeout_seconds"]
+            )
+    
+    def _bus_channel_name(self, channel: AlertChannel) -> str:
+        return f"{self.bus_namespace}.{channel.value}"
+    
     def _process_notifications(self, alert: Alert):
         """Procesar las notificaciones de una alerta"""
-        for channel in alert.channels:
-            callbacks = self.notification_callbacks.get(channel, [])
-            for callback in callbacks:
-                try:
-                    callback(alert)
-                except Exception as e:
-                    if self.error:
-                        self.error.handle_system_error("AlertEngine", e, {"method": f"notification_callback_{channel.value}"})
+        if not self.alert_config.get("async_notifications", True):
+            for channel in alert.channels:
+                self._run_channel_callbacks(channel, alert)
+            return
+        
+        # Publicar en el bus: los canales se atienden en paralelo y por prioridad
+        targets = [self._bus_channel_name(channel) for channel in alert.channels
+                   if self.notification_callbacks.get(channel)]
+        if targets:
+            self.event_bus.publish(alert, alert.priority, channels=targets)
+    
+    def _run_channel_callbacks(self, channel: AlertChannel, alert: Alert) -> bool:
+        """Ejecutar los callbacks de un canal (en un worker del bus)"""
+        success = True
+        for callback in list(self.notification_callbacks.get(channel, [])):
+            try:
+                callback(alert)
+            except Exception as e:
+                success = False
+                if self.error:
+                    self.error.handle_system_error("AlertEngine", e, {"method": f"notification_callback_{channel.value}"})
+        return success
     
     def _process_alerts_loop(self):
         """Loop principal de procesamiento de alertas"""
@@ -408,17 +450,8 @@ class AlertEngine:
             self.alert_history = self.alert_history[-self.max_history_size:]
     
     def _cleanup_throttle_cache(self):
-        """Limpiar cache de throttling"""
-        throttle_time = timedelta(seconds=self.alert_config["throttle_seconds"])
-        now = datetime.now()
-        
-        to_remove = []
-        for key, timestamp in self.throttle_cache.items():
-            if now - timestamp > throttle_time:
-                to_remove.append(key)
-        
-        for key in to_remove:
-            del self.throttle_cache[key]
+        """Limpiar claves de throttling caducadas"""
+        self.throttle.expire()
     
     def acknowledge_alert(self, alert_id: str) -> bool:
         """
@@ -538,8 +571,10 @@ class AlertEngine:
             current_metrics.update({
                 "active_alerts_count": len(self.active_alerts),
                 "history_size": len(self.alert_history),
-                "throttle_cache_size": len(self.throttle_cache),
-                "uptime_seconds": (datetime.now() - self.metrics["uptime_start"]).total_seconds()
+                "throttle_cache_size": len(self.throttle),
+                "throttle": self.throttle.get_stats(),
+                "uptime_seconds": (datetime.now() - self.metrics["uptime_start"]).total_seconds(),
+                "notification_bus": self.event_bus.get_stats(prefix=self.bus_namespace)["channels"]
             })
             return current_metrics
     
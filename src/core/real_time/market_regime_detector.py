@@ -24,12 +24,15 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+import pandas as pd
+
 # Imports del sistema SÓTANO 1 (protocolo centralizado)
 from ..config_manager import ConfigManager
 from ..logger_manager import LoggerManager
 from ..error_manager import ErrorManager
 from ..data_manager import DataManager
 from ..analytics_manager import AnalyticsManager
+from ..regime_state import DEFAULT_REGIME_CONFIG, compute_regimes, get_regime_state
 
 class MarketRegime(Enum):
     """Regímenes de mercado identificables"""
@@ -126,6 +129,12 @@ class MarketRegimeDetector:
             'confidence_decay_rate': 0.95
         }
         
+        # Umbrales del motor de velas (RegimeState) compartidos con detection_config
+        self.regime_config = dict(DEFAULT_REGIME_CONFIG)
+        self.regime_config.update({
+            key: value for key, value in self.detection_config.items() if key in DEFAULT_REGIME_CONFIG
+        })
+        
         # Métricas
         self.detector_metrics = {
             'total_detections': 0,
@@ -145,7 +154,105 @@ class MarketRegimeDetector:
     
     def detect_market_regime(self, symbol: str, timeframe: str, 
                            market_data: Optional[Dict[str, Any]] = None) -> Optional[RegimeDetection]:
-        """Detectar régimen de mercado para un símbolo específico"""
+        """
+        Detectar régimen de mercado para un símbolo específico
+        
+        Usa el RegimeState compartido de (symbol, timeframe), que se
+        actualiza solo con las velas cerradas nuevas. Sin velas suficientes
+        (terminal no disponible) se clasifica el resumen del AnalyticsManager.
+        
+        Args:
+            symbol: Símbolo
+            timeframe: Timeframe
+            market_data: Opcional; 'bars' con velas cerradas a incorporar
+                o 'volatility' para el resumen de respaldo
+        """
+        try:
+            state = get_regime_state(symbol, timeframe, config=self.regime_config)
+            bars = market_data.get('bars') if market_data else None
+            if bars is not None:
+                state.apply_rates(bars)
+            else:
+                state.refresh()
+            
+            if not state.ready:
+                return self._detect_from_summary(symbol, timeframe, market_data)
+            
+            snapshot = state.snapshot()
+            key = f"{symbol}_{timeframe}"
+            current = self.current_regimes.get(key)
+            if current and current.metadata.get('bar_time') == snapshot['last_bar_time']:
+                return current  # Sin vela nueva: el régimen no ha cambiado
+            
+            detection = RegimeDetection(
+                symbol=symbol,
+                timeframe=timeframe,
+                regime=MarketRegime(snapshot['regime']),
+                confidence=RegimeConfidence(snapshot['confidence']),
+                probability=snapshot['probability'],
+                timestamp=datetime.now(),
+                duration=timedelta(seconds=snapshot['last_bar_time'] - snapshot['regime_since'] + state.tf_seconds),
+                indicators={
+                    'volatility': snapshot['volatility'],
+                    'volatility_ratio': snapshot['volatility_ratio'],
+                    'trend_strength': snapshot['trend_strength'],
+                    'trend_slope': snapshot['trend_slope'],
+                    'momentum': snapshot['momentum'],
+                    'volume_profile': snapshot['volume_ratio'],
+                    'fvg_density': snapshot['fvg_density']
+                },
+                metadata={
+                    'volatility_regime': snapshot['volatility_regime'],
+                    'trend_regime': snapshot['trend_regime'],
+                    'momentum_regime': snapshot['momentum_regime'],
+                    'detection_method': 'rolling_bars',
+                    'bar_time': snapshot['last_bar_time']
+                }
+            )
+            
+            self._register_detection(detection)
+            return detection
+            
+        except Exception as e:
+            self.error_manager.handle_system_error("MarketRegimeDetector", e, 
+                                                 {"symbol": symbol, "timeframe": timeframe})
+            return None
+    
+    def label_regimes(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Etiquetar con su régimen cada vela de un histórico (backtests)
+        
+        Args:
+            bars: Velas con high, low, close y opcionalmente volume/tick_volume
+            
+        Returns:
+            DataFrame alineado con ``bars`` con indicadores, regime, confidence y probability
+        """
+        return compute_regimes(bars, self.regime_config)
+    
+    def _register_detection(self, detection: RegimeDetection):
+        """Actualizar régimen actual, historial y métricas"""
+        key = f"{detection.symbol}_{detection.timeframe}"
+        
+        with self.detection_lock:
+            old_regime = self.current_regimes.get(key)
+            self.current_regimes[key] = detection
+            self.regime_history.append(detection)
+            
+            # Detectar cambio de régimen
+            if old_regime and old_regime.regime != detection.regime:
+                self.detector_metrics['regime_changes_detected'] += 1
+                self.logger_manager.log_info(f"🔄 Cambio de régimen detectado en {detection.symbol}: "
+                                           f"{old_regime.regime.value} → {detection.regime.value}")
+            
+            self.detector_metrics['total_detections'] += 1
+        
+        self.logger_manager.log_info(f"🎯 Régimen detectado: {detection.symbol} - {detection.regime.value} "
+                                   f"(Confianza: {detection.confidence.name}, {detection.probability:.1%})")
+    
+    def _detect_from_summary(self, symbol: str, timeframe: str,
+                             market_data: Optional[Dict[str, Any]] = None) -> Optional[RegimeDetection]:
+        """Detección de respaldo a partir del resumen del AnalyticsManager"""
         try:
             # Obtener datos del mercado del AnalyticsManager
             market_summary = self.analytics_manager.get_market_summary()
@@ -196,24 +303,7 @@ class MarketRegimeDetector:
                 }
             )
             
-            # Actualizar estado
-            key = f"{symbol}_{timeframe}"
-            
-            with self.detection_lock:
-                old_regime = self.current_regimes.get(key)
-                self.current_regimes[key] = detection
-                self.regime_history.append(detection)
-                
-                # Detectar cambio de régimen
-                if old_regime and old_regime.regime != detection.regime:
-                    self.detector_metrics['regime_changes_detected'] += 1
-                    self.logger_manager.log_info(f"🔄 Cambio de régimen detectado en {symbol}: "
-                                               f"{old_regime.regime.value} → {detection.regime.value}")
-                
-                self.detector_metrics['total_detections'] += 1
-            
-            self.logger_manager.log_info(f"🎯 Régimen detectado: {symbol} - {primary_regime.value} "
-                                       f"(Confianza: {confidence.name}, {probability:.1%})")
+            self._register_detection(detection)
             
             return detection
             
@@ -16,12 +16,19 @@ Fecha: 2025-08-11
 
 import threading
 import time
+from array import array
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
 from collections import deque
+from pathlib import Path
+
+from ..running_stats import RollingStats, TradeStatsAccumulator, running_sharpe
+from ..columnar_history import ColumnarHistory
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
 
 
 @dataclass
@@ -59,6 +66,39 @@ class TradeRecord:
     net_profit: float
 
 
+# Esquemas de columnas de los historiales (ver ColumnarHistory)
+SNAPSHOT_COLUMNS = {
+    "timestamp": "datetime64[ms]",
+    "balance": float,
+    "equity": float,
+    "margin_used": float,
+    "margin_free": float,
+    "open_positions": "int32",
+    "total_pnl": float,
+    "day_pnl": float,
+    "win_rate": float,
+    "profit_factor": float,
+    "max_drawdown": float,
+    "sharpe_ratio": float,
+    "trades_count": "int64"
+}
+
+TRADE_COLUMNS = {
+    "id": object,
+    "symbol": object,
+    "type": object,
+    "volume": float,
+    "open_price": float,
+    "close_price": float,
+    "open_time": "datetime64[ms]",
+    "close_time": "datetime64[ms]",
+    "pnl": float,
+    "commission": float,
+    "swap": float,
+    "net_profit": float
+}
+
+
 class PerformanceTracker:
     """
     Seguimiento de Rendimiento - PUERTA-S2-PERFORMANCE
@@ -131,12 +171,24 @@ class PerformanceTracker:
                 "min_profit_factor": 1.2
             },
             "risk_free_rate": 0.02,  # Para Sharpe ratio
-            "benchmark_symbol": "EURUSD"
+            "benchmark_symbol": "EURUSD",
+            "verify_interval": 3600.0,  # segundos entre recálculos completos de verificación
+            "history_dir": "data/performance",  # fragmentos en disco, relativo a la raíz (None = solo memoria)
+            "history_flush_rows": 60  # snapshots/trades pendientes antes de escribir a disco
         }
         
-        # Datos de performance
-        self.performance_snapshots: deque = deque(maxlen=self.tracker_config["max_snapshots"])
-        self.trade_history: List[TradeRecord] = []
+        # Datos de performance (columnas preasignadas; DataFrames sin copia)
+        history_dir = self.tracker_config["history_dir"]
+        if history_dir:
+            history_dir = PROJECT_ROOT / history_dir
+        self.performance_snapshots = ColumnarHistory(
+            SNAPSHOT_COLUMNS, max_rows=self.tracker_config["max_snapshots"],
+            path=Path(history_dir) / "snapshots" if history_dir else None,
+            flush_rows=self.tracker_config["history_flush_rows"])
+        self.trade_history = ColumnarHistory(
+            TRADE_COLUMNS, max_rows=self.tracker_config["max_trades_history"],
+            path=Path(history_dir) / "trades" if history_dir else None,
+            flush_rows=self.tracker_config["history_flush_rows"])
         self.current_snapshot: Optional[PerformanceSnapshot] = None
         
         # Estado actual de la cuenta
@@ -175,7 +227,15 @@ class PerformanceTracker:
         
         # Buffers para cálculos en tiempo real
         self.pnl_buffer: deque = deque(maxlen=252)  # 1 año de días trading
-        self.returns_buffer: deque = deque(maxlen=252)
+        self.returns_stats = RollingStats(window=252)
+        self.returns_buffer: deque = self.returns_stats.values
+        
+        # Acumuladores O(1) por trade (todo el historial, no solo el retenido)
+        self.trade_stats = TradeStatsAccumulator()
+        # P&L de todos los trades (8 bytes por trade) para verificar más allá de max_trades_history
+        self.trade_pnl = array('d')
+        self.verification = {"last_run": None, "runs": 0, "drift_events": 0, "last_drift": {},
+                             "trades_verified": 0}
         
         # Cargar configuración
         self._load_configuration()
@@ -267,6 +327,7 @@ class PerformanceTracker:
             if self.tracking_thread:
                 self.tracking_thread.join(timeout=5.0)
             
+            self.flush_history()
             self.status = "stopped"
             
             if self.logger:
@@ -282,6 +343,7 @@ class PerformanceTracker:
     def _tracking_loop(self):
         """Loop principal de tracking"""
         last_snapshot_time = time.time()
+        last_verify_time = time.time()
         
         while self.is_tracking:
             try:
@@ -295,6 +357,11 @@ class PerformanceTracker:
                     self._create_performance_snapshot()
                     last_snapshot_time = current_time
                 
+                # Recálculo completo periódico para verificar la deriva de los acumuladores
+                if current_time - last_verify_time >= self.tracker_config["verify_interval"]:
+                    self.verify_accumulators()
+                    last_verify_time = current_time
+                
                 # Verificar alertas de performance
                 self._check_performance_alerts()
                 
@@ -339,7 +406,7 @@ class PerformanceTracker:
             # Actualizar buffer de returns
             if self.account_state["initial_balance"] > 0:
                 daily_return = (equity - self.account_state["initial_balance"]) / self.account_state["initial_balance"]
-                self.returns_buffer.append(daily_return)
+                self.returns_stats.push(daily_return)
             
             if self.logger and self.is_tracking:
                 self.logger.log_info(f"[{self.component_id}] Cuenta actualizada - Balance: ${balance:,.2f}, Equity: ${equity:,.2f}")
@@ -352,12 +419,10 @@ class PerformanceTracker:
             trade: Registro de la operación
         """
         with self.tracking_lock:
-            # Agregar al historial
-            self.trade_history.append(trade)
-            
-            # Mantener límite de historial
-            if len(self.trade_history) > self.tracker_config["max_trades_history"]:
-                self.trade_history = self.trade_history[-self.tracker_config["max_trades_history"]:]
+            # Agregar al historial (acotado a max_trades_history)
+            self.trade_history.append_record(trade)
+            self.trade_stats.add(trade.net_profit)
+            self.trade_pnl.append(trade.net_profit)
             
             # Actualizar estadísticas
             self.account_state["total_trades"] += 1
@@ -411,19 +476,15 @@ class PerformanceTracker:
             if self.account_state["losing_trades"] > 0:
                 self.calculated_metrics["average_loss"] = self.account_state["gross_loss"] / self.account_state["losing_trades"]
             
-            # Calcular desde historial de trades
-            if self.trade_history:
-                profits = [t.net_profit for t in self.trade_history if t.net_profit > 0]
-                losses = [t.net_profit for t in self.trade_history if t.net_profit < 0]
-                
-                if profits:
-                    self.calculated_metrics["largest_win"] = max(profits)
-                
-                if losses:
-                    self.calculated_metrics["largest_loss"] = min(losses)
-                
-                # Calcular rachas
-                self._calculate_consecutive_stats()
+            # Extremos desde los acumuladores (sin recorrer el historial)
+            if self.trade_stats.wins.count:
+                self.calculated_metrics["largest_win"] = self.trade_stats.wins.max
+            
+            if self.trade_stats.losses.min < 0:
+                self.calculated_metrics["largest_loss"] = self.trade_stats.losses.min
+            
+            # Rachas
+            self._calculate_consecutive_stats()
             
             # Ratios avanzados
             self._calculate_advanced_ratios()
@@ -434,53 +495,33 @@ class PerformanceTracker:
     
     def _calculate_consecutive_stats(self):
         """Calcular estadísticas de rachas consecutivas"""
-        if not self.trade_history:
-            return
-        
-        current_wins = 0
-        current_losses = 0
-        max_wins = 0
-        max_losses = 0
-        
-        for trade in self.trade_history:
-            if trade.net_profit > 0:
-                current_wins += 1
-                current_losses = 0
-                max_wins = max(max_wins, current_wins)
-            else:
-                current_losses += 1
-                current_wins = 0
-                max_losses = max(max_losses, current_losses)
-        
-        self.calculated_metrics["consecutive_wins"] = current_wins
-        self.calculated_metrics["consecutive_losses"] = current_losses
-        self.calculated_metrics["max_consecutive_wins"] = max_wins
-        self.calculated_metrics["max_consecutive_losses"] = max_losses
+        streaks = self.trade_stats.streaks
+        self.calculated_metrics["consecutive_wins"] = streaks.current_wins
+        self.calculated_metrics["consecutive_losses"] = streaks.current_losses
+        self.calculated_metrics["max_consecutive_wins"] = streaks.max_wins
+        self.calculated_metrics["max_consecutive_losses"] = streaks.max_losses
     
     def _calculate_advanced_ratios(self):
         """Calcular ratios avanzados (Sharpe, Sortino, etc.)"""
         try:
-            if len(self.returns_buffer) < 30:  # Necesitamos datos suficientes
+            returns = self.returns_stats
+            if len(returns) < 30:  # Necesitamos datos suficientes
                 return
             
-            returns = np.array(list(self.returns_buffer))
-            
-            # Sharpe Ratio
-            if len(returns) > 1:
-                excess_returns = returns - (self.tracker_config["risk_free_rate"] / 252)  # Daily risk-free rate
-                if np.std(excess_returns) > 0:
-                    self.calculated_metrics["sharpe_ratio"] = np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252)
+            # Sharpe Ratio (tasa libre de riesgo diaria)
+            sharpe = running_sharpe(returns, 252, self.tracker_config["risk_free_rate"])
+            if sharpe is not None:
+                self.calculated_metrics["sharpe_ratio"] = sharpe
             
             # Sortino Ratio (solo downside deviation)
-            negative_returns = returns[returns < 0]
-            if len(negative_returns) > 1:
-                downside_std = np.std(negative_returns)
+            if returns.downside_count > 1:
+                downside_std = returns.downside_std()
                 if downside_std > 0:
-                    self.calculated_metrics["sortino_ratio"] = np.mean(returns) / downside_std * np.sqrt(252)
+                    self.calculated_metrics["sortino_ratio"] = returns.mean() / downside_std * np.sqrt(252)
             
             # Calmar Ratio
             if self.account_state["max_drawdown"] > 0:
-                annual_return = np.mean(returns) * 252
+                annual_return = returns.mean() * 252
                 self.calculated_metrics["calmar_ratio"] = annual_return / (self.account_state["max_drawdown"] / 100)
             
             # Recovery Factor
@@ -491,6 +532,35 @@ class PerformanceTracker:
             if self.error:
                 self.error.handle_system_error("PerformanceTracker", e, {"method": "_calculate_advanced_ratios"})
     
+    def verify_accumulators(self) -> Dict[str, float]:
+        """
+        Recalcular desde los datos retenidos y corregir la deriva de los acumuladores
+        
+        Los acumuladores de trades se verifican contra la columna compacta de
+        P&L, que conserva todos los trades aunque el historial retenido esté
+        acotado a max_trades_history; la ventana de retornos se verifica siempre.
+        
+        Returns:
+            Dict[str, float]: Diferencia de cada métrica que había derivado
+        """
+        with self.tracking_lock:
+            drift = {}
+            drift.update(self.trade_stats.resync(self.trade_pnl))
+            returns_drift = self.returns_stats.resync()
+            if returns_drift > 1e-9:
+                drift["returns_window"] = returns_drift
+            
+            self.verification["last_run"] = datetime.now()
+            self.verification["runs"] += 1
+            self.verification["last_drift"] = drift
+            self.verification["trades_verified"] = len(self.trade_pnl)
+            if drift:
+                self.verification["drift_events"] += 1
+                self._calculate_metrics()
+                if self.logger:
+                    self.logger.log_warning(f"[{self.component_id}] Deriva corregida en acumuladores: {drift}")
+            return drift
+    
     def _create_current_snapshot(self) -> PerformanceSnapshot:
         """Crear snapshot del estado actual"""
         return PerformanceSnapshot(
@@ -513,7 +583,7 @@ class PerformanceTracker:
         """Crear y almacenar un snapshot de performance"""
         try:
             snapshot = self._create_current_snapshot()
-            self.performance_snapshots.append(snapshot)
+            self.performance_snapshots.append_record(snapshot)
             
             if self.logger:
                 self.logger.log_info(f"[{self.component_id}] Snapshot creado - Balance: ${snapshot.balance:,.2f}")
@@ -591,63 +661,55 @@ class PerformanceTracker:
             "tracking_active": self.is_tracking
         }
     
-    def get_snapshots_dataframe(self) -> pd.DataFrame:
-        """Obtener snapshots como DataFrame para análisis"""
-        if not self.performance_snapshots:
-            return pd.DataFrame()
+    def get_snapshots_dataframe(self, tail: Optional[int] = None, copy: bool = False) -> pd.DataFrame:
+        """
+        Obtener snapshots como DataFrame para análisis (vista sin copia, solo lectura)
         
+        Args:
+            tail: Solo los últimos N snapshots (opcional)
+            copy: Entregar una copia modificable en lugar de la vista
+        """
         try:
-            data = []
-            for snapshot in self.performance_snapshots:
-                data.append({
-                    'timestamp': snapshot.timestamp,
-                    'balance': snapshot.balance,
-                    'equity': snapshot.equity,
-                    'total_pnl': snapshot.total_pnl,
-                    'max_drawdown': snapshot.max_drawdown,
-                    'win_rate': snapshot.win_rate,
-                    'profit_factor': snapshot.profit_factor,
-                    'sharpe_ratio': snapshot.sharpe_ratio,
-                    'trades_count': snapshot.trades_count
-                })
-            
-            return pd.DataFrame(data)
+            return self.performance_snapshots.frame(
+                ['timestamp', 'balance', 'equity', 'total_pnl', 'max_drawdown', 'win_rate',
+                 'profit_factor', 'sharpe_ratio', 'trades_count'], tail=tail, copy=copy)
             
         except Exception as e:
             if self.error:
                 self.error.handle_system_error("PerformanceTracker", e, {"method": "get_snapshots_dataframe"})
             return pd.DataFrame()
     
-    def get_trades_dataframe(self) -> pd.DataFrame:
-        """Obtener historial de trades como DataFrame"""
-        if not self.trade_history:
-            return pd.DataFrame()
+    def get_trades_dataframe(self, tail: Optional[int] = None, copy: bool = False) -> pd.DataFrame:
+        """
+        Obtener historial de trades como DataFrame (vista sin copia, solo lectura)
         
+        Args:
+            tail: Solo los últimos N trades (opcional)
+            copy: Entregar una copia modificable en lugar de la vista
+        """
         try:
-            data = []
-            for trade in self.trade_history:
-                data.append({
-                    'id': trade.id,
-                    'symbol': trade.symbol,
-                    'type': trade.type,
-                    'volume': trade.volume,
-                    'open_price': trade.open_price,
-                    'close_price': trade.close_price,
-                    'open_time': trade.open_time,
-                    'close_time': trade.close_time,
-                    'pnl': trade.pnl,
-                    'commission': trade.commission,
-                    'swap': trade.swap,
-                    'net_profit': trade.net_profit
-                })
-            
-            return pd.DataFrame(data)
+            return self.trade_history.frame(tail=tail, copy=copy)
             
         except Exception as e:
             if self.error:
                 self.error.handle_system_error("PerformanceTracker", e, {"method": "get_trades_dataframe"})
             return pd.DataFrame()
     
+    def flush_history(self) -> int:
+        """
+        Escribir a disco los snapshots y trades pendientes
+        
+        Returns:
+            int: Filas escritas
+        """
+        try:
+            with self.tracking_lock:
+                return self.performance_snapshots.flush() + self.trade_history.flush()
+        except Exception as e:
+            if self.error:
+                self.error.handle_system_error("PerformanceTracker", e, {"method": "flush_history"})
+            return 0
+    
     def get_status(self) -> Dict[str, Any]:
         """Obtener estado del tracker"""
         return {
@@ -659,5 +721,10 @@ class PerformanceTracker:
             "snapshots_count": len(self.performance_snapshots),
             "trades_count": len(self.trade_history),
             "account_initialized": self.account_state["initial_balance"] > 0,
+            "accumulator_verification": dict(self.verification),
+            "history": {
+                "snapshots": self.performance_snapshots.get_stats(),
+                "trades": self.trade_history.get_stats()
+            },
             "alert_engine_connected": self.alert_engine is not None
         }
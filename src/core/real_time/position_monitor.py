@@ -34,6 +34,8 @@ try:
     from ..error_manager import ErrorManager
     from ..mt5_manager import MT5Manager
     from ..data_manager import DataManager
+    from .position_table import PositionTable, PositionDiff
+    from ..exposure_engine import get_exposure_engine
 except ImportError as e:
     print(f"❌ Error importando dependencias: {e}")
     sys.exit(1)
@@ -78,15 +80,19 @@ class PositionMonitor:
         self._stop_event = threading.Event()
         self._monitor_thread = None
         
-        # Estado de posiciones
-        self.current_positions = {}
+        # Configuración de monitoreo
+        self._load_monitor_config()
+        
+        # Estado de posiciones (tabla compacta por ticket)
+        self.position_table = PositionTable(
+            pnl_threshold=self.monitor_config.get("pnl_change_threshold", 1.0),
+            price_threshold=self.monitor_config.get("price_change_threshold")
+        )
         self.position_history = []
+        self.exposure = get_exposure_engine()
         self.last_pnl = 0.0
         self.last_update = None
         
-        # Configuración de monitoreo
-        self._load_monitor_config()
-        
         # Alertas y thresholds
         self.alert_callbacks = []
         self.risk_thresholds = {
@@ -100,6 +106,7 @@ class PositionMonitor:
         self.metrics = {
             "total_positions_tracked": 0,
             "position_changes_detected": 0,
+            "change_batches_emitted": 0,
             "alerts_triggered": 0,
             "max_pnl_today": 0.0,
             "min_pnl_today": 0.0,
@@ -120,7 +127,9 @@ class PositionMonitor:
                 "enable_alerts": True,         # Habilitar alertas
                 "max_history_items": 1000,     # Máximo histórico
                 "symbols_to_track": ["EURUSD", "GBPUSD", "USDJPY"],
-                "alert_on_change": True        # Alertar en cambios
+                "alert_on_change": True,       # Alertar en cambios
+                "pnl_change_threshold": 1.0,   # ΔP&L mínimo para reportar update
+                "price_change_threshold": None # Δprecio mínimo (None = desactivado)
             }
             
             self.logger.log_info(f"[{self.component_id}] Configuración cargada: {len(self.monitor_config['symbols_to_track'])} símbolos")
@@ -158,7 +167,7 @@ class PositionMonitor:
                 return False
                 
             # Obtener estado inicial de posiciones
-            self._snapshot_current_positions()
+            self._sync_exposure(self._snapshot_current_positions())
             
             # Iniciar thread de monitoreo
             self._stop_event.clear()
@@ -223,42 +232,33 @@ class PositionMonitor:
             self.error.handle_system_error(f"{self.component_id}: Error verificando conexión MT5", e)
             return False
             
-    def _snapshot_current_positions(self):
-        """Tomar snapshot del estado actual de posiciones"""
+    @property
+    def current_positions(self) -> Dict[int, Dict[str, Any]]:
+        """Vista {ticket: posición} de la tabla de posiciones"""
+        return self.position_table.to_dict()
+        
+    def _snapshot_current_positions(self) -> PositionDiff:
+        """
+        Sincronizar la tabla de posiciones con MT5
+        
+        Returns:
+            PositionDiff con los cambios significativos desde la pasada anterior
+        """
         try:
             positions = mt5.positions_get()
             
-            if positions is None:
-                self.current_positions = {}
-                return
-                
-            # Convertir a diccionario para fácil comparación
-            position_dict = {}
-            total_pnl = 0.0
+            # Diff vectorizado contra la tabla (None = sin posiciones)
+            diff = self.position_table.sync(positions)
             
-            for pos in positions:
-                position_dict[pos.ticket] = {
-                    "symbol": pos.symbol,
-                    "type": pos.type,
-                    "volume": pos.volume,
-                    "price_open": pos.price_open,
-                    "price_current": pos.price_current,
-                    "profit": pos.profit,
-                    "commission": pos.commission,
-                    "swap": pos.swap,
-                    "time_create": pos.time,
-                    "comment": pos.comment
-                }
-                total_pnl += pos.profit
-                
-            self.current_positions = position_dict
-            self.last_pnl = total_pnl
-            self.last_update = datetime.now()
+            self.last_pnl = self.position_table.total_profit()
+            self.last_update = diff.timestamp
             
-            self.logger.log_info(f"[{self.component_id}] Snapshot: {len(position_dict)} posiciones, P&L: {total_pnl:.2f}")
+            self.logger.log_debug(f"[{self.component_id}] Snapshot: {len(self.position_table)} posiciones, P&L: {self.last_pnl:.2f}")
+            return diff
             
         except Exception as e:
             self.error.handle_data_error(f"{self.component_id}_snapshot", e)
+            return PositionDiff()
             
     def _monitoring_loop(self):
         """Loop principal de monitoreo"""
@@ -267,15 +267,12 @@ class PositionMonitor:
         
         while not self._stop_event.is_set():
             try:
-                # Obtener estado actual
-                previous_positions = self.current_positions.copy()
-                self._snapshot_current_positions()
-                
-                # Detectar cambios
-                changes = self._detect_position_changes(previous_positions, self.current_positions)
+                # Sincronizar tabla y obtener diff en una sola pasada
+                diff = self._snapshot_current_positions()
+                self._sync_exposure(diff)
                 
-                if changes:
-                    self._process_position_changes(changes)
+                if diff:
+                    self._process_position_changes(diff.to_events())
                     
                 # Verificar niveles de riesgo
                 self._check_risk_levels()
@@ -298,78 +295,53 @@ class PositionMonitor:
         self.metrics["monitoring_uptime"] = (datetime.now() - start_time).total_seconds()
         self.logger.log_info(f"[{self.component_id}] Loop de monitoreo terminado. Uptime: {self.metrics['monitoring_uptime']:.1f}s")
         
-    def _detect_position_changes(self, previous: Dict, current: Dict) -> List[Dict]:
-        """Detectar cambios en posiciones"""
-        changes = []
-        
-        # Posiciones nuevas
-        for ticket, position in current.items():
-            if ticket not in previous:
-                changes.append({
-                    "type": "NEW_POSITION",
-                    "ticket": ticket,
-                    "position": position,
-                    "timestamp": datetime.now()
-                })
-                
-        # Posiciones cerradas
-        for ticket, position in previous.items():
-            if ticket not in current:
-                changes.append({
-                    "type": "CLOSED_POSITION",
-                    "ticket": ticket,
-                    "position": position,
-                    "timestamp": datetime.now()
-                })
-                
-        # Posiciones modificadas
-        for ticket, position in current.items():
-            if ticket in previous:
-                prev_pos = previous[ticket]
-                if (position["profit"] != prev_pos["profit"] or 
-                    position["price_current"] != prev_pos["price_current"]):
-                    changes.append({
-                        "type": "POSITION_UPDATE",
-                        "ticket": ticket,
-                        "position": position,
-                        "previous": prev_pos,
-                        "timestamp": datetime.now()
-                    })
-                    
-        return changes
-        
+    def _sync_exposure(self, diff: PositionDiff):
+        """Propagar el diff y el estado de cuenta al ExposureEngine compartido"""
+        try:
+            self.exposure.apply_changes(diff.to_events())
+            self.exposure.update_account(mt5.account_info())
+        except Exception as e:
+            self.error.handle_data_error(f"{self.component_id}_exposure", e)
+            
     def _process_position_changes(self, changes: List[Dict]):
-        """Procesar cambios detectados en posiciones"""
+        """Procesar un lote de cambios detectados en posiciones"""
         self.metrics["position_changes_detected"] += len(changes)
+        self.metrics["change_batches_emitted"] += 1
         
+        updates = 0
+        pnl_delta = 0.0
         for change in changes:
-            # Log del cambio
+            # Aperturas y cierres se registran individualmente
             if change["type"] == "NEW_POSITION":
                 self.logger.log_info(f"[{self.component_id}] Nueva posición: {change['ticket']} {change['position']['symbol']}")
             elif change["type"] == "CLOSED_POSITION":
                 self.logger.log_info(f"[{self.component_id}] Posición cerrada: {change['ticket']} {change['position']['symbol']}")
             elif change["type"] == "POSITION_UPDATE":
-                profit_change = change['position']['profit'] - change['previous']['profit']
-                self.logger.log_info(f"[{self.component_id}] Posición actualizada: {change['ticket']} P&L change: {profit_change:.2f}")
+                updates += 1
+                pnl_delta += change['position']['profit'] - change['previous']['profit']
                 
-            # Guardar en histórico si está habilitado
-            if self.monitor_config.get("track_history", False):
-                self.position_history.append(change)
+        # Las actualizaciones se resumen en una línea por lote
+        if updates:
+            self.logger.log_debug(f"[{self.component_id}] {updates} posiciones actualizadas, P&L change: {pnl_delta:.2f}")
+            
+        # Guardar en histórico si está habilitado
+        if self.monitor_config.get("track_history", False):
+            self.position_history.extend(changes)
+            
+            # Limpiar histórico si excede máximo
+            max_items = self.monitor_config.get("max_history_items", 1000)
+            if len(self.position_history) > max_items:
+                self.position_history = self.position_history[-max_items:]
                 
-                # Limpiar histórico si excede máximo
-                max_items = self.monitor_config.get("max_history_items", 1000)
-                if len(self.position_history) > max_items:
-                    self.position_history = self.position_history[-max_items:]
-                    
-            # Notificar callbacks de alertas
-            if self.monitor_config.get("alert_on_change", True):
-                self._notify_alert_callbacks("POSITION_CHANGE", change)
+        # Notificar callbacks con el lote completo
+        if self.monitor_config.get("alert_on_change", True):
+            self._notify_alert_callbacks("POSITION_CHANGES", changes)
                 
     def _check_risk_levels(self):
         """Verificar niveles de riesgo"""
         try:
             # Calcular P&L total actual
-            total_pnl = sum(pos.get("profit", 0) for pos in self.current_positions.values())
+            total_pnl = self.position_table.total_profit()
             
             # Actualizar métricas min/max
             if total_pnl > self.metrics["max_pnl_today"]:
@@ -377,8 +349,9 @@ class PositionMonitor:
             if total_pnl < self.metrics["min_pnl_today"]:
                 self.metrics["min_pnl_today"] = total_pnl
                 
-            # Verificar umbral de pérdida diaria
-            if total_pnl < 0 and abs(total_pnl) > (self.risk_thresholds["max_daily_loss"] * 10000):  # Asumiendo balance 10k
+            # Verificar umbral de pérdida diaria (balance real del último snapshot)
+            balance = self.exposure.balance or 10000.0  # Fallback si aún no hay snapshot de cuenta
+            if total_pnl < 0 and abs(total_pnl) > (self.risk_thresholds["max_daily_loss"] * balance):
                 self._trigger_risk_alert("MAX_DAILY_LOSS_EXCEEDED", {
                     "current_pnl": total_pnl,
                     "threshold": self.risk_thresholds["max_daily_loss"]
@@ -419,7 +392,7 @@ class PositionMonitor:
                 
     def _update_metrics(self):
         """Actualizar métricas de rendimiento"""
-        self.metrics["total_positions_tracked"] = len(self.current_positions)
+        self.metrics["total_positions_tracked"] = len(self.position_table)
         self.metrics["last_update"] = datetime.now()
         
     def _attempt_reconnection(self):
@@ -446,7 +419,7 @@ class PositionMonitor:
             
     def get_current_positions(self) -> Dict[str, Any]:
         """Obtener posiciones actuales"""
-        return self.current_positions.copy()
+        return self.current_positions
         
     def get_position_history(self) -> List[Dict]:
         """Obtener histórico de cambios de posiciones"""
@@ -454,7 +427,7 @@ class PositionMonitor:
         
     def get_current_pnl(self) -> float:
         """Obtener P&L actual"""
-        return sum(pos.get("profit", 0) for pos in self.current_positions.values())
+        return self.position_table.total_profit()
         
     def get_metrics(self) -> Dict[str, Any]:
         """Obtener métricas de rendimiento"""
@@ -467,8 +440,9 @@ class PositionMonitor:
             "version": self.version,
             "is_monitoring": self.is_monitoring,
             "is_connected": self.is_connected,
-            "positions_count": len(self.current_positions),
+            "positions_count": len(self.position_table),
             "current_pnl": self.get_current_pnl(),
+            "exposure": self.exposure.get_total_exposure(),
             "symbols_tracked": len(self.monitor_config["symbols_to_track"]),
             "alerts_triggered": self.metrics["alerts_triggered"],
             "last_update": self.last_update
@@ -0,0 +1,213 @@
+"""
+PositionTable - Tabla compacta de posiciones MT5
+================================================
+
+Almacena las posiciones abiertas en arrays numpy ordenados por ticket y
+calcula el diff contra un nuevo ``positions_get()`` en una sola pasada
+vectorizada (``np.isin`` + ``np.searchsorted``), sin copiar diccionarios.
+
+Las actualizaciones se coalescen: una posición solo genera
+``POSITION_UPDATE`` cuando su P&L o su precio se alejan del último valor
+reportado más allá de los umbrales configurados. Los movimientos pequeños
+se acumulan hasta superar el umbral.
+
+Fecha: 2025-08-11
+Componente: SÓTANO 2 - Real-Time Optimization
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# Columnas numéricas de la tabla (orden fijo)
+NUMERIC_FIELDS = (
+    'type', 'volume', 'price_open', 'price_current', 'profit',
+    'commission', 'swap', 'time_create', 'sl', 'tp'
+)
+_COL = {name: i for i, name in enumerate(NUMERIC_FIELDS)}
+_INT_FIELDS = ('type', 'time_create')
+
+# Atributo MT5 de origen para cada columna
+_SOURCE_ATTR = {'time_create': 'time'}
+
+
+@dataclass
+class PositionDiff:
+    """Resultado de sincronizar la tabla con el terminal"""
+    opened: List[Dict[str, Any]] = field(default_factory=list)
+    closed: List[Dict[str, Any]] = field(default_factory=list)
+    updated: List[Dict[str, Any]] = field(default_factory=list)
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    def __bool__(self) -> bool:
+        return bool(self.opened or self.closed or self.updated)
+
+    def to_events(self) -> List[Dict[str, Any]]:
+        """Convertir el diff al formato de eventos de PositionMonitor"""
+        events = []
+        for row in self.opened:
+            events.append({"type": "NEW_POSITION", "ticket": row["ticket"],
+                           "position": row, "timestamp": self.timestamp})
+        for row in self.closed:
+            events.append({"type": "CLOSED_POSITION", "ticket": row["ticket"],
+                           "position": row, "timestamp": self.timestamp})
+        for update in self.updated:
+            events.append({"type": "POSITION_UPDATE", "ticket": update["ticket"],
+                           "position": update["position"], "previous": update["previous"],
+                           "timestamp": self.timestamp})
+        return events
+
+
+class PositionTable:
+    """
+    Tabla de posiciones respaldada por arrays y ordenada por ticket
+
+    Args:
+        pnl_threshold: Cambio mínimo de P&L (moneda de la cuenta) para reportar
+            una actualización. None desactiva el criterio.
+        price_threshold: Cambio mínimo de precio actual para reportar una
+            actualización. None desactiva el criterio.
+    """
+
+    def __init__(self, pnl_threshold: Optional[float] = 1.0,
+                 price_threshold: Optional[float] = None):
+        self.pnl_threshold = pnl_threshold
+        self.price_threshold = price_threshold
+
+        self.tickets = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, len(NUMERIC_FIELDS)), dtype=np.float64)
+        self.symbols = np.empty(0, dtype=object)
+        self.comments = np.empty(0, dtype=object)
+
+        # Último P&L / precio reportado por posición (base de la coalescencia)
+        self.reported_profit = np.empty(0, dtype=np.float64)
+        self.reported_price = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    # ========================================================================
+    # 🔄 SINCRONIZACIÓN
+    # ========================================================================
+
+    def sync(self, positions: Optional[Iterable[Any]]) -> PositionDiff:
+        """
+        Reemplazar el contenido con las posiciones del terminal y devolver el diff
+
+        Args:
+            positions: Resultado de ``mt5.positions_get()`` (None se trata como vacío)
+
+        Returns:
+            PositionDiff con aperturas, cierres y actualizaciones significativas
+        """
+        positions = list(positions or ())
+        new_tickets = np.fromiter((p.ticket for p in positions), dtype=np.int64, count=len(positions))
+        new_values = np.array(
+            [[getattr(p, _SOURCE_ATTR.get(name, name), 0) or 0 for name in NUMERIC_FIELDS]
+             for p in positions],
+            dtype=np.float64
+        ).reshape(len(positions), len(NUMERIC_FIELDS))
+        new_symbols = np.array([p.symbol for p in positions], dtype=object)
+        new_comments = np.array([getattr(p, 'comment', '') for p in positions], dtype=object)
+
+        order = np.argsort(new_tickets, kind='stable')
+        new_tickets = new_tickets[order]
+        new_values = new_values[order]
+        new_symbols = new_symbols[order]
+        new_comments = new_comments[order]
+
+        diff = PositionDiff()
+
+        # Pertenencia en ambos sentidos (tickets ordenados → búsqueda binaria)
+        still_open = np.isin(new_tickets, self.tickets, assume_unique=True)
+        survived = np.isin(self.tickets, new_tickets, assume_unique=True)
+
+        diff.closed = self._rows(np.flatnonzero(~survived))
+        opened_idx = np.flatnonzero(~still_open)
+
+        # Base de coalescencia: nuevas posiciones parten de su valor actual
+        reported_profit = new_values[:, _COL['profit']].copy()
+        reported_price = new_values[:, _COL['price_current']].copy()
+
+        common_new = np.flatnonzero(still_open)
+        if len(common_new):
+            common_old = np.searchsorted(self.tickets, new_tickets[common_new])
+            reported_profit[common_new] = self.reported_profit[common_old]
+            reported_price[common_new] = self.reported_price[common_old]
+
+            significant = np.zeros(len(common_new), dtype=bool)
+            if self.pnl_threshold is not None:
+                delta = np.abs(new_values[common_new, _COL['profit']] - reported_profit[common_new])
+                significant |= (delta > 0) & (delta >= self.pnl_threshold)
+            if self.price_threshold is not None:
+                delta = np.abs(new_values[common_new, _COL['price_current']] - reported_price[common_new])
+                significant |= (delta > 0) & (delta >= self.price_threshold)
+            # Cambios estructurales (cierre parcial, SL/TP) siempre se reportan
+            structural = [_COL['volume'], _COL['sl'], _COL['tp']]
+            significant |= np.any(
+                new_values[np.ix_(common_new, structural)] != self.values[np.ix_(common_old, structural)],
+                axis=1
+            )
+
+            changed_new = common_new[significant]
+            changed_old = common_old[significant]
+            previous_rows = self._rows(changed_old)
+            for prev_row, old_i in zip(previous_rows, changed_old):
+                prev_row['profit'] = float(self.reported_profit[old_i])
+                prev_row['price_current'] = float(self.reported_price[old_i])
+
+            reported_profit[changed_new] = new_values[changed_new, _COL['profit']]
+            reported_price[changed_new] = new_values[changed_new, _COL['price_current']]
+
+        # Reemplazar el estado
+        self.tickets = new_tickets
+        self.values = new_values
+        self.symbols = new_symbols
+        self.comments = new_comments
+        self.reported_profit = reported_profit
+        self.reported_price = reported_price
+
+        diff.opened = self._rows(opened_idx)
+        if len(common_new):
+            diff.updated = [
+                {"ticket": row["ticket"], "position": row, "previous": prev}
+                for row, prev in zip(self._rows(changed_new), previous_rows)
+            ]
+        return diff
+
+    # ========================================================================
+    # 📊 CONSULTAS
+    # ========================================================================
+
+    def total_profit(self) -> float:
+        """P&L flotante total"""
+        return float(self.values[:, _COL['profit']].sum()) if len(self) else 0.0
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista de una columna numérica"""
+        return self.values[:, _COL[name]]
+
+    def get(self, ticket: int) -> Optional[Dict[str, Any]]:
+        """Fila de un ticket o None"""
+        i = np.searchsorted(self.tickets, ticket)
+        if i < len(self.tickets) and self.tickets[i] == ticket:
+            return self._rows(np.array([i]))[0]
+        return None
+
+    def to_dict(self) -> Dict[int, Dict[str, Any]]:
+        """Vista en diccionario {ticket: posición} (compatibilidad)"""
+        return {row["ticket"]: row for row in self._rows(np.arange(len(self)))}
+
+    def _rows(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """Materializar filas como diccionarios (solo para las filas pedidas)"""
+        rows = []
+        for i in indices:
+            row = {"ticket": int(self.tickets[i]), "symbol": self.symbols[i],
+                   "comment": self.comments[i]}
+            for name, value in zip(NUMERIC_FIELDS, self.values[i]):
+                row[name] = int(value) if name in _INT_FIELDS else float(value)
+            rows.append(row)
+        return rows
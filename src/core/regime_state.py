@@ -0,0 +1,621 @@
+"""
+RegimeState - Régimen de mercado incremental por (símbolo, timeframe)
+=====================================================================
+
+Motor de régimen de mercado calculado a partir de velas cerradas en lugar
+de un resumen puntual del mercado. Lo usan el MarketRegimeDetector de
+tiempo real (SÓTANO 2) y el detector de regímenes de la oficina de
+análisis del Piso 3.
+
+Indicadores mantenidos con sumas deslizantes (O(1) por vela):
+
+- Volatilidad: desviación de los retornos en la ventana corta y su ratio
+  frente a la ventana base
+- Tendencia: pendiente y correlación (fuerza con signo) de la regresión
+  lineal del cierre sobre la ventana de tendencia
+- Momentum: desplazamiento de ``momentum_period`` velas en unidades de
+  volatilidad
+- Ratio de volumen y densidad de FVGs (gaps de 3 velas por vela)
+
+``classify_regime`` combina los tres votos (volatilidad, tendencia,
+momentum) igual que el detector de SÓTANO 2 con una tabla precalculada;
+``classify_regimes`` es su versión vectorizada, que usa
+``compute_regimes`` para etiquetar un histórico completo de una vez
+(backtests).
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import MetaTrader5 as mt5
+    MT5_AVAILABLE = True
+except ImportError:
+    mt5 = None
+    MT5_AVAILABLE = False
+
+
+TIMEFRAME_SECONDS = {
+    'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H4': 14400, 'D1': 86400
+}
+
+# Valores de MarketRegime (SÓTANO 2) en orden de desempate
+REGIMES = (
+    'trending_up', 'trending_down', 'ranging', 'high_volatility',
+    'low_volatility', 'breakout', 'reversal', 'consolidation'
+)
+_REGIME_INDEX = {name: i for i, name in enumerate(REGIMES)}
+
+DEFAULT_REGIME_CONFIG = {
+    'volatility_window': 20,          # Velas de la volatilidad corta
+    'volatility_base_window': 100,    # Velas de la volatilidad de referencia
+    'trend_window': 50,               # Velas de la regresión de tendencia
+    'momentum_period': 10,            # Velas del momentum
+    'fvg_window': 50,                 # Velas de la densidad de FVGs
+    'volatility_ratio_high': 1.5,
+    'volatility_ratio_low': 0.6,
+    'trend_strength_threshold': 0.6,
+    'ranging_threshold': 0.3,
+    'breakout_threshold': 1.5,
+    'reversal_threshold': 0.8,
+    'breakout_volume_ratio': 1.2,
+    'reversal_volume_ratio': 0.8,
+    'breakout_fvg_density': 0.3
+}
+
+# Pesos de cada voto y confianza según el peso del régimen ganador
+VOTE_WEIGHTS = (0.3, 0.4, 0.3)  # volatilidad, tendencia, momentum
+CONFIDENCE_LEVELS = ((0.8, 4, 0.9), (0.6, 3, 0.8), (0.4, 2, 0.6), (0.0, 1, 0.4))
+
+
+def _combine_votes(votes: Tuple[int, int, int]) -> Tuple[int, int, float]:
+    """Régimen ganador (desempate por el orden de REGIMES), confianza y probabilidad"""
+    weights = [0.0] * len(REGIMES)
+    for vote, weight in zip(votes, VOTE_WEIGHTS):
+        weights[vote] += weight
+    winner = max(range(len(REGIMES)), key=lambda i: weights[i])
+    for level, confidence, probability in CONFIDENCE_LEVELS:
+        if weights[winner] >= level:
+            return winner, confidence, probability
+    return winner, CONFIDENCE_LEVELS[-1][1], CONFIDENCE_LEVELS[-1][2]
+
+
+# Combinación precalculada de cada trío de votos (volatilidad, tendencia, momentum)
+_COMBINATIONS = {
+    votes: _combine_votes(votes)
+    for votes in itertools.product(range(len(REGIMES)), repeat=3)
+}
+_COMBINATION_TABLE = np.array([_COMBINATIONS[votes] for votes in sorted(_COMBINATIONS)])
+
+
+def classify_regime(volatility_ratio: float, trend_strength: float, momentum: float,
+                    volume_ratio: float, fvg_density: float,
+                    config: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Clasificar el régimen de una vela (versión escalar de ``classify_regimes``)
+
+    Returns:
+        dict: regime, confidence (1-4), probability y los tres votos
+    """
+    cfg = DEFAULT_REGIME_CONFIG if config is None else {**DEFAULT_REGIME_CONFIG, **config}
+    ix = _REGIME_INDEX
+
+    if volatility_ratio > cfg['volatility_ratio_high']:
+        volatility_vote = ix['high_volatility']
+    elif volatility_ratio < cfg['volatility_ratio_low']:
+        volatility_vote = ix['low_volatility']
+    else:
+        volatility_vote = ix['ranging']
+
+    strength = abs(trend_strength)
+    if strength > cfg['trend_strength_threshold']:
+        trend_vote = ix['trending_up'] if trend_strength > 0 else ix['trending_down']
+    elif strength < cfg['ranging_threshold']:
+        trend_vote = ix['ranging']
+    else:
+        trend_vote = ix['consolidation']
+
+    impulse = abs(momentum)
+    if impulse > cfg['breakout_threshold'] and (volume_ratio > cfg['breakout_volume_ratio']
+                                                or fvg_density >= cfg['breakout_fvg_density']):
+        momentum_vote = ix['breakout']
+    elif impulse > cfg['reversal_threshold'] and volume_ratio < cfg['reversal_volume_ratio']:
+        momentum_vote = ix['reversal']
+    else:
+        momentum_vote = ix['consolidation']
+
+    winner, confidence, probability = _COMBINATIONS[(volatility_vote, trend_vote, momentum_vote)]
+    return {
+        'regime': REGIMES[winner],
+        'confidence': confidence,
+        'probability': probability,
+        'volatility_regime': REGIMES[volatility_vote],
+        'trend_regime': REGIMES[trend_vote],
+        'momentum_regime': REGIMES[momentum_vote]
+    }
+
+
+def classify_regimes(volatility_ratio: np.ndarray, trend_strength: np.ndarray,
+                     momentum: np.ndarray, volume_ratio: np.ndarray, fvg_density: np.ndarray,
+                     config: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Clasificar el régimen de cada vela a partir de sus indicadores
+
+    Args:
+        volatility_ratio: Volatilidad corta / volatilidad de referencia
+        trend_strength: Correlación precio-tiempo (-1 a 1)
+        momentum: Desplazamiento en unidades de volatilidad
+        volume_ratio: Volumen / volumen medio
+        fvg_density: Fracción de velas que formaron un FVG
+        config: Umbrales (por defecto DEFAULT_REGIME_CONFIG)
+
+    Returns:
+        dict: regime, confidence (1-4), probability y los tres votos
+    """
+    cfg = {**DEFAULT_REGIME_CONFIG, **(config or {})}
+    regimes = np.array(REGIMES, dtype=object)
+    ix = _REGIME_INDEX
+
+    volatility_vote = np.select(
+        [volatility_ratio > cfg['volatility_ratio_high'], volatility_ratio < cfg['volatility_ratio_low']],
+        [ix['high_volatility'], ix['low_volatility']], ix['ranging']
+    )
+    strength = np.abs(trend_strength)
+    trend_vote = np.select(
+        [(strength > cfg['trend_strength_threshold']) & (trend_strength > 0),
+         strength > cfg['trend_strength_threshold'],
+         strength < cfg['ranging_threshold']],
+        [ix['trending_up'], ix['trending_down'], ix['ranging']], ix['consolidation']
+    )
+    impulse = np.abs(momentum)
+    momentum_vote = np.select(
+        [(impulse > cfg['breakout_threshold'])
+         & ((volume_ratio > cfg['breakout_volume_ratio']) | (fvg_density >= cfg['breakout_fvg_density'])),
+         (impulse > cfg['reversal_threshold']) & (volume_ratio < cfg['reversal_volume_ratio'])],
+        [ix['breakout'], ix['reversal']], ix['consolidation']
+    )
+
+    # Tabla de combinaciones indexada por los tres votos
+    size = len(REGIMES)
+    table = _COMBINATION_TABLE
+    combo = (volatility_vote * size + trend_vote) * size + momentum_vote
+    winner = table[combo, 0].astype(int)
+
+    return {
+        'regime': regimes[winner],
+        'confidence': table[combo, 1].astype(int),
+        'probability': table[combo, 2],
+        'volatility_regime': regimes[volatility_vote],
+        'trend_regime': regimes[trend_vote],
+        'momentum_regime': regimes[momentum_vote]
+    }
+
+
+def compute_regimes(bars: pd.DataFrame, config: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Indicadores y régimen de cada vela de un histórico (vectorizado)
+
+    Args:
+        bars: Velas con high, low, close y opcionalmente volume/tick_volume
+        config: Ventanas y umbrales (por defecto DEFAULT_REGIME_CONFIG)
+
+    Returns:
+        DataFrame alineado con ``bars``; regime es None durante el calentamiento
+    """
+    cfg = {**DEFAULT_REGIME_CONFIG, **(config or {})}
+    close = bars['close'].astype(float).reset_index(drop=True)
+    high = bars['high'].astype(float).reset_index(drop=True)
+    low = bars['low'].astype(float).reset_index(drop=True)
+    n = len(close)
+
+    returns = close.pct_change()
+    volatility = returns.rolling(cfg['volatility_window']).std()
+    base_volatility = returns.rolling(cfg['volatility_base_window']).std()
+
+    window = cfg['trend_window']
+    position = pd.Series(np.arange(n, dtype=float))
+    trend_strength = close.rolling(window).corr(position)
+    x_std = np.sqrt(window * (window + 1) / 12.0)  # Desviación muestral de 0..w-1
+    trend_slope = trend_strength * close.rolling(window).std() / x_std / close
+
+    m = cfg['momentum_period']
+    momentum = (close - close.shift(m)) / (close.shift(m) * volatility * np.sqrt(m))
+
+    volume_col = 'volume' if 'volume' in bars else ('tick_volume' if 'tick_volume' in bars else None)
+    if volume_col:
+        volume = bars[volume_col].astype(float).reset_index(drop=True)
+        volume_ratio = volume / volume.rolling(cfg['volatility_window']).mean()
+    else:
+        volume_ratio = pd.Series(np.ones(n))
+
+    fvg = ((low > high.shift(2)) | (high < low.shift(2))).astype(float)
+    fvg_density = fvg.rolling(cfg['fvg_window'], min_periods=1).mean()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility_ratio = np.where(base_volatility > 0, volatility / base_volatility, np.nan)
+    frame = pd.DataFrame({
+        'volatility': volatility.to_numpy(),
+        'volatility_ratio': volatility_ratio,
+        'trend_slope': trend_slope.to_numpy(),
+        'trend_strength': trend_strength.fillna(0.0).to_numpy(),
+        'momentum': momentum.replace([np.inf, -np.inf], np.nan).fillna(0.0).to_numpy(),
+        'volume_ratio': volume_ratio.replace([np.inf, -np.inf], np.nan).fillna(1.0).to_numpy(),
+        'fvg_density': fvg_density.to_numpy()
+    }, index=bars.index)
+
+    labels = classify_regimes(
+        np.nan_to_num(frame['volatility_ratio'].to_numpy(), nan=1.0), frame['trend_strength'].to_numpy(),
+        frame['momentum'].to_numpy(), frame['volume_ratio'].to_numpy(), frame['fvg_density'].to_numpy(), cfg
+    )
+    warm = np.arange(n) >= _warmup_bars(cfg) - 1
+    for key, values in labels.items():
+        frame[key] = np.where(warm, values, None) if values.dtype == object else np.where(warm, values, np.nan)
+    return frame
+
+
+def _warmup_bars(cfg: Dict[str, float]) -> int:
+    """Velas necesarias para que todos los indicadores estén definidos"""
+    return max(cfg['volatility_base_window'], cfg['trend_window'], cfg['momentum_period']) + 1
+
+
+class _RollingSum:
+    """Suma y suma de cuadrados de los últimos ``window`` valores"""
+
+    __slots__ = ('window', 'values', 'total', 'total_sq')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value: float):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else np.nan
+
+    def std(self) -> float:
+        """Desviación muestral (ddof=1), como pandas"""
+        count = len(self.values)
+        if count < 2:
+            return np.nan
+        variance = (self.total_sq - self.total * self.total / count) / (count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def resync(self):
+        """Recalcular las sumas para limitar el error acumulado"""
+        self.total = float(sum(self.values))
+        self.total_sq = float(sum(v * v for v in self.values))
+
+
+class RegimeState:
+    """
+    Régimen de mercado incremental de un símbolo y timeframe
+
+    Args:
+        symbol: Símbolo
+        timeframe: Timeframe ('M15', 'H1'...)
+        config: Ventanas y umbrales (sobre DEFAULT_REGIME_CONFIG)
+        min_interval: Segundos mínimos entre consultas al terminal en refresh()
+        resync_every: Velas entre recálculos completos de las sumas deslizantes
+    """
+
+    def __init__(self, symbol: str, timeframe: str = 'H1', config: Optional[Dict[str, float]] = None,
+                 min_interval: float = 5.0, resync_every: int = 1000):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.config = {**DEFAULT_REGIME_CONFIG, **(config or {})}
+        self.min_interval = min_interval
+        self.resync_every = resync_every
+        self.tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 3600)
+        self.warmup_bars = _warmup_bars(self.config)
+        self._lock = threading.RLock()
+        self._last_refresh: Optional[float] = None
+        self.stats = {'bars': 0, 'refreshes': 0, 'fetches': 0, 'reloads': 0, 'regime_changes': 0}
+        self.reset()
+
+    def reset(self):
+        """Vaciar el estado (se reconstruye con las siguientes velas)"""
+        cfg = self.config
+        with self._lock:
+            self._bars = 0
+            self._closes: deque = deque(maxlen=max(cfg['trend_window'], cfg['momentum_period'] + 1))
+            self._highs: deque = deque(maxlen=3)
+            self._lows: deque = deque(maxlen=3)
+            self._returns = _RollingSum(cfg['volatility_window'])
+            self._base_returns = _RollingSum(cfg['volatility_base_window'])
+            self._volumes = _RollingSum(cfg['volatility_window'])
+            self._fvgs = _RollingSum(cfg['fvg_window'])
+            self._trend = _RollingSum(cfg['trend_window'])
+            self._trend_xy = 0.0  # Σ x·y con x = posición en la ventana
+            self._offset: Optional[float] = None  # Centrado de precios para las sumas
+            self.last_bar_time: Optional[int] = None
+            self.forming_bar_time: Optional[int] = None
+            self.indicators: Dict[str, float] = {}
+            self.regime: Optional[str] = None
+            self.confidence: Optional[int] = None
+            self.probability: Optional[float] = None
+            self.votes: Dict[str, str] = {}
+            self.regime_since: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """True cuando todos los indicadores tienen su ventana completa"""
+        return self._bars >= self.warmup_bars
+
+    # ========================================================================
+    # 🕯️ ACTUALIZACIÓN POR VELA CERRADA
+    # ========================================================================
+
+    def update(self, bar_time: int, high: float, low: float, close: float,
+               volume: Optional[float] = None) -> bool:
+        """
+        Incorporar una vela cerrada y reclasificar el régimen
+
+        Las velas con tiempo igual o anterior a la última procesada se
+        ignoran, por lo que volver a pasar las mismas velas es inocuo.
+
+        Returns:
+            bool: True si la vela era nueva
+        """
+        bar_time = int(bar_time)
+        with self._lock:
+            if self.last_bar_time is not None and bar_time <= self.last_bar_time:
+                return False
+            self.last_bar_time = bar_time
+            self._bars += 1
+            self.stats['bars'] += 1
+            cfg = self.config
+
+            if self._closes:
+                ret = close / self._closes[-1] - 1.0
+                self._returns.push(ret)
+                self._base_returns.push(ret)
+            self._push_trend(close)
+            self._closes.append(close)
+
+            if volume is not None:
+                self._volumes.push(float(volume))
+            self._highs.append(high)
+            self._lows.append(low)
+            is_fvg = len(self._highs) == 3 and (low > self._highs[0] or high < self._lows[0])
+            self._fvgs.push(1.0 if is_fvg else 0.0)
+
+            if self._bars % self.resync_every == 0:
+                for rolling in (self._returns, self._base_returns, self._volumes, self._fvgs, self._trend):
+                    rolling.resync()
+                self._trend_xy = float(sum(i * y for i, y in enumerate(self._trend.values)))
+
+            self._refresh_indicators(close, cfg)
+            if self.ready:
+                self._classify()
+            return True
+
+    def _push_trend(self, close: float):
+        """Ventana de regresión: desplazar las posiciones al salir la más antigua"""
+        if self._offset is None:
+            self._offset = close
+        y = close - self._offset
+        trend = self._trend
+        if trend.full:
+            oldest = trend.values[0]
+            # Las posiciones bajan 1 al salir y_0: Σxy' = Σxy - (Σy - y_0) + (w-1)·y
+            self._trend_xy -= trend.total - oldest
+            self._trend_xy += (trend.window - 1) * y
+        else:
+            self._trend_xy += len(trend.values) * y
+        trend.push(y)
+
+    def _refresh_indicators(self, close: float, cfg: Dict[str, float]):
+        volatility = self._returns.std()
+        base_volatility = self._base_returns.std()
+
+        trend = self._trend
+        count = len(trend.values)
+        trend_strength, trend_slope = 0.0, np.nan
+        if count >= 2:
+            sum_x = count * (count - 1) / 2.0
+            sum_xx = (count - 1) * count * (2 * count - 1) / 6.0
+            cov = count * self._trend_xy - sum_x * trend.total
+            var_x = count * sum_xx - sum_x * sum_x
+            var_y = count * trend.total_sq - trend.total * trend.total
+            trend_slope = cov / var_x / close
+            if var_y > 0:
+                trend_strength = float(np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0))
+
+        m = cfg['momentum_period']
+        momentum = 0.0
+        if len(self._closes) > m and volatility and volatility > 0:
+            past = self._closes[-m - 1]
+            momentum = (close - past) / (past * volatility * np.sqrt(m))
+
+        volume_ratio = 1.0
+        volume_mean = self._volumes.mean()
+        if self._volumes.values and volume_mean > 0:
+            volume_ratio = self._volumes.values[-1] / volume_mean
+
+        self.indicators = {
+            'volatility': volatility,
+            'volatility_ratio': volatility / base_volatility if base_volatility > 0 else np.nan,
+            'trend_slope': trend_slope,
+            'trend_strength': trend_strength,
+            'momentum': float(momentum),
+            'volume_ratio': float(volume_ratio),
+            'fvg_density': self._fvgs.mean()
+        }
+
+    def _classify(self):
+        ind = self.indicators
+        ratio = ind['volatility_ratio']
+        labels = classify_regime(
+            1.0 if np.isnan(ratio) else ratio, ind['trend_strength'], ind['momentum'],
+            ind['volume_ratio'], ind['fvg_density'], self.config
+        )
+        regime = labels.pop('regime')
+        if regime != self.regime:
+            if self.regime is not None:
+                self.stats['regime_changes'] += 1
+            self.regime_since = self.last_bar_time
+        self.regime = regime
+        self.confidence = labels.pop('confidence')
+        self.probability = labels.pop('probability')
+        self.votes = labels
+
+    def apply_rates(self, rates: Any) -> int:
+        """
+        Incorporar velas cerradas desde un array de MT5 o un DataFrame
+
+        Args:
+            rates: Estructura con columnas time (o datetime), high, low, close
+                y opcionalmente tick_volume/volume, de la más antigua a la
+                más reciente
+
+        Returns:
+            int: Velas nuevas incorporadas
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+        names = rates.dtype.names if hasattr(rates, 'dtype') and rates.dtype.names else rates.columns
+        times = np.asarray(rates['time'] if 'time' in names else rates['datetime'])
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype('datetime64[s]').astype(np.int64)
+        volume_col = 'tick_volume' if 'tick_volume' in names else ('volume' if 'volume' in names else None)
+        volumes = (np.asarray(rates[volume_col], dtype=float).tolist() if volume_col
+                   else [None] * len(times))
+
+        added = 0
+        with self._lock:
+            for bar_time, high, low, close, volume in zip(
+                    times.tolist(), np.asarray(rates['high'], dtype=float).tolist(),
+                    np.asarray(rates['low'], dtype=float).tolist(),
+                    np.asarray(rates['close'], dtype=float).tolist(), volumes):
+                added += self.update(bar_time, high, low, close, volume)
+        return added
+
+    def refresh(self, loader: Optional[Callable[[int], Any]] = None, force: bool = False) -> bool:
+        """
+        Traer del terminal las velas cerradas nuevas
+
+        Pide las 3 últimas velas (la última está en formación). Si la más
+        antigua ya es posterior a la última procesada faltan velas y se
+        recarga la ventana de calentamiento completa.
+
+        Args:
+            loader: Callable(count) → rates de las últimas ``count`` velas
+                (por defecto ``mt5.copy_rates_from_pos``)
+            force: Ignorar ``min_interval``
+
+        Returns:
+            bool: True si se incorporó alguna vela nueva
+        """
+        loader = loader or self._mt5_loader
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.min_interval:
+                return False
+            self._last_refresh = now
+            self.stats['refreshes'] += 1
+
+            full_count = self.warmup_bars + 1
+            rates = self._fetch(loader, full_count if not self.ready else 3)
+            if rates is None or len(rates) < 2:
+                return False
+
+            if self.ready and int(rates['time'][0]) > self.last_bar_time:
+                rates = self._fetch(loader, full_count)
+                if rates is None or len(rates) < 2:
+                    return False
+                self.reset()
+                self.stats['reloads'] += 1
+
+            self.forming_bar_time = int(rates['time'][-1])
+            return self.apply_rates(rates[:-1]) > 0
+
+    def _fetch(self, loader: Callable[[int], Any], count: int) -> Any:
+        self.stats['fetches'] += 1
+        try:
+            return loader(count)
+        except Exception:
+            return None
+
+    def _mt5_loader(self, count: int) -> Any:
+        if not MT5_AVAILABLE:
+            return None
+        timeframe = getattr(mt5, f"TIMEFRAME_{self.timeframe}", mt5.TIMEFRAME_H1)
+        return mt5.copy_rates_from_pos(self.symbol, timeframe, 0, count)
+
+    # ========================================================================
+    # 🔎 CONSULTA O(1)
+    # ========================================================================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Régimen actual con sus indicadores
+
+        Returns:
+            dict: regime, confidence, probability, votos, indicadores y tiempos
+        """
+        with self._lock:
+            snapshot = {
+                'regime': self.regime,
+                'confidence': self.confidence,
+                'probability': self.probability,
+                'regime_since': self.regime_since,
+                'last_bar_time': self.last_bar_time,
+                'forming_bar_time': self.forming_bar_time,
+                'ready': self.ready
+            }
+            snapshot.update(self.votes)
+            snapshot.update(self.indicators)
+            return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats.update({'symbol': self.symbol, 'timeframe': self.timeframe, 'ready': self.ready})
+        return stats
+
+
+# Estados compartidos por todos los componentes del proceso
+_shared_states: Dict[Tuple[str, str], RegimeState] = {}
+_shared_lock = threading.Lock()
+
+
+def get_regime_state(symbol: str, timeframe: str = 'H1', **options) -> RegimeState:
+    """
+    Obtener el RegimeState compartido de (símbolo, timeframe)
+
+    Args:
+        symbol: Símbolo
+        timeframe: Timeframe
+        **options: Argumentos de RegimeState (solo se usan en la primera llamada)
+
+    Returns:
+        RegimeState: Instancia compartida
+    """
+    key = (symbol, timeframe)
+    with _shared_lock:
+        state = _shared_states.get(key)
+        if state is None:
+            state = _shared_states[key] = RegimeState(symbol, timeframe, **options)
+        return state
@@ -0,0 +1,323 @@
+"""
+RunningStats - Acumuladores de métricas O(1)
+============================================
+
+Acumuladores incrementales para las métricas de rendimiento de los
+PerformanceTracker (tiempo real y AnalyticsManager). Cada trade o retorno
+nuevo actualiza las métricas en O(1), sin volver a recorrer el historial:
+
+- ``RunningStats``: media y varianza de Welford, mínimo, máximo y suma
+- ``RollingStats``: media/varianza de una ventana deslizante (sumas que
+  entran y salen) con la semivarianza de los valores negativos
+- ``StreakCounter``: rachas actuales y máximas de ganadoras/perdedoras
+- ``RunningDrawdown``: pico y drawdown máximo de una serie acumulada
+- ``TradeStatsAccumulator``: todo lo anterior sobre el P&L de los trades
+
+``TradeStatsAccumulator.verify`` y ``RollingStats.resync`` recalculan
+desde los valores originales para medir (y corregir) la deriva numérica.
+El recálculo no repite la actualización incremental: sumas con
+``math.fsum``, varianza en dos pasadas y rachas y drawdown recorriendo la
+serie con suma compensada.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import math
+from collections import deque
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class RunningStats:
+    """Media, varianza (Welford), extremos y suma de una serie"""
+
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max', 'total')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+
+    def push(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def variance(self, ddof: int = 0) -> float:
+        return self._m2 / (self.count - ddof) if self.count > ddof else 0.0
+
+    def std(self, ddof: int = 0) -> float:
+        return math.sqrt(max(self.variance(ddof), 0.0))
+
+
+class RollingStats:
+    """
+    Media y desviación de los últimos ``window`` valores
+
+    Args:
+        window: Tamaño de la ventana
+        resync_every: Valores entre recálculos completos de las sumas
+    """
+
+    def __init__(self, window: int, resync_every: int = 1000):
+        self.values: deque = deque(maxlen=window)
+        self.resync_every = resync_every
+        self._sum = 0.0
+        self._sq_sum = 0.0
+        self._neg_count = 0
+        self._neg_sum = 0.0
+        self._neg_sq_sum = 0.0
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            self._add(self.values[0], -1)
+        self.values.append(value)
+        self._add(value, +1)
+        self._pushes += 1
+        if self._pushes % self.resync_every == 0:
+            self.resync()
+
+    def _add(self, value: float, sign: int):
+        self._sum += sign * value
+        self._sq_sum += sign * value * value
+        if value < 0:
+            self._neg_count += sign
+            self._neg_sum += sign * value
+            self._neg_sq_sum += sign * value * value
+
+    @staticmethod
+    def _std(count: int, total: float, sq_total: float) -> float:
+        if count == 0:
+            return 0.0
+        mean = total / count
+        return math.sqrt(max(sq_total / count - mean * mean, 0.0))
+
+    def mean(self) -> float:
+        return self._sum / len(self.values) if self.values else 0.0
+
+    def std(self) -> float:
+        """Desviación poblacional (``np.std``) de la ventana"""
+        return self._std(len(self.values), self._sum, self._sq_sum)
+
+    @property
+    def downside_count(self) -> int:
+        return self._neg_count
+
+    def downside_std(self) -> float:
+        """Desviación poblacional de los valores negativos de la ventana"""
+        return self._std(self._neg_count, self._neg_sum, self._neg_sq_sum)
+
+    def resync(self) -> float:
+        """
+        Recalcular las sumas desde la ventana
+
+        Returns:
+            float: Deriva absoluta máxima corregida
+        """
+        values = list(self.values)
+        negatives = [v for v in values if v < 0]
+        exact = (math.fsum(values), math.fsum(v * v for v in values),
+                 math.fsum(negatives), math.fsum(v * v for v in negatives))
+        drift = max(abs(a - b) for a, b in zip(exact, (self._sum, self._sq_sum, self._neg_sum, self._neg_sq_sum)))
+        self._sum, self._sq_sum, self._neg_sum, self._neg_sq_sum = exact
+        self._neg_count = len(negatives)
+        return drift
+
+
+class StreakCounter:
+    """Rachas consecutivas de ganadoras y perdedoras"""
+
+    __slots__ = ('current_wins', 'current_losses', 'max_wins', 'max_losses')
+
+    def __init__(self):
+        self.current_wins = 0
+        self.current_losses = 0
+        self.max_wins = 0
+        self.max_losses = 0
+
+    def push(self, win: bool):
+        if win:
+            self.current_wins += 1
+            self.current_losses = 0
+            self.max_wins = max(self.max_wins, self.current_wins)
+        else:
+            self.current_losses += 1
+            self.current_wins = 0
+            self.max_losses = max(self.max_losses, self.current_losses)
+
+
+class RunningDrawdown:
+    """Pico y drawdown de una serie acumulada (equity, P&L acumulado)"""
+
+    __slots__ = ('peak', 'drawdown', 'max_drawdown', 'max_drawdown_pct')
+
+    def __init__(self, start: float = 0.0):
+        self.peak = start
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.max_drawdown_pct = 0.0
+
+    def push(self, level: float):
+        if level > self.peak:
+            self.peak = level
+        self.drawdown = self.peak - level
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+        if self.peak > 0:
+            self.max_drawdown_pct = max(self.max_drawdown_pct, self.drawdown / self.peak * 100)
+
+
+def exact_stats(values: List[float]) -> RunningStats:
+    """RunningStats calculado en bloque: suma con fsum y varianza en dos pasadas"""
+    stats = RunningStats()
+    if values:
+        stats.count = len(values)
+        stats.total = math.fsum(values)
+        stats.mean = stats.total / stats.count
+        stats._m2 = math.fsum((value - stats.mean) ** 2 for value in values)
+        stats.min = min(values)
+        stats.max = max(values)
+    return stats
+
+
+def scan_streaks(values: List[float]) -> StreakCounter:
+    """Rachas a partir de los tramos consecutivos de ganadoras/perdedoras"""
+    streaks = StreakCounter()
+    runs = [(win, sum(1 for _ in run)) for win, run in groupby(value > 0 for value in values)]
+    streaks.max_wins = max((length for win, length in runs if win), default=0)
+    streaks.max_losses = max((length for win, length in runs if not win), default=0)
+    if runs:
+        win, length = runs[-1]
+        streaks.current_wins, streaks.current_losses = (length, 0) if win else (0, length)
+    return streaks
+
+
+def scan_drawdown(values: List[float]) -> Tuple[RunningDrawdown, float]:
+    """Drawdown del P&L acumulado con suma compensada (Neumaier); devuelve también el acumulado"""
+    drawdown = RunningDrawdown()
+    level = compensation = 0.0
+    for value in values:
+        total = level + value
+        if abs(level) >= abs(value):
+            compensation += (level - total) + value
+        else:
+            compensation += (value - total) + level
+        level = total
+        drawdown.push(level + compensation)
+    return drawdown, level + compensation
+
+
+class TradeStatsAccumulator:
+    """
+    Métricas de trading acumuladas trade a trade
+
+    Una operación con P&L > 0 es ganadora; el resto cuenta como perdedora
+    (criterio de los PerformanceTracker existentes).
+    """
+
+    def __init__(self):
+        self.trades = RunningStats()
+        self.wins = RunningStats()
+        self.losses = RunningStats()
+        self.streaks = StreakCounter()
+        self.drawdown = RunningDrawdown()
+        self.cumulative = 0.0
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'TradeStatsAccumulator':
+        """Recalcular desde cero a partir de los P&L, sin pasar por ``add``"""
+        values = list(values)
+        accumulator = cls()
+        accumulator.trades = exact_stats(values)
+        accumulator.wins = exact_stats([value for value in values if value > 0])
+        accumulator.losses = exact_stats([value for value in values if value <= 0])
+        accumulator.streaks = scan_streaks(values)
+        accumulator.drawdown, accumulator.cumulative = scan_drawdown(values)
+        return accumulator
+
+    def add(self, net_profit: float):
+        self.trades.push(net_profit)
+        (self.wins if net_profit > 0 else self.losses).push(net_profit)
+        self.streaks.push(net_profit > 0)
+        self.cumulative += net_profit
+        self.drawdown.push(self.cumulative)
+
+    def metrics(self) -> Dict[str, float]:
+        """Métricas derivadas (importes en la divisa de la cuenta)"""
+        trades, wins, losses = self.trades, self.wins, self.losses
+        gross_loss = -losses.total
+        std = trades.std(ddof=1)
+        return {
+            "total_trades": trades.count,
+            "winning_trades": wins.count,
+            "losing_trades": losses.count,
+            "gross_profit": wins.total,
+            "gross_loss": gross_loss,
+            "net_profit": trades.total,
+            "win_rate": wins.count / trades.count * 100 if trades.count else 0.0,
+            "profit_factor": wins.total / gross_loss if gross_loss > 0 else 0.0,
+            "average_win": wins.mean if wins.count else 0.0,
+            "average_loss": gross_loss / losses.count if losses.count else 0.0,
+            "largest_win": wins.max if wins.count else 0.0,
+            "largest_loss": min(losses.min, 0.0) if losses.count else 0.0,
+            "average_trade": trades.mean,
+            "trade_std": std,
+            "trade_sharpe": trades.mean / std if std > 0 else 0.0,
+            "consecutive_wins": self.streaks.current_wins,
+            "consecutive_losses": self.streaks.current_losses,
+            "max_consecutive_wins": self.streaks.max_wins,
+            "max_consecutive_losses": self.streaks.max_losses,
+            "max_drawdown": self.drawdown.max_drawdown,
+            "max_drawdown_pct": self.drawdown.max_drawdown_pct
+        }
+
+    def verify(self, values: Iterable[float], tolerance: float = 1e-9) -> Dict[str, float]:
+        """
+        Comparar con un recálculo completo e independiente (``from_values``)
+
+        Args:
+            values: P&L de todos los trades acumulados, en orden
+            tolerance: Diferencia relativa admitida
+
+        Returns:
+            dict: Métricas cuya diferencia supera la tolerancia (vacío si no hay deriva)
+        """
+        running = self.metrics()
+        exact = TradeStatsAccumulator.from_values(values).metrics()
+        drift = {}
+        for name, value in exact.items():
+            difference = abs(running[name] - value)
+            if difference > tolerance * max(1.0, abs(value)):
+                drift[name] = difference
+        return drift
+
+    def resync(self, values: Iterable[float]) -> Dict[str, float]:
+        """Verificar y, si hay deriva, sustituir el estado por el recálculo"""
+        values = list(values)
+        drift = self.verify(values)
+        if drift:
+            fresh = TradeStatsAccumulator.from_values(values)
+            self.__dict__.update(fresh.__dict__)
+        return drift
+
+
+def running_sharpe(stats: RollingStats, periods: int = 252, risk_free_rate: float = 0.0) -> Optional[float]:
+    """Sharpe anualizado de una ventana de retornos por período (None si la desviación es 0)"""
+    std = stats.std()
+    if std <= 0:
+        return None
+    return (stats.mean() - risk_free_rate / periods) / std * math.sqrt(periods)
@@ -0,0 +1,467 @@
+"""
+SeasonalStats - Estadísticas estacionales precalculadas
+=======================================================
+
+Almacén compartido de estadísticas por (símbolo, día de la semana, hora,
+sesión). Sustituye los recorridos bajo demanda de listas de FVGs y precios
+de AdvancedAnalyzer, SessionAnalyzer, el analizador de calidad y el
+predictor ML.
+
+Cada símbolo guarda una tabla de acumuladores ``(campo, 7, 24, sesión)``
+que se actualiza de forma incremental:
+
+- ``update_bars``: retorno logarítmico, retorno², rango relativo de cada
+  vela cerrada nueva (las ya vistas se ignoran)
+- ``record_fvgs`` / ``record_fvg_fill``: FVGs formados y llenados,
+  asignados al bin de su vela de formación
+
+Las lecturas (``bin_stats``, ``stats_at``, ``fill_rates``, ``profile``)
+derivan media, volatilidad, tasa de formación y de llenado de sumas ya
+acumuladas, con coste independiente del histórico. El almacén se
+persiste como ``.npz`` comprimido (una tabla por símbolo): cada cambio lo
+marca como pendiente, se guarda como mucho cada ``autosave_interval``
+segundos y el almacén compartido se guarda también al salir del proceso.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import atexit
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.core.session_calendar import SessionWindow, get_session_calendar
+except ImportError:
+    from session_calendar import SessionWindow, get_session_calendar
+
+# Sesiones por hora UTC (fin inclusivo); el solapamiento London-NY es OVERLAP
+SEASONAL_SESSION_WINDOWS = (
+    SessionWindow.hours('ASIA', 21, 6),
+    SessionWindow.hours('LONDON', 7, 12),
+    SessionWindow.hours('OVERLAP', 13, 16),
+    SessionWindow.hours('NY', 17, 20),
+)
+OFF_SESSION = 'OFF'
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_STATS_PATH = PROJECT_ROOT / "data" / "seasonal" / "seasonal_stats.npz"
+
+# Acumuladores por bin
+FIELDS = ('bars', 'return_sum', 'return_sq_sum', 'range_sum', 'fvg_formed', 'fvg_filled')
+_F = {name: i for i, name in enumerate(FIELDS)}
+
+WEEKDAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+PROFILE_AXES = ('weekday', 'hour', 'session')
+
+_DAY_SECONDS = 86400
+
+
+def _bar_frame(bars: Any) -> Optional[pd.DataFrame]:
+    """Velas (rates de MT5 o DataFrame de DataManager) con columna epoch ``time`` en segundos"""
+    if bars is None or len(bars) == 0:
+        return None
+    frame = pd.DataFrame(bars)
+    if 'time' in frame:
+        times = frame['time']
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+    elif 'datetime' in frame:
+        times = pd.to_datetime(frame['datetime']).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    else:
+        times = pd.DatetimeIndex(frame.index).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    frame = frame.assign(time=np.asarray(times, dtype=np.int64))
+    return frame.sort_values('time', kind='stable')
+
+
+def derive_stats(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Derivar estadísticas de acumuladores (primer eje = FIELDS)
+
+    Args:
+        counts: Sumas con forma (len(FIELDS), ...)
+
+    Returns:
+        dict: bars, mean_return, volatility, average_range, fvg_count,
+        fvg_rate, fill_rate y t_stat con la forma de los bins (NaN sin datos)
+    """
+    bars, return_sum, return_sq_sum, range_sum, formed, filled = counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = return_sum / bars
+        volatility = np.sqrt(np.maximum(return_sq_sum / bars - mean ** 2, 0.0))
+        return {
+            'bars': bars,
+            'mean_return': mean,
+            'volatility': volatility,
+            'average_range': range_sum / bars,
+            'fvg_count': formed,
+            'fvg_rate': formed / bars,
+            'fill_rate': filled / formed,
+            't_stat': np.where(volatility > 0, mean / (volatility / np.sqrt(bars)), np.nan)
+        }
+
+
+class SeasonalStatsStore:
+    """
+    Estadísticas estacionales incrementales por símbolo
+
+    Args:
+        windows: Sesiones del eje de sesión (en orden de prioridad)
+        naive_tz: Zona de los datetimes sin zona
+        min_samples: Muestras mínimas de un bin antes de usarlo en lecturas
+            con respaldo (``stats_at``, ``fill_rates``)
+        path: Fichero ``.npz`` de persistencia; se carga al crear el almacén
+            si existe (None = solo en memoria)
+        autosave_interval: Segundos mínimos entre guardados automáticos tras
+            un cambio (None = solo guardados explícitos)
+    """
+
+    def __init__(self, windows: Sequence[SessionWindow] = SEASONAL_SESSION_WINDOWS,
+                 naive_tz: str = 'UTC', min_samples: int = 20,
+                 path: Optional[Union[str, Path]] = DEFAULT_STATS_PATH,
+                 autosave_interval: Optional[float] = 300.0):
+        self.calendar = get_session_calendar(windows, naive_tz=naive_tz)
+        self.sessions = tuple(self.calendar.names) + (OFF_SESSION,)
+        self.min_samples = min_samples
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+
+        self._tables: Dict[str, np.ndarray] = {}
+        self._last_time: Dict[str, int] = {}
+        self._last_close: Dict[str, float] = {}
+        self.autosave_interval = autosave_interval
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.stats = {'bars': 0, 'fvgs': 0, 'fills': 0, 'lookups': 0, 'saves': 0}
+
+        if self.path and self.path.exists():
+            self.load(self.path)
+
+    # ========================================================================
+    # 🗂️ BINS
+    # ========================================================================
+
+    @property
+    def shape(self) -> tuple:
+        return (len(FIELDS), 7, 24, len(self.sessions))
+
+    def _table(self, symbol: str) -> np.ndarray:
+        table = self._tables.get(symbol)
+        if table is None:
+            table = self._tables[symbol] = np.zeros(self.shape)
+        return table
+
+    def bin_index(self, epochs: np.ndarray) -> np.ndarray:
+        """Índice plano (día, hora, sesión) de cada instante"""
+        epochs = np.asarray(epochs, dtype=np.int64)
+        weekday = (epochs // _DAY_SECONDS + 3) % 7  # 1970-01-01 fue jueves
+        hour = (epochs % _DAY_SECONDS) // 3600
+        labels = self.calendar.label(epochs)
+        session = np.full(len(epochs), len(self.sessions) - 1)
+        for i, name in enumerate(self.calendar.names):
+            session[labels == name] = i
+        return (weekday * 24 + hour) * len(self.sessions) + session
+
+    def _accumulate(self, symbol: str, field: str, index: np.ndarray, weights: Optional[np.ndarray] = None):
+        flat = self._table(symbol).reshape(len(FIELDS), -1)
+        flat[_F[field]] += np.bincount(index, weights=weights, minlength=flat.shape[1])
+
+    # ========================================================================
+    # 🕯️ ALIMENTACIÓN
+    # ========================================================================
+
+    def update_bars(self, symbol: str, bars: Any) -> int:
+        """
+        Acumular las velas cerradas nuevas de un símbolo
+
+        Args:
+            symbol: Símbolo
+            bars: Rates de MT5 o DataFrame con time/datetime, high, low, close
+
+        Returns:
+            int: Velas nuevas acumuladas
+        """
+        frame = _bar_frame(bars)
+        if frame is None:
+            return 0
+
+        with self._lock:
+            last_time = self._last_time.get(symbol)
+            if last_time is not None:
+                frame = frame[frame['time'] > last_time]
+            if frame.empty:
+                return 0
+
+            times = frame['time'].to_numpy()
+            closes = frame['close'].to_numpy(dtype=float)
+            previous = np.concatenate(([self._last_close.get(symbol, np.nan)], closes[:-1]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.log(closes / previous)
+                ranges = (frame['high'].to_numpy(dtype=float) - frame['low'].to_numpy(dtype=float)) / closes
+            valid = np.isfinite(returns) & np.isfinite(ranges)
+
+            index = self.bin_index(times[valid])
+            self._accumulate(symbol, 'bars', index)
+            self._accumulate(symbol, 'return_sum', index, returns[valid])
+            self._accumulate(symbol, 'return_sq_sum', index, returns[valid] ** 2)
+            self._accumulate(symbol, 'range_sum', index, ranges[valid])
+
+            self._last_time[symbol] = int(times[-1])
+            self._last_close[symbol] = float(closes[-1])
+            self.stats['bars'] += int(valid.sum())
+            self._changed()
+            return int(valid.sum())
+
+    def record_fvgs(self, symbol: str, formation_times: Any, filled: Optional[Sequence[bool]] = None) -> int:
+        """
+        Registrar FVGs formados (y opcionalmente su resultado)
+
+        Args:
+            symbol: Símbolo
+            formation_times: Instantes de formación (datetime, epoch o columna)
+            filled: Máscara de FVGs ya llenados (cargas históricas)
+
+        Returns:
+            int: FVGs registrados
+        """
+        epochs = self.calendar.to_epoch_array(np.atleast_1d(np.asarray(formation_times)))
+        if len(epochs) == 0:
+            return 0
+        with self._lock:
+            index = self.bin_index(epochs)
+            self._accumulate(symbol, 'fvg_formed', index)
+            self.stats['fvgs'] += len(index)
+            if filled is not None:
+                mask = np.asarray(filled, dtype=bool)
+                self._accumulate(symbol, 'fvg_filled', index[mask])
+                self.stats['fills'] += int(mask.sum())
+            self._changed()
+        return len(epochs)
+
+    def record_fvg_fill(self, symbol: str, formation_time: Any):
+        """Registrar el llenado de un FVG (en el bin de su formación)"""
+        with self._lock:
+            index = self.bin_index(np.array([self.calendar.to_epoch(formation_time)]))
+            self._accumulate(symbol, 'fvg_filled', index)
+            self.stats['fills'] += 1
+            self._changed()
+
+    # ========================================================================
+    # 📊 LECTURAS
+    # ========================================================================
+
+    def symbols(self) -> list:
+        return list(self._tables)
+
+    def last_bar_time(self, symbol: str) -> Optional[int]:
+        return self._last_time.get(symbol)
+
+    def sample_size(self, symbol: str) -> int:
+        table = self._tables.get(symbol)
+        return int(table[_F['bars']].sum()) if table is not None else 0
+
+    def bin_stats(self, symbol: str, weekday: Optional[int] = None, hour: Optional[Union[int, Sequence[int]]] = None,
+                  session: Optional[str] = None) -> Dict[str, float]:
+        """
+        Estadísticas de un bin; los ejes omitidos se agregan
+
+        Args:
+            symbol: Símbolo
+            weekday: Día de la semana (0=lunes)
+            hour: Hora UTC o lista de horas (ventana de sesión)
+            session: Nombre de sesión
+
+        Returns:
+            dict: Estadísticas derivadas (``derive_stats``) como floats
+        """
+        self.stats['lookups'] += 1
+        table = self._tables.get(symbol)
+        if table is None:
+            return {name: np.nan for name in derive_stats(np.zeros(len(FIELDS)))}
+        selection = (slice(None),
+                     slice(None) if weekday is None else weekday,
+                     slice(None) if hour is None else hour,
+                     slice(None) if session is None else self.sessions.index(session))
+        counts = table[selection].reshape(len(FIELDS), -1).sum(axis=1)
+        return {name: float(value) for name, value in derive_stats(counts).items()}
+
+    def stats_at(self, symbol: str, when: Any = None) -> Dict[str, float]:
+        """
+        Estadísticas del bin día/hora de un instante
+
+        Si el bin tiene menos de ``min_samples`` velas se usa el perfil de la
+        hora (todos los días).
+        """
+        epoch = self.calendar.to_epoch(when)
+        weekday = (epoch // _DAY_SECONDS + 3) % 7
+        hour = (epoch % _DAY_SECONDS) // 3600
+        stats = self.bin_stats(symbol, weekday, hour)
+        if not stats['bars'] >= self.min_samples:
+            stats = self.bin_stats(symbol, hour=hour)
+        return stats
+
+    def fill_rates(self, symbol: str, formation_times: Any, min_fvgs: Optional[int] = None) -> np.ndarray:
+        """
+        Tasa histórica de llenado del bin de formación de cada FVG
+
+        Bins día/hora con menos de ``min_fvgs`` FVGs usan el perfil de la
+        hora; si tampoco llega la muestra el resultado es NaN.
+
+        Args:
+            symbol: Símbolo
+            formation_times: Instantes de formación
+            min_fvgs: FVGs mínimos por bin (por defecto ``min_samples``)
+
+        Returns:
+            np.ndarray: Tasa de llenado por FVG (0-1 o NaN)
+        """
+        epochs = self.calendar.to_epoch_array(np.atleast_1d(np.asarray(formation_times)))
+        table = self._tables.get(symbol)
+        if table is None or len(epochs) == 0:
+            return np.full(len(epochs), np.nan)
+        min_fvgs = self.min_samples if min_fvgs is None else min_fvgs
+
+        weekday = (epochs // _DAY_SECONDS + 3) % 7
+        hour = (epochs % _DAY_SECONDS) // 3600
+        outcomes = table[[_F['fvg_formed'], _F['fvg_filled']]].sum(axis=3)  # (2, 7, 24)
+        by_hour = outcomes.sum(axis=1)                                         # (2, 24)
+
+        formed, filled = outcomes[0, weekday, hour], outcomes[1, weekday, hour]
+        thin = formed < min_fvgs
+        formed = np.where(thin, by_hour[0, hour], formed)
+        filled = np.where(thin, by_hour[1, hour], filled)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(formed >= min_fvgs, filled / formed, np.nan)
+
+    def profile(self, symbol: str, by: str = 'hour') -> pd.DataFrame:
+        """
+        Perfil estacional agregado por un eje
+
+        Args:
+            symbol: Símbolo
+            by: 'weekday', 'hour' o 'session'
+
+        Returns:
+            pd.DataFrame: Una fila por valor del eje y una columna por estadística
+        """
+        axis = PROFILE_AXES.index(by) + 1
+        labels = {'weekday': WEEKDAYS, 'hour': range(24), 'session': self.sessions}[by]
+        table = self._tables.get(symbol)
+        if table is None:
+            table = np.zeros(self.shape)
+        others = tuple(a for a in (1, 2, 3) if a != axis)
+        counts = table.sum(axis=others)
+        return pd.DataFrame(derive_stats(counts), index=pd.Index(list(labels), name=by))
+
+    # ========================================================================
+    # 💾 PERSISTENCIA
+    # ========================================================================
+
+    def _changed(self):
+        """Marcar cambios pendientes y guardar si venció el intervalo de autoguardado"""
+        self._dirty = True
+        if (self.path and self.autosave_interval is not None
+                and time.monotonic() - self._last_save >= self.autosave_interval):
+            try:
+                self.save()
+            except OSError:
+                pass  # Se reintenta con el siguiente cambio
+
+    def flush(self) -> bool:
+        """
+        Guardar si hay cambios pendientes
+
+        Returns:
+            bool: True si se escribió el fichero
+        """
+        if not self.path or not self._dirty:
+            return False
+        self.save()
+        return True
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> Path:
+        """Guardar todas las tablas en un ``.npz`` comprimido"""
+        path = Path(path or self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            symbols = list(self._tables)
+            arrays = {f'table_{i}': self._tables[s] for i, s in enumerate(symbols)}
+            np.savez_compressed(
+                path,
+                symbols=np.array(symbols, dtype=str),
+                sessions=np.array(self.sessions, dtype=str),
+                last_time=np.array([self._last_time.get(s, -1) for s in symbols], dtype=np.int64),
+                last_close=np.array([self._last_close.get(s, np.nan) for s in symbols]),
+                **arrays
+            )
+            if path == self.path:
+                self._dirty = False
+                self._last_save = time.monotonic()
+            self.stats['saves'] += 1
+        return path
+
+    def load(self, path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Cargar tablas guardadas con ``save``
+
+        Returns:
+            int: Símbolos cargados (0 si las sesiones no coinciden)
+        """
+        with np.load(Path(path or self.path)) as data:
+            if tuple(data['sessions']) != self.sessions:
+                return 0
+            with self._lock:
+                for i, symbol in enumerate(data['symbols']):
+                    symbol = str(symbol)
+                    self._tables[symbol] = data[f'table_{i}'].astype(float)
+                    if data['last_time'][i] >= 0:
+                        self._last_time[symbol] = int(data['last_time'][i])
+                    if np.isfinite(data['last_close'][i]):
+                        self._last_close[symbol] = float(data['last_close'][i])
+                return len(data['symbols'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['symbols'] = len(self._tables)
+        stats['sessions'] = len(self.sessions)
+        stats['bytes'] = sum(table.nbytes for table in self._tables.values())
+        stats['unsaved_changes'] = self._dirty
+        return stats
+
+
+# Almacén compartido por analizadores, predictor y gestor de sesiones
+_shared_store: Optional[SeasonalStatsStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_seasonal_stats(**options) -> SeasonalStatsStore:
+    """
+    Obtener el SeasonalStatsStore compartido del proceso
+
+    Args:
+        **options: Argumentos de SeasonalStatsStore (solo se usan en la primera llamada)
+
+    Returns:
+        SeasonalStatsStore: Instancia compartida
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = SeasonalStatsStore(**options)
+        return _shared_store
+
+
+@atexit.register
+def _save_shared_store():
+    """Guardar los cambios pendientes del almacén compartido al salir"""
+    if _shared_store is not None:
+        try:
+            _shared_store.flush()
+        except OSError:
+            pass
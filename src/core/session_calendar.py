@@ -0,0 +1,303 @@
+"""
+SessionCalendar - Calendario de sesiones con transiciones precalculadas
+=======================================================================
+
+Servicio compartido para resolver la sesión de trading de un instante.
+Sustituye las comparaciones de horas de reloj repartidas por el sistema
+(SessionManager, ConfigManager, detectores multi-timeframe, predictor ML,
+analizadores de calidad y de sesiones, trading_schedule).
+
+Cada sesión se define con una ``SessionWindow`` (hora de inicio/fin en su
+zona horaria y días de apertura). El calendario precalcula los límites de
+cada sesión como arrays ordenados de timestamps UTC, resolviendo los
+cambios de horario (DST) al localizar cada día, y a partir de ahí:
+
+- ``session_at`` / ``sessions_at``: consulta individual en O(log n)
+- ``label`` / ``mask``: etiquetado vectorizado de columnas completas
+- ``next_transition``: próximo inicio/fin de sesión, para cachear la
+  sesión actual hasta que realmente cambie
+
+El rango precalculado se amplía automáticamente cuando se consultan
+fechas fuera de él (análisis históricos).
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import threading
+import time as _time
+from dataclasses import dataclass
+from datetime import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+TimeLike = Union[str, time]
+
+_DAY_SECONDS = 86400
+
+
+def _epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """DatetimeIndex con zona → segundos UTC (independiente de la resolución)"""
+    return np.asarray(index.tz_convert('UTC').tz_localize(None), dtype='datetime64[s]').astype(np.int64)
+
+
+def _minutes(value: TimeLike) -> int:
+    """Minutos desde medianoche de '08:30' o time(8, 30)"""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, _, minutes = str(value).partition(':')
+    return int(hours) * 60 + int(minutes or 0)
+
+
+@dataclass(frozen=True)
+class SessionWindow:
+    """
+    Definición de una sesión
+
+    Args:
+        name: Nombre de la sesión
+        start: Hora de inicio ('HH:MM' o time) en ``tz``
+        end: Hora de fin exclusiva; si es <= inicio la sesión cruza medianoche
+        tz: Zona horaria de las horas (los cambios DST se respetan)
+        days: Días de la semana (0=lunes) en que abre la sesión; None = todos
+    """
+    name: str
+    start: TimeLike
+    end: TimeLike
+    tz: str = 'UTC'
+    days: Optional[Tuple[int, ...]] = None
+
+    @classmethod
+    def hours(cls, name: str, start_hour: int, end_hour: int, **kwargs) -> 'SessionWindow':
+        """Ventana de horas completas con fin inclusivo (``start <= hour <= end``)"""
+        return cls(name, time(start_hour % 24), time((end_hour + 1) % 24), **kwargs)
+
+
+class _Schedule(NamedTuple):
+    """Límites precalculados de las sesiones en [first_day, last_day] (días UTC)"""
+    first_day: Optional[int]
+    last_day: Optional[int]
+    starts: List[np.ndarray]
+    ends: List[np.ndarray]
+    transitions: np.ndarray
+
+
+class SessionCalendar:
+    """
+    Calendario de sesiones con límites precalculados
+
+    Las ventanas se evalúan en el orden dado: cuando se solapan,
+    ``session_at`` y ``label`` devuelven la primera que coincide.
+
+    Args:
+        windows: Sesiones del calendario
+        naive_tz: Zona con la que se interpretan los datetimes sin zona
+        days_back: Días precalculados hacia atrás desde hoy
+        days_ahead: Días precalculados hacia delante desde hoy
+    """
+
+    def __init__(self, windows: Sequence[SessionWindow], naive_tz: str = 'UTC',
+                 days_back: int = 7, days_ahead: int = 30):
+        self.windows = tuple(windows)
+        self.names = [w.name for w in self.windows]
+        self.naive_tz = naive_tz
+        self._lock = threading.Lock()
+        # Tabla precalculada, publicada de una vez para que las lecturas sin
+        # lock nunca mezclen límites de dos construcciones distintas
+        self._schedule = _Schedule(None, None, [], [], np.empty(0, dtype=np.int64))
+        self.stats = {'builds': 0, 'lookups': 0, 'labeled_rows': 0}
+
+        today = int(_time.time()) // _DAY_SECONDS
+        with self._lock:
+            self._build(today - days_back, today + days_ahead)
+
+    # ========================================================================
+    # 🏗️ PRECÁLCULO
+    # ========================================================================
+
+    def _build(self, first_day: int, last_day: int):
+        """
+        Precalcular los límites de todas las sesiones en [first_day, last_day]
+
+        Se llama con ``_lock`` tomado; la tabla nueva sustituye a la anterior
+        en una única asignación.
+        """
+        # Margen de un día por zonas horarias y sesiones que cruzan medianoche
+        days = pd.to_datetime(np.arange(first_day - 1, last_day + 2), unit='D')
+        starts, ends = [], []
+        for window in self.windows:
+            open_days = days if window.days is None else days[days.weekday.isin(window.days)]
+            start_min = _minutes(window.start)
+            end_min = _minutes(window.end)
+            if end_min <= start_min:
+                end_min += 1440
+            starts.append(self._localize(open_days + pd.to_timedelta(start_min, unit='m'), window.tz))
+            ends.append(self._localize(open_days + pd.to_timedelta(end_min, unit='m'), window.tz))
+
+        transitions = np.unique(np.concatenate(starts + ends)) if starts else np.empty(0, dtype=np.int64)
+        self._schedule = _Schedule(first_day, last_day, starts, ends, transitions)
+        self.stats['builds'] += 1
+
+    @staticmethod
+    def _localize(local_times: pd.DatetimeIndex, tz: str) -> np.ndarray:
+        """Horas locales → epoch UTC; horas inexistentes por DST se desplazan"""
+        localized = local_times.tz_localize(
+            tz, ambiguous=np.zeros(len(local_times), dtype=bool), nonexistent='shift_forward'
+        )
+        return _epoch_seconds(localized)
+
+    def _ensure_range(self, min_ts: int, max_ts: int) -> '_Schedule':
+        """Tabla que cubre [min_ts, max_ts], ampliándola si hace falta"""
+        first = min_ts // _DAY_SECONDS
+        last = max_ts // _DAY_SECONDS
+        schedule = self._schedule
+        if first >= schedule.first_day and last <= schedule.last_day:
+            return schedule
+        with self._lock:
+            schedule = self._schedule
+            if first < schedule.first_day or last > schedule.last_day:
+                self._build(min(first, schedule.first_day), max(last, schedule.last_day))
+            return self._schedule
+
+    # ========================================================================
+    # 🕐 CONVERSIÓN DE TIMESTAMPS
+    # ========================================================================
+
+    def to_epoch(self, value: Any = None) -> int:
+        """Convertir un instante (datetime, Timestamp, str o epoch) a segundos UTC"""
+        if value is None:
+            return int(_time.time())
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return int(value)
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize(self.naive_tz)
+        return int(ts.timestamp())
+
+    def to_epoch_array(self, values: Any) -> np.ndarray:
+        """Convertir una columna de instantes a segundos UTC (int64)"""
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+            return values.astype(np.int64)
+        index = pd.DatetimeIndex(pd.to_datetime(values))
+        if index.tz is None:
+            index = index.tz_localize(self.naive_tz)
+        return _epoch_seconds(index)
+
+    # ========================================================================
+    # 🔎 CONSULTA INDIVIDUAL - O(log n)
+    # ========================================================================
+
+    @staticmethod
+    def _inside(schedule: '_Schedule', i: int, ts: int) -> bool:
+        starts = schedule.starts[i]
+        pos = int(np.searchsorted(starts, ts, side='right')) - 1
+        return pos >= 0 and ts < schedule.ends[i][pos]
+
+    def sessions_at(self, value: Any = None) -> List[str]:
+        """Todas las sesiones abiertas en el instante (por defecto ahora)"""
+        ts = self.to_epoch(value)
+        schedule = self._ensure_range(ts, ts)
+        self.stats['lookups'] += 1
+        return [name for i, name in enumerate(self.names) if self._inside(schedule, i, ts)]
+
+    def session_at(self, value: Any = None, default: Optional[str] = None) -> Optional[str]:
+        """Primera sesión abierta en el instante, o ``default``"""
+        ts = self.to_epoch(value)
+        schedule = self._ensure_range(ts, ts)
+        self.stats['lookups'] += 1
+        for i, name in enumerate(self.names):
+            if self._inside(schedule, i, ts):
+                return name
+        return default
+
+    def is_active(self, names: Iterable[str], value: Any = None) -> bool:
+        """True si alguna de las sesiones indicadas está abierta"""
+        wanted = set(names)
+        return any(name in wanted for name in self.sessions_at(value))
+
+    def next_transition(self, value: Any = None) -> Optional[int]:
+        """Epoch UTC del próximo inicio o fin de cualquier sesión"""
+        ts = self.to_epoch(value)
+        transitions = self._ensure_range(ts, ts + _DAY_SECONDS * 8).transitions
+        pos = int(np.searchsorted(transitions, ts, side='right'))
+        return int(transitions[pos]) if pos < len(transitions) else None
+
+    # ========================================================================
+    # 📊 ETIQUETADO VECTORIZADO
+    # ========================================================================
+
+    def mask(self, name: str, values: Any) -> np.ndarray:
+        """Máscara booleana de los instantes que caen en la sesión ``name``"""
+        epochs = self.to_epoch_array(values)
+        if len(epochs) == 0:
+            return np.zeros(0, dtype=bool)
+        schedule = self._ensure_range(int(epochs.min()), int(epochs.max()))
+        return self._mask(schedule, self.names.index(name), epochs)
+
+    @staticmethod
+    def _mask(schedule: '_Schedule', i: int, epochs: np.ndarray) -> np.ndarray:
+        starts, ends = schedule.starts[i], schedule.ends[i]
+        if len(starts) == 0:
+            return np.zeros(len(epochs), dtype=bool)
+        pos = np.searchsorted(starts, epochs, side='right') - 1
+        return (pos >= 0) & (epochs < ends[np.clip(pos, 0, None)])
+
+    def label(self, values: Any, default: Optional[str] = None) -> np.ndarray:
+        """
+        Etiquetar una columna completa de instantes
+
+        Args:
+            values: Timestamps (Series, DatetimeIndex, lista o epoch)
+            default: Etiqueta fuera de sesión
+
+        Returns:
+            np.ndarray: Nombre de la primera sesión abierta en cada instante
+        """
+        epochs = self.to_epoch_array(values)
+        labels = np.full(len(epochs), default, dtype=object)
+        if len(epochs) == 0:
+            return labels
+        schedule = self._ensure_range(int(epochs.min()), int(epochs.max()))
+        assigned = np.zeros(len(epochs), dtype=bool)
+        for i, name in enumerate(self.names):
+            hits = self._mask(schedule, i, epochs) & ~assigned
+            labels[hits] = name
+            assigned |= hits
+        self.stats['labeled_rows'] += len(epochs)
+        return labels
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['sessions'] = len(self.windows)
+        schedule = self._schedule
+        stats['transitions'] = len(schedule.transitions)
+        stats['days'] = (schedule.last_day - schedule.first_day + 1) if schedule.first_day is not None else 0
+        return stats
+
+
+# Calendarios compartidos por definición de sesiones
+_shared_calendars: Dict[Tuple[Tuple[SessionWindow, ...], str], SessionCalendar] = {}
+_shared_lock = threading.Lock()
+
+
+def get_session_calendar(windows: Sequence[SessionWindow], naive_tz: str = 'UTC',
+                         **options) -> SessionCalendar:
+    """
+    Obtener el SessionCalendar compartido para un conjunto de sesiones
+
+    Args:
+        windows: Sesiones del calendario (en orden de prioridad)
+        naive_tz: Zona de los datetimes sin zona
+        **options: Argumentos de SessionCalendar (solo se usan en la primera llamada)
+
+    Returns:
+        SessionCalendar: Instancia compartida
+    """
+    key = (tuple(windows), naive_tz)
+    with _shared_lock:
+        calendar = _shared_calendars.get(key)
+        if calendar is None:
+            calendar = _shared_calendars[key] = SessionCalendar(windows, naive_tz=naive_tz, **options)
+        return calendar
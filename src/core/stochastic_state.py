@@ -0,0 +1,356 @@
+"""
+StochasticState - Estocástico incremental por (símbolo, timeframe)
+===================================================================
+
+Estado compartido del oscilador estocástico (%K/%D) que se actualiza una
+vez por vela cerrada en lugar de recalcular la ventana completa en cada
+consulta. Lo leen StochasticSignalAnalyzer (y por tanto el integrador
+FVG-Estocástico), analisis_estocastico_m15 y DataManager.
+
+- ``compute_stochastic``: cálculo vectorizado en una pasada (numpy) para
+  DataFrames arbitrarios
+- ``StochasticState``: mínimo/máximo de la ventana con colas monótonas,
+  %D sobre las últimas ``d_period`` %K y %D suavizado (``d_smooth``) sobre
+  los últimos ``smooth_period`` %D; cada vela es O(1) amortizado
+- Cruces y zonas quedan resueltos al cerrar la vela: consultarlos es O(1)
+
+``refresh()`` solo pide al terminal las últimas 3 velas (o la ventana de
+calentamiento si hay hueco) y como mucho una vez cada ``min_interval``.
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import MetaTrader5 as mt5
+    MT5_AVAILABLE = True
+except ImportError:
+    mt5 = None
+    MT5_AVAILABLE = False
+
+
+TIMEFRAME_SECONDS = {
+    'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H4': 14400, 'D1': 86400
+}
+
+# %K cuando la ventana no tiene rango (máximo == mínimo)
+NEUTRAL_K = 50.0
+
+
+def compute_stochastic(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       k_period: int = 14, d_period: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcular %K y %D vectorizados en una sola pasada
+
+    Args:
+        high, low, close: Series de precios
+        k_period: Período de %K
+        d_period: Período de %D (media de %K)
+
+    Returns:
+        Tuple (k, d) con NaN durante el calentamiento
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    k = np.full(n, np.nan)
+    d = np.full(n, np.nan)
+    if n < k_period:
+        return k, d
+
+    windows = np.lib.stride_tricks.sliding_window_view
+    highest = windows(high, k_period).max(axis=1)
+    lowest = windows(low, k_period).min(axis=1)
+    price_range = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw_k = np.where(price_range > 0, 100.0 * (close[k_period - 1:] - lowest) / price_range, NEUTRAL_K)
+    k[k_period - 1:] = raw_k
+
+    if len(raw_k) >= d_period:
+        d[k_period + d_period - 2:] = windows(raw_k, d_period).mean(axis=1)
+    return k, d
+
+
+class StochasticState:
+    """
+    Estocástico incremental de un símbolo y timeframe
+
+    Args:
+        symbol: Símbolo
+        timeframe: Timeframe ('M15', 'H1'...)
+        k_period: Período de %K
+        d_period: Período de %D
+        smooth_period: Período de la media de %D (``d_smooth``)
+        oversold: Nivel de sobreventa por defecto
+        overbought: Nivel de sobrecompra por defecto
+        min_interval: Segundos mínimos entre consultas al terminal en refresh()
+    """
+
+    def __init__(self, symbol: str, timeframe: str = 'M15', k_period: int = 14, d_period: int = 3,
+                 oversold: float = 20.0, overbought: float = 80.0, min_interval: float = 5.0,
+                 smooth_period: int = 3):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.k_period = k_period
+        self.d_period = d_period
+        self.smooth_period = smooth_period
+        self.oversold = oversold
+        self.overbought = overbought
+        self.min_interval = min_interval
+        self.tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 900)
+        # Velas para reconstruir el estado completo (incluido el %K/%D anterior)
+        self.warmup_bars = k_period + d_period + smooth_period - 1
+        self._lock = threading.RLock()
+        self._last_refresh: Optional[float] = None
+        self.stats = {'bars': 0, 'refreshes': 0, 'fetches': 0, 'reloads': 0}
+        self.reset()
+
+    def reset(self):
+        """Vaciar el estado (se reconstruye con las siguientes velas)"""
+        with self._lock:
+            self._index = 0
+            self._max_q: deque = deque()  # (índice, high) decreciente
+            self._min_q: deque = deque()  # (índice, low) creciente
+            self._k_window: deque = deque(maxlen=self.d_period)
+            self._d_window: deque = deque(maxlen=self.smooth_period)
+            self.last_bar_time: Optional[int] = None
+            self.forming_bar_time: Optional[int] = None
+            self.k: Optional[float] = None
+            self.d: Optional[float] = None
+            self.prev_k: Optional[float] = None
+            self.prev_d: Optional[float] = None
+            self.d_smooth: Optional[float] = None
+            self.prev_d_smooth: Optional[float] = None
+            self.cross_up = False
+            self.cross_down = False
+            self.smooth_cross_up = False
+            self.smooth_cross_down = False
+
+    @property
+    def ready(self) -> bool:
+        """True cuando hay %K/%D actuales y anteriores"""
+        return self.prev_d is not None
+
+    # ========================================================================
+    # 🕯️ ACTUALIZACIÓN POR VELA CERRADA
+    # ========================================================================
+
+    def update(self, bar_time: int, high: float, low: float, close: float) -> bool:
+        """
+        Incorporar una vela cerrada
+
+        Las velas con tiempo igual o anterior a la última procesada se
+        ignoran, por lo que volver a pasar las mismas velas es inocuo.
+
+        Returns:
+            bool: True si la vela era nueva
+        """
+        bar_time = int(bar_time)
+        with self._lock:
+            if self.last_bar_time is not None and bar_time <= self.last_bar_time:
+                return False
+
+            i = self._index
+            self._index += 1
+            self.last_bar_time = bar_time
+            self.stats['bars'] += 1
+
+            while self._max_q and self._max_q[-1][1] <= high:
+                self._max_q.pop()
+            self._max_q.append((i, high))
+            while self._min_q and self._min_q[-1][1] >= low:
+                self._min_q.pop()
+            self._min_q.append((i, low))
+            window_start = i - self.k_period + 1
+            if self._max_q[0][0] < window_start:
+                self._max_q.popleft()
+            if self._min_q[0][0] < window_start:
+                self._min_q.popleft()
+
+            if window_start < 0:
+                return True
+
+            highest = self._max_q[0][1]
+            lowest = self._min_q[0][1]
+            k = 100.0 * (close - lowest) / (highest - lowest) if highest > lowest else NEUTRAL_K
+            self._k_window.append(k)
+
+            self.prev_k, self.prev_d, self.prev_d_smooth = self.k, self.d, self.d_smooth
+            self.k = k
+            self.d = (sum(self._k_window) / self.d_period
+                      if len(self._k_window) == self.d_period else None)
+            if self.d is not None:
+                self._d_window.append(self.d)
+            self.d_smooth = (sum(self._d_window) / self.smooth_period
+                             if len(self._d_window) == self.smooth_period else None)
+
+            if self.ready and self.d is not None:
+                self.cross_up = self.k > self.d and self.prev_k <= self.prev_d
+                self.cross_down = self.k < self.d and self.prev_k >= self.prev_d
+            if self.prev_d_smooth is not None:
+                self.smooth_cross_up = self.k > self.d_smooth and self.prev_k <= self.prev_d_smooth
+                self.smooth_cross_down = self.k < self.d_smooth and self.prev_k >= self.prev_d_smooth
+            return True
+
+    def apply_rates(self, rates: Any) -> int:
+        """
+        Incorporar velas cerradas desde un array de MT5 o un DataFrame
+
+        Args:
+            rates: Estructura con columnas time, high, low, close (solo
+                velas cerradas, de la más antigua a la más reciente)
+
+        Returns:
+            int: Velas nuevas incorporadas
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+        times = np.asarray(rates['time'])
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype('datetime64[s]').astype(np.int64)
+        highs = np.asarray(rates['high'], dtype=float)
+        lows = np.asarray(rates['low'], dtype=float)
+        closes = np.asarray(rates['close'], dtype=float)
+
+        added = 0
+        with self._lock:
+            for bar in zip(times.tolist(), highs.tolist(), lows.tolist(), closes.tolist()):
+                added += self.update(*bar)
+        return added
+
+    def refresh(self, loader: Optional[Callable[[int], Any]] = None, force: bool = False) -> bool:
+        """
+        Traer del terminal las velas cerradas nuevas
+
+        Pide las 3 últimas velas (la última está en formación). Si la más
+        antigua ya es posterior a la última procesada faltan velas y se
+        recarga la ventana de calentamiento completa.
+
+        Args:
+            loader: Callable(count) → rates de las últimas ``count`` velas
+                (por defecto ``mt5.copy_rates_from_pos``)
+            force: Ignorar ``min_interval``
+
+        Returns:
+            bool: True si se incorporó alguna vela nueva
+        """
+        loader = loader or self._mt5_loader
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.min_interval:
+                return False
+            self._last_refresh = now
+            self.stats['refreshes'] += 1
+
+            full_count = self.warmup_bars + 1
+            rates = self._fetch(loader, full_count if not self.ready else 3)
+            if rates is None or len(rates) < 2:
+                return False
+
+            if self.ready and int(rates['time'][0]) > self.last_bar_time:
+                rates = self._fetch(loader, full_count)
+                if rates is None or len(rates) < 2:
+                    return False
+                self.reset()
+                self.stats['reloads'] += 1
+
+            self.forming_bar_time = int(rates['time'][-1])
+            return self.apply_rates(rates[:-1]) > 0
+
+    def _fetch(self, loader: Callable[[int], Any], count: int) -> Any:
+        self.stats['fetches'] += 1
+        try:
+            return loader(count)
+        except Exception:
+            return None
+
+    def _mt5_loader(self, count: int) -> Any:
+        if not MT5_AVAILABLE:
+            return None
+        timeframe = getattr(mt5, f"TIMEFRAME_{self.timeframe}", mt5.TIMEFRAME_M15)
+        return mt5.copy_rates_from_pos(self.symbol, timeframe, 0, count)
+
+    # ========================================================================
+    # 🔎 CONSULTA O(1)
+    # ========================================================================
+
+    def is_oversold(self, level: Optional[float] = None, smoothed: bool = False) -> bool:
+        """%K y %D (o ``d_smooth`` si ``smoothed``) por debajo del nivel de sobreventa"""
+        level = self.oversold if level is None else level
+        d = self.d_smooth if smoothed else self.d
+        return d is not None and self.k < level and d < level
+
+    def is_overbought(self, level: Optional[float] = None, smoothed: bool = False) -> bool:
+        """%K y %D (o ``d_smooth`` si ``smoothed``) por encima del nivel de sobrecompra"""
+        level = self.overbought if level is None else level
+        d = self.d_smooth if smoothed else self.d
+        return d is not None and self.k > level and d > level
+
+    def snapshot(self, oversold: Optional[float] = None,
+                 overbought: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Valores actuales con las claves que usan los analizadores
+
+        Returns:
+            dict: k, d, k/d anteriores, cruces, zonas y tiempos de vela
+        """
+        with self._lock:
+            return {
+                'k': self.k,
+                'd': self.d,
+                'k_anterior': self.prev_k,
+                'd_anterior': self.prev_d,
+                'd_smooth': self.d_smooth,
+                'cruce_k_d': self.cross_up,
+                'cruce_d_k': self.cross_down,
+                'sobreventa': self.is_oversold(oversold),
+                'sobrecompra': self.is_overbought(overbought),
+                'last_bar_time': self.last_bar_time,
+                'forming_bar_time': self.forming_bar_time
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats.update({'symbol': self.symbol, 'timeframe': self.timeframe, 'ready': self.ready})
+        return stats
+
+
+# Estados compartidos por todos los componentes del proceso
+_shared_states: Dict[Tuple[str, str, int, int, int], StochasticState] = {}
+_shared_lock = threading.Lock()
+
+
+def get_stochastic_state(symbol: str, timeframe: str = 'M15', k_period: int = 14,
+                         d_period: int = 3, smooth_period: int = 3, **options) -> StochasticState:
+    """
+    Obtener el StochasticState compartido de (símbolo, timeframe, períodos)
+
+    Args:
+        symbol: Símbolo
+        timeframe: Timeframe
+        k_period: Período de %K
+        d_period: Período de %D
+        smooth_period: Período de la media de %D
+        **options: Argumentos de StochasticState (solo se usan en la primera llamada)
+
+    Returns:
+        StochasticState: Instancia compartida
+    """
+    key = (symbol, timeframe, k_period, d_period, smooth_period)
+    with _shared_lock:
+        state = _shared_states.get(key)
+        if state is None:
+            state = _shared_states[key] = StochasticState(
+                symbol, timeframe, k_period=k_period, d_period=d_period,
+                smooth_period=smooth_period, **options
+            )
+        return state
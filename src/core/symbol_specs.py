@@ -0,0 +1,301 @@
+"""
+SymbolSpecCache - Especificaciones de símbolos precalculadas
+============================================================
+
+Cache compartido de metadatos de símbolos (dígitos, point, tick value,
+lotaje mínimo/máximo/step, stops level) cargado al arrancar y refrescado
+periódicamente, para que construir una orden no requiera consultar el
+terminal.
+
+Cada ``SymbolSpec`` precalcula lo necesario para normalizar órdenes:
+- ``round_price``: ajuste al tick y a los dígitos del símbolo
+- ``snap_volume``: ajuste al step de lotaje dentro de [min, max]
+- ``pip_size`` / ``pip_value``: tamaño y valor monetario del pip
+
+Sin terminal disponible se usan especificaciones por defecto equivalentes
+a los valores fijos que usaba el sistema (5 dígitos, $10/pip por lote).
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import MetaTrader5 as mt5
+    MT5_AVAILABLE = True
+except ImportError:
+    mt5 = None
+    MT5_AVAILABLE = False
+
+
+def _info_field(info: Any, name: str, default: Any = None) -> Any:
+    """Leer un campo de ``symbol_info`` (namedtuple) o de su _asdict()"""
+    if isinstance(info, dict):
+        return info.get(name, default)
+    return getattr(info, name, default)
+
+
+def _decimals(step: float) -> int:
+    """Decimales necesarios para representar un step (0.01 → 2)"""
+    if step <= 0:
+        return 2
+    return max(0, -int(math.floor(math.log10(step) + 1e-9)))
+
+
+@dataclass
+class SymbolSpec:
+    """Especificación de un símbolo con reglas de normalización precalculadas"""
+    symbol: str
+    digits: int = 5
+    point: float = 0.00001
+    tick_size: float = 0.00001
+    tick_value: float = 1.0
+    contract_size: float = 100000.0
+    volume_min: float = 0.01
+    volume_max: float = 100.0
+    volume_step: float = 0.01
+    stops_level: int = 0
+    freeze_level: int = 0
+    is_fallback: bool = False
+    loaded_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.tick_size = self.tick_size or self.point
+        # Pip = 10 points en cotizaciones de 3/5 dígitos, 1 point en el resto
+        self.pip_size = self.point * 10 if self.digits in (3, 5) else self.point
+        self.pip_value_per_lot = (self.tick_value * self.pip_size / self.tick_size) if self.tick_size else 0.0
+        self.volume_decimals = _decimals(self.volume_step)
+        self.min_stop_distance = self.stops_level * self.point
+
+    @classmethod
+    def from_symbol_info(cls, info: Any) -> 'SymbolSpec':
+        """Construir desde ``mt5.symbol_info()`` o su diccionario"""
+        return cls(
+            symbol=_info_field(info, 'name'),
+            digits=int(_info_field(info, 'digits', 5)),
+            point=float(_info_field(info, 'point', 0.00001)),
+            tick_size=float(_info_field(info, 'trade_tick_size', 0.0) or 0.0),
+            tick_value=float(_info_field(info, 'trade_tick_value', 1.0) or 1.0),
+            contract_size=float(_info_field(info, 'trade_contract_size', 100000.0) or 100000.0),
+            volume_min=float(_info_field(info, 'volume_min', 0.01) or 0.01),
+            volume_max=float(_info_field(info, 'volume_max', 100.0) or 100.0),
+            volume_step=float(_info_field(info, 'volume_step', 0.01) or 0.01),
+            stops_level=int(_info_field(info, 'trade_stops_level', 0) or 0),
+            freeze_level=int(_info_field(info, 'trade_freeze_level', 0) or 0)
+        )
+
+    @classmethod
+    def fallback(cls, symbol: str) -> 'SymbolSpec':
+        """Especificación por defecto cuando el terminal no está disponible"""
+        if 'JPY' in symbol.upper():
+            return cls(symbol=symbol, digits=3, point=0.001, tick_size=0.001,
+                       tick_value=0.67, is_fallback=True)
+        # EURUSD y similares: 5 dígitos, $1 por tick → $10 por pip y lote
+        return cls(symbol=symbol, is_fallback=True)
+
+    def round_price(self, price: float) -> float:
+        """Ajustar un precio al tick y a los dígitos del símbolo"""
+        if self.tick_size:
+            price = round(price / self.tick_size) * self.tick_size
+        return round(price, self.digits)
+
+    def snap_volume(self, volume: float) -> float:
+        """Ajustar un volumen al step de lotaje dentro de [min, max]"""
+        steps = math.floor(volume / self.volume_step + 1e-9)
+        snapped = max(self.volume_min, min(self.volume_max, steps * self.volume_step))
+        return round(snapped, self.volume_decimals)
+
+    def pip_value(self, lots: float = 1.0) -> float:
+        """Valor monetario de un pip para el lotaje dado"""
+        return self.pip_value_per_lot * lots
+
+    def pips_to_price(self, pips: float) -> float:
+        return pips * self.pip_size
+
+    def price_to_pips(self, distance: float) -> float:
+        return distance / self.pip_size if self.pip_size else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'symbol': self.symbol,
+            'digits': self.digits,
+            'point': self.point,
+            'tick_size': self.tick_size,
+            'tick_value': self.tick_value,
+            'contract_size': self.contract_size,
+            'volume_min': self.volume_min,
+            'volume_max': self.volume_max,
+            'volume_step': self.volume_step,
+            'stops_level': self.stops_level,
+            'pip_size': self.pip_size,
+            'pip_value_per_lot': self.pip_value_per_lot,
+            'is_fallback': self.is_fallback,
+            'loaded_at': self.loaded_at
+        }
+
+
+class SymbolSpecCache:
+    """
+    Cache compartido de especificaciones de símbolos
+
+    Args:
+        loader: Callable(symbol) → symbol_info (por defecto ``mt5.symbol_info``)
+        refresh_interval: Segundos entre refrescos programados
+        fallback_retry: Segundos hasta el primer reintento de una especificación
+            de respaldo; se duplica en cada fallo hasta ``refresh_interval``
+    """
+
+    def __init__(self, loader: Optional[Callable[[str], Any]] = None,
+                 refresh_interval: float = 3600.0, fallback_retry: float = 5.0):
+        self.loader = loader or (mt5.symbol_info if MT5_AVAILABLE else None)
+        self.refresh_interval = refresh_interval
+        self.fallback_retry = fallback_retry
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._retry_at: Dict[str, float] = {}      # símbolo → próximo reintento
+        self._retry_delay: Dict[str, float] = {}   # símbolo → espera actual
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'fallbacks': 0, 'retries': 0, 'refreshes': 0}
+
+    # ========================================================================
+    # 📥 CARGA
+    # ========================================================================
+
+    def load(self, symbols: Iterable[str]) -> Dict[str, SymbolSpec]:
+        """Cargar (o recargar) las especificaciones de varios símbolos"""
+        return {symbol: self._load_one(symbol) for symbol in symbols}
+
+    def update_from_info(self, info: Any) -> Optional[SymbolSpec]:
+        """Actualizar desde un symbol_info ya obtenido por otro componente"""
+        if info is None or not _info_field(info, 'name'):
+            return None
+        spec = SymbolSpec.from_symbol_info(info)
+        with self._lock:
+            self._specs[spec.symbol] = spec
+        return spec
+
+    def _load_one(self, symbol: str) -> SymbolSpec:
+        info = None
+        if self.loader:
+            try:
+                info = self.loader(symbol)
+            except Exception:
+                info = None
+
+        with self._lock:
+            if info is not None:
+                spec = SymbolSpec.from_symbol_info(info)
+                spec.symbol = symbol
+                self.stats['loads'] += 1
+                self._retry_at.pop(symbol, None)
+                self._retry_delay.pop(symbol, None)
+            else:
+                spec = SymbolSpec.fallback(symbol)
+                self.stats['fallbacks'] += 1
+                # Backoff exponencial: el terminal puede no estar listo todavía
+                delay = self._retry_delay.get(symbol)
+                delay = self.fallback_retry if delay is None else min(delay * 2, self.refresh_interval)
+                self._retry_delay[symbol] = delay
+                self._retry_at[symbol] = time.time() + delay
+            self._specs[symbol] = spec
+        return spec
+
+    # ========================================================================
+    # 🔎 CONSULTA
+    # ========================================================================
+
+    def get(self, symbol: str) -> SymbolSpec:
+        """
+        Especificación del símbolo (sin ida y vuelta al terminal si está cacheada)
+
+        Un símbolo no cacheado se carga una vez; si el terminal no responde se
+        devuelve la especificación por defecto y se reintenta en consultas
+        posteriores con backoff exponencial (y en cada refresco programado).
+        """
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            if spec.is_fallback and time.time() >= self._retry_at.get(symbol, 0.0):
+                self.stats['retries'] += 1
+                return self._load_one(symbol)
+            self.stats['hits'] += 1
+            return spec
+        self.stats['misses'] += 1
+        return self._load_one(symbol)
+
+    def symbols(self) -> List[str]:
+        return list(self._specs)
+
+    # ========================================================================
+    # 🔄 REFRESCO PROGRAMADO
+    # ========================================================================
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Recargar especificaciones caducadas (o de respaldo)
+
+        Returns:
+            int: Número de símbolos recargados
+        """
+        now = time.time()
+        stale = [s for s, spec in list(self._specs.items())
+                 if force or spec.is_fallback or now - spec.loaded_at >= self.refresh_interval]
+        self.load(stale)
+        if stale:
+            self.stats['refreshes'] += 1
+        return len(stale)
+
+    def start_auto_refresh(self):
+        """Iniciar el hilo de refresco periódico"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name="SymbolSpecRefresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self):
+        self._stop_event.set()
+        if self._refresh_thread:
+            self._refresh_thread.join(timeout=5)
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                pass  # El siguiente ciclo reintenta
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['cached_symbols'] = len(self._specs)
+        stats['fallback_symbols'] = sorted(s for s, spec in self._specs.items() if spec.is_fallback)
+        return stats
+
+
+# Instancia compartida por todos los componentes del proceso
+_shared_cache: Optional[SymbolSpecCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_symbol_spec_cache(**options) -> SymbolSpecCache:
+    """
+    Obtener el SymbolSpecCache compartido del proceso
+
+    Args:
+        **options: Argumentos de SymbolSpecCache (solo se usan en la primera llamada)
+
+    Returns:
+        SymbolSpecCache: Instancia compartida
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SymbolSpecCache(**options)
+        return _shared_cache
@@ -0,0 +1,481 @@
+"""
+TickMicrostructure - Métricas de microestructura sobre el flujo de ticks
+========================================================================
+
+Métricas por símbolo calculadas a partir de los ticks bid/ask que ya
+recoge MT5Streamer (o de ficheros de ticks grabados, para pruebas):
+
+- Percentiles del spread: histograma de spreads en points sobre la
+  ventana de ticks; la entrada y la salida de un tick son O(1) y un
+  percentil es una suma acumulada de tamaño fijo
+- Tasa de ticks: ticks por segundo en la ventana temporal reciente,
+  contada con sus propios tiempos (no depende de la capacidad del ring)
+- Desequilibrio de cotizaciones: (subidas - bajadas) de bid y ask sobre
+  el total de actualizaciones de la ventana, en [-1, 1]
+- Volatilidad realizada: raíz de la suma de retornos² del mid
+
+Cada símbolo guarda sus ticks en ring buffers de capacidad fija y
+mantiene las sumas de la ventana de forma incremental (con recálculo
+periódico para acotar el error de coma flotante).
+
+Autor: Trading Grid System
+Fecha: 2025-08-13
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.core.symbol_specs import get_symbol_spec_cache
+except ImportError:
+    from symbol_specs import get_symbol_spec_cache
+
+DEFAULT_PERCENTILES = (50, 90, 95)
+TICK_COLUMNS = ('symbol', 'time', 'bid', 'ask', 'volume')
+
+
+def _default_point(symbol: str) -> float:
+    return get_symbol_spec_cache().get(symbol).point
+
+
+class MicrostructureState:
+    """
+    Ring buffers y sumas de ventana de un símbolo
+
+    Args:
+        symbol: Símbolo
+        point: Tamaño del point (unidad del histograma de spreads)
+        capacity: Ticks de la ventana (spread, desequilibrio, volatilidad)
+        rate_window: Segundos de la ventana de tasa de ticks; se cuenta con
+            una cola de tiempos aparte, así que puede contener más ticks que
+            ``capacity``
+        spread_bins: Spreads distintos (en points) del histograma; los
+            mayores se acumulan en el último bin
+        resync_every: Ticks entre recálculos completos de las sumas
+    """
+
+    def __init__(self, symbol: str, point: float, capacity: int = 1000,
+                 rate_window: float = 60.0, spread_bins: int = 1000, resync_every: int = 10000):
+        self.symbol = symbol
+        self.point = point
+        self.capacity = capacity
+        self.rate_window = rate_window
+        self.spread_bins = spread_bins
+        self.resync_every = resync_every
+
+        self._times = np.zeros(capacity)
+        self._bids = np.zeros(capacity)
+        self._asks = np.zeros(capacity)
+        self._volumes = np.zeros(capacity)
+        self._spread_bins = np.zeros(capacity, dtype=np.int64)
+        self._returns = np.zeros(capacity)
+        self._signs = np.zeros(capacity, dtype=np.int64)
+
+        self._histogram = np.zeros(spread_bins + 1, dtype=np.int64)
+        self._sq_sum = 0.0
+        self._abs_sum = 0.0
+        self._sign_sum = 0
+        self._updates_sum = 0
+        self._volume_sum = 0.0
+
+        self.total = 0         # Ticks aceptados desde el inicio
+        self.count = 0         # Ticks en la ventana
+        self._rate_times: deque = deque()  # Tiempos de los ticks dentro de rate_window
+        self.last_bid = 0.0
+        self.last_ask = 0.0
+        self.last_time = 0.0
+
+    # ========================================================================
+    # ⚡ ACTUALIZACIÓN O(1)
+    # ========================================================================
+
+    def update(self, bid: float, ask: float, volume: float = 0.0, timestamp: Optional[float] = None) -> bool:
+        """
+        Incorporar un tick
+
+        Args:
+            bid: Precio bid
+            ask: Precio ask
+            volume: Volumen del tick
+            timestamp: Epoch en segundos (por defecto ahora)
+
+        Returns:
+            bool: False si el tick es inválido o repite la última cotización
+        """
+        bid, ask, volume = float(bid), float(ask), float(volume or 0.0)
+        if not (bid > 0 and ask >= bid):
+            return False
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        if self.total and bid == self.last_bid and ask == self.last_ask and timestamp <= self.last_time:
+            return False  # Mismo tick leído dos veces por el sondeo
+
+        spread_bin = min(int(round((ask - bid) / self.point)), self.spread_bins)
+        if self.total:
+            ret = math.log((bid + ask) / (self.last_bid + self.last_ask))
+            sign = (bid > self.last_bid) - (bid < self.last_bid) + (ask > self.last_ask) - (ask < self.last_ask)
+        else:
+            ret, sign = 0.0, 0
+
+        i = self.total % self.capacity
+        if self.count == self.capacity:
+            self._evict(i)
+        else:
+            self.count += 1
+
+        self._times[i] = timestamp
+        self._bids[i] = bid
+        self._asks[i] = ask
+        self._volumes[i] = volume
+        self._spread_bins[i] = spread_bin
+        self._returns[i] = ret
+        self._signs[i] = sign
+
+        self._histogram[spread_bin] += 1
+        self._sq_sum += ret * ret
+        self._abs_sum += abs(ret)
+        self._sign_sum += sign
+        self._updates_sum += abs(sign)
+        self._volume_sum += volume
+
+        self.total += 1
+        self.last_bid, self.last_ask, self.last_time = bid, ask, timestamp
+        self._rate_times.append(timestamp)
+        self._advance_rate_tail(timestamp)
+        if self.total % self.resync_every == 0:
+            self.resync()
+        return True
+
+    def _evict(self, i: int):
+        self._histogram[self._spread_bins[i]] -= 1
+        ret = self._returns[i]
+        self._sq_sum -= ret * ret
+        self._abs_sum -= abs(ret)
+        self._sign_sum -= int(self._signs[i])
+        self._updates_sum -= abs(int(self._signs[i]))
+        self._volume_sum -= self._volumes[i]
+
+    def _advance_rate_tail(self, now: float):
+        """Descartar los tiempos que salen de la ventana temporal (amortizado O(1))"""
+        cutoff = now - self.rate_window
+        while self._rate_times and self._rate_times[0] < cutoff:
+            self._rate_times.popleft()
+
+    def resync(self):
+        """Recalcular las sumas de la ventana desde los buffers"""
+        idx = self._window_index()
+        returns = self._returns[idx]
+        signs = self._signs[idx]
+        self._histogram = np.bincount(self._spread_bins[idx], minlength=self.spread_bins + 1)
+        self._sq_sum = float(np.dot(returns, returns))
+        self._abs_sum = float(np.abs(returns).sum())
+        self._sign_sum = int(signs.sum())
+        self._updates_sum = int(np.abs(signs).sum())
+        self._volume_sum = float(self._volumes[idx].sum())
+
+    def _window_index(self) -> np.ndarray:
+        """Posiciones de la ventana en orden cronológico"""
+        return (np.arange(self.total - self.count, self.total)) % self.capacity
+
+    # ========================================================================
+    # 📊 MÉTRICAS
+    # ========================================================================
+
+    @property
+    def spread(self) -> float:
+        return self.last_ask - self.last_bid
+
+    @property
+    def mid(self) -> float:
+        return (self.last_bid + self.last_ask) / 2
+
+    def spread_points(self, spread: float) -> int:
+        """Bin del histograma (points enteros) de un spread en precio"""
+        return min(int(round(spread / self.point)), self.spread_bins)
+
+    def spread_percentile_points(self, q: float) -> int:
+        """Percentil q (0-100) del spread de la ventana, en points enteros"""
+        target = max(1, math.ceil(q / 100 * self.count))
+        return int(np.searchsorted(np.cumsum(self._histogram), target))
+
+    def spread_percentile(self, q: float) -> float:
+        """Percentil q (0-100) del spread de la ventana, en precio"""
+        if self.count == 0:
+            return float('nan')
+        return self.spread_percentile_points(q) * self.point
+
+    def spread_rank(self, spread: Optional[float] = None) -> float:
+        """Percentil (0-100) que ocupa un spread en la ventana (por defecto el actual)"""
+        if self.count == 0:
+            return float('nan')
+        spread = self.spread if spread is None else spread
+        points = self.spread_points(spread)
+        below = int(self._histogram[:points].sum())
+        return 100.0 * (below + 0.5 * int(self._histogram[points])) / self.count
+
+    def tick_rate(self, now: Optional[float] = None) -> float:
+        """Ticks por segundo en la ventana temporal (por defecto hasta el último tick)"""
+        if now is not None and now > self.last_time:
+            self._advance_rate_tail(now)
+        return len(self._rate_times) / self.rate_window
+
+    def imbalance(self) -> float:
+        """Desequilibrio de actualizaciones de cotización en [-1, 1]"""
+        return self._sign_sum / self._updates_sum if self._updates_sum else 0.0
+
+    def realized_volatility(self) -> float:
+        """Volatilidad realizada del mid sobre la ventana (retornos logarítmicos)"""
+        return math.sqrt(max(self._sq_sum, 0.0))
+
+    def price_impact(self) -> float:
+        """Movimiento medio absoluto del mid por tick (retorno logarítmico)"""
+        returns = self.count if self.total > self.count else self.count - 1  # El primer tick no tiene retorno
+        return self._abs_sum / returns if returns > 0 else 0.0
+
+    def snapshot(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        """Todas las métricas del símbolo"""
+        snapshot = {
+            'symbol': self.symbol,
+            'bid': self.last_bid,
+            'ask': self.last_ask,
+            'spread': self.spread,
+            'spread_rank': self.spread_rank(),
+            'tick_rate': self.tick_rate(),
+            'imbalance': self.imbalance(),
+            'realized_volatility': self.realized_volatility(),
+            'price_impact': self.price_impact(),
+            'volume': self._volume_sum,
+            'ticks': self.count,
+            'last_time': self.last_time
+        }
+        for q in percentiles:
+            snapshot[f'spread_p{q:g}'] = self.spread_percentile(q)
+        return snapshot
+
+    def to_frame(self) -> pd.DataFrame:
+        """Ticks de la ventana en orden cronológico (formato de ``load_tick_file``)"""
+        idx = self._window_index()
+        return pd.DataFrame({
+            'symbol': self.symbol,
+            'time': self._times[idx],
+            'bid': self._bids[idx],
+            'ask': self._asks[idx],
+            'volume': self._volumes[idx]
+        }, columns=list(TICK_COLUMNS))
+
+
+def load_tick_file(path: Union[str, Path], symbol: Optional[str] = None) -> pd.DataFrame:
+    """
+    Leer un fichero de ticks grabado
+
+    Acepta CSV/Parquet con columnas ``time`` (epoch o fecha), ``bid``,
+    ``ask`` y opcionalmente ``volume`` / ``symbol``, y la exportación de
+    ticks de MT5 (``<DATE> <TIME> <BID> <ASK> <LAST> <VOLUME>``, tabulada),
+    donde un lado vacío repite la última cotización.
+
+    Args:
+        path: Ruta del fichero
+        symbol: Símbolo para ficheros sin columna ``symbol``
+
+    Returns:
+        pd.DataFrame: Columnas symbol, time (epoch s), bid, ask, volume
+    """
+    path = Path(path)
+    if path.suffix == '.parquet':
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path, sep=None, engine='python')
+
+    if '<BID>' in frame.columns:
+        stamps = pd.to_datetime(frame['<DATE>'].astype(str) + ' ' + frame['<TIME>'].astype(str))
+        frame = pd.DataFrame({
+            'time': stamps,
+            'bid': frame['<BID>'].ffill(),
+            'ask': frame['<ASK>'].ffill(),
+            'volume': frame.get('<VOLUME>', 0.0)
+        }).dropna(subset=['bid', 'ask'])
+
+    times = frame['time']
+    if not np.issubdtype(times.dtype, np.number):
+        times = pd.to_datetime(times).to_numpy(dtype='datetime64[ms]').astype(np.int64) / 1000.0
+    result = pd.DataFrame({
+        'symbol': frame['symbol'] if 'symbol' in frame else (symbol or 'UNKNOWN'),
+        'time': np.asarray(times, dtype=float),
+        'bid': frame['bid'].to_numpy(dtype=float),
+        'ask': frame['ask'].to_numpy(dtype=float),
+        'volume': frame['volume'].to_numpy(dtype=float) if 'volume' in frame else 0.0
+    }, columns=list(TICK_COLUMNS))
+    return result.fillna({'volume': 0.0})
+
+
+class TickMicrostructure:
+    """
+    Microestructura de todos los símbolos del flujo de ticks
+
+    Args:
+        capacity: Ticks de la ventana por símbolo
+        rate_window: Segundos de la ventana de tasa de ticks
+        spread_bins: Bins (points) del histograma de spreads
+        point_fn: Callable symbol → point (por defecto SymbolSpecCache)
+    """
+
+    def __init__(self, capacity: int = 1000, rate_window: float = 60.0, spread_bins: int = 1000,
+                 point_fn: Optional[Callable[[str], float]] = None):
+        self.capacity = capacity
+        self.rate_window = rate_window
+        self.spread_bins = spread_bins
+        self.point_fn = point_fn or _default_point
+        self._states: Dict[str, MicrostructureState] = {}
+        self._lock = threading.Lock()
+        self.stats = {'ticks': 0, 'duplicates': 0, 'replayed': 0}
+
+    def state(self, symbol: str) -> MicrostructureState:
+        """Estado del símbolo (se crea en el primer tick)"""
+        state = self._states.get(symbol)
+        if state is None:
+            with self._lock:
+                state = self._states.get(symbol)
+                if state is None:
+                    state = self._states[symbol] = MicrostructureState(
+                        symbol, self.point_fn(symbol), self.capacity, self.rate_window, self.spread_bins
+                    )
+        return state
+
+    # ========================================================================
+    # 🔄 ALIMENTACIÓN
+    # ========================================================================
+
+    def update_tick(self, symbol: str, bid: float, ask: float, volume: float = 0.0,
+                    timestamp: Optional[float] = None) -> bool:
+        """Incorporar un tick de un símbolo (ver ``MicrostructureState.update``)"""
+        state = self.state(symbol)
+        with self._lock:
+            accepted = state.update(bid, ask, volume, timestamp)
+        self.stats['ticks' if accepted else 'duplicates'] += 1
+        return accepted
+
+    def on_market_data(self, data: Dict[str, Any]):
+        """
+        Callback para ``MT5Streamer.subscribe``
+
+        Args:
+            data: {symbol: {bid, ask, volume, time}} (otras claves se ignoran)
+        """
+        for symbol, tick in data.items():
+            if isinstance(tick, dict) and 'bid' in tick:
+                self.update_tick(symbol, tick['bid'], tick['ask'], tick.get('volume', 0.0), tick.get('time'))
+
+    def replay(self, source: Union[str, Path, pd.DataFrame], symbol: Optional[str] = None,
+               callback: Optional[Callable[[MicrostructureState], None]] = None) -> int:
+        """
+        Reproducir ticks grabados
+
+        Args:
+            source: Fichero (``load_tick_file``) o DataFrame con columnas symbol, time, bid, ask, volume
+            symbol: Símbolo para fuentes sin columna ``symbol``
+            callback: Llamado con el estado del símbolo tras cada tick aceptado
+
+        Returns:
+            int: Ticks aceptados
+        """
+        ticks = source if isinstance(source, pd.DataFrame) else load_tick_file(source, symbol)
+        if 'symbol' not in ticks:
+            ticks = ticks.assign(symbol=symbol or 'UNKNOWN')
+        if 'volume' not in ticks:
+            ticks = ticks.assign(volume=0.0)
+        accepted = 0
+        for row in ticks[list(TICK_COLUMNS)].itertuples(index=False):
+            if self.update_tick(row.symbol, row.bid, row.ask, row.volume, row.time):
+                accepted += 1
+                if callback is not None:
+                    callback(self._states[row.symbol])
+        self.stats['replayed'] += accepted
+        return accepted
+
+    def export(self, path: Union[str, Path], symbols: Optional[Iterable[str]] = None) -> int:
+        """Grabar los ticks de la ventana en CSV (reproducible con ``replay``)"""
+        symbols = list(symbols) if symbols is not None else list(self._states)
+        with self._lock:
+            frames = [self._states[s].to_frame() for s in symbols if s in self._states]
+        ticks = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(TICK_COLUMNS))
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        ticks.to_csv(path, index=False)
+        return len(ticks)
+
+    # ========================================================================
+    # 📊 LECTURAS
+    # ========================================================================
+
+    def symbols(self) -> List[str]:
+        return list(self._states)
+
+    def snapshot(self, symbol: str) -> Optional[Dict[str, Any]]:
+        state = self._states.get(symbol)
+        if state is None or state.count == 0:
+            return None
+        with self._lock:
+            return state.snapshot()
+
+    def snapshots(self) -> Dict[str, Dict[str, Any]]:
+        return {s: snap for s in list(self._states) if (snap := self.snapshot(s)) is not None}
+
+    def spread_check(self, symbol: str, spread: float, max_percentile: float = 95.0,
+                     min_ticks: int = 100) -> Dict[str, Any]:
+        """
+        Comprobar si un spread es anómalo respecto a la ventana del símbolo
+
+        Args:
+            symbol: Símbolo
+            spread: Spread a evaluar (precio)
+            max_percentile: Percentil de la ventana por encima del cual se rechaza
+            min_ticks: Ticks mínimos en la ventana para decidir
+
+        Returns:
+            dict: allowed, rank (percentil del spread) y threshold (spread del
+            percentil máximo); sin historial suficiente siempre permite. La
+            comparación se hace en points enteros, igual que el histograma,
+            para que el ruido de coma flotante de ``ask - bid`` no rechace
+            spreads situados justo en el percentil
+        """
+        state = self._states.get(symbol)
+        if state is None or state.count < min_ticks:
+            return {'allowed': True, 'rank': None, 'threshold': None}
+        with self._lock:
+            threshold_points = state.spread_percentile_points(max_percentile)
+            rank = state.spread_rank(spread)
+        return {'allowed': state.spread_points(spread) <= threshold_points, 'rank': rank,
+                'threshold': threshold_points * state.point}
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats.copy()
+        stats['symbols'] = len(self._states)
+        stats['capacity'] = self.capacity
+        return stats
+
+
+# Instancia compartida por el streamer, el analizador y el ejecutor de órdenes
+_shared_microstructure: Optional[TickMicrostructure] = None
+_shared_lock = threading.Lock()
+
+
+def get_tick_microstructure(**options) -> TickMicrostructure:
+    """
+    Obtener el TickMicrostructure compartido del proceso
+
+    Args:
+        **options: Argumentos de TickMicrostructure (solo se usan en la primera llamada)
+
+    Returns:
+        TickMicrostructure: Instancia compartida
+    """
+    global _shared_microstructure
+    with _shared_lock:
+        if _shared_microstructure is None:
+            _shared_microstructure = TickMicrostructure(**options)
+        return _shared_microstructure
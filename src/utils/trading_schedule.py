@@ -1,8 +1,17 @@
-from datetime import datetime, time
+import sys
+from pathlib import Path
+from datetime import time
 import json
 import os
 from typing import List
 
+# Configurar rutas para imports
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root.absolute()))
+sys.path.insert(0, str((project_root / "src" / "core").absolute()))
+
+from src.core.session_calendar import SessionWindow, get_session_calendar
+
 # Configuración centralizada - directa desde los valores definidos
 user_dir = os.path.expanduser("~")
 safe_data_dir = os.path.join(user_dir, "Documents", "GRID SCALP")
@@ -16,28 +25,18 @@ SESIONES_TRADING = {
     'LONDRES_NY': {'inicio': time(7, 0), 'fin': time(11, 0), 'dias': [0, 1, 2, 3, 4]}
 }
 
-def esta_en_horario_operacion(sesiones_seleccionadas: List[str]) -> bool:
-    ahora = datetime.now().replace(tzinfo=None)
-    hora_actual = ahora.time()
-    dia_actual = ahora.weekday()
-
-    for sesion in sesiones_seleccionadas:
-        if sesion not in SESIONES_TRADING:
-            continue
-        config = SESIONES_TRADING[sesion]
-        inicio = config['inicio']
-        fin = config['fin']
+# Horario Ecuador (UTC-5), el mismo que muestra solicitar_horario_operacion
+ZONA_SESIONES = 'America/Guayaquil'
 
-        if fin < inicio:
-            if (hora_actual >= inicio or hora_actual <= fin) and dia_actual in config['dias']:
-                return True
-            if hora_actual <= fin and (dia_actual - 1) % 7 in config['dias']:
-                return True
-        else:
-            if inicio <= hora_actual <= fin and dia_actual in config['dias']:
-                return True
+# Calendario con los límites de sesión precalculados
+calendario_sesiones = get_session_calendar([
+    SessionWindow(nombre, config['inicio'], config['fin'], tz=ZONA_SESIONES, days=tuple(config['dias']))
+    for nombre, config in SESIONES_TRADING.items()
+], naive_tz=ZONA_SESIONES)
 
-    return False
+def esta_en_horario_operacion(sesiones_seleccionadas: List[str]) -> bool:
+    # Una sesión nocturna pertenece al día en que abre (según 'dias')
+    return calendario_sesiones.is_active(sesiones_seleccionadas)
 
 def mostrar_horario_operacion(sesiones_seleccionadas: List[str]) -> str:
     return f"Sesiones activas: {', '.join(sesiones_seleccionadas) if sesiones_seleccionadas else 'NINGUNA'}"